@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the resident AI decision service.
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.decision_service import AIDecisionService, LookupCache
+from src.AI.position_sizer import AdaptivePositionSizer
+
+
+class TestLookupCache(unittest.TestCase):
+    """TTL expiry and invalidation of cached lookups."""
+
+    def test_invalidation_discards_in_flight_loads(self):
+        cache = LookupCache({'account': 60.0})
+        found, _, generation = cache.get('account', 1)
+        self.assertFalse(found)
+
+        # A write lands while the value is being loaded
+        cache.invalidate('account')
+        cache.put('account', 1, 'stale', generation)
+        self.assertFalse(cache.get('account', 1)[0])
+
+        _, _, generation = cache.get('account', 1)
+        cache.put('account', 1, 'fresh', generation)
+        self.assertEqual(cache.get('account', 1)[:2], (True, 'fresh'))
+
+    def test_entries_expire(self):
+        cache = LookupCache({'regime': 0.0})
+        _, _, generation = cache.get('regime', 'EURUSD')
+        cache.put('regime', 'EURUSD', {'regime_id': 1}, generation)
+        self.assertFalse(cache.get('regime', 'EURUSD')[0])
+
+
+class TestAIDecisionService(unittest.TestCase):
+    """Signal enhancement from resident components."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        db = sqlite3.connect(self.db_path)
+        db.execute('CREATE TABLE positions (id INTEGER PRIMARY KEY AUTOINCREMENT, account_id INTEGER, '
+                   'symbol TEXT, direction TEXT, size REAL, entry_price REAL, profit_loss REAL, '
+                   'timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, exit_timestamp DATETIME)')
+        db.commit()
+        db.close()
+
+        self.service = AIDecisionService(db_path=self.db_path, workers=4)
+        db = sqlite3.connect(self.db_path)
+        db.execute("INSERT INTO volatility_regimes (symbol, timestamp, regime_id, description, volatility_level) "
+                   "VALUES ('EURUSD', '2026-01-01 00:00:00', 2, 'Regime 2', 'HIGH')")
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        self.service.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _signal(self, **extra):
+        signal = {'ticker': 'EURUSD', 'order_action': 'BUY', 'position_size': 2.0,
+                  'price': 1.10, 'stop_loss': 1.09}
+        signal.update(extra)
+        return signal
+
+    def test_matches_sequential_components(self):
+        self.service.update_account_balance(1, 10000.0, 10000.0)
+        data = self.service.enhance(self._signal())
+
+        sizer = AdaptivePositionSizer(db_path=self.db_path)
+        expected = sizer.calculate_position_size('EURUSD', 1, 2.0, price=1.10, stop_loss=1.09)
+        self.assertTrue(data['ai_enhanced'])
+        self.assertEqual(data['volatility_level'], 'HIGH')
+        self.assertEqual(data['position_size'], expected['adjusted_size'])
+        self.assertLess(data['stop_loss'], 1.09)
+        self.assertEqual(set(data['ai_metadata']['timings_ms']), {'lookups', 'sizing', 'risk', 'stop_loss', 'total'})
+
+    def test_lookups_are_cached_until_a_write(self):
+        self.service.enhance(self._signal())
+        misses = self.service.cache.stats['misses']
+        self.service.enhance(self._signal())
+        self.assertEqual(self.service.cache.stats['misses'], misses)
+
+        # Drawdown beyond the threshold must be seen by the next signal
+        db = sqlite3.connect(self.db_path)
+        db.execute("INSERT INTO account_balances (timestamp, account_id, balance, equity, peak_balance) "
+                   "VALUES ('2026-01-01 00:00:00', 1, 10000, 10000, 10000)")
+        db.commit()
+        db.close()
+        self.service.update_account_balance(1, 7000.0, 7000.0)
+        result = self.service.enhance(self._signal())
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['code'], 'RISK_MANAGEMENT_REJECTION')
+
+    def test_risk_evaluation_is_saved_in_background(self):
+        self.service.enhance(self._signal())
+        self.service.stop()
+
+        db = sqlite3.connect(self.db_path)
+        count = db.execute('SELECT COUNT(*) FROM risk_metrics').fetchone()[0]
+        db.close()
+        self.assertEqual(count, 1)
+
+    def test_metrics_report_stage_timings(self):
+        self.service.enhance(self._signal())
+        stages = self.service.metrics()['stages']
+        for stage in ('lookups', 'sizing', 'risk', 'total', 'lookup.regime', 'lookup.correlation'):
+            self.assertEqual(stages[stage]['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
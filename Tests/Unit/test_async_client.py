@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio Capital.com client, against a local stub server.
+"""
+
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+import unittest
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.Exchanges.capital_com_api.async_client import AsyncClient
+from src.Exchanges.capital_com_api.exceptions import ValidationError
+from src.Exchanges.capital_com_api.rate_limiter import RateLimiter
+from src.Exchanges.capital_com_api.session_manager import SessionManager
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Minimal Capital.com API: session, prices, markets, positions."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _track(self):
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+
+    def _untrack(self):
+        with self.server.lock:
+            self.server.in_flight -= 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = urlparse(self.path).path
+        if path == '/api/v1/session':
+            with self.server.lock:
+                self.server.logins += 1
+                self.server.token = f'cst-{self.server.logins}'
+            return self._send(200, {}, {'CST': self.server.token, 'X-SECURITY-TOKEN': 'token'})
+        if self.headers.get('CST') != self.server.token:
+            return self._send(401, {'errorCode': 'error.invalid.session.token'})
+        self.server.orders.append((path, json.loads(body)))
+        self._send(200, {'dealReference': f'ref-{len(self.server.orders)}'})
+
+    def do_GET(self):
+        self._track()
+        try:
+            time.sleep(0.05)
+            url = urlparse(self.path)
+            parts = url.path.split('/')
+            if self.headers.get('CST') != self.server.token:
+                return self._send(401, {'errorCode': 'error.invalid.session.token'})
+            if parts[3] == 'prices':
+                if parts[4] == 'UNKNOWN':
+                    return self._send(404, {'errorCode': 'error.not-found.epic'})
+                query = parse_qs(url.query)
+                return self._send(200, {'prices': [], 'epic': parts[4], 'resolution': query['resolution'][0]})
+            if parts[3] == 'positions':
+                return self._send(200, {'position': {'dealId': parts[4], 'direction': 'BUY', 'size': 2}})
+            self._send(404, {'errorCode': 'error.not-found'})
+        finally:
+            self._untrack()
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAsyncClient(unittest.TestCase):
+    """Test cases for AsyncClient"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.logins = 0
+        self.server.token = None
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.orders = []
+        self.manager = SessionManager(self.url, api_key='key', username='user', password='secret')
+        self.manager.rate_limiter = RateLimiter({}, account_limit=None)
+
+    def tearDown(self):
+        self.manager._release_session_slot()
+
+    def _run(self, coro_fn, **kwargs):
+        async def main():
+            async with AsyncClient(self.manager, **kwargs) as client:
+                return client, await coro_fn(client)
+        return asyncio.run(main())
+
+    def test_bounded_fan_out(self):
+        """Many epics are fetched concurrently, never more than max_concurrency at once"""
+        epics = [f'EPIC{k}' for k in range(12)]
+        started = time.monotonic()
+        client, results = self._run(lambda c: c.prices_many(epics, resolution='HOUR', max=5), max_concurrency=4)
+        elapsed = time.monotonic() - started
+        self.assertEqual(list(results), epics)
+        self.assertEqual(results['EPIC3']['epic'], 'EPIC3')
+        self.assertEqual(results['EPIC3']['resolution'], 'HOUR')
+        self.assertEqual(self.server.max_in_flight, 4)
+        self.assertLess(elapsed, 12 * 0.05)
+        self.assertEqual(self.server.logins, 1)
+
+    def test_request_interval(self):
+        """Request starts wait for the rate limiter"""
+        limiter = RateLimiter({'market_data': (25.0, 1.0)}, account_limit=None)
+        started = time.monotonic()
+        self._run(lambda c: c.single_market_details_many(['A', 'B', 'C', 'D']), max_concurrency=4,
+                  rate_limiter=limiter)
+        self.assertGreaterEqual(time.monotonic() - started, 3 * 0.04)
+        self.assertEqual(limiter.metrics()['market_data']['delayed'], 3)
+
+    def test_errors_are_returned_per_key(self):
+        """A failing epic does not fail the batch"""
+        _, results = self._run(lambda c: c.prices_many(['BTCUSD', 'UNKNOWN']))
+        self.assertEqual(results['BTCUSD']['epic'], 'BTCUSD')
+        self.assertIsInstance(results['UNKNOWN'], ValidationError)
+        self.assertEqual(results['UNKNOWN'].status_code, 404)
+
+    def test_reauthenticates_after_401(self):
+        """Revoked tokens are replaced once and the requests retried"""
+        self.manager.create_session()
+        self.server.token = 'revoked'
+        client, results = self._run(lambda c: c.position_details_many(['D1', 'D2', 'D3']))
+        self.assertEqual(results['D2']['position']['dealId'], 'D2')
+        self.assertEqual(self.server.logins, 2)
+
+    def test_create_and_close_position(self):
+        """Orders are posted with the PositionManager payloads"""
+        async def trade(client):
+            opened = await client.create_position('BTCUSD', 'BUY', 1.5, stopLevel=90, profitLevel=110)
+            closed = await client.close_position('D9')
+            return opened, closed
+
+        _, (opened, closed) = self._run(trade)
+        self.assertEqual(opened, {'dealReference': 'ref-1'})
+        self.assertEqual(closed, {'dealReference': 'ref-2'})
+        self.assertEqual(self.server.orders[0], ('/api/v1/positions', {
+            'epic': 'BTCUSD', 'direction': 'BUY', 'size': '1.5', 'orderType': 'MARKET',
+            'timeInForce': 'FILL_OR_KILL', 'stopLevel': '90', 'profitLevel': '110'
+        }))
+        self.assertEqual(self.server.orders[1], ('/api/v1/positions/otc', {
+            'dealId': 'D9', 'direction': 'SELL', 'size': '2', 'orderType': 'MARKET'
+        }))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite backtest result cache.
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import logging
+from functools import partial
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI import backtest_cache
+from src.AI.backtest_cache import (
+    BacktestCache,
+    data_fingerprint,
+    evaluate_with_cache,
+    strategy_identity
+)
+from src.AI.performance_monitor import PerformanceMonitor
+
+CALLS = []
+
+
+def counting_batch(df, param_chunk):
+    """Batch evaluator that records which parameter sets it ran."""
+    CALLS.extend(p['x'] for p in param_chunk)
+    return [{'value': p['x'] * len(df)} for p in param_chunk]
+
+
+def counting_strategy(data, scale=1.0):
+    """Strategy returning (trades, equity_curve) and recording each call."""
+    CALLS.append(scale)
+    equity = pd.Series(100 + scale * np.arange(len(data), dtype=float), index=data.index)
+    trades = pd.DataFrame({'pnl': [scale, -1.0]})
+    return trades, equity
+
+
+class TestBacktestCache(unittest.TestCase):
+    """Test cases for BacktestCache"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = BacktestCache(os.path.join(self.tmp_dir, 'cache.db'))
+        self.df = pd.DataFrame({'close': np.linspace(100, 110, 50)},
+                               index=pd.date_range('2024-01-01', periods=50, freq='h'))
+        CALLS.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key(self):
+        """Keys depend on data, strategy and params, not on scalar types or key order"""
+        fp = data_fingerprint(self.df)
+        key = BacktestCache.make_key(fp, counting_strategy, {'a': 1, 'b': 2.5})
+
+        self.assertEqual(key, BacktestCache.make_key(fp, counting_strategy, {'b': np.float64(2.5), 'a': np.int64(1)}))
+        self.assertNotEqual(key, BacktestCache.make_key(fp, counting_strategy, {'a': 2, 'b': 2.5}))
+        self.assertNotEqual(key, BacktestCache.make_key(fp, counting_batch, {'a': 1, 'b': 2.5}))
+
+        changed = self.df.copy()
+        changed.iloc[-1, 0] += 0.01
+        self.assertNotEqual(fp, data_fingerprint(changed))
+        self.assertEqual(fp, data_fingerprint(self.df.copy()))
+
+    def test_partial_identity(self):
+        """Bound callables are identified by name and code, not by address"""
+        self.assertEqual(strategy_identity(partial(counting_batch, counting_strategy)),
+                         strategy_identity(partial(counting_batch, counting_strategy)))
+        self.assertNotIn(' at 0x', strategy_identity(partial(counting_batch, counting_strategy)))
+
+    def test_identity_covers_defaults_closures_and_module(self):
+        """Captured settings, defaults and helper edits change the identity"""
+        def make_strategy(threshold):
+            def strategy(data):
+                return data['close'] > threshold
+            return strategy
+
+        self.assertEqual(strategy_identity(make_strategy(1.0)), strategy_identity(make_strategy(1.0)))
+        self.assertNotEqual(strategy_identity(make_strategy(1.0)), strategy_identity(make_strategy(2.0)))
+
+        def with_default(data, scale=1.0):
+            return data * scale
+        before = strategy_identity(with_default)
+        with_default.__defaults__ = (2.0,)
+        self.assertNotEqual(before, strategy_identity(with_default))
+
+        module_path = os.path.join(self.tmp_dir, 'cached_strategy_module.py')
+        with open(module_path, 'w') as f:
+            f.write("def helper():\n    return 1\n\n\ndef strategy(data):\n    return helper()\n")
+        sys.path.insert(0, self.tmp_dir)
+        self.addCleanup(sys.path.remove, self.tmp_dir)
+        self.addCleanup(sys.modules.pop, 'cached_strategy_module', None)
+        import cached_strategy_module
+
+        before = strategy_identity(cached_strategy_module.strategy)
+        with open(module_path, 'w') as f:
+            f.write("def helper():\n    return 22\n\n\ndef strategy(data):\n    return helper()\n")
+        self.assertNotEqual(before, strategy_identity(cached_strategy_module.strategy))
+
+    def test_identity_covers_helper_modules(self):
+        """Editing a project module the strategy imports from changes the identity"""
+        helper_path = os.path.join(self.tmp_dir, 'cached_helper_module.py')
+        with open(helper_path, 'w') as f:
+            f.write("def scale():\n    return 1\n")
+        with open(os.path.join(self.tmp_dir, 'cached_user_module.py'), 'w') as f:
+            f.write("from cached_helper_module import scale\n\n\ndef strategy(data):\n    return scale()\n")
+        sys.path.insert(0, self.tmp_dir)
+        self.addCleanup(sys.path.remove, self.tmp_dir)
+        for name in ('cached_helper_module', 'cached_user_module'):
+            self.addCleanup(sys.modules.pop, name, None)
+        import cached_user_module
+
+        with mock.patch.object(backtest_cache, '_SOURCE_ROOT', self.tmp_dir):
+            before = strategy_identity(cached_user_module.strategy)
+            self.assertEqual(before, strategy_identity(cached_user_module.strategy))
+            with open(helper_path, 'w') as f:
+                f.write("def scale():\n    return 22\n")
+            self.assertNotEqual(before, strategy_identity(cached_user_module.strategy))
+
+    def test_round_trip(self):
+        """Stored values come back and count as hits"""
+        self.cache.put('k', {'sharpe_ratio': 1.5})
+        self.assertEqual(self.cache.get('k'), {'sharpe_ratio': 1.5})
+        self.assertIsNone(self.cache.get('missing'))
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_age_eviction(self):
+        """Expired entries are neither returned nor kept"""
+        self.cache.put('old', 1)
+        self.cache.max_age_seconds = 0.01
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('old'))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_size_eviction(self):
+        """Least recently used entries go first when the cache is too large"""
+        payload = 'x' * 1000
+        for key in ('a', 'b', 'c'):
+            self.cache.put(key, payload)
+            time.sleep(0.01)
+        self.cache.get('a')
+        self.cache.max_size_bytes = 2500
+        self.cache.evict()
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), payload)
+        self.assertEqual(self.cache.get('c'), payload)
+
+    def test_evaluate_with_cache(self):
+        """Only parameter sets missing from the cache are evaluated"""
+        first = dict(evaluate_with_cache(self.df, counting_batch, [{'x': 1}, {'x': 2}], self.cache))
+        second = dict(evaluate_with_cache(self.df, counting_batch, [{'x': 2}, {'x': 3}], self.cache))
+
+        self.assertEqual(first, {0: {'value': 50}, 1: {'value': 100}})
+        self.assertEqual(second, {0: {'value': 100}, 1: {'value': 150}})
+        self.assertEqual(CALLS, [1, 2, 3])
+
+    def test_performance_monitor(self):
+        """run_backtest reuses cached results unless caching is turned off"""
+        env = {'BACKTEST_CACHE_PATH': self.cache.db_path, 'BACKTEST_CACHE_ENABLED': 'true'}
+        with mock.patch.dict(os.environ, env):
+            first = PerformanceMonitor(counting_strategy, self.df, {'scale': 2.0}).run_backtest()
+            second = PerformanceMonitor(counting_strategy, self.df, {'scale': 2.0}).run_backtest()
+            PerformanceMonitor(counting_strategy, self.df, {'scale': 2.0}, use_cache=False).run_backtest()
+
+        self.assertEqual(CALLS, [2.0, 2.0])
+        self.assertEqual(first.metrics, second.metrics)
+        pd.testing.assert_series_equal(first.equity_curve, second.equity_curve)
+
+        with mock.patch.dict(os.environ, {'BACKTEST_CACHE_ENABLED': 'false'}):
+            self.assertIsNone(backtest_cache.get_default_cache())
+
+
+if __name__ == '__main__':
+    unittest.main()
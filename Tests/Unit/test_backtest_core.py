@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the array-based backtest core.
+"""
+
+import sys
+import os
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI import backtest_core
+from src.AI.backtest_core import run_backtest_arrays, trades_to_frame
+from src.AI.fallback_optimizer import backtest_strategy, calculate_metrics, evaluate_parameter_batch
+
+
+class TestBacktestCore(unittest.TestCase):
+    """Test cases for run_backtest_arrays"""
+
+    def setUp(self):
+        """Long at bar 1, take profit at bar 2, short at bar 3, held to the end."""
+        self.close = np.array([100.0, 100.0, 103.0, 105.0, 104.0])
+        self.high = np.array([101.0, 101.0, 105.0, 106.0, 105.0])
+        self.low = np.array([99.0, 99.0, 102.0, 104.0, 103.0])
+        self.signal = np.array([0, 1, 0, -1, 0])
+
+    def _check(self):
+        trades, equity = run_backtest_arrays(self.high, self.low, self.close, self.signal,
+                                             stop_loss_pct=2.0, take_profit_pct=4.0)
+        frame = trades_to_frame(trades, pd.RangeIndex(len(self.close)))
+
+        self.assertEqual(list(frame['action']), ['BUY', 'TAKE_PROFIT_LONG', 'SELL', 'CLOSE_FINAL_SHORT'])
+        self.assertEqual(list(frame['timestamp']), [1, 2, 3, 4])
+        self.assertAlmostEqual(frame['pnl'].iloc[1], 4.0)
+        self.assertAlmostEqual(frame['pnl'].iloc[3], 1.0)
+        self.assertTrue(np.isnan(frame['pnl'].iloc[0]))
+        self.assertAlmostEqual(frame['stop_loss'].iloc[2], 105.0 * 1.02)
+
+        # The final close is recorded as a trade but not in the equity curve
+        np.testing.assert_allclose(equity, [100.0, 100.0, 104.0, 104.0, 104.0])
+
+    def test_backtest(self):
+        """Trades and equity for a small hand-checked scenario"""
+        self._check()
+
+    def test_backtest_without_numba(self):
+        """The pure-Python path gives the same result"""
+        numba_available = backtest_core.NUMBA_AVAILABLE
+        try:
+            backtest_core.NUMBA_AVAILABLE = False
+            self._check()
+        finally:
+            backtest_core.NUMBA_AVAILABLE = numba_available
+
+    def test_no_signals(self):
+        """No signals means no trades and a flat equity curve"""
+        trades, equity = run_backtest_arrays(self.high, self.low, self.close, np.zeros(5))
+        self.assertEqual(len(trades), 0)
+        self.assertTrue(trades_to_frame(trades, pd.RangeIndex(5)).empty)
+        np.testing.assert_allclose(equity, 100.0)
+
+
+class TestBatchEvaluation(unittest.TestCase):
+    """evaluate_parameter_batch must agree with backtest_strategy + calculate_metrics"""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        n = 1500
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        self.df = pd.DataFrame({
+            'open': close,
+            'high': close * (1 + np.abs(rng.normal(0, 0.004, n))),
+            'low': close * (1 - np.abs(rng.normal(0, 0.004, n))),
+            'close': close
+        }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+        self.param_sets = [
+            {'atr_period': 10, 'atr_multiplier': 2.0, 'stop_loss': 1.0, 'take_profit': 2.0},
+            {'atr_period': 10, 'atr_multiplier': 3.5, 'stop_loss': 3.0, 'take_profit': 6.0},
+            {'atr_period': 21, 'atr_multiplier': 2.5, 'stop_loss': 0.5, 'take_profit': 8.0},
+            {'atr_period': 0, 'atr_multiplier': 2.5},
+        ]
+
+    def _check(self):
+        batch = evaluate_parameter_batch(self.df, self.param_sets)
+        self.assertIsNone(batch[-1])
+        for params, metrics in zip(self.param_sets[:-1], batch[:-1]):
+            trades, equity_curve = backtest_strategy(self.df, params)
+            expected = calculate_metrics(equity_curve, trades)
+            self.assertEqual(list(metrics.keys()), list(expected.keys()))
+            for key, value in expected.items():
+                self.assertAlmostEqual(metrics[key], value, places=8, msg=key)
+
+    def test_batch_matches_single(self):
+        """Batched metrics equal per-candidate metrics"""
+        self._check()
+
+    def test_batch_without_numba(self):
+        """The vectorized NumPy lanes give the same metrics"""
+        numba_available = backtest_core.NUMBA_AVAILABLE
+        try:
+            backtest_core.NUMBA_AVAILABLE = False
+            self._check()
+        finally:
+            backtest_core.NUMBA_AVAILABLE = numba_available
+
+
+if __name__ == '__main__':
+    unittest.main()
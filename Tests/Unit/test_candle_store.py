@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar candle store.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI import candle_store
+from src.AI.candle_store import CandleStore
+
+
+class TestCandleStore(unittest.TestCase):
+    """Test cases for CandleStore"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = CandleStore(self.root)
+        n = 3000
+        self.df = pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=n, freq='min'),
+            'open': np.arange(n, dtype=float),
+            'high': np.arange(n, dtype=float) + 1,
+            'low': np.arange(n, dtype=float) - 1,
+            'close': np.arange(n, dtype=float) + 0.5,
+            'volume': np.ones(n)
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_append_and_read(self):
+        """Overlapping appends keep one candle per timestamp, growing past the initial capacity"""
+        self.assertEqual(self.store.append('BTCUSD', 'MINUTE', self.df.iloc[:1000]), 1000)
+        self.assertEqual(self.store.append('BTCUSD', 'MINUTE', self.df.iloc[500:2500]), 1500)
+        self.assertEqual(self.store.append('BTCUSD', 'MINUTE', self.df.iloc[2500:].iloc[::-1]), 500)
+
+        stored = self.store.read('BTCUSD', 'MINUTE')
+        pd.testing.assert_frame_equal(stored, self.df.astype({'timestamp': 'datetime64[ns]'}))
+        self.assertEqual(self.store.last_timestamp('BTCUSD', 'MINUTE'), self.df['timestamp'].iloc[-1])
+
+    def test_last_candle_is_replaced(self):
+        """A candle with the last stored timestamp updates it; older ones are ignored"""
+        self.store.append('BTCUSD', 'MINUTE', self.df.iloc[:100])
+        update = self.df.iloc[50:100].copy()
+        update['close'] = -1.0
+        self.assertEqual(self.store.append('BTCUSD', 'MINUTE', update), 0)
+
+        stored = self.store.read('BTCUSD', 'MINUTE')
+        self.assertEqual(stored['close'].iloc[99], -1.0)
+        self.assertEqual(stored['close'].iloc[98], self.df['close'].iloc[98])
+
+    def test_range_query(self):
+        """Range bounds are inclusive and views are read-only"""
+        self.store.append('BTCUSD', 'MINUTE', self.df)
+        arrays = self.store.arrays('BTCUSD', 'MINUTE', start='2024-01-01 01:00', end='2024-01-01 02:00')
+        self.assertEqual(len(arrays['close']), 61)
+        self.assertEqual(arrays['timestamp'][0], np.datetime64('2024-01-01T01:00'))
+        self.assertFalse(arrays['close'].flags.writeable)
+        self.assertEqual(len(self.store.read('BTCUSD', 'MINUTE', start='2030-01-01')), 0)
+
+    def test_missing_series(self):
+        """Unknown series read as empty"""
+        self.assertTrue(self.store.read('EURUSD', 'DAY').empty)
+        self.assertIsNone(self.store.last_timestamp('EURUSD', 'DAY'))
+
+    def test_default_store_can_be_disabled(self):
+        """CANDLE_STORE_ENABLED=false turns the shared store off"""
+        saved = os.environ.get('CANDLE_STORE_ENABLED')
+        os.environ['CANDLE_STORE_ENABLED'] = 'false'
+        try:
+            self.assertIsNone(candle_store.get_default_store())
+        finally:
+            if saved is None:
+                del os.environ['CANDLE_STORE_ENABLED']
+            else:
+                os.environ['CANDLE_STORE_ENABLED'] = saved
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm Capital.com client pool and session refresh.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.Exchanges.capital_com_api.client_pool import ClientPool
+from src.Exchanges.capital_com_api.market_data_manager import MarketDataManager
+from src.Exchanges.capital_com_api.rate_limiter import RateLimiter
+from src.Exchanges.capital_com_api.session_manager import SessionManager
+
+
+class StubSessionHandler(BaseHTTPRequestHandler):
+    """Issues numbered tokens on POST /api/v1/session."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.logins += 1
+            number = self.server.logins
+        self.server.connections.add(self.client_address)
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('CST', f'cst-{number}')
+        self.send_header('X-SECURITY-TOKEN', f'token-{number}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSessionManager:
+    def __init__(self):
+        self.is_authenticated = True
+        self.last_auth_time = time.time()
+        self.refreshes = 0
+
+    def refresh_session(self):
+        self.refreshes += 1
+        self.last_auth_time = time.time()
+        return {'success': True}
+
+
+class FakeRequestHandler:
+    def __init__(self):
+        self.requests = []
+
+    def make_request(self, method, url, data, headers):
+        self.requests.append((method, url, headers))
+        return {'instrument': {'epic': 'EURUSD'}}, {}
+
+
+class FakeClient:
+    def __init__(self, server, session):
+        self.server = server
+        self.session = session
+        self.session_manager = FakeSessionManager()
+
+    def _setup_auth_headers(self):
+        pass
+
+
+class TestClientPool(unittest.TestCase):
+    """Test cases for ClientPool"""
+
+    def setUp(self):
+        self.built = []
+
+        def factory(server, session):
+            time.sleep(0.01)
+            client = FakeClient(server, session)
+            self.built.append(client)
+            return client
+
+        self.pool = ClientPool(factory, lambda: 'https://demo.example.com/', check_interval=0.05)
+
+    def tearDown(self):
+        self.pool.stop()
+
+    def test_client_is_reused(self):
+        """Concurrent requests share one client built once"""
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(self.pool.get())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.built), 1)
+        self.assertTrue(all(c is self.built[0] for c in clients))
+        self.assertEqual(self.built[0].server, 'https://demo.example.com')
+
+    def test_servers_have_own_sessions(self):
+        """Each server gets its own client and keep-alive session"""
+        demo = self.pool.get()
+        live = self.pool.get('https://live.example.com')
+        self.assertIsNot(demo, live)
+        self.assertIsNot(demo.session, live.session)
+        self.assertIs(self.pool.get('https://live.example.com/'), live)
+
+    def test_unauthenticated_client_is_rebuilt(self):
+        """A client that lost its session is replaced, reusing the connection pool"""
+        first = self.pool.get()
+        first.session_manager.is_authenticated = False
+        second = self.pool.get()
+        self.assertIsNot(first, second)
+        self.assertIs(first.session, second.session)
+
+    def test_background_refresh(self):
+        """Old tokens are refreshed by the background thread"""
+        self.pool.refresh_after = 0.1
+        client = self.pool.warm()
+        client.session_manager.last_auth_time -= 1
+        deadline = time.time() + 2
+        while client.session_manager.refreshes == 0 and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertGreaterEqual(client.session_manager.refreshes, 1)
+
+        fresh = client.session_manager.refreshes
+        time.sleep(0.06)
+        self.assertEqual(client.session_manager.refreshes, fresh)
+
+
+class TestSessionRefresh(unittest.TestCase):
+    """SessionManager refresh against a stub server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubSessionHandler)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.logins = 0
+        self.server.connections = set()
+
+    def test_refresh_keeps_one_session_slot(self):
+        """Repeated refreshes neither leak session slots nor open new connections"""
+        manager = SessionManager(self.url, api_key='key', username='user', password='secret')
+        manager.rate_limiter = RateLimiter({}, account_limit=None)
+        before = SessionManager.active_sessions
+        for _ in range(SessionManager.MAX_SESSIONS + 2):
+            self.assertTrue(manager.refresh_session()['success'])
+        self.assertEqual(SessionManager.active_sessions, before + 1)
+        self.assertEqual(manager.CST, f'cst-{SessionManager.MAX_SESSIONS + 2}')
+        self.assertEqual(len(self.server.connections), 1)
+
+        manager.end_session()
+        self.assertEqual(SessionManager.active_sessions, before)
+
+
+class TestPooledMarketData(unittest.TestCase):
+    """Market data calls on a pooled client keep its session"""
+
+    def test_market_details_leave_session_authenticated(self):
+        manager = SessionManager('https://demo.example.com', api_key='key', username='user', password='secret',
+                                 auth_tokens={'CST': 'cst-1', 'X-SECURITY-TOKEN': 'token-1'})
+        manager.end_session = lambda: self.fail("pooled session was ended")
+        handler = FakeRequestHandler()
+        market_data = MarketDataManager(manager, handler)
+
+        self.assertEqual(market_data.single_market_details('EURUSD')['instrument']['epic'], 'EURUSD')
+        market_data.market_details('EURUSD')
+        self.assertTrue(manager.is_authenticated)
+        self.assertEqual(manager.CST, 'cst-1')
+        self.assertEqual(handler.requests[0][2], {'CST': 'cst-1', 'X-SECURITY-TOKEN': 'token-1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests for the rolling correlation engine and correlation change detection.
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.candle_store import CandleStore
+from src.AI.correlation_engine import RollingCorrelationEngine
+from src.AI.data_collector import MarketDataCollector
+from src.AI.risk_manager import RiskManager
+
+SYMBOLS = ['USDJPY', 'EURUSD', 'GOLD', 'GBPUSD']
+
+
+def random_prices(bars, seed=0):
+    """Correlated random-walk prices, one row per bar."""
+    rng = np.random.default_rng(seed)
+    mix = np.eye(len(SYMBOLS)) + rng.normal(scale=0.5, size=(len(SYMBOLS), len(SYMBOLS)))
+    returns = rng.normal(scale=0.01, size=(bars, len(SYMBOLS))) @ mix
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+
+class TestRollingCorrelationEngine(unittest.TestCase):
+    """Online correlations match a full recomputation."""
+
+    def test_matches_corrcoef_over_each_window(self):
+        prices = random_prices(200)
+        engine = RollingCorrelationEngine(SYMBOLS, windows={'correlation_30d': 30, 'correlation_90d': 90})
+        for row in prices:
+            engine.update(dict(zip(SYMBOLS, row)))
+
+        order = [SYMBOLS.index(s) for s in engine.symbols]
+        returns = np.diff(np.log(prices[:, order]), axis=0)
+        for column, length in engine.windows.items():
+            expected = np.corrcoef(returns[-length:].T)
+            np.testing.assert_allclose(engine.correlations(column), expected, atol=1e-10)
+
+    def test_correlations_are_unknown_until_the_window_fills(self):
+        engine = RollingCorrelationEngine(SYMBOLS, windows={'correlation_30d': 5})
+        for row in random_prices(5):
+            engine.update(dict(zip(SYMBOLS, row)))
+        self.assertTrue(np.isnan(engine.correlations()[0, 1]))
+
+        engine.update(dict(zip(SYMBOLS, random_prices(1, seed=1)[0])))
+        self.assertFalse(np.isnan(engine.correlations()[0, 1]))
+
+
+class TestCorrelationPublishing(unittest.TestCase):
+    """Changed pairs are written to market_correlations and detected as changes."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        self.risk_manager = RiskManager(db_path=self.db_path)
+        self.risk_manager.correlations.refresh_interval = 0
+        self.engine = RollingCorrelationEngine(SYMBOLS, db_path=self.db_path,
+                                               windows={'correlation_30d': 10, 'correlation_90d': 20})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _rows(self):
+        db = sqlite3.connect(self.db_path)
+        rows = db.execute('SELECT symbol1, symbol2, correlation_30d, correlation_90d, correlation_7d '
+                          'FROM market_correlations ORDER BY symbol1, symbol2').fetchall()
+        db.close()
+        return rows
+
+    def test_only_changed_pairs_are_written(self):
+        self.risk_manager.update_market_correlation('EURUSD', 'GBPUSD', 0.0, 0.0, 0.55)
+        prices = random_prices(25)
+        prices[:, SYMBOLS.index('GOLD')] = 1800.0
+
+        # GOLD is flat, so its correlations are unknown and not written
+        written = self.engine.load_history(dict(zip(SYMBOLS, row)) for row in prices)
+        self.assertEqual(written, 3)
+        self.assertEqual(self.engine.publish(), 0)
+
+        rows = self._rows()
+        self.assertEqual([row[:2] for row in rows],
+                         [('EURUSD', 'GBPUSD'), ('EURUSD', 'USDJPY'), ('GBPUSD', 'USDJPY')])
+        self.assertAlmostEqual(rows[0][2], self.engine.correlations()[0, 1])
+        self.assertEqual(rows[0][4], 0.55)
+
+    def test_changes_are_detected_from_the_table(self):
+        self.assertEqual(self.risk_manager.detect_correlation_changes(threshold=0.2), [])
+        self.engine.load_history(dict(zip(SYMBOLS, row)) for row in random_prices(25))
+        self.assertEqual(self.risk_manager.detect_correlation_changes(threshold=0.2), [])
+        before = self.risk_manager.correlations.get('EURUSD', 'GOLD')
+
+        # GOLD starts tracking EURUSD one for one
+        prices = dict(zip(SYMBOLS, random_prices(25)[-1]))
+        prices['GOLD'] = prices['EURUSD'] * 20
+        self.engine.update(prices)
+        for step in range(10):
+            prices = dict(prices, EURUSD=prices['EURUSD'] * (1.01 if step % 2 else 0.985))
+            prices['GOLD'] = prices['EURUSD'] * 20
+            self.engine.update(prices)
+
+        changes = self.risk_manager.detect_correlation_changes(threshold=0.2)
+        eurusd_gold = [c for c in changes if (c['symbol1'], c['symbol2']) == ('EURUSD', 'GOLD')][0]
+        self.assertAlmostEqual(eurusd_gold['previous_correlation'], before)
+        self.assertAlmostEqual(eurusd_gold['current_correlation'], 1.0)
+        self.assertAlmostEqual(eurusd_gold['change'], 1.0 - before)
+
+        # Reported changes become the new baseline
+        self.assertEqual(self.risk_manager.detect_correlation_changes(threshold=0.2), [])
+        self.assertEqual(self.engine.detect_correlation_changes(threshold=0.2), [])
+
+
+class TestCollectorCorrelations(unittest.TestCase):
+    """The data collector publishes correlations of the candles it stores."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        self.store = CandleStore(os.path.join(self.tmp_dir, 'candles'))
+        self.prices = random_prices(31)
+        self.dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=31, freq='D')
+        for i, symbol in enumerate(SYMBOLS):
+            self._store(symbol, slice(0, 30), i)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _store(self, symbol, rows, i):
+        close = self.prices[rows, i]
+        self.store.append(symbol, 'DAY', pd.DataFrame({
+            'timestamp': self.dates[rows], 'open': close, 'high': close, 'low': close, 'close': close,
+            'volume': 0.0
+        }))
+
+    def test_stored_closes_are_published_once(self):
+        engine = RollingCorrelationEngine(SYMBOLS, db_path=self.db_path, windows={'correlation_30d': 10})
+        collector = MarketDataCollector(symbols=SYMBOLS, db_path=self.db_path, candle_store=self.store,
+                                        correlation_engine=engine)
+
+        self.assertEqual(collector._update_correlations(), 6)
+        self.assertEqual(engine.stats['bars'], 29)
+        self.assertEqual(collector._update_correlations(), 0)
+        self.assertEqual(engine.stats['bars'], 29)
+
+        for i, symbol in enumerate(SYMBOLS):
+            self._store(symbol, slice(30, 31), i)
+        collector._update_correlations()
+        self.assertEqual(engine.stats['bars'], 30)
+
+        order = [SYMBOLS.index(s) for s in engine.symbols]
+        returns = np.diff(np.log(self.prices[:, order]), axis=0)
+        np.testing.assert_allclose(engine.correlations(), np.corrcoef(returns[-10:].T), atol=1e-10)
+        db = sqlite3.connect(self.db_path)
+        self.assertEqual(db.execute('SELECT COUNT(*) FROM market_correlations').fetchone(), (6,))
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory correlation matrix used by the risk manager.
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import logging
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.correlation_matrix import CorrelationMatrix
+from src.AI.risk_manager import RiskManager
+
+
+class TestCorrelationMatrix(unittest.TestCase):
+    """Symmetric storage, growth and vectorized exposure."""
+
+    def test_pairs_are_symmetric_and_matrix_grows(self):
+        matrix = CorrelationMatrix(capacity=2)
+        matrix.set('EURUSD', 'GBPUSD', 0.8)
+        matrix.set('EURUSD', 'USDJPY', -0.6)
+        matrix.set('GOLD', 'SILVER', 0.9)
+
+        self.assertEqual(len(matrix), 5)
+        self.assertEqual(matrix.get('GBPUSD', 'EURUSD'), 0.8)
+        self.assertEqual(matrix.get('USDJPY', 'EURUSD'), -0.6)
+        self.assertIsNone(matrix.get('EURUSD', 'GOLD'))
+        self.assertIsNone(matrix.get('EURUSD', 'BTCUSD'))
+
+    def test_exposure_is_weighted_by_correlation_and_size(self):
+        matrix = CorrelationMatrix()
+        matrix.set('EURUSD', 'GBPUSD', 0.8)
+        matrix.set('EURUSD', 'USDJPY', -0.9)
+        matrix.set('EURUSD', 'GOLD', 0.3)
+
+        exposure, mask, correlations = matrix.correlated_exposure(
+            'EURUSD', ['GBPUSD', 'USDJPY', 'GOLD', 'EURUSD', 'BTCUSD'], [2.0, -1.0, 5.0, 3.0, 1.0], 0.7
+        )
+        self.assertAlmostEqual(exposure, 0.8 * 2.0 + 0.9 * 1.0)
+        self.assertEqual(mask.tolist(), [True, True, False, False, False])
+        self.assertTrue(np.isnan(correlations[4]))
+
+
+class TestRiskManagerCorrelations(unittest.TestCase):
+    """get_position_correlations reads the matrix, kept current on writes."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        db = sqlite3.connect(self.db_path)
+        db.execute('CREATE TABLE positions (id INTEGER PRIMARY KEY AUTOINCREMENT, account_id INTEGER, '
+                   'symbol TEXT, direction TEXT, size REAL, exit_timestamp DATETIME)')
+        db.executemany('INSERT INTO positions (account_id, symbol, direction, size) VALUES (1, ?, ?, ?)',
+                       [('GBPUSD', 'BUY', 4.0), ('USDJPY', 'SELL', 3.0), ('GOLD', 'BUY', 1.0)])
+        db.commit()
+        db.close()
+        self.risk_manager = RiskManager(db_path=self.db_path)
+        self.risk_manager.correlations.refresh_interval = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_exposure_from_stored_correlations(self):
+        self.risk_manager.update_market_correlation('GBPUSD', 'EURUSD', 0.9, 0.8, 0.7)
+        self.risk_manager.update_market_correlation('EURUSD', 'USDJPY', -0.9, -0.75, -0.7)
+
+        result = self.risk_manager.get_position_correlations('EURUSD', 1)
+        self.assertEqual(result['status'], 'HIGH')
+        self.assertAlmostEqual(result['correlation_risk'], 0.8 * 4.0 + 0.75 * 3.0)
+        self.assertEqual([p['symbol'] for p in result['correlated_positions']], ['GBPUSD', 'USDJPY'])
+
+    def test_rows_written_elsewhere_are_picked_up(self):
+        self.assertEqual(self.risk_manager.get_position_correlations('EURUSD', 1)['correlation_risk'], 0)
+
+        db = sqlite3.connect(self.db_path)
+        db.execute("INSERT INTO market_correlations (timestamp, symbol1, symbol2, correlation_30d) "
+                   "VALUES ('2999-01-01 00:00:00', 'EURUSD', 'GOLD', 0.95)")
+        db.commit()
+        db.close()
+
+        result = self.risk_manager.get_position_correlations('EURUSD', 1)
+        self.assertAlmostEqual(result['correlation_risk'], 0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
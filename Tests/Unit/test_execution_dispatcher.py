@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-symbol sharded execution dispatcher.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.Webhook.execution_dispatcher import ExecutionDispatcher, BacklogFullError
+
+
+class TestExecutionDispatcher(unittest.TestCase):
+    """Ordering, parallelism and backpressure of execution lanes."""
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.dispatcher = None
+
+    def tearDown(self):
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+
+    def _execute(self, symbol, n, delay=0.0):
+        time.sleep(delay)
+        with self.lock:
+            self.calls.append((symbol, n))
+        return {'dealReference': f'{symbol}-{n}'}
+
+    def test_lane_is_stable_per_symbol(self):
+        self.dispatcher = ExecutionDispatcher(self._execute, lanes=8)
+        self.assertEqual(self.dispatcher.lane_for('EURUSD'), self.dispatcher.lane_for('eurusd'))
+        lanes = {self.dispatcher.lane_for(f'SYM{i}') for i in range(100)}
+        self.assertGreater(len(lanes), 4)
+
+    def test_same_symbol_keeps_order(self):
+        self.dispatcher = ExecutionDispatcher(self._execute, lanes=4)
+        futures = [self.dispatcher.submit('EURUSD', 'EURUSD', n, delay=0.002) for n in range(20)]
+        results = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual([c for c in self.calls if c[0] == 'EURUSD'], [('EURUSD', n) for n in range(20)])
+        self.assertEqual(results[3], {'dealReference': 'EURUSD-3'})
+
+    def test_symbols_on_different_lanes_run_in_parallel(self):
+        self.dispatcher = ExecutionDispatcher(self._execute, lanes=8)
+        symbols = []
+        seen_lanes = set()
+        i = 0
+        while len(symbols) < 8:
+            symbol = f'SYM{i}'
+            lane = self.dispatcher.lane_for(symbol)
+            if lane not in seen_lanes:
+                seen_lanes.add(lane)
+                symbols.append(symbol)
+            i += 1
+
+        start = time.monotonic()
+        futures = [self.dispatcher.submit(s, s, 0, delay=0.1) for s in symbols]
+        for f in futures:
+            f.result(timeout=5)
+        # Eight 0.1s executions on eight lanes take about one execution
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_exceptions_propagate_to_the_future(self):
+        def failing(symbol):
+            raise ValueError(f"bad {symbol}")
+        self.dispatcher = ExecutionDispatcher(failing, lanes=2)
+        future = self.dispatcher.submit('BTCUSD', 'BTCUSD')
+        with self.assertRaises(ValueError):
+            future.result(timeout=5)
+        self.assertEqual(sum(m['failed'] for m in self.dispatcher.metrics()), 1)
+
+    def test_full_backlog_pushes_back(self):
+        release = threading.Event()
+        self.dispatcher = ExecutionDispatcher(lambda: release.wait(5), lanes=1, max_backlog=2,
+                                              submit_timeout=0.05)
+        self.dispatcher.submit('BTCUSD')
+        time.sleep(0.05)  # the first call is now running, not queued
+        self.dispatcher.submit('BTCUSD')
+        self.dispatcher.submit('BTCUSD')
+        with self.assertRaises(BacklogFullError):
+            self.dispatcher.submit('BTCUSD')
+        release.set()
+
+        metrics = self.dispatcher.metrics()[0]
+        self.assertEqual(metrics['rejected'], 1)
+        self.assertEqual(metrics['max_depth'], 2)
+
+    def test_metrics_record_queue_wait(self):
+        self.dispatcher = ExecutionDispatcher(self._execute, lanes=1)
+        futures = [self.dispatcher.submit('EURUSD', 'EURUSD', n, delay=0.02) for n in range(3)]
+        for f in futures:
+            f.result(timeout=5)
+
+        metrics = self.dispatcher.metrics()[0]
+        self.assertEqual(metrics['completed'], 3)
+        self.assertEqual(metrics['depth'], 0)
+        self.assertGreater(metrics['max_wait'], 0.03)
+        self.assertGreater(metrics['mean_run'], 0.015)
+
+
+if __name__ == '__main__':
+    unittest.main()
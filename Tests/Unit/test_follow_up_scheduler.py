@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for the background trailing-stop follow-up scheduler.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.Exchanges.capital_com_api.follow_up_scheduler import FollowUpScheduler, TrailingStopVerification
+from src.Exchanges.capital_com_api.position_manager import PositionManager
+
+
+class FakePositionManager:
+    """Serves a mutable positions listing and records calls."""
+
+    def __init__(self, positions=None):
+        self.positions = positions or []
+        self.listings = 0
+        self.updates = []
+        self.lock = threading.Lock()
+        self.fail_listings = 0
+        self.confirmations = {}
+
+    def add(self, deal_id, reference, epic='BTCUSD', direction='BUY', trailing=False, created='2026-01-01T00:00:00'):
+        with self.lock:
+            self.positions.append({
+                'position': {'dealId': deal_id, 'dealReference': reference, 'direction': direction,
+                             'trailingStop': trailing, 'createdDate': created},
+                'market': {'epic': epic}
+            })
+
+    def all_positions(self):
+        with self.lock:
+            self.listings += 1
+            if self.fail_listings:
+                self.fail_listings -= 1
+                raise ConnectionError("listing failed")
+            return {'positions': [dict(p) for p in self.positions]}
+
+    def deal_confirmation(self, deal_reference):
+        return self.confirmations.get(deal_reference, {})
+
+    def update_position(self, deal_id, **kwargs):
+        with self.lock:
+            self.updates.append((deal_id, kwargs))
+            for entry in self.positions:
+                if entry['position']['dealId'] == deal_id and kwargs.get('trailingStop'):
+                    entry['position']['trailingStop'] = True
+        return {'dealReference': 'o_update'}
+
+
+class TestFollowUpScheduler(unittest.TestCase):
+    """Batching, matching and retries of trailing-stop verifications."""
+
+    def setUp(self):
+        self.manager = FakePositionManager()
+        self.outcomes = {}
+        self.scheduler = FollowUpScheduler(self.manager, delay=0.05, backoff=2.0, max_attempts=4)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def _verification(self, reference, **kwargs):
+        def done(outcome, deal_id):
+            self.outcomes[reference] = (outcome, deal_id)
+        return TrailingStopVerification('BTCUSD', 'BUY', deal_reference=reference, on_done=done, **kwargs)
+
+    def _wait_for(self, count, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        while len(self.outcomes) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_due_verifications_share_one_listing(self):
+        for i in range(5):
+            self.manager.add(f'deal-{i}', f'p_ref{i}', trailing=True)
+        self.scheduler.run_batch([self._verification(f'o_ref{i}') for i in range(5)])
+
+        self.assertEqual(self.manager.listings, 1)
+        self.assertEqual(self.outcomes, {f'o_ref{i}': ('verified', f'deal-{i}') for i in range(5)})
+
+    def test_matches_by_reference_not_newest_position(self):
+        self.manager.add('old', 'p_first', trailing=True, created='2026-01-01T00:00:00')
+        self.manager.add('new', 'p_second', trailing=True, created='2026-01-02T00:00:00')
+        self.scheduler.run_batch([self._verification('o_first')])
+
+        self.assertEqual(self.outcomes['o_first'], ('verified', 'old'))
+
+    def test_schedule_returns_without_waiting(self):
+        self.manager.add('deal-1', 'p_ref1', trailing=True)
+        start = time.monotonic()
+        self.scheduler.schedule(self._verification('o_ref1'))
+        self.assertLess(time.monotonic() - start, 0.05)
+
+        self._wait_for(1)
+        self.assertEqual(self.outcomes['o_ref1'], ('verified', 'deal-1'))
+
+    def test_retries_until_position_is_listed(self):
+        self.scheduler.schedule(self._verification('o_late'))
+        time.sleep(0.1)
+        self.assertNotIn('o_late', self.outcomes)
+        self.manager.add('deal-late', 'p_late', trailing=True)
+
+        self._wait_for(1)
+        self.assertEqual(self.outcomes['o_late'], ('verified', 'deal-late'))
+        self.assertGreater(self.manager.listings, 1)
+
+    def test_failed_listing_is_retried(self):
+        self.manager.add('deal-1', 'p_ref1', trailing=True)
+        self.manager.fail_listings = 1
+        self.scheduler.schedule(self._verification('o_ref1'))
+
+        self._wait_for(1)
+        self.assertEqual(self.outcomes['o_ref1'], ('verified', 'deal-1'))
+
+    def test_gives_up_after_max_attempts(self):
+        self.scheduler.max_delay = 0.05
+        self.scheduler.schedule(self._verification('o_missing'))
+
+        self._wait_for(1)
+        self.assertEqual(self.outcomes['o_missing'], ('failed', None))
+        self.assertEqual(self.manager.listings, 4)
+        self.assertEqual(self.scheduler.stats['failed'], 1)
+
+    def test_missing_trailing_stop_is_added_and_verified(self):
+        self.manager.add('deal-1', 'p_ref1', trailing=False)
+        self.scheduler.schedule(self._verification('o_ref1', stop_distance=25.0))
+
+        self._wait_for(1)
+        self.assertEqual(self.outcomes['o_ref1'], ('verified', 'deal-1'))
+        self.assertEqual(self.manager.updates, [('deal-1', {'trailingStop': True, 'stopDistance': 25.0})])
+        self.assertEqual(self.scheduler.stats['updated'], 1)
+
+    def test_without_reference_checks_newest_matching_position(self):
+        self.manager.add('old', 'p_a', trailing=True, created='2026-01-01T00:00:00')
+        self.manager.add('new', 'p_b', trailing=True, created='2026-01-02T00:00:00')
+        self.manager.add('other', 'p_c', direction='SELL', trailing=True, created='2026-01-03T00:00:00')
+        self.scheduler.run_batch([self._verification(None)])
+
+        self.assertEqual(self.outcomes[None], ('verified', 'new'))
+
+
+    def test_unlisted_reference_never_touches_other_positions(self):
+        self.scheduler.max_delay = 0.05
+        self.manager.add('unrelated', 'p_other', trailing=False)
+        self.manager.confirmations['o_rejected'] = {'dealStatus': 'REJECTED', 'reason': 'MARKET_CLOSED'}
+        self.scheduler.schedule(self._verification('o_rejected', stop_distance=25.0))
+
+        self._wait_for(1)
+        self.assertEqual(self.outcomes['o_rejected'], ('rejected', None))
+        self.assertEqual(self.manager.listings, 4)
+        self.assertEqual(self.manager.updates, [])
+        self.assertEqual(self.scheduler.stats['rejected'], 1)
+
+class TestPositionManagerScheduling(unittest.TestCase):
+    """PositionManager hands verifications to its scheduler."""
+
+    def test_schedule_does_not_block(self):
+        manager = PositionManager(session_manager=None, request_handler=None)
+        calls = []
+        manager.all_positions = lambda: calls.append(1) or {'positions': []}
+
+        start = time.monotonic()
+        manager.schedule_trailing_stop_verification('BTCUSD', 'BUY', deal_reference='o_ref')
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertEqual(manager.follow_up_scheduler.pending(), 1)
+        manager.follow_up_scheduler.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for the paginated historical backfill, against a local stub server.
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.candle_store import CandleStore
+from src.AI.historical_backfill import HistoricalBackfill
+
+HISTORY = pd.date_range('2024-01-01', periods=3000, freq='h')
+
+
+class StubPricesHandler(BaseHTTPRequestHandler):
+    """Serves hourly candles from HISTORY for /api/v1/prices/<epic>."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.requests.append(self.path)
+            fail = server.fail_next > 0
+            server.fail_next -= 1 if fail else 0
+        try:
+            time.sleep(0.02)
+            if self.headers.get('CST') != 'token':
+                return self._send(401, {'errorCode': 'error.invalid.session.token'})
+            if fail:
+                return self._send(429, {'errorCode': 'error.too-many.requests'})
+
+            query = parse_qs(urlparse(self.path).query)
+            start = pd.Timestamp(query['from'][0])
+            end = pd.Timestamp(query['to'][0])
+            limit = int(query['max'][0])
+            window = HISTORY[(HISTORY >= start) & (HISTORY <= end)][:limit]
+            prices = [{
+                'snapshotTimeUTC': t.strftime('%Y-%m-%dT%H:%M:%S'),
+                'openPrice': {'bid': float(i), 'ask': float(i) + 1},
+                'highPrice': {'bid': float(i) + 2, 'ask': float(i) + 3},
+                'lowPrice': {'bid': float(i) - 2, 'ask': float(i) - 1},
+                'closePrice': {'bid': float(i) + 1, 'ask': float(i) + 2},
+                'lastTradedVolume': 10
+            } for i, t in zip(HISTORY.get_indexer(window) + 100, window)]
+            self._send(200, {'prices': prices})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHistoricalBackfill(unittest.TestCase):
+    """Test cases for HistoricalBackfill"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubPricesHandler)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.fail_next = 0
+        self.root = tempfile.mkdtemp()
+        self.store = CandleStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _backfill(self, **kwargs):
+        kwargs.setdefault('page_size', 200)
+        kwargs.setdefault('min_request_interval', 0.0)
+        return HistoricalBackfill(self.url, {'CST': 'token'}, store=self.store, **kwargs)
+
+    def _assert_stored(self, start, end):
+        stored = self.store.read('BTCUSD', 'HOUR')
+        expected = HISTORY[start:end]
+        self.assertEqual(list(stored['timestamp']), list(expected))
+        self.assertEqual(stored['close'].iloc[0], start + 101.0)
+
+    def test_full_backfill(self):
+        """Pages are fetched concurrently and stored once each"""
+        backfill = self._backfill(max_concurrency=4)
+        added = backfill.backfill('BTCUSD', 'HOUR', HISTORY[0], HISTORY[-1])
+        self.assertEqual(added, len(HISTORY))
+        self._assert_stored(0, len(HISTORY))
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+        self.assertEqual(backfill.stats['splits'], 0)
+
+    def test_resume_and_older_history(self):
+        """A second run starts at the last stored candle; older history is merged in front"""
+        backfill = self._backfill()
+        backfill.backfill('BTCUSD', 'HOUR', HISTORY[1000], HISTORY[1999])
+        self._assert_stored(1000, 2000)
+
+        self.server.requests = []
+        self.assertEqual(backfill.backfill('BTCUSD', 'HOUR', HISTORY[1500], HISTORY[2499]), 500)
+        first_from = min(parse_qs(urlparse(p).query)['from'][0] for p in self.server.requests)
+        self.assertEqual(pd.Timestamp(first_from), HISTORY[1999])
+
+        self.assertEqual(backfill.backfill('BTCUSD', 'HOUR', HISTORY[0], HISTORY[2499]), 1000)
+        self._assert_stored(0, 2500)
+
+    def test_full_page_is_split(self):
+        """A page hitting max is split until each part fits"""
+        backfill = self._backfill(page_size=200)
+        # Pretend the bars are twice as long, so every page is overfull
+        from src.AI import historical_backfill
+        original = historical_backfill.RESOLUTION_SECONDS['HOUR']
+        historical_backfill.RESOLUTION_SECONDS['HOUR'] = 2 * original
+        try:
+            backfill.backfill('BTCUSD', 'HOUR', HISTORY[0], HISTORY[999])
+        finally:
+            historical_backfill.RESOLUTION_SECONDS['HOUR'] = original
+        self.assertGreater(backfill.stats['splits'], 0)
+        self._assert_stored(0, 1000)
+
+    def test_rate_limit_and_retry(self):
+        """Requests are spaced and 429 responses are retried"""
+        self.server.fail_next = 2
+        backfill = self._backfill(min_request_interval=0.05, max_concurrency=4)
+        started = time.monotonic()
+        backfill.backfill('BTCUSD', 'HOUR', HISTORY[0], HISTORY[999])
+        elapsed = time.monotonic() - started
+        self._assert_stored(0, 1000)
+        self.assertEqual(backfill.stats['retries'], 2)
+        self.assertGreaterEqual(elapsed, 0.05 * (backfill.stats['requests'] - 1))
+
+    def test_reauthenticates_once(self):
+        """An expired token is refreshed through the callback"""
+        backfill = HistoricalBackfill(self.url, {'CST': 'expired'}, store=self.store, page_size=200,
+                                      min_request_interval=0.0, reauthenticate=lambda: {'CST': 'token'})
+        backfill.backfill('BTCUSD', 'HOUR', HISTORY[0], HISTORY[399])
+        self._assert_stored(0, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
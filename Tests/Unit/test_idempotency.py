@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Tests for order_id idempotency of the webhook routes.
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import logging
+from unittest.mock import patch
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from flask import Flask
+
+from src.Webhook.execution_dispatcher import ExecutionDispatcher
+from src.Webhook.idempotency import IdempotencyStore, UNKNOWN_OUTCOME_STATUS
+from src.Webhook.database import SIGNALS_TABLE_SQL
+from src.Webhook.routes import init_routes
+from src.Webhook import WEBHOOK_TOKEN
+from src.Webhook.utils import dispatch_trade
+
+
+class TestIdempotencyStore(unittest.TestCase):
+    """Claiming, replaying and releasing order_ids."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        self.store = IdempotencyStore(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_duplicate_gets_original_response(self):
+        calls = []
+
+        def handler():
+            calls.append(1)
+            return {'status': 'success', 'deal_reference': 'o_1'}, 200
+
+        first = self.store.run_once('order-1', handler)
+        second = self.store.run_once('order-1', handler)
+
+        self.assertEqual(calls, [1])
+        self.assertFalse(first[2])
+        self.assertEqual(second, ({'status': 'success', 'deal_reference': 'o_1'}, 200, True))
+
+    def test_result_survives_restart(self):
+        self.store.run_once('order-1', lambda: ({'status': 'error', 'message': 'rejected'}, 400))
+        restarted = IdempotencyStore(self.db_path)
+
+        response, status_code, replayed = restarted.run_once('order-1', lambda: self.fail("executed twice"))
+        self.assertTrue(replayed)
+        self.assertEqual(status_code, 400)
+        self.assertEqual(response['message'], 'rejected')
+        self.assertEqual(restarted.stats['cache_hits'], 0)
+
+    def test_recent_keys_are_served_from_cache(self):
+        self.store.run_once('order-1', lambda: ({'status': 'success'}, 200))
+        self.store.run_once('order-1', lambda: ({'status': 'success'}, 200))
+        self.assertEqual(self.store.stats['cache_hits'], 1)
+
+        self.store.cache_ttl = 0
+        self.store.run_once('order-2', lambda: ({'status': 'success'}, 200))
+        time.sleep(0.01)
+        self.store.run_once('order-2', lambda: ({'status': 'success'}, 200))
+        self.assertEqual(self.store.stats['cache_hits'], 1)
+
+    def test_in_flight_duplicate_is_not_executed(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_handler():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'status': 'success'}, 200
+
+        worker = threading.Thread(target=self.store.run_once, args=('order-1', slow_handler))
+        worker.start()
+        started.wait(5)
+        response, status_code, replayed = IdempotencyStore(self.db_path).run_once(
+            'order-1', slow_handler
+        )
+        release.set()
+        worker.join(5)
+
+        self.assertEqual(calls, [1])
+        self.assertTrue(replayed)
+        self.assertEqual(status_code, 202)
+        self.assertEqual(response['status'], 'processing')
+
+    def test_exception_releases_claim(self):
+        def failing():
+            raise RuntimeError("database down")
+
+        with self.assertRaises(RuntimeError):
+            self.store.run_once('order-1', failing)
+        response, status_code, replayed = self.store.run_once('order-1', lambda: ({'status': 'success'}, 200))
+        self.assertFalse(replayed)
+        self.assertEqual(status_code, 200)
+
+    def test_abandoned_claim_expires_after_lease(self):
+        # A worker that crashed mid-request never completes or releases its claim
+        self.assertEqual(self.store.begin('order-1'), (True, None))
+        response, status_code, replayed = self.store.run_once('order-1', lambda: self.fail("executed twice"))
+        self.assertEqual(status_code, 202)
+
+        db = sqlite3.connect(self.db_path)
+        with db:
+            db.execute('UPDATE idempotency_keys SET created_at = ?', (time.time() - 121,))
+        db.close()
+        response, status_code, replayed = self.store.run_once('order-1', lambda: ({'status': 'success'}, 200))
+        self.assertFalse(replayed)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.store.stats['expired'], 1)
+
+    def test_error_response_is_replayed_only_briefly(self):
+        self.store.failure_ttl = 0
+        self.store.run_once('order-1', lambda: ({'status': 'error', 'message': 'market closed'}, 500))
+        time.sleep(0.01)
+
+        response, status_code, replayed = self.store.run_once('order-1', lambda: ({'status': 'success'}, 200))
+        self.assertFalse(replayed)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.store.run_once('order-1', lambda: self.fail("executed twice"))[1:], (200, True))
+
+    def test_slow_handler_keeps_its_claim_past_the_lease(self):
+        self.store.lease = 0.2
+        started = threading.Event()
+        calls = []
+
+        def slow_handler():
+            calls.append(1)
+            started.set()
+            time.sleep(0.5)
+            return {'status': 'success'}, 200
+
+        worker = threading.Thread(target=self.store.run_once, args=('order-1', slow_handler))
+        worker.start()
+        started.wait(5)
+        time.sleep(0.35)
+        retry = IdempotencyStore(self.db_path, lease=0.2)
+        response, status_code, replayed = retry.run_once('order-1', slow_handler)
+        worker.join(5)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(status_code, 202)
+        self.assertGreater(self.store.stats['heartbeats'], 0)
+        self.assertEqual(retry.stats['expired'], 0)
+
+    def test_unknown_outcome_is_not_executed_again(self):
+        self.store.failure_ttl = 0
+        self.store.run_once('order-1', lambda: ({'status': 'error', 'code': 'EXECUTION_TIMEOUT'},
+                                                UNKNOWN_OUTCOME_STATUS))
+        time.sleep(0.01)
+
+        response, status_code, replayed = self.store.run_once('order-1', lambda: self.fail("executed twice"))
+        self.assertTrue(replayed)
+        self.assertEqual(status_code, UNKNOWN_OUTCOME_STATUS)
+        self.assertEqual(IdempotencyStore(self.db_path, failure_ttl=0).purge(), 0)
+
+    def test_purge_drops_abandoned_claims_and_expired_errors(self):
+        self.store.failure_ttl = 0
+        self.store.lease = 0
+        self.store.begin('order-1')
+        self.store.run_once('order-2', lambda: ({'status': 'error'}, 400))
+        self.store.run_once('order-3', lambda: ({'status': 'success'}, 200))
+        time.sleep(0.01)
+
+        self.assertEqual(self.store.purge(), 2)
+
+
+class TestDispatchTimeout(unittest.TestCase):
+    """dispatch_trade stops waiting before the idempotency lease runs out."""
+
+    def test_running_trade_times_out_and_queued_trade_is_cancelled(self):
+        release = threading.Event()
+        executed = []
+
+        def execute(client, data):
+            executed.append(data['order_id'])
+            release.wait(5)
+            return {'dealReference': 'o_1'}
+
+        dispatcher = ExecutionDispatcher(execute, lanes=1)
+        self.addCleanup(dispatcher.stop)
+        with patch('src.Webhook.utils.execution_dispatcher', dispatcher):
+            running = dispatch_trade(None, {'ticker': 'BTCUSD', 'order_id': 'a'}, timeout=0.05)
+            queued = dispatch_trade(None, {'ticker': 'BTCUSD', 'order_id': 'b'}, timeout=0.05)
+        release.set()
+
+        self.assertEqual(running['code'], 'EXECUTION_TIMEOUT')
+        self.assertEqual(queued['code'], 'EXECUTION_BACKLOG_FULL')
+        self.assertEqual(executed, ['a'])
+
+
+class TestWebhookIdempotency(unittest.TestCase):
+    """/webhook executes an order_id once."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        db = sqlite3.connect(self.db_path)
+        db.execute(SIGNALS_TABLE_SQL)
+        db.close()
+
+        self.app = Flask(__name__)
+        self.app.config.update(TESTING=True, DATABASE=self.db_path)
+        init_routes(self.app)
+        self.client = self.app.test_client()
+        self.headers = {'X-Trading-Token': WEBHOOK_TOKEN}
+        self.trades = []
+
+        patches = [
+            patch('src.Webhook.database.DATABASE', self.db_path),
+            patch('src.Webhook.routes.get_client', lambda: object()),
+            patch('src.Webhook.routes.dispatch_trade', self._dispatch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _dispatch(self, client, data):
+        self.trades.append(data['order_id'])
+        return {'dealReference': f"o_{data['order_id']}"}
+
+    def test_retried_alert_replays_original_response(self):
+        signal = {'order_id': 'tv-1', 'ticker': 'BTCUSD', 'order_action': 'BUY',
+                  'position_size': 1, 'price': 100.0}
+        first = self.client.post('/webhook', json=signal, headers=self.headers)
+        second = self.client.post('/webhook', json=signal, headers=self.headers)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.headers.get('X-Idempotent-Replay'), 'true')
+        self.assertEqual(self.trades, ['tv-1'])
+
+        db = sqlite3.connect(self.db_path)
+        count = db.execute("SELECT COUNT(*) FROM signals WHERE order_id = 'tv-1'").fetchone()[0]
+        db.close()
+        self.assertEqual(count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests for the resumable incremental backtest.
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import logging
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.fallback_optimizer import backtest_strategy, calculate_metrics
+from src.AI.incremental_backtest import IncrementalBacktest
+from src.AI import scheduled_optimization
+
+
+class TestIncrementalBacktest(unittest.TestCase):
+    """Incremental updates must agree with a full backtest over the same bars"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 1200
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        self.df = pd.DataFrame({
+            'open': close,
+            'high': close * (1 + np.abs(rng.normal(0, 0.004, n))),
+            'low': close * (1 - np.abs(rng.normal(0, 0.004, n))),
+            'close': close
+        }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+        self.params = {'atr_period': 10, 'atr_multiplier': 2.0, 'stop_loss': 1.0, 'take_profit': 2.0}
+
+    def _assert_metrics_equal(self, metrics, expected):
+        self.assertEqual(list(metrics.keys()), list(expected.keys()))
+        for key, value in expected.items():
+            self.assertAlmostEqual(metrics[key], value, places=8, msg=key)
+
+    def test_chunks_match_full_backtest(self):
+        """Overlapping chunks give the metrics of one full backtest"""
+        backtest = IncrementalBacktest(self.params)
+        for start, end in [(0, 5), (0, 400), (350, 900), (900, 1200)]:
+            backtest.update(self.df.iloc[start:end])
+            trades, equity_curve = backtest_strategy(self.df.iloc[:end], self.params)
+            self._assert_metrics_equal(backtest.metrics(), calculate_metrics(equity_curve, trades))
+        self.assertEqual(backtest.num_bars, len(self.df))
+        self.assertEqual(backtest.update(self.df.iloc[-10:]), 0)
+
+    def test_timestamp_column(self):
+        """Frames from fetch_market_data carry timestamps in a column"""
+        frame = self.df.reset_index().rename(columns={'index': 'timestamp'})
+        backtest = IncrementalBacktest(self.params)
+        backtest.update(frame.iloc[:700])
+        backtest.update(frame.iloc[600:])
+        trades, equity_curve = backtest_strategy(frame, self.params)
+        self._assert_metrics_equal(backtest.metrics(), calculate_metrics(equity_curve, trades))
+
+    def test_state_round_trip(self):
+        """A restored state continues exactly where it stopped"""
+        backtest = IncrementalBacktest(self.params)
+        backtest.update(self.df.iloc[:600])
+        restored = IncrementalBacktest.from_dict(json.loads(json.dumps(backtest.to_dict())))
+        restored.update(self.df.iloc[600:])
+        trades, equity_curve = backtest_strategy(self.df, self.params)
+        self._assert_metrics_equal(restored.metrics(), calculate_metrics(equity_curve, trades))
+
+    def test_state_with_running_total_is_restored(self):
+        """States saved with the old running true-range total keep working"""
+        backtest = IncrementalBacktest(self.params)
+        backtest.update(self.df.iloc[:600])
+        state = backtest.to_dict()
+
+        head = self.df.iloc[:600]
+        true_range = np.maximum(head['high'] - head['low'], np.maximum(
+            (head['high'] - head['close'].shift()).abs(), (head['low'] - head['close'].shift()).abs()))
+        true_range.iloc[0] = head['high'].iloc[0] - head['low'].iloc[0]
+        cumsum = true_range.cumsum().to_numpy()
+        del state['tr_window']
+        state.update(tr_cumsum=float(cumsum[-1]), cumsum_window=cumsum[-self.params['atr_period']:].tolist())
+
+        restored = IncrementalBacktest.from_dict(json.loads(json.dumps(state)))
+        np.testing.assert_allclose(list(restored.tr_window), true_range.iloc[-9:].to_numpy(), rtol=1e-9)
+        restored.update(self.df.iloc[600:])
+        trades, equity_curve = backtest_strategy(self.df, self.params)
+        self._assert_metrics_equal(restored.metrics(), calculate_metrics(equity_curve, trades))
+
+    def test_window_metrics(self):
+        """Metrics over a trailing window count only that window's bars"""
+        backtest = IncrementalBacktest(self.params)
+        backtest.update(self.df.iloc[:700])
+        backtest.update(self.df.iloc[700:])
+        self._assert_metrics_equal(backtest.metrics(start=self.df.index[0]), backtest.metrics())
+
+        start = self.df.index[600]
+        window = backtest.metrics(start=start)
+        restored = IncrementalBacktest.from_dict(json.loads(json.dumps(backtest.to_dict())))
+        self._assert_metrics_equal(restored.metrics(start=start), window)
+
+        head = IncrementalBacktest(self.params)
+        head.update(self.df.iloc[:601])
+        self.assertAlmostEqual(window['total_return'], (backtest.equity / head.equity - 1) * 100, places=8)
+        self.assertLess(window['num_trades'], backtest.metrics()['num_trades'])
+
+    def test_invalid_period(self):
+        """An ATR period below one is rejected"""
+        with self.assertRaises(ValueError):
+            IncrementalBacktest({'atr_period': 0})
+
+
+class TestParameterMonitoring(unittest.TestCase):
+    """Live metrics are compared over the optimization's lookback and alerted once"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        patcher = patch.object(scheduled_optimization, 'DB_PATH', os.path.join(self.tmp_dir, 'history.db'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        scheduled_optimization.initialize_database()
+        self.alerts = []
+        patcher = patch.object(scheduled_optimization, 'log_alert', lambda *args: self.alerts.append(args))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        rng = np.random.default_rng(7)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 1200)))
+        self.df = pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=1200, freq='h'),
+            'high': close * 1.002, 'low': close * 0.998, 'close': close
+        })
+        self.params = {'atr_period': 10, 'atr_multiplier': 2.0, 'stop_loss': 1.0, 'take_profit': 2.0}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _optimize(self, total_return):
+        scheduled_optimization.store_optimization_result(
+            'EURUSD', 'HOUR', 'sharpe',
+            {'total_return': total_return, 'sharpe_ratio': 5.0, 'max_drawdown': 1.0, 'win_rate': 0.6},
+            self.params
+        )
+
+    def _monitor(self, bars):
+        return scheduled_optimization.monitor_parameter_performance(
+            'EURUSD', 'HOUR', 'sharpe', self.df.iloc[:bars], lookback_days=10
+        )
+
+    def test_window_matches_the_lookback(self):
+        self._optimize(50.0)
+        live = self._monitor(1200)
+        backtest = scheduled_optimization.load_backtest_state('EURUSD', 'HOUR', 'sharpe')
+        expected = backtest.metrics(start=self.df['timestamp'].iloc[-1] - pd.Timedelta(days=10))
+        self.assertEqual(live, expected)
+        self.assertNotEqual(live['num_trades'], backtest.metrics()['num_trades'])
+
+    def test_degradation_is_alerted_once_per_baseline(self):
+        self._optimize(50.0)
+        self._monitor(600)
+        self._monitor(700)
+        self.assertEqual(len(self.alerts), 1)
+
+        # A new optimization replaces the baseline
+        self._optimize(40.0)
+        self._monitor(800)
+        self._monitor(900)
+        self.assertEqual(len(self.alerts), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-memory parallel evaluation engine.
+"""
+
+import sys
+import os
+import random
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI import parallel_evaluator
+from src.AI.parallel_evaluator import SharedFrame, evaluate_in_parallel
+from src.AI.fallback_optimizer import evaluate_parameter_batch, optimize_parameters, supertrend_strategy
+
+
+def make_frame(n=1500, seed=5):
+    """Random-walk OHLC frame with an hourly DatetimeIndex."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'open': close,
+        'high': close * (1 + np.abs(rng.normal(0, 0.004, n))),
+        'low': close * (1 - np.abs(rng.normal(0, 0.004, n))),
+        'close': close
+    }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+
+
+def failing_batch(df, param_chunk):
+    """Batch evaluator that raises for chunks containing a 'fail' parameter."""
+    if any(p.get('fail') for p in param_chunk):
+        raise ValueError("bad chunk")
+    return [len(df) * p['x'] for p in param_chunk]
+
+
+class TestSharedFrame(unittest.TestCase):
+    """Test cases for SharedFrame"""
+
+    def test_round_trip(self):
+        """Attached frames equal the original and view the shared block"""
+        df = make_frame(n=200)
+        df['symbol'] = 'EURUSD'
+        df['timestamp'] = df.index
+
+        with SharedFrame(df) as shared:
+            frame, shm = SharedFrame.attach(shared.descriptor)
+            block = np.ndarray(shm.size, dtype=np.uint8, buffer=shm.buf)
+            try:
+                pd.testing.assert_frame_equal(frame, df)
+                self.assertTrue(np.shares_memory(frame['close'].to_numpy(), block))
+                self.assertTrue(np.shares_memory(np.asarray(frame.index), block))
+                self.assertFalse(frame['close'].to_numpy().flags.writeable)
+            finally:
+                del frame, block
+                shm.close()
+
+    def test_worker_closes_its_mapping_on_exit(self):
+        """Worker state is dropped and the attached block closed by the exit finalizer"""
+        with SharedFrame(make_frame(n=50)) as shared:
+            parallel_evaluator._init_worker(shared.descriptor, failing_batch)
+            shm = parallel_evaluator._worker_shm
+            self.assertEqual(parallel_evaluator._run_chunk([{'x': 2}]), [100])
+
+            parallel_evaluator._release_worker()
+            self.assertIsNone(parallel_evaluator._worker_frame)
+            self.assertIsNone(parallel_evaluator._worker_shm)
+            self.assertIsNone(shm.buf)
+
+
+class TestEvaluateInParallel(unittest.TestCase):
+    """Test cases for evaluate_in_parallel"""
+
+    def setUp(self):
+        self.df = make_frame()
+        self.param_sets = [
+            {'atr_period': p, 'atr_multiplier': m, 'stop_loss': 1.0, 'take_profit': 3.0}
+            for p in (7, 10, 14, 21) for m in (1.5, 2.5, 3.5)
+        ]
+
+    def test_workers_match_in_process(self):
+        """Worker processes produce the same results as in-process evaluation"""
+        sequential = dict(evaluate_in_parallel(self.df, evaluate_parameter_batch, self.param_sets, workers=1))
+        parallel = dict(evaluate_in_parallel(self.df, evaluate_parameter_batch, self.param_sets,
+                                             workers=2, max_chunk=2))
+        self.assertEqual(sorted(parallel), list(range(len(self.param_sets))))
+        self.assertEqual(parallel, sequential)
+
+    def test_failed_chunk_yields_none(self):
+        """A chunk that raises yields None for each of its parameter sets"""
+        params = [{'x': 1}, {'x': 2, 'fail': True}, {'x': 3}, {'x': 4}]
+        results = dict(evaluate_in_parallel(self.df, failing_batch, params, workers=1, max_chunk=2))
+        self.assertEqual(results, {0: None, 1: None, 2: 3 * len(self.df), 3: 4 * len(self.df)})
+
+        results = dict(evaluate_in_parallel(self.df, failing_batch, params, workers=2, max_chunk=1))
+        self.assertEqual(results, {0: len(self.df), 1: None, 2: 3 * len(self.df), 3: 4 * len(self.df)})
+
+    def test_optimizer_workers(self):
+        """optimize_parameters picks the same best parameters with and without workers"""
+        search_space = {
+            'atr_period': [5, 30],
+            'atr_multiplier': [1.0, 5.0],
+            'stop_loss': [0.5, 3.0],
+            'take_profit': [1.0, 6.0]
+        }
+        random.seed(3)
+        best_seq, value_seq, results_seq = optimize_parameters(
+            self.df, supertrend_strategy, search_space, num_evals=24, workers=1, use_cache=False)
+        random.seed(3)
+        best_par, value_par, results_par = optimize_parameters(
+            self.df, supertrend_strategy, search_space, num_evals=24, batch_size=4, workers=2, use_cache=False)
+
+        self.assertEqual(best_par, best_seq)
+        self.assertEqual(value_par, value_seq)
+        self.assertEqual(len(results_par), len(results_seq))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-bucket rate limiter used for Capital.com requests.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.Exchanges.capital_com_api.rate_limiter import (
+    RateLimiter, TokenBucket, classify_endpoint, get_rate_limiter, interval_limiter
+)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for TokenBucket and RateLimiter"""
+
+    def test_burst_then_refill_rate(self):
+        """A bucket serves its burst at once, then one token per 1/rate seconds"""
+        bucket = TokenBucket(rate=10.0, burst=3.0)
+        now = bucket.updated
+        waits = [bucket.reserve(now) for _ in range(5)]
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.1)
+        self.assertAlmostEqual(waits[4], 0.2)
+        # A second later the debt is repaid and the burst refilled
+        self.assertEqual(bucket.reserve(now + 1.5), 0.0)
+        self.assertAlmostEqual(bucket.tokens, 2.0)
+
+    def test_invalid_limits(self):
+        """Non-positive rates and bursts below one are rejected"""
+        with self.assertRaises(ValueError):
+            TokenBucket(0.0, 1.0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1.0, 0.5)
+
+    def test_account_bucket_spans_classes(self):
+        """The account bucket limits all endpoint classes together"""
+        limiter = RateLimiter({'trading': (100.0, 5.0), 'market_data': (100.0, 5.0)}, account_limit=(10.0, 4.0))
+        waits = [limiter.reserve('trading') for _ in range(2)] + [limiter.reserve('market_data') for _ in range(3)]
+        self.assertEqual(waits[:4], [0.0] * 4)
+        self.assertGreater(waits[4], 0.09)
+
+        metrics = limiter.metrics()
+        self.assertEqual(metrics['trading']['requests'], 2)
+        self.assertEqual(metrics['market_data']['delayed'], 1)
+        self.assertAlmostEqual(metrics['market_data']['max_wait'], waits[4])
+
+    def test_delayed_reservation_takes_the_account_token(self):
+        """reserve draws the account bucket even when the class token is not due yet"""
+        limiter = RateLimiter({'trading': (10.0, 1.0), 'market_data': (100.0, 5.0)}, account_limit=(10.0, 2.0))
+        self.assertEqual(limiter.reserve('trading'), 0.0)
+        self.assertGreater(limiter.reserve('trading'), 0.09)
+        # Both account tokens are gone, so market data waits for the account bucket
+        self.assertGreater(limiter.reserve('market_data'), 0.09)
+
+    def test_market_data_burst_leaves_budget_for_orders(self):
+        """Queued market data does not run up account debt that orders wait behind"""
+        limiter = RateLimiter({'trading': (100.0, 10.0), 'market_data': (80.0, 8.0)}, account_limit=(100.0, 10.0))
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(100)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        trading_wait = limiter.acquire('trading')
+        for t in threads:
+            t.join()
+
+        self.assertLess(trading_wait, 0.05)
+        self.assertGreater(limiter.metrics()['market_data']['max_wait'], 1.0)
+
+    def test_classification(self):
+        """Requests are grouped by endpoint"""
+        self.assertEqual(classify_endpoint('POST', 'https://api/api/v1/session'), 'session')
+        self.assertEqual(classify_endpoint('GET', '/api/v1/session'), 'market_data')
+        self.assertEqual(classify_endpoint('post', '/api/v1/positions'), 'trading')
+        self.assertEqual(classify_endpoint('GET', 'https://api/api/v1/confirms/REF'), 'trading')
+        self.assertEqual(classify_endpoint('GET', '/api/v1/prices/BTCUSD?resolution=HOUR'), 'market_data')
+
+    def test_threads_share_the_budget(self):
+        """Concurrent threads are spaced by one shared bucket"""
+        limiter = RateLimiter({'market_data': (100.0, 1.0)}, account_limit=None)
+        started = time.monotonic()
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertGreaterEqual(time.monotonic() - started, 19 / 100.0 - 0.01)
+        self.assertEqual(limiter.metrics()['market_data']['requests'], 20)
+
+    def test_async_acquire_does_not_block_loop(self):
+        """Tasks wait in the event loop while other tasks keep running"""
+        limiter = RateLimiter({'market_data': (50.0, 2.0)}, account_limit=None)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        async def main():
+            started = time.monotonic()
+            await asyncio.gather(ticker(), *(limiter.acquire_async() for _ in range(6)))
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(main())
+        self.assertGreaterEqual(elapsed, 4 / 50.0 - 0.01)
+        self.assertEqual(len(ticks), 5)
+
+    def test_interval_limiter_and_shared_instance(self):
+        """Helpers build an interval limiter and return one shared limiter"""
+        self.assertIsNone(interval_limiter(0))
+        limiter = interval_limiter(0.05)
+        limiter.reserve()
+        self.assertAlmostEqual(limiter.reserve(), 0.05, places=3)
+        self.assertIs(get_rate_limiter(), get_rate_limiter())
+        self.assertIn('session', get_rate_limiter().metrics())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for the regime model registry and online regime classification.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.candle_store import CandleStore
+from src.AI.data_collector import MarketDataCollector
+from src.AI.regime_detector import VolatilityRegimeDetector
+from src.AI.regime_registry import OnlineRegimeFeatures, RegimeModel, RegimeModelRegistry
+
+
+def daily_candles(days=150, seed=0):
+    """Daily candles ending today, alternating calm and volatile stretches."""
+    rng = np.random.default_rng(seed)
+    scale = np.where((np.arange(days) // 25) % 2 == 0, 0.004, 0.02)
+    close = 100 * np.exp(np.cumsum(rng.normal(scale=scale)))
+    spread = close * scale * rng.uniform(0.5, 1.5, days)
+    end = pd.Timestamp.now().normalize()
+    return pd.DataFrame({
+        'timestamp': pd.date_range(end=end, periods=days, freq='D'),
+        'open': close,
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(1000, 2000, days)
+    })
+
+
+class TestOnlineRegimeFeatures(unittest.TestCase):
+    """Rolling features match the detector's batch feature preparation."""
+
+    def test_matches_prepare_features(self):
+        df = daily_candles()
+        features = OnlineRegimeFeatures()
+        for row in df.itertuples():
+            features.update(row.close, row.high, row.low, row.volume)
+
+        detector = VolatilityRegimeDetector(db_path=':memory:', candle_store=None,
+                                            registry=RegimeModelRegistry(tempfile.gettempdir()))
+        expected = detector._prepare_features(df[['close', 'high', 'low', 'volume']].copy())
+        np.testing.assert_allclose(features.vector, expected[detector.features].iloc[-1].to_numpy(), rtol=1e-9)
+
+    def test_not_ready_until_windows_fill(self):
+        features = OnlineRegimeFeatures()
+        for row in daily_candles(20).itertuples():
+            self.assertIsNone(features.update(row.close, row.high, row.low, row.volume))
+
+
+class TestRegimeModelRegistry(unittest.TestCase):
+    """Versioned save, load, pruning and cross-instance refresh."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _model(self, symbol='EURUSD'):
+        return RegimeModel(symbol, ['a', 'b'], [1.0, 2.0], [0.5, 1.0], [[0.0, 0.0], [2.0, 2.0]],
+                           {0: {'volatility_level': 'LOW'}, 1: {'volatility_level': 'HIGH'}},
+                           mean_distance=0.5, n_samples=40)
+
+    def test_versions_are_numbered_and_pruned(self):
+        registry = RegimeModelRegistry(self.root, keep=2)
+        self.assertEqual([registry.save(self._model()) for _ in range(3)], [1, 2, 3])
+        self.assertEqual(registry.versions('EURUSD'), [2, 3])
+
+        loaded = registry.load('EURUSD')
+        self.assertEqual(loaded.version, 3)
+        self.assertEqual(loaded.characteristics[1]['volatility_level'], 'HIGH')
+        self.assertEqual(loaded.classify(np.array([2.0, 4.0]))[0], 1)
+        self.assertIsNone(registry.load('GBPUSD'))
+
+    def test_latest_picks_up_versions_saved_elsewhere(self):
+        reader = RegimeModelRegistry(self.root, refresh_interval=0)
+        self.assertIsNone(reader.latest('EURUSD'))
+        RegimeModelRegistry(self.root).save(self._model())
+        self.assertEqual(reader.latest('EURUSD').version, 1)
+
+
+class TestOnlineRegimeDetection(unittest.TestCase):
+    """Regimes come from the saved model; refits happen on schedule or drift."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = CandleStore(os.path.join(self.tmp_dir, 'candles'))
+        self.store.write('EURUSD', 'DAY', daily_candles())
+        self.registry = RegimeModelRegistry(os.path.join(self.tmp_dir, 'regimes'), refresh_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _detector(self, name, **kwargs):
+        return VolatilityRegimeDetector(db_path=os.path.join(self.tmp_dir, name), candle_store=self.store,
+                                        registry=self.registry, **kwargs)
+
+    def test_saved_model_is_used_without_refitting(self):
+        trained = self._detector('a.db').train('EURUSD')
+        self.assertGreaterEqual(trained, 0)
+        self.assertEqual(self.registry.versions('EURUSD'), [1])
+
+        # A fresh process with no regime rows classifies instead of training
+        detector = self._detector('b.db')
+        regime = detector.get_current_regime('EURUSD')
+        self.assertEqual(regime['regime_id'], trained)
+        self.assertIsNone(detector.model)
+        self.assertEqual(self.registry.versions('EURUSD'), [1])
+        self.assertIsNone(detector.needs_refit('EURUSD'))
+
+    def test_refit_on_schedule_and_on_drift(self):
+        self.assertEqual(self._detector('a.db', refit_interval_days=0).refit_if_needed('EURUSD'), 'missing')
+        self.assertEqual(self._detector('a.db', refit_interval_days=0).needs_refit('EURUSD'), 'schedule')
+
+        detector = self._detector('a.db')
+        self.assertIsNone(detector.refit_if_needed('EURUSD'))
+        close = 100.0
+        for step in range(10):
+            close *= 1.3 if step % 2 else 0.75
+            self.assertGreaterEqual(detector.update_bar('EURUSD', close, close * 1.2, close * 0.8, 1500.0), 0)
+        self.assertEqual(detector.refit_if_needed('EURUSD'), 'drift')
+        self.assertEqual(self.registry.versions('EURUSD'), [1, 2])
+
+    def test_collected_candles_drive_the_current_regime(self):
+        self._detector('a.db').train('EURUSD')
+        detector = self._detector('b.db')
+        detector.classify('EURUSD')
+        collector = MarketDataCollector(db_path=os.path.join(self.tmp_dir, 'b.db'), candle_store=self.store,
+                                        regime_detector=detector)
+
+        # Violent daily bars after the stored history
+        close = np.cumprod(np.where(np.arange(10) % 2, 1.3, 0.75)) * 100
+        new_bars = pd.DataFrame({
+            'timestamp': pd.date_range(pd.Timestamp.now().normalize() + pd.Timedelta(days=1), periods=10, freq='D'),
+            'open': close, 'high': close * 1.2, 'low': close * 0.8, 'close': close, 'volume': 1500.0
+        })
+        collector._store_candles('EURUSD', new_bars.iloc[:5].copy())
+        self.assertEqual(detector._online['EURUSD'].bars_since_fit, 5)
+
+        # A second process catches up from the candle store, once per bar
+        monitor = self._detector('c.db')
+        monitor.classify('EURUSD')
+        self.store.append('EURUSD', 'DAY', new_bars.iloc[5:])
+        regime = monitor.refresh_bars('EURUSD')
+        monitor.refresh_bars('EURUSD')
+        self.assertEqual(monitor._online['EURUSD'].bars_since_fit, 5)
+
+        collector._store_candles('EURUSD', new_bars.copy())
+        self.assertEqual(detector._online['EURUSD'].bars_since_fit, 10)
+        self.assertEqual(detector.get_current_regime('EURUSD')['regime_id'], detector.classify('EURUSD'))
+        self.assertEqual(monitor.get_current_regime('EURUSD')['regime_id'], regime)
+        self.assertEqual(detector.needs_refit('EURUSD'), 'drift')
+
+
+if __name__ == '__main__':
+    unittest.main()
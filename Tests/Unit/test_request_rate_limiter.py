@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the sliding-window rate limiter of the Flask endpoints.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from flask import Flask
+
+from src.Optional.rate_limiter import (
+    MemoryBackend, SQLiteBackend, SlidingWindowLimiter, rate_limit, set_limiter
+)
+
+
+class TestBackends(unittest.TestCase):
+    """Sliding-window counting and eviction."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_window_slides_instead_of_resetting(self):
+        backend = MemoryBackend()
+        results = [backend.hit('ip', 4, 10, 105.0)[0] for _ in range(5)]
+        self.assertEqual(results, [True, True, True, True, False])
+
+        # Halfway through the next window, half of the previous count still applies
+        self.assertEqual(backend.hit('ip', 4, 10, 115.0), (True, 2.0))
+        self.assertEqual(backend.hit('ip', 4, 10, 115.0), (True, 3.0))
+        self.assertEqual(backend.hit('ip', 4, 10, 115.0), (False, 4.0))
+        # Two windows later nothing is left
+        self.assertEqual(backend.hit('ip', 4, 10, 131.0), (True, 0.0))
+
+    def test_idle_clients_are_evicted_lru(self):
+        backend = MemoryBackend(max_clients=2, shards=1)
+        backend.hit('a', 1, 60, 0.0)
+        backend.hit('b', 1, 60, 0.0)
+        backend.hit('a', 1, 60, 1.0)
+        backend.hit('c', 1, 60, 1.0)
+
+        self.assertEqual(len(backend), 2)
+        self.assertEqual(backend.evictions, 1)
+        # 'a' was used more recently than 'b', so it kept its count
+        self.assertFalse(backend.hit('a', 1, 60, 2.0)[0])
+        self.assertTrue(backend.hit('b', 1, 60, 2.0)[0])
+
+    def test_sqlite_backend_is_shared_between_instances(self):
+        db_path = os.path.join(self.tmp_dir, 'rate_limits.db')
+        first = SQLiteBackend(db_path)
+        second = SQLiteBackend(db_path)
+
+        self.assertTrue(first.hit('ip', 2, 60, 10.0)[0])
+        self.assertTrue(second.hit('ip', 2, 60, 11.0)[0])
+        self.assertFalse(first.hit('ip', 2, 60, 12.0)[0])
+        self.assertTrue(second.hit('other', 2, 60, 12.0)[0])
+
+    def test_sqlite_purge_keeps_most_recent_clients(self):
+        backend = SQLiteBackend(os.path.join(self.tmp_dir, 'rate_limits.db'), max_clients=2, idle_timeout=100)
+        for n, key in enumerate(('a', 'b', 'c', 'd')):
+            backend.hit(key, 5, 60, 1000.0 + n)
+        backend.hit('old', 5, 60, 500.0)
+
+        self.assertEqual(backend.purge(1010.0), 3)
+        self.assertEqual(len(backend), 2)
+        self.assertEqual(backend.hit('d', 1, 60, 1011.0), (False, 1.0))
+
+
+class TestRateLimitDecorator(unittest.TestCase):
+    """Flask routes answer 429 once a client exceeds its limit."""
+
+    def setUp(self):
+        self.limiter = SlidingWindowLimiter(MemoryBackend())
+        set_limiter(self.limiter)
+        self.addCleanup(set_limiter, None)
+
+        app = Flask(__name__)
+
+        @app.route('/limited')
+        @rate_limit(limit=2, window=60)
+        def limited():
+            return 'ok'
+
+        self.client = app.test_client()
+
+    def test_limit_and_metrics(self):
+        codes = [self.client.get('/limited').status_code for _ in range(3)]
+        other = self.client.get('/limited', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        limited = self.client.get('/limited')
+
+        self.assertEqual(codes, [200, 200, 429])
+        self.assertEqual(other.status_code, 200)
+        self.assertIn('Retry-After', limited.headers)
+        self.assertEqual(limited.get_json()['error'], 'Rate limit exceeded')
+
+        metrics = self.limiter.metrics()
+        self.assertEqual(metrics['scopes']['limited'], {'allowed': 3, 'limited': 2, 'errors': 0})
+        self.assertEqual(metrics['clients'], 2)
+
+    def test_backend_errors_fail_open(self):
+        class BrokenBackend:
+            def hit(self, key, limit, window, now):
+                raise OSError("disk full")
+
+        set_limiter(SlidingWindowLimiter(BrokenBackend()))
+        self.assertEqual(self.client.get('/limited').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached token lifecycle of SessionManager.
+"""
+
+import sys
+import os
+import threading
+import unittest
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.Exchanges.capital_com_api.rate_limiter import RateLimiter
+from src.Exchanges.capital_com_api.request_handler import RequestHandler
+from src.Exchanges.capital_com_api.session_manager import SessionManager
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Login on POST /api/v1/session; GET /api/v1/positions accepts only the latest token."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.logins += 1
+            self.server.current = f'cst-{self.server.logins}'
+        self._send(200, b'{}', {'CST': self.server.current, 'X-SECURITY-TOKEN': 'token'})
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.gets += 1
+        if self.headers.get('CST') != self.server.current:
+            return self._send(401, b'{"errorCode": "error.invalid.session.token"}')
+        self._send(200, b'{"positions": []}')
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSessionManagerTokens(unittest.TestCase):
+    """Test cases for the cached token expiry and lazy revalidation"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.logins = 0
+        self.server.gets = 0
+        self.server.current = None
+        self.manager = SessionManager(self.url, api_key='key', username='user', password='secret')
+        self.manager.rate_limiter = RateLimiter({}, account_limit=None)
+        self.handler = RequestHandler()
+        self.handler.session_manager = self.manager
+        self.handler.rate_limiter = self.manager.rate_limiter
+
+    def tearDown(self):
+        self.manager._release_session_slot()
+
+    def _headers(self):
+        return {'CST': self.manager.CST, 'X-SECURITY-TOKEN': self.manager.X_TOKEN}
+
+    def test_valid_token_needs_no_request(self):
+        """create_session on a fresh token is answered from the cache"""
+        self.assertTrue(self.manager.create_session()['success'])
+        for _ in range(5):
+            self.assertTrue(self.manager.create_session()['success'])
+        self.assertEqual(self.server.logins, 1)
+        self.assertEqual(self.server.gets, 0)
+
+    def test_expired_token_logs_in_again(self):
+        """A token past its lifetime is replaced on the next create_session"""
+        self.manager.create_session()
+        self.manager.token_expires_at = 0.0
+        self.manager.create_session()
+        self.assertEqual(self.server.logins, 2)
+
+    def test_unauthorized_request_is_retried(self):
+        """A 401 invalidates the token, logs in once and retries the request"""
+        self.manager.create_session()
+        self.server.current = 'revoked'
+        data, _ = self.handler.make_request('get', f"{self.url}/api/v1/positions", headers=self._headers())
+        self.assertEqual(data, {'positions': []})
+        self.assertEqual(self.server.logins, 2)
+        self.assertEqual(self.manager.unauthorized_count, 1)
+        self.assertEqual(self.handler.headers['CST'], self.manager.CST)
+
+    def test_concurrent_unauthorized_requests_share_one_login(self):
+        """Requests rejected with the same token trigger a single login"""
+        self.manager.create_session()
+        self.server.current = 'revoked'
+        headers = self._headers()
+        results = []
+        barrier = threading.Barrier(6)
+
+        def worker():
+            barrier.wait()
+            results.append(self.handler.make_request('get', f"{self.url}/api/v1/positions", headers=headers)[0])
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [{'positions': []}] * 6)
+        self.assertEqual(self.server.logins, 2)
+
+    def test_retry_adapter_is_mounted(self):
+        """The session manager's connections retry only idempotent requests, and not on 429"""
+        adapter = self.manager.session.get_adapter('https://api-capital.backend-capital.com')
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertNotIn(429, adapter.max_retries.status_forcelist)
+        self.assertFalse(adapter.max_retries.is_retry('POST', 503))
+        self.assertTrue(adapter.max_retries.is_retry('GET', 503))
+
+
+if __name__ == '__main__':
+    unittest.main()
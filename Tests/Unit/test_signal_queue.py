@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable webhook signal queue and async ingestion mode.
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from flask import Flask
+
+from src.Webhook.signal_queue import SignalQueue
+from src.Webhook.routes import init_routes
+from src.Webhook import WEBHOOK_TOKEN
+
+
+def make_signal(order_id, ticker='BTCUSD', action='BUY', size=1):
+    return {'order_id': order_id, 'ticker': ticker, 'order_action': action,
+            'position_size': size, 'price': 100.0}
+
+
+class RecordingExecutor:
+    """Records executions; each takes ``delay`` seconds."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.running = {}
+        self.overlaps = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, data):
+        symbol = data['ticker']
+        with self.lock:
+            if self.running.get(symbol):
+                self.overlaps += 1
+            self.running[symbol] = True
+            self.calls.append(data['order_id'])
+        time.sleep(self.delay)
+        with self.lock:
+            self.running[symbol] = False
+        if data.get('fail'):
+            return {'status': 'error', 'message': 'rejected by broker'}
+        return {'dealReference': f"o_{data['order_id']}"}
+
+
+class TestSignalQueue(unittest.TestCase):
+    """Persistence, ordering and idempotency of queued signals."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        self.executor = RecordingExecutor()
+        self.queue = SignalQueue(self.db_path, execute=self.executor, workers=4, poll_interval=0.05)
+
+    def tearDown(self):
+        self.queue.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _wait_until_drained(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            depth = self.queue.depth()
+            if not depth.get('queued') and not depth.get('running'):
+                return
+            time.sleep(0.01)
+        self.fail(f"Queue not drained: {self.queue.depth()}")
+
+    def _signal_row(self, signal_id):
+        db = sqlite3.connect(self.db_path)
+        db.row_factory = sqlite3.Row
+        try:
+            return db.execute('SELECT * FROM signals WHERE id = ?', (signal_id,)).fetchone()
+        finally:
+            db.close()
+
+    def test_enqueue_persists_signal_without_executing(self):
+        signal_id, status, duplicate = self.queue.enqueue(make_signal('order-1'))
+
+        self.assertEqual(status, 'queued')
+        self.assertFalse(duplicate)
+        row = self._signal_row(signal_id)
+        self.assertEqual(row['order_id'], 'order-1')
+        self.assertEqual(row['symbol'], 'BTCUSD')
+        self.assertEqual(row['status'], 'queued')
+        self.assertEqual(self.executor.calls, [])
+
+    def test_duplicate_order_id_returns_original_signal(self):
+        first = self.queue.enqueue(make_signal('order-1'))
+        second = self.queue.enqueue(make_signal('order-1'))
+
+        self.assertEqual(second[0], first[0])
+        self.assertTrue(second[2])
+        self.queue.start()
+        self._wait_until_drained()
+        self.assertEqual(self.executor.calls, ['order-1'])
+
+    def test_signal_rows_record_outcome(self):
+        ok_id = self.queue.enqueue(make_signal('order-ok'))[0]
+        bad = make_signal('order-bad', ticker='ETHUSD')
+        bad['fail'] = True
+        bad_id = self.queue.enqueue(bad)[0]
+        self.queue.start()
+        self._wait_until_drained()
+
+        ok_row = self._signal_row(ok_id)
+        self.assertEqual(ok_row['status'], 'success')
+        self.assertEqual(ok_row['deal_id'], 'o_order-ok')
+        bad_row = self._signal_row(bad_id)
+        self.assertEqual(bad_row['status'], 'failed')
+        self.assertEqual(bad_row['error'], 'rejected by broker')
+        self.assertEqual(self.queue.status('order-ok')['deal_reference'], 'o_order-ok')
+
+    def test_same_symbol_runs_in_order_other_symbols_in_parallel(self):
+        self.executor.delay = 0.05
+        for i in range(4):
+            self.queue.enqueue(make_signal(f'btc-{i}', ticker='BTCUSD'))
+            self.queue.enqueue(make_signal(f'eth-{i}', ticker='ETHUSD'))
+        start = time.monotonic()
+        self.queue.start()
+        self._wait_until_drained()
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(self.executor.overlaps, 0)
+        btc = [c for c in self.executor.calls if c.startswith('btc')]
+        eth = [c for c in self.executor.calls if c.startswith('eth')]
+        self.assertEqual(btc, [f'btc-{i}' for i in range(4)])
+        self.assertEqual(eth, [f'eth-{i}' for i in range(4)])
+        # Two symbols in parallel: about 4 executions long, not 8
+        self.assertLess(elapsed, 0.35)
+
+    def test_queue_survives_restart_and_interrupted_jobs_fail(self):
+        queued_id = self.queue.enqueue(make_signal('order-queued'))[0]
+        stale_id = self.queue.enqueue(make_signal('order-stale', ticker='ETHUSD'))[0]
+        live_id = self.queue.enqueue(make_signal('order-live', ticker='SOLUSD'))[0]
+        db = sqlite3.connect(self.db_path)
+        db.execute("UPDATE signal_queue SET status = 'running', started_at = ? WHERE order_id = 'order-stale'",
+                   (time.time() - 600,))
+        # Still being executed by a live worker of another process
+        db.execute("UPDATE signal_queue SET status = 'running', started_at = ? WHERE order_id = 'order-live'",
+                   (time.time(),))
+        db.commit()
+        db.close()
+
+        restarted = SignalQueue(self.db_path, execute=self.executor, workers=2, poll_interval=0.05)
+        restarted.start()
+        try:
+            deadline = time.monotonic() + 5
+            while self._signal_row(queued_id)['status'] != 'success' and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            restarted.stop()
+
+        self.assertEqual(self._signal_row(queued_id)['status'], 'success')
+        self.assertEqual(self._signal_row(stale_id)['status'], 'failed')
+        self.assertEqual(self.queue.depth().get('running'), 1)
+        self.assertNotEqual(self._signal_row(live_id)['status'], 'failed')
+        self.assertEqual(self.executor.calls, ['order-queued'])
+
+    def test_slow_job_of_a_live_worker_is_not_recovered(self):
+        self.queue.stop()
+        executor = RecordingExecutor(delay=0.6)
+        self.queue = SignalQueue(self.db_path, execute=executor, workers=2, poll_interval=0.05, stale_after=0.2)
+        slow_id = self.queue.enqueue(make_signal('order-slow'))[0]
+        self.queue.enqueue(make_signal('order-next'))
+        self.queue.start()
+
+        time.sleep(0.45)
+        self.queue._recover()
+        self.assertEqual(self._signal_row(slow_id)['status'], 'processing')
+        self.assertEqual(executor.calls, ['order-slow'])
+
+        self._wait_until_drained()
+        self.assertEqual(self._signal_row(slow_id)['status'], 'success')
+        self.assertEqual(executor.calls, ['order-slow', 'order-next'])
+        self.assertEqual(executor.overlaps, 0)
+
+    def test_recording_error_fails_the_job_and_keeps_the_worker(self):
+        finish = self.queue._finish
+        failures = []
+
+        def flaky_finish(job, job_status, *args, **kwargs):
+            if not failures:
+                failures.append(job['order_id'])
+                raise sqlite3.OperationalError('database is locked')
+            return finish(job, job_status, *args, **kwargs)
+
+        self.queue._finish = flaky_finish
+        self.queue.workers = 1
+        first_id = self.queue.enqueue(make_signal('order-1'))[0]
+        second_id = self.queue.enqueue(make_signal('order-2'))[0]
+        self.queue.start()
+        self._wait_until_drained()
+
+        self.assertEqual(failures, ['order-1'])
+        self.assertEqual(self._signal_row(first_id)['status'], 'failed')
+        self.assertIn('check the broker', self._signal_row(first_id)['error'])
+        self.assertEqual(self._signal_row(second_id)['status'], 'success')
+
+
+class TestAsyncIngestionRoute(unittest.TestCase):
+    """/webhook answers 202 in async ingestion mode."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            TESTING=True,
+            WEBHOOK_ASYNC_INGESTION=True,
+            SIGNAL_QUEUE_WORKERS=2,
+            DATABASE=os.path.join(self.tmp_dir, 'signals.db')
+        )
+        init_routes(self.app)
+        self.queue = self.app.extensions['signal_queue']
+        self.executor = RecordingExecutor(delay=0.2)
+        self.queue.execute = self.executor
+        self.client = self.app.test_client()
+        self.headers = {'X-Trading-Token': WEBHOOK_TOKEN}
+
+    def tearDown(self):
+        self.queue.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_webhook_acknowledges_before_execution(self):
+        start = time.monotonic()
+        response = self.client.post('/webhook', json=make_signal('route-1'), headers=self.headers)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['status'], 'queued')
+        self.assertLess(elapsed, 0.2)
+
+        duplicate = self.client.post('/webhook', json=make_signal('route-1'), headers=self.headers)
+        self.assertEqual(duplicate.status_code, 200)
+        self.assertTrue(duplicate.get_json()['duplicate'])
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            status = self.client.get('/webhook/status/route-1', headers=self.headers).get_json()
+            if status['status'] == 'success':
+                break
+            time.sleep(0.02)
+        self.assertEqual(status['deal_reference'], 'o_route-1')
+        self.assertEqual(self.executor.calls, ['route-1'])
+
+    def test_invalid_signal_is_rejected_synchronously(self):
+        response = self.client.post('/webhook', json={'order_id': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.queue.depth(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-behind signal writer.
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+import logging
+from unittest.mock import patch
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.Webhook.signal_writer import SignalWriter
+from src.Webhook.database import SIGNALS_TABLE_SQL
+from src.Webhook.utils import save_signal, save_trade_result
+
+
+class TestSignalWriter(unittest.TestCase):
+    """Group commits, isolation of failures and read-your-writes."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'signals.db')
+        db = sqlite3.connect(self.db_path)
+        db.execute(SIGNALS_TABLE_SQL)
+        db.execute('CREATE TABLE positions (id INTEGER PRIMARY KEY AUTOINCREMENT, signal_id INTEGER, '
+                   'deal_id TEXT, symbol TEXT, direction TEXT, size REAL, entry_price REAL)')
+        db.commit()
+        db.close()
+        self.writer = SignalWriter(self.db_path, max_delay=0.01)
+
+    def tearDown(self):
+        self.writer.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _read(self, sql, params=()):
+        db = sqlite3.connect(self.db_path)
+        try:
+            return db.execute(sql, params).fetchall()
+        finally:
+            db.close()
+
+    def test_insert_returns_row_id(self):
+        first = self.writer.insert_signal({'order_id': 'a', 'symbol': 'BTCUSD'}).result(timeout=5)
+        second = self.writer.insert_signal({'order_id': 'b', 'symbol': 'BTCUSD'}).result(timeout=5)
+        self.assertEqual(second, first + 1)
+        self.assertEqual(self._read('SELECT order_id FROM signals WHERE id = ?', (first,)), [('a',)])
+
+    def test_concurrent_writes_share_transactions(self):
+        barrier = threading.Barrier(20)
+        ids = []
+
+        def write(n):
+            barrier.wait()
+            signal_id = self.writer.insert_signal({'order_id': f'order-{n}', 'symbol': 'EURUSD'}).result(timeout=5)
+            self.writer.update_signal(signal_id, status='success', deal_id=f'deal-{n}')
+            ids.append(signal_id)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.writer.sync(timeout=5)
+
+        self.assertEqual(len(set(ids)), 20)
+        self.assertEqual(self.writer.stats['writes'], 40)
+        self.assertLess(self.writer.stats['transactions'], 40)
+        self.assertEqual(self._read("SELECT COUNT(*) FROM signals WHERE status = 'success'"), [(20,)])
+
+    def test_sync_gives_read_your_writes(self):
+        signal_id = self.writer.insert_signal({'order_id': 'a'}).result(timeout=5)
+        self.writer.update_signal(signal_id, status='failed', error='rejected')
+
+        rows = self.writer.query('SELECT status, error FROM signals WHERE id = ?', (signal_id,))
+        self.assertEqual(tuple(rows[0]), ('failed', 'rejected'))
+
+    def test_failing_write_does_not_drop_its_group(self):
+        good = self.writer.insert_signal({'order_id': 'good'})
+        bad = self.writer.insert_signal({'no_such_column': 1})
+        also_good = self.writer.insert_signal({'order_id': 'also-good'})
+
+        self.assertIsInstance(good.result(timeout=5), int)
+        self.assertIsInstance(also_good.result(timeout=5), int)
+        with self.assertRaises(sqlite3.OperationalError):
+            bad.result(timeout=5)
+        self.assertTrue(self.writer.sync(timeout=5))
+        self.assertEqual(self.writer.stats['failed'], 1)
+        self.assertEqual(self._read('SELECT COUNT(*) FROM signals'), [(2,)])
+
+    def test_unexpected_error_fails_the_write_and_keeps_the_thread(self):
+        with patch.object(self.writer, '_write', side_effect=RuntimeError("boom")):
+            failed = self.writer.insert_signal({'order_id': 'lost'})
+            with self.assertRaises(RuntimeError):
+                failed.result(timeout=5)
+        self.assertTrue(self.writer.sync(timeout=5))
+
+        self.assertIsInstance(self.writer.insert_signal({'order_id': 'a'}).result(timeout=5), int)
+        self.assertEqual(self._read('SELECT order_id FROM signals'), [('a',)])
+
+    def test_sync_writes_directly_when_the_thread_is_gone(self):
+        self.writer.insert_signal({'order_id': 'a'}).result(timeout=5)
+        self.writer.stop()
+        with patch.object(self.writer, '_ensure_started', lambda: None):
+            pending = self.writer.insert_signal({'order_id': 'b'})
+            self.assertTrue(self.writer.sync(timeout=1))
+
+        self.assertIsInstance(pending.result(timeout=0), int)
+        self.assertEqual(self._read('SELECT order_id FROM signals ORDER BY id'), [('a',), ('b',)])
+
+    def test_database_runs_in_wal_mode(self):
+        self.writer.insert_signal({'order_id': 'a'}).result(timeout=5)
+        self.assertEqual(self._read('PRAGMA journal_mode'), [('wal',)])
+
+    def test_save_helpers_accept_the_writer(self):
+        signal_id = save_signal(self.writer, {'order_id': 'tv-1', 'symbol': 'BTCUSD', 'direction': 'buy',
+                                              'quantity': 1, 'price': 100})
+        position_id = save_trade_result(self.writer, signal_id, {'dealId': 'd1', 'epic': 'BTCUSD',
+                                                                 'direction': 'BUY', 'size': 1, 'level': 100})
+
+        self.assertEqual(self._read('SELECT direction, status FROM signals WHERE id = ?', (signal_id,)),
+                         [('BUY', 'pending')])
+        self.assertEqual(self._read('SELECT signal_id, deal_id FROM positions WHERE id = ?', (position_id,)),
+                         [(signal_id, 'd1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
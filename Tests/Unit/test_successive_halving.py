@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the successive-halving parameter search.
+"""
+
+import sys
+import os
+import random
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.successive_halving import halving_schedule, successive_halving
+from src.AI.fallback_optimizer import optimize_parameters, supertrend_strategy
+
+
+def scaled_score_batch(df, param_chunk):
+    """Score is x times the window length; x == 0 fails."""
+    return [{'score': p['x'] * len(df)} if p['x'] != 0 else None for p in param_chunk]
+
+
+class TestHalvingSchedule(unittest.TestCase):
+    """Test cases for halving_schedule"""
+
+    def test_schedule(self):
+        """Windows grow by eta and end with the full history"""
+        self.assertEqual(halving_schedule(900, min_fraction=1 / 9, eta=3, min_bars=10), [100, 300, 900])
+        self.assertEqual(halving_schedule(1000, min_fraction=0.2, eta=3, min_bars=50), [200, 600, 1000])
+
+    def test_short_history(self):
+        """Windows below min_bars are raised; a tiny history is a single rung"""
+        self.assertEqual(halving_schedule(300, min_fraction=0.1, eta=3, min_bars=50), [50, 90, 270, 300])
+        self.assertEqual(halving_schedule(40, min_bars=50), [40])
+
+    def test_invalid(self):
+        """eta below 2 and out-of-range fractions are rejected"""
+        with self.assertRaises(ValueError):
+            halving_schedule(100, eta=1)
+        with self.assertRaises(ValueError):
+            halving_schedule(100, min_fraction=0)
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+    """Test cases for successive_halving"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({'close': np.arange(900, dtype=float)})
+
+    def test_promotion(self):
+        """Only the top 1/eta of each rung is promoted, and rungs are reported"""
+        params = [{'x': x} for x in range(1, 10)] + [{'x': 0}]
+        results = successive_halving(self.df, params, scaled_score_batch, lambda m: m['score'],
+                                     min_fraction=1 / 9, eta=3, min_bars=10)
+
+        by_x = {r['params']['x']: r for r in results}
+        self.assertEqual(results[0]['params'], {'x': 9})
+        self.assertEqual(results[0]['bars'], 900)
+        self.assertEqual(results[0]['objective_value'], 9 * 900)
+        self.assertEqual(sorted(x for x, r in by_x.items() if r['rung'] == 2), [9])
+        self.assertEqual(sorted(x for x, r in by_x.items() if r['rung'] == 1), [7, 8])
+        self.assertEqual(by_x[1]['bars'], 100)
+        self.assertIsNone(by_x[0]['metrics'])
+        self.assertEqual(by_x[0]['objective_value'], float('-inf'))
+
+
+    def test_infinite_score_is_promoted(self):
+        """A +inf objective ranks first and reaches the full history; failures stop"""
+        params = [{'x': x} for x in range(1, 9)] + [{'x': 99}, {'x': 0}]
+
+        def objective(metrics):
+            return float('inf') if metrics['score'] >= 99 * 100 else metrics['score']
+
+        results = successive_halving(self.df, params, scaled_score_batch, objective,
+                                     min_fraction=1 / 9, eta=3, min_bars=10)
+
+        self.assertEqual(results[0]['params'], {'x': 99})
+        self.assertEqual(results[0]['objective_value'], float('inf'))
+        self.assertEqual(results[0]['bars'], 900)
+        self.assertEqual(results[-1]['params'], {'x': 0})
+        self.assertEqual(results[-1]['rung'], 0)
+
+class TestOptimizerHalvingMode(unittest.TestCase):
+    """optimize_parameters with search_mode='halving'"""
+
+    def test_halving_mode(self):
+        """The best candidate is scored on the full history"""
+        rng = np.random.default_rng(2)
+        n = 1200
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        df = pd.DataFrame({
+            'open': close,
+            'high': close * 1.003,
+            'low': close * 0.997,
+            'close': close
+        }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+        search_space = {
+            'atr_period': [5, 30],
+            'atr_multiplier': [1.0, 5.0],
+            'stop_loss': [0.5, 3.0],
+            'take_profit': [1.0, 6.0]
+        }
+
+        random.seed(4)
+        best_params, best_value, results = optimize_parameters(
+            df, supertrend_strategy, search_space, num_evals=27, search_mode='halving', use_cache=False)
+
+        self.assertEqual(len(results), 27)
+        self.assertEqual(results[0]['params'], best_params)
+        self.assertEqual(results[0]['objective_value'], best_value)
+        self.assertEqual(results[0]['bars'], n)
+        self.assertEqual(sum(r['bars'] == n for r in results), 3)
+
+        with self.assertRaises(ValueError):
+            optimize_parameters(df, supertrend_strategy, search_space, num_evals=3, search_mode='bogus')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the array-based SuperTrend/ATR kernel.
+
+The kernel is checked against the pandas ATR in TechnicalIndicators and
+against a straightforward transcription of pine_supertrend, with and
+without numba.
+"""
+
+import sys
+import os
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.indicators import supertrend_kernel
+from src.AI.indicators.supertrend_kernel import (
+    rolling_atr,
+    supertrend,
+    trend_signals,
+    true_range
+)
+from src.AI.indicators.technical import TechnicalIndicators
+
+
+def make_prices(n=500, seed=7):
+    """Generate a random walk with consistent high/low/close."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + np.abs(rng.normal(0, 0.004, n)))
+    low = close * (1 - np.abs(rng.normal(0, 0.004, n)))
+    return high, low, close
+
+
+def reference_supertrend(high, low, close, atr_period, multiplier):
+    """Bar-by-bar transcription of pine_supertrend (trend 1 = up)."""
+    atr = TechnicalIndicators.atr(pd.Series(high), pd.Series(low), pd.Series(close), atr_period).values
+    hl2 = (high + low) / 2
+    n = len(close)
+    st = np.full(n, np.nan)
+    trend = np.full(n, -1)
+    upper = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+    for i in range(n):
+        if np.isnan(atr[i]):
+            continue
+        bu = hl2[i] + multiplier * atr[i]
+        bl = hl2[i] - multiplier * atr[i]
+        if i == 0 or np.isnan(atr[i - 1]):
+            upper[i], lower[i], trend[i] = bu, bl, -1
+        else:
+            upper[i] = bu if (bu < upper[i - 1] or close[i - 1] > upper[i - 1]) else upper[i - 1]
+            lower[i] = bl if (bl > lower[i - 1] or close[i - 1] < lower[i - 1]) else lower[i - 1]
+            if trend[i - 1] == -1:
+                trend[i] = 1 if close[i] > upper[i] else -1
+            else:
+                trend[i] = -1 if close[i] < lower[i] else 1
+        st[i] = lower[i] if trend[i] == 1 else upper[i]
+    return st, trend
+
+
+class TestSuperTrendKernel(unittest.TestCase):
+    """Test cases for the SuperTrend/ATR kernel"""
+
+    def test_atr_matches_pandas(self):
+        """rolling_atr(true_range(...)) should match TechnicalIndicators.atr"""
+        high, low, close = make_prices()
+        expected = TechnicalIndicators.atr(pd.Series(high), pd.Series(low), pd.Series(close), 14).values
+        actual = rolling_atr(true_range(high, low, close), 14)
+        np.testing.assert_allclose(actual, expected, equal_nan=True)
+
+    def test_supertrend_matches_reference(self):
+        """The compiled and pure-Python passes should match the reference loop"""
+        high, low, close = make_prices()
+        expected_st, expected_trend = reference_supertrend(high, low, close, 10, 3.0)
+
+        st, trend = supertrend(high, low, close, 10, 3.0)
+        np.testing.assert_allclose(st, expected_st, equal_nan=True)
+        np.testing.assert_array_equal(trend, expected_trend)
+
+        numba_available = supertrend_kernel.NUMBA_AVAILABLE
+        try:
+            supertrend_kernel.NUMBA_AVAILABLE = False
+            st_py, trend_py = supertrend(high, low, close, 10, 3.0)
+        finally:
+            supertrend_kernel.NUMBA_AVAILABLE = numba_available
+        np.testing.assert_allclose(st_py, expected_st, equal_nan=True)
+        np.testing.assert_array_equal(trend_py, expected_trend)
+
+    def test_trend_signals(self):
+        """Signals fire only on trend flips"""
+        signals = trend_signals(np.array([-1, -1, 1, 1, -1, -1]))
+        np.testing.assert_array_equal(signals, [0, 0, 1, 0, -1, 0])
+
+    def test_short_input(self):
+        """Inputs shorter than the ATR window produce no trend"""
+        high, low, close = make_prices(n=5)
+        st, trend = supertrend(high, low, close, 10, 3.0)
+        self.assertTrue(np.isnan(st).all())
+        self.assertTrue((trend == -1).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for walk-forward optimization.
+"""
+
+import sys
+import os
+import unittest
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.ERROR)
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.AI.fallback_optimizer import evaluate_parameter_batch
+from src.AI.walk_forward import evaluate_fold_tasks, precompute_signals, walk_forward_folds, walk_forward_optimize
+
+
+class TestWalkForward(unittest.TestCase):
+    """Test cases for the walk-forward pipeline"""
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        n = 1000
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        self.df = pd.DataFrame({
+            'open': close,
+            'high': close * (1 + np.abs(rng.normal(0, 0.004, n))),
+            'low': close * (1 - np.abs(rng.normal(0, 0.004, n))),
+            'close': close
+        }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+        self.param_sets = [
+            {'atr_period': 10, 'atr_multiplier': 2.0, 'stop_loss': 1.0, 'take_profit': 2.0},
+            {'atr_period': 10, 'atr_multiplier': 2.0, 'stop_loss': 3.0, 'take_profit': 6.0},
+            {'atr_period': 21, 'atr_multiplier': 3.5, 'stop_loss': 0.5, 'take_profit': 8.0},
+            {'atr_period': 0},
+        ]
+
+    def test_folds(self):
+        """Folds roll forward by the test window and stay inside the history"""
+        self.assertEqual(walk_forward_folds(100, 50, 20), [(0, 50, 70), (20, 70, 90)])
+        self.assertEqual(walk_forward_folds(100, 50, 20, step=40), [(0, 50, 70)])
+        self.assertEqual(walk_forward_folds(60, 50, 20), [])
+        with self.assertRaises(ValueError):
+            walk_forward_folds(100, 1, 20)
+
+    def test_signals_shared_between_settings(self):
+        """One signal series per distinct indicator setting"""
+        frame, columns = precompute_signals(self.df, self.param_sets)
+        self.assertEqual(columns, ['signal_0', 'signal_0', 'signal_1', None])
+        self.assertEqual(list(frame.columns), ['high', 'low', 'close', 'signal_0', 'signal_1'])
+
+    def test_first_fold_matches_prefix_backtest(self):
+        """Indicators are causal, so a fold at the start equals a plain backtest of the prefix"""
+        frame, columns = precompute_signals(self.df, self.param_sets[:3])
+        tasks = [{'start': 0, 'end': 400, 'signal': c, 'params': p}
+                 for c, p in zip(columns, self.param_sets[:3])]
+        expected = evaluate_parameter_batch(self.df.iloc[:400], self.param_sets[:3])
+        for metrics, reference in zip(evaluate_fold_tasks(frame, tasks), expected):
+            for key, value in reference.items():
+                self.assertAlmostEqual(metrics[key], value, places=8, msg=key)
+
+    def test_workers_agree(self):
+        """Parallel folds pick the same winners as sequential ones"""
+        sequential = walk_forward_optimize(self.df, {}, train_bars=400, test_bars=150,
+                                           param_sets=self.param_sets, workers=1)
+        parallel = walk_forward_optimize(self.df, {}, train_bars=400, test_bars=150,
+                                         param_sets=self.param_sets, workers=2)
+        self.assertEqual(len(sequential), 4)
+        self.assertEqual([f['test_from'] for f in sequential][0], str(self.df.index[400]))
+        for a, b in zip(sequential, parallel):
+            self.assertEqual(a['params'], b['params'])
+            self.assertAlmostEqual(a['test_objective'], b['test_objective'])
+            self.assertIsNotNone(a['test_metrics'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 # Patch: Use absolute imports for validators
 from src.Webhook.validators import (
+    parse_webhook_signal,
     validate_webhook_data,
     validate_close_position_data,
     sanitize_input,
@@ -184,6 +185,60 @@ class TestWebhookDataValidation(unittest.TestCase):
         self.assertTrue(any("trailing_stop is enabled" in e for e in errors))
 
 
+class TestWebhookSignalParsing(unittest.TestCase):
+    """Test cases for the normalized signal returned by parse_webhook_signal."""
+
+    def test_legacy_keys_are_normalized(self):
+        """Test coercion of a legacy payload with string values."""
+        signal, errors = parse_webhook_signal({
+            'order_id': 'o1', 'ticker': 'BTCUSD', 'order_action': 'buy',
+            'position_size': '0.5', 'price': '100', 'stop_loss': '90', 'comment': 'x'
+        })
+        self.assertEqual(errors, [])
+        self.assertEqual(signal.symbol, 'BTCUSD')
+        self.assertEqual(signal.direction, 'BUY')
+        self.assertEqual(signal.quantity, 0.5)
+        self.assertEqual(signal.stop_loss, 90.0)
+        self.assertIsNone(signal.take_profit)
+        self.assertFalse(signal.trailing_stop)
+
+        payload = signal.to_payload()
+        self.assertEqual(payload['order_action'], 'BUY')
+        self.assertEqual(payload['direction'], 'BUY')
+        self.assertEqual(payload['position_size'], 0.5)
+        self.assertEqual(payload['quantity'], 0.5)
+        self.assertEqual(payload['price'], 100.0)
+        self.assertEqual(payload['comment'], 'x')
+
+    def test_new_keys_are_accepted(self):
+        """Test a payload using symbol/direction/quantity."""
+        signal, errors = parse_webhook_signal({
+            'order_id': 'o2', 'symbol': 'EURUSD', 'direction': 'SELL', 'quantity': 2
+        })
+        self.assertEqual(errors, [])
+        self.assertEqual(signal.to_payload()['ticker'], 'EURUSD')
+
+    def test_invalid_payload_returns_no_signal(self):
+        """Test that errors and no signal are returned for invalid data."""
+        signal, errors = parse_webhook_signal({'order_id': 'o3', 'ticker': 'BTCUSD'})
+        self.assertIsNone(signal)
+        self.assertIn("Missing required field: order_action or direction", errors)
+
+        signal, errors = parse_webhook_signal(['not', 'an', 'object'])
+        self.assertIsNone(signal)
+        self.assertEqual(errors, ["Payload must be a JSON object"])
+
+    def test_trailing_settings_only_checked_when_enabled(self):
+        """Test that trailing settings are ignored without trailing_stop."""
+        base = {'order_id': 'o4', 'ticker': 'BTCUSD', 'order_action': 'BUY', 'position_size': 1}
+        signal, errors = parse_webhook_signal(dict(base, trailing_step_percent=0))
+        self.assertEqual(errors, [])
+        signal, errors = parse_webhook_signal(dict(base, trailing_stop=True, trailing_offset='15'))
+        self.assertEqual(errors, [])
+        self.assertTrue(signal.trailing_stop)
+        self.assertEqual(signal.trailing_offset, 15.0)
+
+
 class TestClosePositionValidation(unittest.TestCase):
     """Test cases for close position data validation."""
     
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for webhook payload parsing and validation.
+
+Measures the per-request overhead of the schema-driven webhook validator:
+- validate: parse_webhook_signal on an already-decoded payload
+- normalize: validation plus TradingSignal.to_payload
+- body: json.loads of the raw request body plus the above, i.e. everything
+  /webhook does before touching the database or the broker
+
+Usage:
+    python Tools/benchmark_webhook_validator.py [--iterations 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.Webhook.validators import parse_webhook_signal
+
+PAYLOADS = {
+    'legacy': {
+        'order_id': 'tv_123456', 'ticker': 'BTCUSD', 'order_action': 'buy',
+        'position_size': '0.5', 'price': '64250.5', 'stop_loss': '63000', 'take_profit': '66000',
+        'trailing_stop': True, 'trailing_step_percent': '0.5'
+    },
+    'new_keys': {
+        'order_id': 'tv_123457', 'symbol': 'EURUSD', 'direction': 'SELL', 'quantity': 2, 'price': 1.0842
+    },
+    'invalid': {
+        'order_id': 'tv_123458', 'ticker': 'BTC/USD', 'order_action': 'HOLD', 'position_size': 'lots'
+    },
+}
+
+
+def run(iterations: int) -> None:
+    print(f"{'payload':<10} {'stage':<10} {'us/request':>12}")
+    for name, payload in PAYLOADS.items():
+        body = json.dumps(payload).encode('utf-8')
+        stages = {
+            'validate': lambda: parse_webhook_signal(payload),
+            'normalize': lambda: (lambda s: s and s.to_payload())(parse_webhook_signal(payload)[0]),
+            'body': lambda: (lambda s: s and s.to_payload())(parse_webhook_signal(json.loads(body))[0]),
+        }
+        for stage, func in stages.items():
+            # Best of five runs, to skip warm-up and scheduler noise
+            best = min(timeit.repeat(func, number=iterations, repeat=5))
+            print(f"{name:<10} {stage:<10} {best / iterations * 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark webhook payload validation")
+    parser.add_argument('--iterations', type=int, default=100000, help="Calls per timing run")
+    run(parser.parse_args().iterations)
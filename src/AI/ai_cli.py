@@ -16,6 +16,7 @@ Commands:
     get-regime      - Get current volatility regime for a symbol
     calculate-size  - Calculate position size for a symbol
     evaluate-risk   - Evaluate trade risk for a signal
+    optimize        - Optimize strategy parameters for a symbol
     dashboard       - Start the AI dashboard visualization
 """
 
@@ -48,7 +49,7 @@ def parse_args():
     # Main command argument
     parser.add_argument('command', choices=[
         'setup', 'collect-data', 'train-models', 'run-tests',
-        'get-regime', 'calculate-size', 'evaluate-risk', 'dashboard'
+        'get-regime', 'calculate-size', 'evaluate-risk', 'optimize', 'dashboard'
     ], help="Command to execute")
     
     # Common options
@@ -78,6 +79,10 @@ def parse_args():
     parser.add_argument('--signal', type=str, help="JSON string or file path with signal data")
     parser.add_argument('--direction', type=str, choices=['buy', 'sell'], help="Trade direction")
     
+    # Optimization options
+    parser.add_argument('--workers', type=int,
+                        help="Worker processes for parameter optimization (0 for all cores but one)")
+    
     return parser.parse_args()
 
 def execute_setup(args):
@@ -237,6 +242,19 @@ def execute_evaluate_risk(args):
         logger.error(f"Error evaluating trade risk: {e}")
         return 1
 
+def execute_optimize(args):
+    """Execute the optimize command."""
+    from src.AI.parameter_optimizer import main as optimize_main
+    
+    # Set appropriate sys.argv for the optimizer script
+    sys.argv = ['parameter_optimizer.py']
+    if args.symbol:
+        sys.argv.append(f'--symbol={args.symbol}')
+    if args.workers is not None:
+        sys.argv.append(f'--workers={args.workers}')
+        
+    return optimize_main()
+
 def execute_dashboard(args):
     """Execute the dashboard command."""
     logger.info("Dashboard visualization is not yet implemented in CLI")
@@ -263,6 +281,8 @@ def main():
             return execute_calculate_size(args)
         elif args.command == 'evaluate-risk':
             return execute_evaluate_risk(args)
+        elif args.command == 'optimize':
+            return execute_optimize(args)
         elif args.command == 'dashboard':
             return execute_dashboard(args)
         else:
@@ -0,0 +1,511 @@
+"""
+Backtest Result Cache for Jamso-AI-Engine
+
+Disk-backed memoization of backtest results in SQLite:
+- Keys hash the price data content, the strategy function identity (its
+  bytecode, defaults, closure values and the source of its module and of the
+  project modules that module depends on) and the canonicalized parameter
+  dictionary; other code changes need a ``CACHE_VERSION`` bump
+- Values are pickled results (metrics dicts, frames, BacktestResult objects)
+- Entries are evicted by age and by total stored size, least recently used
+  first
+- Cache failures are logged and treated as misses; they never stop a
+  backtest
+
+The optimizers, ``PerformanceMonitor.run_backtest`` and the visualization
+tools share the default cache returned by ``get_default_cache``. Set
+``BACKTEST_CACHE_PATH`` to move it or ``BACKTEST_CACHE_ENABLED=false`` to
+turn it off.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.AI.parallel_evaluator import BatchEvaluator, evaluate_in_parallel
+
+logger = logging.getLogger(__name__)
+
+# Cache keys include the source of the strategy's module and of every module
+# under src/ that it references, directly or through those modules' globals.
+# Code reached any other way (third-party packages, modules imported inside a
+# function, files read at run time) is NOT tracked: bump CACHE_VERSION by hand
+# when such a change alters backtest results, or stale results are served.
+CACHE_VERSION = 1
+
+# Modules under this directory are hashed into strategy identities
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_CACHE_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'Database', 'Backtest', 'backtest_cache.db'
+))
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Hash of a frame's index, column names and values."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _code_digest(code: types.CodeType, digest: Any) -> None:
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _code_digest(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+_module_digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_module_digests_lock = threading.Lock()
+
+
+def _module_digest(module_name: Optional[str]) -> str:
+    """Hash of a module's source file, re-read only when the file changes."""
+    module = sys.modules.get(module_name or '')
+    path = getattr(module, '__file__', None)
+    if not path:
+        return ''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ''
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _module_digests_lock:
+        cached = _module_digests.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=12).hexdigest()
+    except OSError:
+        return ''
+    with _module_digests_lock:
+        _module_digests[path] = (stamp, digest)
+    return digest
+
+
+_module_dependencies: Dict[str, List[str]] = {}
+
+
+def _is_project_module(module: Any) -> bool:
+    path = getattr(module, '__file__', None)
+    return bool(path) and os.path.abspath(path).startswith(_SOURCE_ROOT + os.sep)
+
+
+def _dependencies(module_name: str) -> List[str]:
+    """
+    A module and the project modules it references through its globals
+    (imported modules, and the modules of imported functions and classes),
+    transitively. Computed once per module.
+    """
+    with _module_digests_lock:
+        cached = _module_dependencies.get(module_name)
+    if cached is not None:
+        return cached
+
+    found = {module_name}
+    pending = [module_name]
+    while pending:
+        module = sys.modules.get(pending.pop())
+        for value in list(vars(module).values()) if module is not None else ():
+            try:
+                name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+            except Exception:
+                # Lazy proxies and similar objects may fail on attribute access
+                continue
+            if not isinstance(name, str) or name in found or not _is_project_module(sys.modules.get(name)):
+                continue
+            found.add(name)
+            pending.append(name)
+
+    dependencies = sorted(found)
+    with _module_digests_lock:
+        _module_dependencies[module_name] = dependencies
+    return dependencies
+
+
+def _dependency_digest(module_name: Optional[str]) -> str:
+    """Hash of the source of a module and of the project modules it depends on."""
+    if not module_name:
+        return ''
+    digest = hashlib.blake2b(digest_size=12)
+    for name in _dependencies(module_name):
+        digest.update(f"{name}:{_module_digest(name)};".encode())
+    return digest.hexdigest()
+
+
+def _bound_value(value: Any, seen: frozenset) -> Any:
+    return _identity(value, seen) if callable(value) else value
+
+
+def _identity(fn: Callable, seen: frozenset) -> str:
+    if isinstance(fn, functools.partial):
+        args = [_bound_value(a, seen) for a in fn.args]
+        kwargs = {k: _bound_value(v, seen) for k, v in (fn.keywords or {}).items()}
+        bound = canonical_params({'args': args, 'kwargs': kwargs})
+        return f"partial({_identity(fn.func, seen)}, {bound})"
+
+    name = f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+    code = getattr(fn, '__code__', None)
+    if code is None or id(fn) in seen:
+        return name
+    seen = seen | {id(fn)}
+
+    digest = hashlib.blake2b(digest_size=12)
+    _code_digest(code, digest)
+    closure = []
+    for cell in getattr(fn, '__closure__', None) or ():
+        try:
+            closure.append(cell.cell_contents)
+        except ValueError:
+            # Cell not yet bound
+            closure.append(None)
+    digest.update(canonical_params({
+        'defaults': [_bound_value(v, seen) for v in (getattr(fn, '__defaults__', None) or ())],
+        'kwdefaults': {k: _bound_value(v, seen) for k, v in (getattr(fn, '__kwdefaults__', None) or {}).items()},
+        'closure': [_bound_value(v, seen) for v in closure],
+        'module': _dependency_digest(getattr(fn, '__module__', None))
+    }).encode())
+    return f"{name}:{digest.hexdigest()}"
+
+
+def strategy_identity(fn: Callable) -> str:
+    """
+    Stable identity of a strategy function.
+
+    Combines the qualified name with a hash of the bytecode, the default
+    argument values, the values captured by closures and the source of the
+    defining module and the project modules it depends on, so editing the
+    function or any helper it reaches through module globals, or building
+    it with other captured settings, invalidates its cached results.
+    ``functools.partial`` objects include their bound arguments. See
+    ``CACHE_VERSION`` for what is not tracked.
+    """
+    return _identity(fn, frozenset())
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if isinstance(value, (pd.Timestamp, np.ndarray)):
+        return str(value)
+    return repr(value)
+
+
+def canonical_params(params: Dict[str, Any]) -> str:
+    """JSON form of a parameter dict with sorted keys and plain scalars."""
+    return json.dumps(params, sort_keys=True, default=_json_default, separators=(',', ':'))
+
+
+def _make_key(fingerprint: str, identity: str, params: Dict[str, Any]) -> str:
+    raw = f"{CACHE_VERSION}|{fingerprint}|{identity}|{canonical_params(params)}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class BacktestCache:
+    """
+    SQLite store of backtest results.
+
+    Safe to share between threads and between the worker processes of the
+    parallel optimizer: every operation uses its own short-lived connection.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, max_age_days: float = 30.0,
+                 max_size_mb: float = 256.0, evict_every: int = 200):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path to the SQLite database
+            max_age_days: Entries older than this are evicted
+            max_size_mb: Total pickled size kept before least recently used
+                entries are evicted
+            evict_every: Run eviction after this many writes
+        """
+        self.db_path = db_path
+        self.max_age_seconds = max_age_days * 86400
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _create_tables(self) -> None:
+        """Create the cache table if it doesn't exist."""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS backtest_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_backtest_cache_accessed ON backtest_cache (accessed_at)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(fingerprint: str, strategy: Callable, params: Dict[str, Any]) -> str:
+        """
+        Cache key for one backtest.
+
+        Args:
+            fingerprint: ``data_fingerprint`` of the price data
+            strategy: Strategy or evaluator function producing the result
+            params: Strategy parameters
+        """
+        return _make_key(fingerprint, strategy_identity(strategy), params)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        """Return cached values for the keys that are present."""
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, Any] = {}
+        try:
+            conn = self._connect()
+            try:
+                for start in range(0, len(keys), 500):
+                    chunk = list(keys[start:start + 500])
+                    rows = conn.execute(
+                        f"SELECT cache_key, value FROM backtest_cache WHERE created_at >= ? "
+                        f"AND cache_key IN ({','.join('?' * len(chunk))})",
+                        [now - self.max_age_seconds] + chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        try:
+                            found[key] = pickle.loads(blob)
+                        except Exception as e:
+                            logger.warning(f"Discarding unreadable cache entry: {str(e)}")
+                if found:
+                    conn.executemany("UPDATE backtest_cache SET accessed_at = ? WHERE cache_key = ?",
+                                     [(now, key) for key in found])
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Backtest cache read failed: {str(e)}")
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None."""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Sequence[Tuple[str, Any]]) -> None:
+        """Store several values in one transaction."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items:
+            try:
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.warning(f"Result is not cacheable: {str(e)}")
+                continue
+            rows.append((key, sqlite3.Binary(blob), len(blob), now, now))
+        try:
+            conn = self._connect()
+            try:
+                conn.executemany("INSERT OR REPLACE INTO backtest_cache VALUES (?, ?, ?, ?, ?)", rows)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Backtest cache write failed: {str(e)}")
+            return
+
+        with self._lock:
+            self._writes += len(rows)
+            due = self._writes >= self.evict_every
+            if due:
+                self._writes = 0
+        if due:
+            self.evict()
+
+    def put(self, key: str, value: Any) -> None:
+        """Store one value."""
+        self.put_many([(key, value)])
+
+    def evict(self) -> int:
+        """
+        Remove expired entries, then least recently used ones until the
+        cache fits in ``max_size_mb``.
+
+        Returns:
+            Number of entries removed
+        """
+        try:
+            conn = self._connect()
+            try:
+                removed = conn.execute("DELETE FROM backtest_cache WHERE created_at < ?",
+                                       (time.time() - self.max_age_seconds,)).rowcount
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM backtest_cache").fetchone()[0]
+                if total > self.max_size_bytes:
+                    excess = total - self.max_size_bytes
+                    doomed = []
+                    for key, size in conn.execute(
+                            "SELECT cache_key, size FROM backtest_cache ORDER BY accessed_at"):
+                        doomed.append((key,))
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    conn.executemany("DELETE FROM backtest_cache WHERE cache_key = ?", doomed)
+                    removed += len(doomed)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Backtest cache eviction failed: {str(e)}")
+            return 0
+        if removed:
+            logger.info(f"Evicted {removed} backtest cache entries")
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM backtest_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_or_compute(self, df: pd.DataFrame, strategy: Callable, params: Dict[str, Any],
+                       compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for a backtest, running ``compute`` on a miss.
+
+        Results of None are not cached.
+        """
+        key = self.make_key(data_fingerprint(df), strategy, params)
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and the stored size."""
+        entries, size = 0, 0
+        try:
+            conn = self._connect()
+            try:
+                entries, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM backtest_cache").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Backtest cache stats failed: {str(e)}")
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': size,
+        }
+
+
+_default_cache: Optional[BacktestCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[BacktestCache]:
+    """
+    Shared cache for this process, or None when caching is disabled or the
+    database cannot be opened.
+    """
+    global _default_cache
+    if os.getenv('BACKTEST_CACHE_ENABLED', 'true').lower() in ('0', 'false', 'no', 'off'):
+        return None
+    path = os.getenv('BACKTEST_CACHE_PATH', DEFAULT_CACHE_PATH)
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.db_path != path:
+            try:
+                _default_cache = BacktestCache(path)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Backtest cache unavailable at {path}: {str(e)}")
+                return None
+        return _default_cache
+
+
+def evaluate_with_cache(
+    df: pd.DataFrame,
+    evaluate_batch: BatchEvaluator,
+    param_sets: Sequence[Dict[str, Any]],
+    cache: Optional[BacktestCache],
+    workers: Optional[int] = 1,
+    max_chunk: int = 64
+) -> Iterator[Tuple[int, Any]]:
+    """
+    ``evaluate_in_parallel`` with a cache in front of it.
+
+    Cached results are yielded first; only the misses are sent to the
+    workers, and their results are stored once the run finishes. With no
+    cache this is ``evaluate_in_parallel``.
+    """
+    param_sets = list(param_sets)
+    if cache is None:
+        yield from evaluate_in_parallel(df, evaluate_batch, param_sets, workers=workers, max_chunk=max_chunk)
+        return
+
+    fingerprint = data_fingerprint(df)
+    identity = strategy_identity(evaluate_batch)
+    keys = [_make_key(fingerprint, identity, params) for params in param_sets]
+    cached = cache.get_many(keys)
+
+    missing: List[int] = []
+    for i, key in enumerate(keys):
+        if key in cached:
+            yield i, cached[key]
+        else:
+            missing.append(i)
+    if not missing:
+        return
+
+    fresh: List[Tuple[str, Any]] = []
+    try:
+        for position, result in evaluate_in_parallel(df, evaluate_batch, [param_sets[i] for i in missing],
+                                                     workers=workers, max_chunk=max_chunk):
+            i = missing[position]
+            if result is not None:
+                fresh.append((keys[i], result))
+            yield i, result
+    finally:
+        cache.put_many(fresh)
@@ -0,0 +1,533 @@
+"""
+Array-based Backtest Core for Jamso-AI-Engine
+
+Event-driven backtest of signal-based strategies with fixed percentage
+stop-loss and take-profit, working on contiguous float64 arrays:
+- Trades are written into a preallocated structured array
+- The equity curve is filled in place, one value per bar
+- The bar loop is JIT-compiled with numba when it is installed
+
+``fallback_optimizer.backtest_strategy`` is a thin pandas wrapper around
+``run_backtest_arrays`` and ``trades_to_frame``; ``run_backtest_batch``
+runs the same state machine for many parameter sets side by side.
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# numba is optional; without it the bar loop runs as a plain Python loop
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Trade actions, indexed by the ``action`` code stored in TRADE_DTYPE
+ACTION_NAMES = (
+    'BUY',
+    'SELL',
+    'CLOSE_LONG',
+    'CLOSE_SHORT',
+    'STOP_LOSS_LONG',
+    'TAKE_PROFIT_LONG',
+    'STOP_LOSS_SHORT',
+    'TAKE_PROFIT_SHORT',
+    'CLOSE_FINAL_LONG',
+    'CLOSE_FINAL_SHORT',
+)
+BUY, SELL, CLOSE_LONG, CLOSE_SHORT, STOP_LOSS_LONG, TAKE_PROFIT_LONG, \
+    STOP_LOSS_SHORT, TAKE_PROFIT_SHORT, CLOSE_FINAL_LONG, CLOSE_FINAL_SHORT = range(len(ACTION_NAMES))
+
+# One record per trade event; fields that do not apply to an action are NaN
+TRADE_DTYPE = np.dtype([
+    ('bar', np.int64),
+    ('action', np.int8),
+    ('price', np.float64),
+    ('size', np.float64),
+    ('stop_loss', np.float64),
+    ('take_profit', np.float64),
+    ('pnl', np.float64),
+])
+
+
+def _simulate(high, low, close, signal, stop_loss_pct, take_profit_pct, position_size, initial_equity,
+              t_bar, t_action, t_price, t_size, t_stop, t_take, t_pnl, equity_out):
+    """
+    Bar loop shared by the numba and pure-Python paths.
+
+    Trade fields are written into the ``t_*`` columns and the equity curve
+    into ``equity_out``. Returns the number of trades written.
+    """
+    n = len(close)
+    position = 0.0
+    entry_price = 0.0
+    stop_loss = 0.0
+    take_profit = 0.0
+    equity = initial_equity
+    k = 0
+
+    if n == 0:
+        return 0
+    equity_out[0] = equity
+
+    for i in range(1, n):
+        sig = signal[i]
+
+        if sig == 1 and position <= 0:
+            # Close any short position
+            if position < 0:
+                pnl = (entry_price - close[i]) * abs(position)
+                equity += pnl
+                t_bar[k] = i
+                t_action[k] = CLOSE_SHORT
+                t_price[k] = close[i]
+                t_pnl[k] = pnl
+                t_size[k] = abs(position)
+                k += 1
+
+            # Open long position
+            position = position_size
+            entry_price = close[i]
+            stop_loss = entry_price * (1 - stop_loss_pct / 100)
+            take_profit = entry_price * (1 + take_profit_pct / 100)
+            t_bar[k] = i
+            t_action[k] = BUY
+            t_price[k] = entry_price
+            t_size[k] = position
+            t_stop[k] = stop_loss
+            t_take[k] = take_profit
+            k += 1
+
+        elif sig == -1 and position >= 0:
+            # Close any long position
+            if position > 0:
+                pnl = (close[i] - entry_price) * position
+                equity += pnl
+                t_bar[k] = i
+                t_action[k] = CLOSE_LONG
+                t_price[k] = close[i]
+                t_pnl[k] = pnl
+                t_size[k] = position
+                k += 1
+
+            # Open short position
+            position = -position_size
+            entry_price = close[i]
+            stop_loss = entry_price * (1 + stop_loss_pct / 100)
+            take_profit = entry_price * (1 - take_profit_pct / 100)
+            t_bar[k] = i
+            t_action[k] = SELL
+            t_price[k] = entry_price
+            t_size[k] = abs(position)
+            t_stop[k] = stop_loss
+            t_take[k] = take_profit
+            k += 1
+
+        # Check for stop loss and take profit on existing positions
+        elif position > 0:
+            if low[i] <= stop_loss:
+                pnl = (stop_loss - entry_price) * position
+                equity += pnl
+                t_bar[k] = i
+                t_action[k] = STOP_LOSS_LONG
+                t_price[k] = stop_loss
+                t_pnl[k] = pnl
+                t_size[k] = position
+                k += 1
+                position = 0.0
+            elif high[i] >= take_profit:
+                pnl = (take_profit - entry_price) * position
+                equity += pnl
+                t_bar[k] = i
+                t_action[k] = TAKE_PROFIT_LONG
+                t_price[k] = take_profit
+                t_pnl[k] = pnl
+                t_size[k] = position
+                k += 1
+                position = 0.0
+
+        elif position < 0:
+            if high[i] >= stop_loss:
+                pnl = (entry_price - stop_loss) * abs(position)
+                equity += pnl
+                t_bar[k] = i
+                t_action[k] = STOP_LOSS_SHORT
+                t_price[k] = stop_loss
+                t_pnl[k] = pnl
+                t_size[k] = abs(position)
+                k += 1
+                position = 0.0
+            elif low[i] <= take_profit:
+                pnl = (entry_price - take_profit) * abs(position)
+                equity += pnl
+                t_bar[k] = i
+                t_action[k] = TAKE_PROFIT_SHORT
+                t_price[k] = take_profit
+                t_pnl[k] = pnl
+                t_size[k] = abs(position)
+                k += 1
+                position = 0.0
+
+        equity_out[i] = equity
+
+    # Close any remaining position at the end (not reflected in the equity curve)
+    if position != 0:
+        final_price = close[n - 1]
+        if position > 0:
+            pnl = (final_price - entry_price) * position
+            t_action[k] = CLOSE_FINAL_LONG
+            t_size[k] = position
+        else:
+            pnl = (entry_price - final_price) * abs(position)
+            t_action[k] = CLOSE_FINAL_SHORT
+            t_size[k] = abs(position)
+        t_bar[k] = n - 1
+        t_price[k] = final_price
+        t_pnl[k] = pnl
+        k += 1
+
+    return k
+
+
+if NUMBA_AVAILABLE:
+    _compiled_simulate = njit(cache=True)(_simulate)
+
+
+def _as_float_array(values) -> np.ndarray:
+    """Return a contiguous float64 view/copy of the input."""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def max_trades(signal) -> int:
+    """
+    Upper bound on trade records a signal array can produce.
+
+    Each signal can close one position and open another, each position can
+    hit a stop at most once, and one final close may follow.
+    """
+    return 3 * int(np.count_nonzero(signal)) + 1
+
+
+def run_backtest_arrays(high, low, close, signal, stop_loss_pct: float = 2.0, take_profit_pct: float = 4.0,
+                        position_size: float = 1.0, initial_equity: float = 100.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the stop-loss/take-profit backtest on price and signal arrays.
+
+    Args:
+        high: High prices
+        low: Low prices
+        close: Close prices; entries and signal exits fill at the close
+        signal: 1 to go long, -1 to go short, 0 to hold
+        stop_loss_pct: Stop-loss distance in percent of the entry price
+        take_profit_pct: Take-profit distance in percent of the entry price
+        position_size: Units traded per position
+        initial_equity: Starting equity
+
+    Returns:
+        Tuple of (trades, equity_curve); trades is a TRADE_DTYPE structured
+        array and equity_curve has one value per bar
+    """
+    high = _as_float_array(high)
+    low = _as_float_array(low)
+    close = _as_float_array(close)
+    signal = _as_float_array(signal)
+
+    n = len(close)
+    trades = np.empty(max_trades(signal), dtype=TRADE_DTYPE)
+    for field in ('price', 'size', 'stop_loss', 'take_profit', 'pnl'):
+        trades[field] = np.nan
+    equity = np.empty(n)
+
+    args = (float(stop_loss_pct), float(take_profit_pct), float(position_size), float(initial_equity),
+            trades['bar'], trades['action'], trades['price'], trades['size'],
+            trades['stop_loss'], trades['take_profit'], trades['pnl'], equity)
+
+    if NUMBA_AVAILABLE:
+        count = _compiled_simulate(high, low, close, signal, *args)
+    else:
+        # Native floats in lists are much faster to index than NumPy scalars
+        count = _simulate(high.tolist(), low.tolist(), close.tolist(), signal.tolist(), *args)
+
+    return trades[:count], equity
+
+
+def trades_to_frame(trades: np.ndarray, index: pd.Index) -> pd.DataFrame:
+    """
+    Convert a TRADE_DTYPE array into the trade DataFrame used by calculate_metrics.
+
+    Args:
+        trades: Structured trade array from run_backtest_arrays
+        index: Bar index (usually timestamps) the ``bar`` field refers to
+
+    Returns:
+        DataFrame with timestamp, action, price, size, stop_loss, take_profit
+        and pnl columns, or an empty DataFrame when there are no trades
+    """
+    if len(trades) == 0:
+        return pd.DataFrame()
+
+    return pd.DataFrame({
+        'timestamp': index[trades['bar']],
+        'action': np.asarray(ACTION_NAMES, dtype=object)[trades['action']],
+        'price': trades['price'],
+        'size': trades['size'],
+        'stop_loss': trades['stop_loss'],
+        'take_profit': trades['take_profit'],
+        'pnl': trades['pnl'],
+    })
+
+
+# Per-lane summary statistics produced by run_backtest_batch
+BATCH_STAT_FIELDS = (
+    'final_equity',      # last value of the equity curve
+    'min_drawdown',      # most negative equity / running peak - 1
+    'return_count',      # number of bar-to-bar returns
+    'return_mean',       # mean bar-to-bar return
+    'return_m2',         # sum of squared deviations of bar-to-bar returns
+    'num_records',       # trade records, entries included
+    'num_pnl',           # trade records carrying a pnl
+    'sum_pnl',
+    'num_win',
+    'sum_win',
+    'num_loss',
+    'sum_loss',
+)
+
+
+def _record_exit(j, pnl, stats):
+    """Accumulate a closing trade's pnl into lane ``j``'s statistics."""
+    stats[j, 5] += 1
+    stats[j, 6] += 1
+    stats[j, 7] += pnl
+    if pnl > 0:
+        stats[j, 8] += 1
+        stats[j, 9] += pnl
+    elif pnl < 0:
+        stats[j, 10] += 1
+        stats[j, 11] += pnl
+
+
+def _simulate_batch(high, low, close, signals, stop_loss_pct, take_profit_pct, position_size,
+                    initial_equity, stats):
+    """
+    Scalar-lane bar loop for the numba path.
+
+    ``signals`` is (bars, lanes); every lane runs the same state machine as
+    ``_simulate`` and only its summary statistics are kept.
+    """
+    n = signals.shape[0]
+    lanes = signals.shape[1]
+    position = np.zeros(lanes)
+    entry_price = np.zeros(lanes)
+    stop_loss = np.zeros(lanes)
+    take_profit = np.zeros(lanes)
+    equity = np.full(lanes, initial_equity)
+    peak = np.full(lanes, initial_equity)
+
+    for i in range(1, n):
+        for j in range(lanes):
+            sig = signals[i, j]
+            pos = position[j]
+            prev_equity = equity[j]
+
+            if sig == 1 and pos <= 0:
+                if pos < 0:
+                    pnl = (entry_price[j] - close[i]) * abs(pos)
+                    equity[j] += pnl
+                    _record_exit(j, pnl, stats)
+                position[j] = position_size[j]
+                entry_price[j] = close[i]
+                stop_loss[j] = close[i] * (1 - stop_loss_pct[j] / 100)
+                take_profit[j] = close[i] * (1 + take_profit_pct[j] / 100)
+                stats[j, 5] += 1
+            elif sig == -1 and pos >= 0:
+                if pos > 0:
+                    pnl = (close[i] - entry_price[j]) * pos
+                    equity[j] += pnl
+                    _record_exit(j, pnl, stats)
+                position[j] = -position_size[j]
+                entry_price[j] = close[i]
+                stop_loss[j] = close[i] * (1 + stop_loss_pct[j] / 100)
+                take_profit[j] = close[i] * (1 - take_profit_pct[j] / 100)
+                stats[j, 5] += 1
+            elif pos > 0:
+                if low[i] <= stop_loss[j]:
+                    pnl = (stop_loss[j] - entry_price[j]) * pos
+                    equity[j] += pnl
+                    _record_exit(j, pnl, stats)
+                    position[j] = 0.0
+                elif high[i] >= take_profit[j]:
+                    pnl = (take_profit[j] - entry_price[j]) * pos
+                    equity[j] += pnl
+                    _record_exit(j, pnl, stats)
+                    position[j] = 0.0
+            elif pos < 0:
+                if high[i] >= stop_loss[j]:
+                    pnl = (entry_price[j] - stop_loss[j]) * abs(pos)
+                    equity[j] += pnl
+                    _record_exit(j, pnl, stats)
+                    position[j] = 0.0
+                elif low[i] <= take_profit[j]:
+                    pnl = (entry_price[j] - take_profit[j]) * abs(pos)
+                    equity[j] += pnl
+                    _record_exit(j, pnl, stats)
+                    position[j] = 0.0
+
+            # Running drawdown and Welford update of bar-to-bar returns
+            eq = equity[j]
+            if eq > peak[j]:
+                peak[j] = eq
+            dd = eq / peak[j] - 1
+            if dd < stats[j, 1]:
+                stats[j, 1] = dd
+            ret = eq / prev_equity - 1 if prev_equity != 0 else np.inf
+            stats[j, 2] += 1
+            delta = ret - stats[j, 3]
+            stats[j, 3] += delta / stats[j, 2]
+            stats[j, 4] += delta * (ret - stats[j, 3])
+
+    # Close remaining positions at the last close (trade stats only)
+    for j in range(lanes):
+        pos = position[j]
+        if pos > 0:
+            _record_exit(j, (close[n - 1] - entry_price[j]) * pos, stats)
+        elif pos < 0:
+            _record_exit(j, (entry_price[j] - close[n - 1]) * abs(pos), stats)
+        stats[j, 0] = equity[j]
+
+
+def _simulate_batch_vectorized(high, low, close, signals, stop_loss_pct, take_profit_pct, position_size,
+                               initial_equity, stats):
+    """
+    Pure NumPy path: one pass over the bars, all lanes updated with array ops.
+    """
+    n, lanes = signals.shape
+    position = np.zeros(lanes)
+    entry_price = np.zeros(lanes)
+    stop_loss = np.zeros(lanes)
+    take_profit = np.zeros(lanes)
+    equity = np.full(lanes, float(initial_equity))
+    peak = equity.copy()
+    sl_long = 1 - stop_loss_pct / 100
+    sl_short = 1 + stop_loss_pct / 100
+    tp_long = 1 + take_profit_pct / 100
+    tp_short = 1 - take_profit_pct / 100
+
+    def record_exit(mask, pnl):
+        pnl = np.where(mask, pnl, 0.0)
+        stats[:, 5] += mask
+        stats[:, 6] += mask
+        stats[:, 7] += pnl
+        win = pnl > 0
+        loss = pnl < 0
+        stats[:, 8] += win
+        stats[:, 9] += np.where(win, pnl, 0.0)
+        stats[:, 10] += loss
+        stats[:, 11] += np.where(loss, pnl, 0.0)
+        return pnl
+
+    for i in range(1, n):
+        sig = signals[i]
+        c = close[i]
+        prev_equity = equity.copy()
+
+        go_long = (sig == 1) & (position <= 0)
+        go_short = (sig == -1) & (position >= 0) & ~go_long
+        hold = ~(go_long | go_short)
+        in_long = hold & (position > 0)
+        in_short = hold & (position < 0)
+
+        # Signal exits at the close
+        close_short = go_long & (position < 0)
+        close_long = go_short & (position > 0)
+        equity += record_exit(close_short, (entry_price - c) * np.abs(position))
+        equity += record_exit(close_long, (c - entry_price) * position)
+
+        # Stop-loss takes precedence over take-profit on the same bar
+        sl_hit_long = in_long & (low[i] <= stop_loss)
+        tp_hit_long = in_long & ~sl_hit_long & (high[i] >= take_profit)
+        sl_hit_short = in_short & (high[i] >= stop_loss)
+        tp_hit_short = in_short & ~sl_hit_short & (low[i] <= take_profit)
+        equity += record_exit(sl_hit_long, (stop_loss - entry_price) * position)
+        equity += record_exit(tp_hit_long, (take_profit - entry_price) * position)
+        equity += record_exit(sl_hit_short, (entry_price - stop_loss) * np.abs(position))
+        equity += record_exit(tp_hit_short, (entry_price - take_profit) * np.abs(position))
+        position[sl_hit_long | tp_hit_long | sl_hit_short | tp_hit_short] = 0.0
+
+        # New entries
+        opened = go_long | go_short
+        stats[:, 5] += opened
+        position = np.where(go_long, position_size, np.where(go_short, -position_size, position))
+        entry_price = np.where(opened, c, entry_price)
+        stop_loss = np.where(go_long, c * sl_long, np.where(go_short, c * sl_short, stop_loss))
+        take_profit = np.where(go_long, c * tp_long, np.where(go_short, c * tp_short, take_profit))
+
+        # Running drawdown and Welford update of bar-to-bar returns
+        np.maximum(peak, equity, out=peak)
+        np.minimum(stats[:, 1], equity / peak - 1, out=stats[:, 1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ret = np.where(prev_equity != 0, equity / prev_equity - 1, np.inf)
+        stats[:, 2] += 1
+        delta = ret - stats[:, 3]
+        stats[:, 3] += delta / stats[:, 2]
+        stats[:, 4] += delta * (ret - stats[:, 3])
+
+    # Close remaining positions at the last close (trade stats only)
+    record_exit(position > 0, (close[n - 1] - entry_price) * position)
+    record_exit(position < 0, (entry_price - close[n - 1]) * np.abs(position))
+    stats[:, 0] = equity
+
+
+if NUMBA_AVAILABLE:
+    _record_exit = njit(cache=True)(_record_exit)
+    _compiled_simulate_batch = njit(cache=True)(_simulate_batch)
+
+
+def run_backtest_batch(high, low, close, signals, stop_loss_pct, take_profit_pct, position_size,
+                       initial_equity: float = 100.0) -> np.ndarray:
+    """
+    Run the stop-loss/take-profit backtest for many candidates in one pass.
+
+    Each column of ``signals`` is one candidate ("lane"); lanes share the
+    price arrays and advance bar by bar side by side. Only per-lane summary
+    statistics are kept, so memory does not grow with the number of bars.
+
+    Args:
+        high: High prices
+        low: Low prices
+        close: Close prices
+        signals: (bars, lanes) int8 array of 1 / -1 / 0 signals
+        stop_loss_pct: Per-lane stop-loss distance in percent
+        take_profit_pct: Per-lane take-profit distance in percent
+        position_size: Per-lane units traded per position
+        initial_equity: Starting equity for every lane
+
+    Returns:
+        (lanes, len(BATCH_STAT_FIELDS)) float64 array of summary statistics
+    """
+    high = _as_float_array(high)
+    low = _as_float_array(low)
+    close = _as_float_array(close)
+    signals = np.ascontiguousarray(signals, dtype=np.int8)
+    lanes = signals.shape[1]
+    stop_loss_pct = np.broadcast_to(_as_float_array(stop_loss_pct), (lanes,)).copy()
+    take_profit_pct = np.broadcast_to(_as_float_array(take_profit_pct), (lanes,)).copy()
+    position_size = np.broadcast_to(_as_float_array(position_size), (lanes,)).copy()
+
+    stats = np.zeros((lanes, len(BATCH_STAT_FIELDS)))
+    if len(close) == 0:
+        return stats
+    stats[:, 0] = initial_equity
+
+    if NUMBA_AVAILABLE:
+        _compiled_simulate_batch(high, low, close, signals, stop_loss_pct, take_profit_pct, position_size,
+                                 float(initial_equity), stats)
+    else:
+        _simulate_batch_vectorized(high, low, close, signals, stop_loss_pct, take_profit_pct, position_size,
+                                   float(initial_equity), stats)
+    return stats
@@ -0,0 +1,306 @@
+"""
+Columnar Candle Store for Jamso-AI-Engine
+
+Local on-disk OHLCV history, one file per symbol/resolution:
+- Each file holds fixed-width columns (timestamp as int64 nanoseconds,
+  open/high/low/close/volume as float64) after a small header
+- Reads memory-map the file and return zero-copy, read-only NumPy views
+- Range queries find their bounds by binary search on the timestamp column
+- Updates are append-only; a candle with the last stored timestamp replaces
+  it (the still-forming bar), older candles are ignored. Older history is
+  added by rewriting the series with ``write``
+
+Columns are preallocated with spare capacity and the file is rewritten with
+double the capacity when it fills up, so appends are amortized O(new bars).
+
+``MarketDataCollector.collect_historical_data`` and
+``capital_data_optimizer.fetch_market_data`` write to the default store
+returned by ``get_default_store``; the optimizers, the regime detector and
+the visualizers read from it. Set ``CANDLE_STORE_PATH`` to move it or
+``CANDLE_STORE_ENABLED=false`` to turn it off.
+"""
+
+import logging
+import os
+import re
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'Database', 'Candles'
+))
+
+CANDLE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+_MAGIC = b'JCANDLE1'
+_HEADER = struct.Struct('<8sqq')  # magic, candle count, column capacity
+_HEADER_SIZE = 64
+_MIN_CAPACITY = 1024
+_ITEM_SIZE = 8
+
+
+def _to_ns(values: Any) -> np.ndarray:
+    """Timestamps as int64 nanoseconds since the epoch, UTC."""
+    times = pd.DatetimeIndex(pd.to_datetime(values))
+    if times.tz is not None:
+        times = times.tz_convert('UTC').tz_localize(None)
+    return times.as_unit('ns').asi8
+
+
+def _bound(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    return int(_to_ns([value])[0])
+
+
+def _frame_columns(df: pd.DataFrame):
+    """Sorted int64 timestamps and float64 value columns, one candle per timestamp."""
+    times = _to_ns(df['timestamp'] if 'timestamp' in df.columns else df.index)
+    values = {}
+    for col in CANDLE_COLUMNS[1:]:
+        if col in df.columns:
+            values[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            values[col] = np.full(len(df), 0.0 if col == 'volume' else np.nan)
+
+    # Sort and keep the last candle of each timestamp
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    keep = np.append(times[1:] != times[:-1], True)
+    return times[keep], {col: v[order][keep] for col, v in values.items()}
+
+
+class CandleStore:
+    """
+    Directory of memory-mapped candle files.
+
+    Attributes:
+        root: Directory holding one ``<SYMBOL>_<RESOLUTION>.candles`` file per
+            series
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory for the candle files, created if missing
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path_for(self, symbol: str, resolution: str) -> str:
+        """File holding one symbol/resolution series."""
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{symbol}_{resolution}")
+        return os.path.join(self.root, f"{name}.candles")
+
+    @contextmanager
+    def _writer(self, path: str) -> Iterator[None]:
+        """Serialize writers across threads and, where supported, processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(path + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_header(mapped: np.ndarray, path: str):
+        magic, count, capacity = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Not a candle file: {path}")
+        return count, capacity
+
+    @staticmethod
+    def _column_offset(k: int, capacity: int) -> int:
+        return _HEADER_SIZE + k * capacity * _ITEM_SIZE
+
+    def arrays(self, symbol: str, resolution: str, start: Any = None, end: Any = None) -> Dict[str, np.ndarray]:
+        """
+        Candles in ``[start, end]`` as read-only views of the mapped file.
+
+        Args:
+            symbol: Market symbol
+            resolution: Candle resolution (e.g. 'HOUR', 'DAY')
+            start: First timestamp to include (None for the beginning)
+            end: Last timestamp to include (None for the end)
+
+        Returns:
+            Dictionary with a ``datetime64[ns]`` timestamp array and float64
+            open/high/low/close/volume arrays; empty arrays if nothing is
+            stored
+        """
+        path = self.path_for(symbol, resolution)
+        if not os.path.exists(path):
+            return {col: np.empty(0, dtype='datetime64[ns]' if col == 'timestamp' else np.float64)
+                    for col in CANDLE_COLUMNS}
+
+        mapped = np.memmap(path, dtype=np.uint8, mode='r')
+        count, capacity = self._read_header(mapped, path)
+        columns = {}
+        for k, col in enumerate(CANDLE_COLUMNS):
+            dtype = 'datetime64[ns]' if col == 'timestamp' else np.float64
+            columns[col] = np.ndarray(count, dtype=dtype, buffer=mapped, offset=self._column_offset(k, capacity))
+
+        times = columns['timestamp'].view(np.int64)
+        start_ns, end_ns = _bound(start), _bound(end)
+        lo = 0 if start_ns is None else int(np.searchsorted(times, start_ns, side='left'))
+        hi = count if end_ns is None else int(np.searchsorted(times, end_ns, side='right'))
+        return {col: values[lo:hi] for col, values in columns.items()}
+
+    def read(self, symbol: str, resolution: str, start: Any = None, end: Any = None,
+             copy: bool = False) -> pd.DataFrame:
+        """
+        Candles in ``[start, end]`` as a DataFrame.
+
+        The frame has a ``timestamp`` column and a RangeIndex, like the frames
+        returned by ``fetch_market_data``. Without ``copy`` it is backed by the
+        mapped file and its values are read-only; adding columns still works.
+        """
+        return pd.DataFrame(self.arrays(symbol, resolution, start, end), copy=copy)
+
+    def first_timestamp(self, symbol: str, resolution: str) -> Optional[pd.Timestamp]:
+        """Timestamp of the oldest stored candle, or None."""
+        times = self.arrays(symbol, resolution)['timestamp']
+        return pd.Timestamp(times[0]) if len(times) else None
+
+    def last_timestamp(self, symbol: str, resolution: str) -> Optional[pd.Timestamp]:
+        """Timestamp of the newest stored candle, or None."""
+        times = self.arrays(symbol, resolution)['timestamp']
+        return pd.Timestamp(times[-1]) if len(times) else None
+
+    def _create(self, path: str, capacity: int, existing: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """Write a new file with the given capacity, copying existing columns."""
+        count = len(existing['timestamp']) if existing else 0
+        size = self._column_offset(len(CANDLE_COLUMNS), capacity)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.truncate(size)
+        mapped = np.memmap(tmp_path, dtype=np.uint8, mode='r+')
+        _HEADER.pack_into(mapped, 0, _MAGIC, count, capacity)
+        if existing:
+            for k, col in enumerate(CANDLE_COLUMNS):
+                target = np.ndarray(count, dtype=existing[col].dtype, buffer=mapped,
+                                    offset=self._column_offset(k, capacity))
+                target[:] = existing[col]
+        mapped.flush()
+        del mapped
+        # Readers holding the old mapping keep a valid view of the old file
+        os.replace(tmp_path, path)
+
+    def write(self, symbol: str, resolution: str, df: pd.DataFrame) -> int:
+        """
+        Replace a whole series, e.g. to extend it with older history.
+
+        The new file is built next to the old one and swapped in atomically;
+        readers keep their view of the old file.
+
+        Returns:
+            Number of candles stored
+        """
+        times, values = _frame_columns(df)
+        columns = {'timestamp': times.view('datetime64[ns]'), **values}
+        path = self.path_for(symbol, resolution)
+        with self._writer(path):
+            self._create(path, max(_MIN_CAPACITY, 2 * len(times)), existing=columns)
+        return len(times)
+
+    def append(self, symbol: str, resolution: str, df: pd.DataFrame) -> int:
+        """
+        Append candles newer than the stored history.
+
+        Args:
+            symbol: Market symbol
+            resolution: Candle resolution
+            df: Candles with a ``timestamp`` column (or a DatetimeIndex) and
+                any of open/high/low/close/volume; missing prices are stored as
+                NaN and missing volume as 0
+
+        Returns:
+            Number of candles added (a replaced last candle is not counted)
+        """
+        if df is None or df.empty:
+            return 0
+
+        times, values = _frame_columns(df)
+        path = self.path_for(symbol, resolution)
+        with self._writer(path):
+            if not os.path.exists(path):
+                self._create(path, max(_MIN_CAPACITY, len(times)))
+
+            current = self.arrays(symbol, resolution)
+            count = len(current['timestamp'])
+            last = int(current['timestamp'][-1].view(np.int64)) if count else None
+
+            replace = None
+            if last is not None:
+                matches = np.flatnonzero(times == last)
+                replace = int(matches[0]) if len(matches) else None
+                new = times > last
+            else:
+                new = np.ones(len(times), dtype=bool)
+            added = int(new.sum())
+
+            capacity = self._read_header(np.memmap(path, dtype=np.uint8, mode='r'), path)[1]
+            if count + added > capacity:
+                self._create(path, max(2 * capacity, count + added), existing=current)
+                capacity = max(2 * capacity, count + added)
+            del current
+
+            mapped = np.memmap(path, dtype=np.uint8, mode='r+')
+            for k, col in enumerate(CANDLE_COLUMNS):
+                column = np.ndarray(capacity, dtype=np.int64 if col == 'timestamp' else np.float64,
+                                    buffer=mapped, offset=self._column_offset(k, capacity))
+                source = times if col == 'timestamp' else values[col]
+                if replace is not None:
+                    column[count - 1] = source[replace]
+                column[count:count + added] = source[new]
+            # Data first, then the count that makes it visible
+            mapped.flush()
+            _HEADER.pack_into(mapped, 0, _MAGIC, count + added, capacity)
+            mapped.flush()
+            del mapped
+
+        if added:
+            logger.debug(f"Appended {added} {resolution} candles for {symbol}")
+        return added
+
+
+_default_store: Optional[CandleStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> Optional[CandleStore]:
+    """
+    Shared candle store for this process, or None when the store is disabled
+    or its directory cannot be created.
+    """
+    global _default_store
+    if os.getenv('CANDLE_STORE_ENABLED', 'true').lower() in ('0', 'false', 'no', 'off'):
+        return None
+    path = os.getenv('CANDLE_STORE_PATH', DEFAULT_STORE_PATH)
+    with _default_store_lock:
+        if _default_store is None or _default_store.root != path:
+            try:
+                _default_store = CandleStore(path)
+            except OSError as e:
+                logger.warning(f"Candle store unavailable at {path}: {str(e)}")
+                return None
+        return _default_store
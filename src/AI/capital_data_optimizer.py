@@ -48,6 +48,18 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(parent_dir)
 
+from src.AI.indicators.supertrend_kernel import rolling_atr, true_range
+from src.AI.candle_store import get_default_store
+from src.AI.historical_backfill import API_MAX_CANDLES, RESOLUTION_SECONDS, HistoricalBackfill, candles_to_frame
+
+# Parameter search space for the SuperTrend strategy
+SEARCH_SPACE = {
+    'atr_period': list(range(10, 30)),  # ATR period
+    'atr_multiplier': [x / 10 for x in range(15, 50)],  # SuperTrend multiplier
+    'stop_loss': [x / 10 for x in range(10, 40)],  # Stop loss percentage
+    'take_profit': [x / 10 for x in range(20, 80)]  # Take profit percentage
+}
+
 # Define optimization objectives locally
 OBJECTIVES = {
     'sharpe': lambda metrics: metrics.get('sharpe_ratio', 0),
@@ -117,14 +129,28 @@ RESOLUTION_MAP = {
     'MONTH': 'MONTH'
 }
 
-def fetch_market_data(symbol: str, resolution: str = 'HOUR', days: int = 30) -> pd.DataFrame:
+def _with_atr(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the ATR column, using the raw true range during warm-up."""
+    tr = true_range(df['high'].values, df['low'].values, df['close'].values)
+    atr = rolling_atr(tr, 14)
+    df['atr'] = np.where(np.isnan(atr), tr, atr)
+    return df
+
+def fetch_market_data(symbol: str, resolution: str = 'HOUR', days: int = 30,
+                      use_store: bool = True) -> pd.DataFrame:
     """
     Fetch historical price data from Capital.com API
     
+    With ``use_store`` candles are kept in the local candle store: fetched
+    candles are appended to it, the requested window is served from it (so
+    it can exceed the 1000-candle API limit once history has accumulated),
+    and the API is skipped entirely while the stored series is current.
+    
     Parameters:
     - symbol: Market symbol/epic (e.g., 'BTCUSD', 'EURUSD')
     - resolution: Timeframe ('MINUTE', 'HOUR', 'DAY', etc.)
     - days: Number of days of data to fetch
+    - use_store: Read from and write to the local candle store
     
     Returns:
     - DataFrame with OHLCV data
@@ -148,10 +174,42 @@ def fetch_market_data(symbol: str, resolution: str = 'HOUR', days: int = 30) ->
     # Calculate max parameter for API (max candles to retrieve)
     max_candles = int(days * candle_multiplier.get(resolution, 1))
     
+    # Serve from the candle store while its newest candle is less than one bar old
+    store = get_default_store() if use_store else None
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    window_start = now - pd.Timedelta(days=days)
+    if store is not None:
+        try:
+            last = store.last_timestamp(symbol, resolution)
+            bar = pd.Timedelta(seconds=86400 / candle_multiplier.get(resolution, 1))
+            if last is not None and now - last < bar:
+                df = store.read(symbol, resolution, start=window_start, copy=True)
+                if not df.empty:
+                    logger.info(f"Loaded {len(df)} {resolution} candles for {symbol} from the candle store")
+                    return _with_atr(df)
+        except Exception as e:
+            logger.warning(f"Error reading candle store: {str(e)}")
+    
+    # Longer windows are backfilled page by page into the candle store
+    if max_candles > API_MAX_CANDLES and store is not None and resolution in RESOLUTION_SECONDS:
+        try:
+            if 'Client' in globals():
+                backfill = HistoricalBackfill.from_session_manager(Client().session_manager, store=store)
+                try:
+                    backfill.backfill(symbol, resolution, window_start, now)
+                finally:
+                    backfill.close()
+                df = store.read(symbol, resolution, start=window_start, copy=True)
+                if not df.empty:
+                    logger.info(f"Loaded {len(df)} backfilled {resolution} candles for {symbol}")
+                    return _with_atr(df)
+        except Exception as e:
+            logger.warning(f"Paginated backfill failed, falling back to a single request: {str(e)}")
+    
     # Cap at 1000 which is usually the API limit
-    if max_candles > 1000:
-        logger.warning(f"Requested {max_candles} candles, capping at 1000 (API limit)")
-        max_candles = 1000
+    if max_candles > API_MAX_CANDLES:
+        logger.warning(f"Requested {max_candles} candles, capping at {API_MAX_CANDLES} (API limit)")
+        max_candles = API_MAX_CANDLES
     
     try:
         candles = []
@@ -195,56 +253,28 @@ def fetch_market_data(symbol: str, resolution: str = 'HOUR', days: int = 30) ->
         
         if not candles:
             logger.error(f"No price data returned for {symbol} from either API client")
+            if store is not None:
+                stored = store.read(symbol, resolution, start=window_start, copy=True)
+                if not stored.empty:
+                    logger.warning(f"Using {len(stored)} stored candles for {symbol}, last at {stored['timestamp'].iloc[-1]}")
+                    return _with_atr(stored)
             return pd.DataFrame()
         
-        # Convert to pandas DataFrame
-        data = []
-        for candle in candles:
-            # Extract OHLCV data
-            timestamp = candle.get('snapshotTimeUTC')
-            # Handle differences between standard and fallback API responses
-            open_price = high_price = low_price = close_price = None
-            if 'openPrice' in candle and isinstance(candle['openPrice'], dict):
-                open_price = candle.get('openPrice', {}).get('bid')
-                high_price = candle.get('highPrice', {}).get('bid')
-                low_price = candle.get('lowPrice', {}).get('bid')
-                close_price = candle.get('closePrice', {}).get('bid')
-            else:
-                open_price = candle.get('openPrice') or candle.get('open')
-                high_price = candle.get('highPrice') or candle.get('high')
-                low_price = candle.get('lowPrice') or candle.get('low')
-                close_price = candle.get('closePrice') or candle.get('close')
-            volume = candle.get('lastTradedVolume', 0) or candle.get('volume', 0)
-            # Skip incomplete candles
-            if not all([timestamp, open_price, high_price, low_price, close_price]):
-                continue
-            # Explicit type guards for static analysis
-            if open_price is None or high_price is None or low_price is None or close_price is None:
-                continue
-            data.append({
-                'timestamp': timestamp,
-                'open': float(open_price),
-                'high': float(high_price),
-                'low': float(low_price),
-                'close': float(close_price),
-                'volume': float(volume)
-            })
-        
-        # Create DataFrame and sort by timestamp
-        df = pd.DataFrame(data)
+        # Convert to pandas DataFrame sorted by timestamp
+        df = candles_to_frame(candles)
         if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp')
+            # Keep the candles and use the longer stored history when there is one
+            if store is not None:
+                try:
+                    store.append(symbol, resolution, df)
+                    stored = store.read(symbol, resolution, start=window_start, copy=True)
+                    if len(stored) > len(df):
+                        df = stored
+                except Exception as e:
+                    logger.warning(f"Error updating candle store: {str(e)}")
             
-            # Calculate ATR (Average True Range)
-            df['tr1'] = df['high'] - df['low']
-            df['tr2'] = abs(df['high'] - df['close'].shift(1))
-            df['tr3'] = abs(df['low'] - df['close'].shift(1))
-            df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-            df['atr'] = df['tr'].rolling(window=14).mean().fillna(df['tr'])
-            
-            # Clean up temporary columns
-            df = df.drop(['tr1', 'tr2', 'tr3', 'tr'], axis=1)
+            # Calculate ATR (Average True Range), using the raw true range during warm-up
+            df = _with_atr(df)
             
             logger.info(f"Fetched {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
             return df
@@ -398,6 +428,12 @@ def main():
                        help="Weight to assign to sentiment data (0-1)")
     parser.add_argument("--output", type=str, default=None, 
                        help="Output file path for optimized parameters")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Worker processes for parameter evaluation (0 for all cores but one); "
+                            "only the fallback optimizer evaluates in a process pool, the standalone "
+                            "optimizer always runs in this process")
+    parser.add_argument("--search-mode", type=str, default="random", choices=["random", "halving"],
+                       help="Evaluate every candidate on the full history, or use successive halving")
     
     args = parser.parse_args()
     
@@ -466,12 +502,7 @@ def main():
             logger.info(f"Using constant sentiment value: {sentiment_value}")
         
     # Define the parameter search space
-    search_space = {
-        'atr_period': list(range(10, 30)),  # ATR period
-        'atr_multiplier': [x / 10 for x in range(15, 50)],  # SuperTrend multiplier
-        'stop_loss': [x / 10 for x in range(10, 40)],  # Stop loss percentage
-        'take_profit': [x / 10 for x in range(20, 80)]  # Take profit percentage
-    }
+    search_space = SEARCH_SPACE
     
     # Set up the optimization function based on whether to use sentiment
     if args.use_sentiment:
@@ -509,6 +540,8 @@ def main():
                 objective_fn,
                 max_evals=args.max_evals  # type: ignore
             )
+            if args.workers != 1:
+                logger.warning("The standalone optimizer has no process pool; --workers was ignored")
         except Exception as e2:
             logger.warning(f"Second optimization attempt failed: {str(e2)}")
             
@@ -528,7 +561,9 @@ def main():
                     fallback_strategy,
                     search_space,
                     objective_name=args.objective,
-                    num_evals=args.max_evals
+                    num_evals=args.max_evals,
+                    workers=args.workers,
+                    search_mode=args.search_mode
                 )
                 
                 # Update strategy_func to use fallback
@@ -0,0 +1,319 @@
+"""
+Rolling Correlation Engine Module
+
+Streaming computation of the rolling return correlations stored in the
+``market_correlations`` table, for every pair of a set of symbols.
+
+Each window (30 and 90 bars by default, i.e. days on daily closes) keeps a
+ring buffer of log returns together with their running mean and co-moment
+matrix. A new bar replaces the oldest return using the sliding form of
+Welford's update:
+
+    m' = m + (x_new - x_old) / N
+    C' = C + (x_new - m)(x_new - m')^T - (x_old - m)(x_old - m')^T
+
+which is one (n x 2) @ (2 x n) product, so all n(n-1)/2 pairs are updated in
+O(pairs) per bar. The co-moments are recomputed exactly from the buffer once
+per full cycle of the window to keep rounding drift bounded.
+
+Publishing compares the correlations with the last values written and
+upserts only the pairs that moved by more than ``epsilon``, in one
+``executemany``, leaving ``correlation_7d`` untouched. Published values are
+also set on the shared in-memory correlation matrices used by the risk
+manager. The table is created by ``RiskManager`` or ``MarketDataCollector``
+(``MARKET_CORRELATIONS_TABLE_SQL``).
+
+``MarketDataCollector`` feeds the engine the daily closes it has stored after
+each collection run, through ``update_frames``, which skips bars that are not
+newer than the last one added.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.AI.correlation_matrix import CORRELATION_COLUMNS, correlation_changes, get_correlation_matrix
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOWS = {'correlation_30d': 30, 'correlation_90d': 90}
+
+
+class _RollingWindow:
+    """Ring buffer of return vectors with their running mean and co-moments."""
+
+    def __init__(self, size: int, length: int):
+        self.length = length
+        self.buffer = np.zeros((length, size))
+        self.mean = np.zeros(size)
+        self.comoment = np.zeros((size, size))
+        self.count = 0
+        self.position = 0
+
+    def push(self, returns: np.ndarray) -> None:
+        """Add one bar of returns, evicting the oldest once the window is full."""
+        if self.count < self.length:
+            delta = returns - self.mean
+            self.count += 1
+            self.mean += delta / self.count
+            self.comoment += np.outer(delta, returns - self.mean)
+        else:
+            old = self.buffer[self.position]
+            mean = self.mean
+            new_mean = mean + (returns - old) / self.length
+            left = np.stack((returns - mean, mean - old), axis=1)
+            right = np.stack((returns - new_mean, old - new_mean), axis=1)
+            self.comoment += left @ right.T
+            self.mean = new_mean
+
+        self.buffer[self.position] = returns
+        self.position = (self.position + 1) % self.length
+        if self.count == self.length and self.position == 0:
+            self.resync()
+
+    def resync(self) -> None:
+        """Recompute mean and co-moments exactly from the buffer."""
+        self.mean = self.buffer.mean(axis=0)
+        centered = self.buffer - self.mean
+        self.comoment = centered.T @ centered
+
+    def correlation(self) -> np.ndarray:
+        """Correlation matrix, NaN until the window is full or for flat series."""
+        size = self.mean.shape[0]
+        if self.count < self.length:
+            return np.full((size, size), np.nan)
+        std = np.sqrt(np.clip(np.diag(self.comoment), 0.0, None))
+        denominator = np.outer(std, std)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = np.where(denominator > 0, self.comoment / denominator, np.nan)
+        np.clip(correlation, -1.0, 1.0, out=correlation)
+        return correlation
+
+
+class RollingCorrelationEngine:
+    """
+    Rolling correlations of all symbol pairs, updated bar by bar.
+
+    Attributes:
+        symbols (list): Tracked symbols, sorted (the table's pair order)
+        db_path (str): SQLite database with the market_correlations table
+        windows (dict): Correlation column -> window length in bars
+        epsilon (float): Smallest change of a correlation that is written
+        last_timestamp (pd.Timestamp): Time of the last bar added through
+            ``update_frames``, or None
+    """
+
+    def __init__(self, symbols: Iterable[str], db_path: Optional[str] = None,
+                 windows: Optional[Mapping[str, int]] = None, epsilon: float = 1e-4):
+        """
+        Initialize the engine with empty windows.
+
+        Args:
+            symbols: Symbols to track
+            db_path: Database to publish to (None to only compute in memory)
+            windows: Correlation column -> window length in bars
+                (default: 30 and 90 bars)
+            epsilon: Smallest change of a correlation that is written
+        """
+        self.symbols: List[str] = sorted(set(symbols))
+        self.db_path = db_path
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        for column in self.windows:
+            if column not in CORRELATION_COLUMNS:
+                raise ValueError(f"Unknown correlation column: {column}")
+        self.epsilon = epsilon
+        self.last_timestamp: Optional[pd.Timestamp] = None
+
+        size = len(self.symbols)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._rolling = {column: _RollingWindow(size, length) for column, length in self.windows.items()}
+        self._written = {column: np.full((size, size), np.nan) for column in self.windows}
+        self._baselines: Dict[str, Optional[np.ndarray]] = {}
+        self._last_prices = np.full(size, np.nan)
+        self._pairs = np.triu_indices(size, 1)
+        self._lock = threading.Lock()
+        self.stats = {'bars': 0, 'publishes': 0, 'rows_written': 0, 'update_ms': 0.0}
+
+    def update(self, prices: Mapping[str, float], publish: bool = True) -> int:
+        """
+        Add one bar of prices.
+
+        Symbols missing from ``prices`` keep their last price (a zero
+        return); unknown symbols are ignored.
+
+        Args:
+            prices: Symbol -> closing price of the new bar
+            publish: Whether to write the changed correlations
+
+        Returns:
+            Number of pairs written
+        """
+        start = time.perf_counter()
+        with self._lock:
+            current = self._last_prices.copy()
+            for symbol, price in prices.items():
+                index = self._index.get(symbol)
+                if index is not None and price is not None and price > 0:
+                    current[index] = price
+
+            previous, self._last_prices = self._last_prices, current
+            if np.isnan(previous).all():
+                return 0
+
+            # Symbols without a previous price contribute a zero return
+            with np.errstate(invalid='ignore'):
+                returns = np.nan_to_num(np.log(current / previous), nan=0.0)
+            for rolling in self._rolling.values():
+                rolling.push(returns)
+            self.stats['bars'] += 1
+
+            written = self._publish() if publish else 0
+        self.stats['update_ms'] = (time.perf_counter() - start) * 1000
+        return written
+
+    def load_history(self, bars: Iterable[Mapping[str, float]]) -> int:
+        """
+        Prime the windows from past bars, oldest first, and publish once.
+
+        Returns:
+            Number of pairs written
+        """
+        for prices in bars:
+            self.update(prices, publish=False)
+        return self.publish()
+
+    def update_frames(self, frames: Mapping[str, pd.DataFrame], publish: bool = True) -> int:
+        """
+        Add the bars of per-symbol candle frames that are newer than the last
+        bar added, and publish once.
+
+        Closes are aligned on timestamp; a symbol without a candle at a
+        timestamp keeps its last price.
+
+        Args:
+            frames: Symbol -> candles with timestamp and close columns
+            publish: Whether to write the changed correlations
+
+        Returns:
+            Number of pairs written
+        """
+        closes = {}
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            series = pd.Series(df['close'].to_numpy(dtype=float), index=pd.to_datetime(df['timestamp']))
+            closes[symbol] = series[~series.index.duplicated(keep='last')]
+        if not closes:
+            return 0
+
+        table = pd.DataFrame(closes).sort_index()
+        if self.last_timestamp is not None:
+            table = table[table.index > self.last_timestamp]
+        for _, row in table.iterrows():
+            self.update(row.dropna().to_dict(), publish=False)
+        if not table.empty:
+            self.last_timestamp = table.index[-1]
+        return self.publish() if publish else 0
+
+    def correlations(self, column: str = 'correlation_30d') -> np.ndarray:
+        """Current correlation matrix of ``column``, rows in ``symbols`` order."""
+        with self._lock:
+            return self._rolling[column].correlation()
+
+    def publish(self) -> int:
+        """
+        Write correlations that changed since they were last written.
+
+        Returns:
+            Number of pairs written
+        """
+        with self._lock:
+            return self._publish()
+
+    def _publish(self) -> int:
+        rows, cols = self._pairs
+        columns = list(self.windows)
+        current = {column: self._rolling[column].correlation() for column in columns}
+
+        changed = np.zeros(rows.shape[0], dtype=bool)
+        for column in columns:
+            new, old = current[column][rows, cols], self._written[column][rows, cols]
+            with np.errstate(invalid='ignore'):
+                changed |= (np.abs(new - old) > self.epsilon) | (np.isnan(new) != np.isnan(old))
+        if not changed.any():
+            return 0
+
+        rows, cols = rows[changed], cols[changed]
+        values = [current[column][rows, cols] for column in columns]
+        if self.db_path is not None:
+            names = np.array(self.symbols, dtype=object)
+            columns_out = [names[rows], names[cols]]
+            for column_values in values:
+                out = column_values.astype(object)
+                out[np.isnan(column_values)] = None
+                columns_out.append(out)
+            try:
+                self._write(columns, list(zip(*(c.tolist() for c in columns_out))))
+            except sqlite3.Error as e:
+                logger.error(f"Error writing market correlations: {e}")
+                return 0
+            for column, column_values in zip(columns, values):
+                get_correlation_matrix(self.db_path, column).set_pairs(self.symbols, rows, cols, column_values)
+
+        for column, column_values in zip(columns, values):
+            self._written[column][rows, cols] = column_values
+            self._written[column][cols, rows] = column_values
+        self.stats['publishes'] += 1
+        self.stats['rows_written'] += int(rows.shape[0])
+        return int(rows.shape[0])
+
+    def _write(self, columns: List[str], params: List[tuple]) -> None:
+        """Upsert the changed pairs in one transaction, keeping other columns."""
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in columns)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany(f'''
+                INSERT INTO market_correlations (symbol1, symbol2, {', '.join(columns)}, timestamp)
+                VALUES (?, ?, {placeholders}, CURRENT_TIMESTAMP)
+                ON CONFLICT(symbol1, symbol2) DO UPDATE SET {updates}, timestamp = excluded.timestamp
+                ''', params)
+        finally:
+            conn.close()
+
+    def detect_correlation_changes(self, threshold: float = 0.2,
+                                   column: str = 'correlation_30d') -> List[Dict[str, Any]]:
+        """
+        Pairs whose correlation moved by at least ``threshold`` since last reported.
+
+        The first call only records the baseline.
+
+        Args:
+            threshold: Absolute change that counts as significant
+            column: Correlation column to watch
+
+        Returns:
+            List of changes with symbol1, symbol2, previous_correlation,
+            current_correlation and change, largest change first
+        """
+        with self._lock:
+            current = self._rolling[column].correlation()
+            self._baselines[column], changes = correlation_changes(
+                self.symbols, self._baselines.get(column), current, threshold
+            )
+        return changes
+
+    def metrics(self) -> Dict[str, Any]:
+        """Update and write counters."""
+        return dict(self.stats, symbols=len(self.symbols), pairs=int(self._pairs[0].shape[0]))
+
+    def reset_metrics(self) -> None:
+        """Reset the update and write counters."""
+        self.stats = {'bars': 0, 'publishes': 0, 'rows_written': 0, 'update_ms': 0.0}
@@ -0,0 +1,261 @@
+"""
+Correlation Matrix Module
+
+In-memory, symmetric matrix of market correlations, so that correlation risk
+for a trade is computed from memory instead of one database query per open
+position.
+
+The matrix is a NumPy array indexed through a symbol -> row map; unknown
+pairs are NaN. It is loaded once from the ``market_correlations`` table and
+kept current in two ways:
+- ``update_market_correlation`` in this process sets the pair directly
+- Rows written by other processes (e.g. the data collector) are picked up by
+  an incremental refresh, at most every ``refresh_interval`` seconds, which
+  only reads rows newer than the last ones seen
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CORRELATION_COLUMNS = ('correlation_90d', 'correlation_30d', 'correlation_7d')
+
+MARKET_CORRELATIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS market_correlations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        symbol1 TEXT NOT NULL,
+        symbol2 TEXT NOT NULL,
+        correlation_90d REAL,
+        correlation_30d REAL,
+        correlation_7d REAL,
+        UNIQUE(symbol1, symbol2)
+    )
+'''
+
+
+class CorrelationMatrix:
+    """
+    Symmetric correlation matrix of one correlation horizon.
+
+    Attributes:
+        db_path (str): SQLite database with the market_correlations table
+        column (str): Correlation column held (e.g. 'correlation_30d')
+        refresh_interval (float): Seconds between incremental refreshes
+    """
+
+    def __init__(self, db_path: Optional[str] = None, column: str = 'correlation_30d',
+                 refresh_interval: float = 30.0, capacity: int = 64):
+        """
+        Initialize an empty matrix.
+
+        Args:
+            db_path: Database to load from and refresh against (None for a
+                purely in-memory matrix)
+            column: Correlation column to hold
+            refresh_interval: Seconds between incremental refreshes
+            capacity: Initial number of symbols; the matrix grows as needed
+        """
+        if column not in CORRELATION_COLUMNS:
+            raise ValueError(f"Unknown correlation column: {column}")
+        self.db_path = db_path
+        self.column = column
+        self.refresh_interval = refresh_interval
+        self._index: Dict[str, int] = {}
+        self._values = np.full((capacity, capacity), np.nan)
+        self._lock = threading.RLock()
+        self._last_timestamp: Optional[str] = None
+        self._next_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols in row order."""
+        with self._lock:
+            return sorted(self._index, key=self._index.get)
+
+    def _slot(self, symbol: str) -> int:
+        """Row of ``symbol``, adding it (and growing the array) if new."""
+        index = self._index.get(symbol)
+        if index is None:
+            index = len(self._index)
+            if index >= self._values.shape[0]:
+                size = self._values.shape[0] * 2
+                grown = np.full((size, size), np.nan)
+                grown[:index, :index] = self._values[:index, :index]
+                self._values = grown
+            self._index[symbol] = index
+            self._values[index, index] = 1.0
+        return index
+
+    def set(self, symbol1: str, symbol2: str, correlation: Optional[float]) -> None:
+        """Set the correlation of a pair (None clears it)."""
+        value = np.nan if correlation is None else float(correlation)
+        with self._lock:
+            i, j = self._slot(symbol1), self._slot(symbol2)
+            self._values[i, j] = self._values[j, i] = value
+
+    def set_pairs(self, symbols: Sequence[str], rows: np.ndarray, cols: np.ndarray,
+                  values: np.ndarray) -> None:
+        """Set many pairs at once: (symbols[rows[k]], symbols[cols[k]]) -> values[k] (NaN clears)."""
+        with self._lock:
+            slots = np.fromiter((self._slot(symbol) for symbol in symbols), dtype=np.intp, count=len(symbols))
+            i, j = slots[rows], slots[cols]
+            self._values[i, j] = values
+            self._values[j, i] = values
+
+    def get(self, symbol1: str, symbol2: str) -> Optional[float]:
+        """Correlation of a pair, or None if unknown."""
+        self._ensure_current()
+        with self._lock:
+            i, j = self._index.get(symbol1), self._index.get(symbol2)
+            if i is None or j is None or np.isnan(self._values[i, j]):
+                return None
+            return float(self._values[i, j])
+
+    def row(self, symbol: str, others: Sequence[str]) -> np.ndarray:
+        """Correlations of ``symbol`` with each of ``others`` (NaN where unknown)."""
+        self._ensure_current()
+        with self._lock:
+            i = self._index.get(symbol)
+            if i is None:
+                return np.full(len(others), np.nan)
+            # Unknown symbols point at the extra NaN slot past the end
+            padded = np.append(self._values[i, :len(self._index)], np.nan)
+            positions = np.fromiter((self._index.get(s, -1) for s in others), dtype=np.intp, count=len(others))
+            return padded[positions]
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray]:
+        """Symbols in row order and a copy of their correlations."""
+        self._ensure_current()
+        with self._lock:
+            n = len(self._index)
+            return self.symbols, self._values[:n, :n].copy()
+
+    def correlated_exposure(self, symbol: str, others: Sequence[str], sizes: Iterable[float],
+                            threshold: float) -> Tuple[float, np.ndarray, np.ndarray]:
+        """
+        Exposure of open positions correlated with ``symbol`` beyond ``threshold``.
+
+        Args:
+            symbol: Symbol of the candidate trade
+            others: Symbols of the open positions
+            sizes: Sizes of the open positions
+            threshold: Absolute correlation above which a position counts
+
+        Returns:
+            Tuple of (sum of |correlation| * |size| over counted positions,
+            boolean mask of counted positions, their correlations)
+        """
+        correlations = self.row(symbol, others)
+        sizes = np.abs(np.asarray(list(sizes), dtype=float))
+        with np.errstate(invalid='ignore'):
+            mask = np.abs(correlations) > threshold
+        mask &= np.fromiter((other != symbol for other in others), dtype=bool, count=len(others))
+        mask &= ~np.isnan(sizes)
+        exposure = float(np.abs(correlations[mask]) @ sizes[mask]) if mask.any() else 0.0
+        return exposure, mask, correlations
+
+    def _ensure_current(self) -> None:
+        """Load on first use, then refresh incrementally once per ``refresh_interval``."""
+        if self.db_path is None or time.monotonic() < self._next_refresh:
+            return
+        try:
+            self.refresh()
+        except sqlite3.Error as e:
+            logger.error(f"Error refreshing correlation matrix: {e}")
+        self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def refresh(self) -> int:
+        """
+        Apply rows written since the last refresh (all rows on the first call).
+
+        Returns:
+            Number of rows applied
+        """
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                query = f"SELECT symbol1, symbol2, {self.column}, timestamp FROM market_correlations"
+                params: Tuple = ()
+                if self._last_timestamp is not None:
+                    # Timestamps have one-second resolution; re-applying a row is harmless
+                    query += " WHERE timestamp >= ?"
+                    params = (self._last_timestamp,)
+                rows = conn.execute(query + " ORDER BY timestamp", params).fetchall()
+            finally:
+                conn.close()
+
+            for symbol1, symbol2, correlation, timestamp in rows:
+                self.set(symbol1, symbol2, correlation)
+                if timestamp is not None and (self._last_timestamp is None or timestamp > self._last_timestamp):
+                    self._last_timestamp = timestamp
+            return len(rows)
+
+
+def correlation_changes(symbols: Sequence[str], baseline: Optional[np.ndarray], current: np.ndarray,
+                        threshold: float) -> Tuple[np.ndarray, List[Dict[str, object]]]:
+    """
+    Pairs whose correlation moved by at least ``threshold`` from a baseline.
+
+    Args:
+        symbols: Symbols in row order of ``current``
+        baseline: Previous baseline; its rows are the first rows of
+            ``current`` (None for no baseline)
+        current: Current symmetric correlation matrix
+        threshold: Absolute change that counts as significant
+
+    Returns:
+        Tuple of (new baseline, list of changes). The new baseline takes the
+        current value of changed pairs and of pairs seen for the first time,
+        so slow drift accumulates until it crosses the threshold.
+    """
+    n = len(symbols)
+    previous = np.full((n, n), np.nan)
+    if baseline is not None:
+        k = min(baseline.shape[0], n)
+        previous[:k, :k] = baseline[:k, :k]
+
+    rows, cols = np.triu_indices(n, 1)
+    before, after = previous[rows, cols], current[rows, cols]
+    with np.errstate(invalid='ignore'):
+        changed = np.abs(after - before) >= threshold
+    first_seen = np.isnan(before) & ~np.isnan(after)
+    update = changed | first_seen
+    previous[rows[update], cols[update]] = previous[cols[update], rows[update]] = after[update]
+
+    changes = []
+    for i, j, old, new in zip(rows[changed], cols[changed], before[changed], after[changed]):
+        symbol1, symbol2 = sorted((symbols[i], symbols[j]))
+        changes.append({
+            'symbol1': symbol1,
+            'symbol2': symbol2,
+            'previous_correlation': float(old),
+            'current_correlation': float(new),
+            'change': float(new - old)
+        })
+    changes.sort(key=lambda c: abs(c['change']), reverse=True)
+    return previous, changes
+
+
+_matrices: Dict[Tuple[str, str], CorrelationMatrix] = {}
+_matrices_lock = threading.Lock()
+
+
+def get_correlation_matrix(db_path: str, column: str = 'correlation_30d') -> CorrelationMatrix:
+    """Shared correlation matrix of ``column`` for the database at ``db_path``."""
+    key = (db_path, column)
+    with _matrices_lock:
+        matrix = _matrices.get(key)
+        if matrix is None:
+            matrix = _matrices[key] = CorrelationMatrix(db_path, column)
+        return matrix
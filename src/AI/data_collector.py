@@ -12,6 +12,7 @@ Usage:
     3. Schedule regular updates using start_scheduled_collection()
 """
 
+import asyncio
 import logging
 import sqlite3
 import pandas as pd
@@ -27,6 +28,11 @@ import json
 from src.Exchanges.capital_com_api.client import Client
 from src.Credentials.credentials import load_credentials, get_api_credentials, get_server_url
 from src.Webhook.utils import get_client
+from src.Exchanges.capital_com_api.async_client import AsyncClient
+from src.AI.candle_store import CandleStore, get_default_store
+from src.AI.correlation_engine import RollingCorrelationEngine
+from src.AI.correlation_matrix import MARKET_CORRELATIONS_TABLE_SQL
+from src.AI.historical_backfill import API_MAX_CANDLES, candles_to_frame
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -40,12 +46,20 @@ class MarketDataCollector:
         db_path (str): Path to the SQLite database
         lookback_days (int): Days of historical data to collect
         client (Client): Authenticated trading API client
+        candle_store (CandleStore): Columnar store receiving the raw candles
+        regime_detector (VolatilityRegimeDetector): Detector whose online
+            regime features receive the new candles, or None
+        correlation_engine (RollingCorrelationEngine): Engine publishing the
+            symbols' rolling correlations to market_correlations, or None
     """
     
     def __init__(self, 
                 symbols: Optional[List[str]] = None,
                 db_path: str = '/home/jamso-ai-server/Jamso-Ai-Engine/src/Database/Webhook/trading_signals.db',
-                lookback_days: int = 120):
+                lookback_days: int = 120,
+                candle_store: Optional[CandleStore] = None,
+                regime_detector: Optional[Any] = None,
+                correlation_engine: Optional[RollingCorrelationEngine] = None):
         """
         Initialize the market data collector.
         
@@ -53,10 +67,19 @@ class MarketDataCollector:
             symbols: List of market symbols to collect data for (e.g. ['EURUSD', 'BTCUSD'])
             db_path: Path to the SQLite database
             lookback_days: Days of historical data to collect
+            candle_store: Candle store to append to (default: the shared store)
+            regime_detector: VolatilityRegimeDetector to feed the new candles to
+            correlation_engine: Engine fed the stored daily closes after each
+                collection run (default: one for ``symbols`` writing to ``db_path``)
         """
         self.symbols = symbols or []
         self.db_path = db_path
         self.lookback_days = lookback_days
+        self.candle_store = candle_store if candle_store is not None else get_default_store()
+        self.regime_detector = regime_detector
+        if correlation_engine is None and len(self.symbols) >= 2:
+            correlation_engine = RollingCorrelationEngine(self.symbols, db_path=db_path)
+        self.correlation_engine = correlation_engine
         self.client = None
         self.collection_thread = None
         self.is_running = False
@@ -86,6 +109,9 @@ class MarketDataCollector:
             )
             ''')
             
+            # Rolling correlations published by the correlation engine
+            cursor.execute(MARKET_CORRELATIONS_TABLE_SQL)
+            
             conn.commit()
             conn.close()
             logger.info("Market data tables verified")
@@ -144,8 +170,35 @@ class MarketDataCollector:
                 logger.warning(f"Insufficient historical data received for {symbol}")
                 return False
                 
-            # Convert to DataFrame and calculate metrics
-            df = pd.DataFrame(candles)
+            return self._store_candles(symbol, pd.DataFrame(candles))
+            
+        except Exception as e:
+            logger.error(f"Error collecting historical data for {symbol}: {e}")
+            return False
+    
+    def _store_candles(self, symbol: str, df: pd.DataFrame) -> bool:
+        """
+        Store daily candles and their volatility metrics.
+        
+        Args:
+            symbol: Market symbol
+            df: Daily OHLCV candles with a timestamp column
+            
+        Returns:
+            True if volatility records were stored, False otherwise
+        """
+        try:
+            # Append the raw daily candles to the columnar store
+            if self.candle_store is not None:
+                try:
+                    added = self.candle_store.append(symbol, 'DAY', df)
+                    logger.info(f"Appended {added} daily candles for {symbol} to the candle store")
+                except Exception as e:
+                    logger.warning(f"Error appending candles for {symbol} to the candle store: {e}")
+            
+            # Advance the online regime features by the bars not seen yet
+            if self.regime_detector is not None:
+                self.regime_detector.update_bars(symbol, df)
             
             # Calculate volatility metrics
             df['returns'] = df['close'].pct_change()
@@ -205,18 +258,95 @@ class MarketDataCollector:
             return False
             
         except Exception as e:
-            logger.error(f"Error collecting historical data for {symbol}: {e}")
+            logger.error(f"Error storing historical data for {symbol}: {e}")
             return False
     
+    def _fetch_daily_candles(self, symbols: List[str], days: int) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch daily candles for all symbols in one concurrent batch.
+        
+        Args:
+            symbols: Market symbols (epics)
+            days: Days of history per symbol
+            
+        Returns:
+            Dictionary of symbol to candle DataFrame; failed symbols are left out
+        """
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        
+        async def fetch_all():
+            async with AsyncClient(self.client.session_manager) as async_client:
+                return await async_client.prices_many(
+                    symbols,
+                    resolution='DAY',
+                    max=min(days + 1, API_MAX_CANDLES),
+                    from_date=start_date.strftime('%Y-%m-%dT%H:%M:%S'),
+                    to_date=end_date.strftime('%Y-%m-%dT%H:%M:%S')
+                )
+        
+        frames = {}
+        for symbol, result in asyncio.run(fetch_all()).items():
+            if isinstance(result, Exception):
+                continue
+            df = candles_to_frame(result.get('prices', []))
+            if not df.empty:
+                df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+            frames[symbol] = df
+        return frames
+    
     def collect_data_for_all_symbols(self):
-        """Collect data for all configured symbols."""
+        """
+        Collect data for all configured symbols.
+        
+        With the Capital.com client, the daily candles of all symbols are
+        fetched concurrently in one batch before they are stored.
+        """
         success_count = 0
-        for symbol in self.symbols:
-            success = self.collect_historical_data(symbol)
-            if success:
-                success_count += 1
+        if self._initialize_client() and not hasattr(self.client, "get_candles") \
+                and hasattr(self.client, "session_manager"):
+            try:
+                frames = self._fetch_daily_candles(self.symbols, self.lookback_days)
+            except Exception as e:
+                logger.error(f"Error fetching historical data: {e}")
+                frames = {}
+            for symbol in self.symbols:
+                df = frames.get(symbol)
+                if df is None or len(df) < 2:
+                    logger.warning(f"Insufficient historical data received for {symbol}")
+                    continue
+                if self._store_candles(symbol, df):
+                    success_count += 1
+        else:
+            for symbol in self.symbols:
+                success = self.collect_historical_data(symbol)
+                if success:
+                    success_count += 1
                 
         logger.info(f"Completed data collection for {success_count}/{len(self.symbols)} symbols")
+        self._update_correlations()
+    
+    def _update_correlations(self) -> int:
+        """
+        Feed the daily closes stored since the last run to the correlation engine.
+        
+        Returns:
+            Number of correlation pairs written
+        """
+        if self.correlation_engine is None or self.candle_store is None:
+            return 0
+        start = self.correlation_engine.last_timestamp
+        if start is None:
+            start = pd.Timestamp.now(tz='UTC').tz_localize(None) - pd.Timedelta(days=self.lookback_days)
+        try:
+            frames = {symbol: self.candle_store.read(symbol, 'DAY', start=start)
+                      for symbol in self.correlation_engine.symbols}
+            written = self.correlation_engine.update_frames(frames)
+        except Exception as e:
+            logger.error(f"Error updating market correlations: {e}")
+            return 0
+        logger.info(f"Updated {written} market correlation pairs")
+        return written
         
     def start_scheduled_collection(self, schedule_time: str = "00:00"):
         """
@@ -0,0 +1,374 @@
+"""
+AI Decision Service Module
+
+Long-lived AI enhancement stage for incoming trading signals.
+
+apply_ai_trading_logic used to build a new VolatilityRegimeDetector,
+AdaptivePositionSizer and RiskManager for every signal (each creating its
+tables again) and then ran the regime lookup, sizing lookups, drawdown check
+and correlation check one after another. The AIDecisionService keeps the
+components resident and, per signal:
+- Runs the independent database lookups concurrently on a thread pool
+- Serves them from a shared TTL cache; writes made through the service (or
+  reported to it, like new positions) invalidate the affected entries
+- Applies the sizing and risk rules to the looked-up values, and saves the
+  risk evaluation in the background instead of on the order path
+- Records per-stage timings, reported by ``metrics``
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from src.AI.position_sizer import AdaptivePositionSizer
+from src.AI.risk_manager import RiskManager
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Seconds each kind of lookup may be served from the cache
+DEFAULT_TTLS: Dict[str, float] = {
+    'regime': 300.0,       # volatility regime per symbol
+    'correlation': 60.0,   # correlated exposure per (symbol, account)
+    'account': 30.0,       # balance and drawdown per account
+    'positions': 30.0,     # daily risk and recent performance
+}
+
+
+class LookupCache:
+    """
+    Thread-safe TTL cache for lookups, keyed by (kind, key).
+
+    Invalidating a kind bumps its generation, so a value that was being
+    loaded while the write happened is not stored afterwards.
+
+    Attributes:
+        ttls: Seconds entries of each kind stay valid
+        max_size: Maximum number of entries
+        stats: Counters for hits, misses and invalidations
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_size: int = 10000):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_size = max_size
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: Hashable) -> Tuple[bool, Any, int]:
+        """
+        Look up an entry.
+
+        Returns:
+            Tuple of (found, value, generation to pass to ``put`` on a miss)
+        """
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is not None and entry[0] > time.monotonic():
+                self.stats['hits'] += 1
+                return True, entry[1], 0
+            self.stats['misses'] += 1
+            return False, None, self._generations.get(kind, 0)
+
+    def put(self, kind: str, key: Hashable, value: Any, generation: int) -> None:
+        """Store a loaded value unless its kind was invalidated since ``get``."""
+        with self._lock:
+            if self._generations.get(kind, 0) != generation:
+                return
+            self._entries[(kind, key)] = (time.monotonic() + self.ttls.get(kind, 30.0), value)
+            while len(self._entries) > self.max_size:
+                # Dicts keep insertion order; drop the oldest entry
+                del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, kind: str, key: Optional[Hashable] = None) -> None:
+        """Drop one entry of ``kind``, or all of them when ``key`` is None."""
+        with self._lock:
+            self._generations[kind] = self._generations.get(kind, 0) + 1
+            self.stats['invalidations'] += 1
+            if key is not None:
+                self._entries.pop((kind, key), None)
+            else:
+                for entry_key in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[entry_key]
+
+
+def _is_error(value: Any) -> bool:
+    """Whether a lookup result reports a failure (these are not cached)."""
+    return isinstance(value, dict) and (value.get('status') == 'ERROR' or value.get('volatility_level') == 'ERROR')
+
+
+class AIDecisionService:
+    """
+    Resident regime detector, position sizer and risk manager behind one entry point.
+
+    Attributes:
+        regime_detector (VolatilityRegimeDetector): Shared regime detector
+        position_sizer (AdaptivePositionSizer): Shared position sizer
+        risk_manager (RiskManager): Shared risk manager
+        cache (LookupCache): Cache of regime, correlation, account and position lookups
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None,
+                 workers: int = 7, position_sizer: Optional[AdaptivePositionSizer] = None,
+                 risk_manager: Optional[RiskManager] = None):
+        """
+        Initialize the service and its components (tables are created once, here).
+
+        Args:
+            db_path: SQLite database for the components (default: their own default)
+            ttls: Cache TTL overrides per lookup kind
+            workers: Threads for concurrent lookups and background writes
+            position_sizer: Position sizer to use instead of a new one
+            risk_manager: Risk manager to use instead of a new one
+        """
+        kwargs = {'db_path': db_path} if db_path else {}
+        self.position_sizer = position_sizer if position_sizer is not None else AdaptivePositionSizer(**kwargs)
+        self.regime_detector = self.position_sizer.regime_detector
+        self.risk_manager = risk_manager if risk_manager is not None else RiskManager(**kwargs)
+        self.cache = LookupCache(ttls)
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='ai-decision')
+        self._timings_lock = threading.Lock()
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def _record(self, stage: str, seconds: float) -> None:
+        with self._timings_lock:
+            stats = self._timings.get(stage)
+            if stats is None:
+                stats = self._timings[stage] = {'count': 0, 'total': 0.0, 'max': 0.0}
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    def _timed(self, stage: str, func: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self._record(stage, time.perf_counter() - started)
+
+    def lookup(self, symbol: str, account_id: int) -> Dict[str, Any]:
+        """
+        Fetch everything the sizing and risk rules need, concurrently and through the cache.
+
+        Args:
+            symbol: Market symbol
+            account_id: Account ID
+
+        Returns:
+            Dictionary with regime, balance, performance_factor,
+            drawdown_factor, daily_risk, drawdown and correlation
+        """
+        sizer = self.position_sizer
+        risk = self.risk_manager
+        plan = {
+            'regime': ('regime', symbol, lambda: self.regime_detector.get_current_regime(symbol)),
+            'balance': ('account', ('balance', account_id), lambda: sizer._get_account_balance(account_id)),
+            'drawdown_factor': ('account', ('drawdown_factor', account_id),
+                                lambda: sizer._calculate_drawdown_adjustment(account_id)),
+            'drawdown': ('account', ('drawdown', account_id), lambda: risk.check_drawdown(account_id)),
+            'performance_factor': ('positions', ('performance', symbol),
+                                   lambda: sizer._calculate_performance_adjustment(symbol)),
+            'daily_risk': ('positions', ('daily_risk', account_id), lambda: risk.check_daily_risk_limit(account_id)),
+            'correlation': ('correlation', (symbol, account_id),
+                            lambda: risk.get_position_correlations(symbol, account_id)),
+        }
+
+        results: Dict[str, Any] = {}
+        pending = {}
+        for name, (kind, key, loader) in plan.items():
+            found, value, generation = self.cache.get(kind, key)
+            if found:
+                results[name] = value
+            else:
+                pending[name] = (kind, key, generation,
+                                 self._executor.submit(self._timed, f'lookup.{name}', loader))
+
+        for name, (kind, key, generation, future) in pending.items():
+            value = future.result()
+            if not _is_error(value):
+                self.cache.put(kind, key, value, generation)
+            results[name] = value
+        return results
+
+    def enhance(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply volatility regime detection, dynamic position sizing and risk management to a signal.
+
+        Args:
+            data: Trading signal data from webhook
+
+        Returns:
+            Modified trading signal data with AI enhancements, or an error
+            response if risk management rejects the trade
+        """
+        started = time.perf_counter()
+        stage_started = started
+        timings: Dict[str, float] = {}
+
+        def lap(stage: str) -> None:
+            nonlocal stage_started
+            now = time.perf_counter()
+            timings[stage] = round((now - stage_started) * 1000, 3)
+            self._record(stage, now - stage_started)
+            stage_started = now
+
+        try:
+            # Extract key signal parameters
+            symbol = data.get('ticker') or data.get('symbol')
+            direction = data.get('order_action') or data.get('direction')
+            original_size = float(data.get('position_size', data.get('quantity', 1.0)))
+
+            # Default account_id - in production should be extracted from appropriate source
+            account_id = int(data.get('account_id', 1))
+
+            # Extract price and stop loss if available
+            price = float(data.get('price', 0)) if data.get('price') else None
+            stop_loss = float(data.get('stop_loss', 0)) if data.get('stop_loss') else None
+
+            # Step 1: Regime, account, performance, drawdown and correlation lookups, concurrently
+            lookups = self.lookup(symbol, account_id)
+            lap('lookups')
+
+            regime_info = lookups['regime']
+            vol_regime = regime_info.get('regime_id', -1)
+            vol_level = regime_info.get('volatility_level', 'MEDIUM')  # Default to medium if unknown
+
+            # Add regime information to signal data for reference
+            data['volatility_regime'] = vol_regime
+            data['volatility_level'] = vol_level
+            logger.info(f"Detected volatility regime for {symbol}: {vol_regime} ({vol_level})")
+
+            # Step 2: Apply dynamic position sizing
+            sizing_result = self.position_sizer.size_position(
+                symbol, original_size, lookups['balance'], regime_info,
+                lookups['performance_factor'], lookups['drawdown_factor'],
+                price=price, stop_loss=stop_loss
+            )
+
+            # Update position size with AI-optimized value
+            adjusted_size = sizing_result.get('adjusted_size', original_size)
+            data['position_size'] = adjusted_size
+            data['original_position_size'] = original_size
+            data['position_size_adjustment_factor'] = sizing_result.get('total_adjustment_factor', 1.0)
+            logger.info(f"Adjusted position size for {symbol}: {original_size} -> {adjusted_size} " +
+                        f"(adjustment factor: {sizing_result.get('total_adjustment_factor', 1.0):.2f})")
+            lap('sizing')
+
+            # Step 3: Apply risk management logic
+            risk_evaluation = self.risk_manager.assess_trade_risk(
+                data, account_id, lookups['daily_risk'], lookups['drawdown'], lookups['correlation']
+            )
+            if risk_evaluation.get('account_id') is not None:
+                # Off the order path; the evaluation is only kept for reporting
+                self._executor.submit(self.risk_manager._save_risk_evaluation, risk_evaluation)
+            lap('risk')
+
+            if risk_evaluation.get('status') == 'REJECTED':
+                logger.warning(f"Trade rejected by risk management: {risk_evaluation.get('rejection_reason')}")
+                # Return error response to prevent trade execution
+                return {
+                    'status': 'error',
+                    'message': f"Trade rejected: {risk_evaluation.get('rejection_reason')}",
+                    'code': 'RISK_MANAGEMENT_REJECTION',
+                    'data': data,
+                    'risk_evaluation': risk_evaluation
+                }
+
+            elif risk_evaluation.get('status') == 'ADJUST_SIZE':
+                # Apply risk-based size adjustment
+                risk_adjusted_size = risk_evaluation.get('adjusted_size', adjusted_size)
+                data['position_size'] = risk_adjusted_size
+                data['risk_size_adjustment_factor'] = risk_evaluation.get('size_adjustment_factor', 1.0)
+                logger.info(f"Risk management adjusted position size: {adjusted_size} -> {risk_adjusted_size}")
+
+            # Step 4: Adjust stop loss based on volatility if needed
+            if stop_loss and vol_level != 'UNKNOWN':
+                adjusted_stop = self.risk_manager.adjust_stop_loss(
+                    symbol=symbol,
+                    current_price=price,
+                    original_stop=stop_loss,
+                    position_direction=direction,
+                    volatility_level=vol_level
+                )
+                data['original_stop_loss'] = stop_loss
+                data['stop_loss'] = adjusted_stop
+                logger.info(f"Adjusted stop loss based on {vol_level} volatility: {stop_loss} -> {adjusted_stop}")
+            lap('stop_loss')
+
+            timings['total'] = round((time.perf_counter() - started) * 1000, 3)
+            self._record('total', time.perf_counter() - started)
+
+            # Add AI metadata to signal
+            data['ai_enhanced'] = True
+            data['ai_metadata'] = {
+                'volatility_regime': vol_regime,
+                'volatility_level': vol_level,
+                'position_sizing': {
+                    'original': original_size,
+                    'ai_adjusted': adjusted_size,
+                    'final': data['position_size']
+                },
+                'risk_evaluation': {
+                    'status': risk_evaluation.get('status'),
+                    'daily_risk_used': risk_evaluation.get('daily_risk', {}).get('used_risk_percent', 0),
+                    'drawdown': risk_evaluation.get('drawdown', {}).get('drawdown_percent', 0)
+                },
+                'timings_ms': timings,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+            return data
+
+        except Exception as e:
+            logger.error(f"Error in AI trading logic: {str(e)}", exc_info=True)
+            # Return original data if AI enhancement fails
+            return data
+
+    def update_account_balance(self, account_id: int, balance: float, equity: float,
+                               margin_used: Optional[float] = None, source: str = "API") -> None:
+        """Record an account balance and drop the account's cached lookups."""
+        self.risk_manager.update_account_balance(account_id, balance, equity, margin_used, source)
+        self.cache.invalidate('account')
+
+    def update_market_correlation(self, symbol1: str, symbol2: str, correlation_90d: float,
+                                  correlation_30d: float, correlation_7d: float) -> None:
+        """Record a market correlation and drop the cached correlation lookups."""
+        self.risk_manager.update_market_correlation(symbol1, symbol2, correlation_90d,
+                                                    correlation_30d, correlation_7d)
+        self.cache.invalidate('correlation')
+
+    def invalidate_regime(self, symbol: Optional[str] = None) -> None:
+        """Drop the cached regime of ``symbol`` (all symbols if None), e.g. after retraining."""
+        self.cache.invalidate('regime', symbol)
+
+    def invalidate_positions(self) -> None:
+        """Drop lookups derived from the positions table, after a position is opened or closed."""
+        self.cache.invalidate('positions')
+        self.cache.invalidate('correlation')
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-stage call count, mean and maximum duration in milliseconds, plus cache counters."""
+        with self._timings_lock:
+            stages = {
+                stage: {
+                    'count': stats['count'],
+                    'mean_ms': stats['total'] / stats['count'] * 1000 if stats['count'] else 0.0,
+                    'max_ms': stats['max'] * 1000
+                }
+                for stage, stats in self._timings.items()
+            }
+        return {'stages': stages, 'cache': dict(self.cache.stats)}
+
+    def reset_metrics(self) -> None:
+        """Clear the stage timings."""
+        with self._timings_lock:
+            self._timings = {}
+
+    def stop(self, wait: bool = True) -> None:
+        """Finish background writes and stop the worker threads."""
+        self._executor.shutdown(wait=wait)
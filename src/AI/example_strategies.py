@@ -5,6 +5,13 @@ Template for use with PerformanceMonitor.
 import numpy as np
 import pandas as pd
 
+from src.AI.indicators.supertrend_kernel import (
+    rolling_atr,
+    supertrend_bands,
+    trend_signals,
+    true_range
+)
+
 def jamso_ai_bot_strategy(df, atr_len=10, fact=2.8, optimize_factor=True, training_data_period=100,
                          highvol=0.75, midvol=0.5, lowvol=0.25, risk_percent=1.0, max_risk_percent=5.0,
                          adaptive_risk=False, direction_bias="Both", sl_type="Fixed Percent", sl_percent=0.5,
@@ -31,23 +38,17 @@ def jamso_ai_bot_strategy(df, atr_len=10, fact=2.8, optimize_factor=True, traini
     loss_count = 0
     current_risk = risk_percent
     paused_by_drawdown = False
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
     # Calculate ATR
-    df['atr'] = df['high'].rolling(atr_len).max() - df['low'].rolling(atr_len).min()
-    # SuperTrend calculation (simplified)
-    hl2 = (df['high'] + df['low']) / 2
-    upper_band = hl2 + fact * df['atr']
-    lower_band = hl2 - fact * df['atr']
-    supertrend = np.zeros(len(df))
-    direction = np.ones(len(df))
-    for i in range(1, len(df)):
-        prev_st = supertrend[i-1] if i > 0 else hl2.iloc[0]
-        prev_ub = upper_band.iloc[i-1]
-        prev_lb = lower_band.iloc[i-1]
-        if prev_st == prev_ub:
-            direction[i] = -1 if df['close'].iloc[i] > upper_band.iloc[i] else 1
-        else:
-            direction[i] = 1 if df['close'].iloc[i] < lower_band.iloc[i] else -1
-        supertrend[i] = lower_band.iloc[i] if direction[i] == -1 else upper_band.iloc[i]
+    df['atr'] = rolling_atr(true_range(high, low, close), atr_len)
+    # SuperTrend calculation (shared kernel, mirrors pine_supertrend)
+    hl2 = (high + low) / 2
+    supertrend, trend, _, _ = supertrend_bands(close, hl2, df['atr'].values, fact)
+    signals = trend_signals(trend)
+    # Pine convention: direction is -1 in an uptrend and 1 in a downtrend
+    direction = -trend
     df['supertrend'] = supertrend
     df['direction'] = direction
     # Volatility regime detection (simple percentile-based)
@@ -77,8 +78,8 @@ def jamso_ai_bot_strategy(df, atr_len=10, fact=2.8, optimize_factor=True, traini
         if paused_by_drawdown and drawdown_percent < max_drawdown_limit * 0.8:
             paused_by_drawdown = False
         # Entry/exit logic
-        long_signal = direction[i-1] < 0 and direction[i] > 0 and direction_bias != "Short Only"
-        short_signal = direction[i-1] > 0 and direction[i] < 0 and direction_bias != "Long Only"
+        long_signal = signals[i] == 1 and direction_bias != "Short Only"
+        short_signal = signals[i] == -1 and direction_bias != "Long Only"
         # Position sizing
         pos_size = order_size if sizing_method == "Fixed Sizing" else max(1, min((equity * current_risk / 100) / (sl_percent / 100 * df['close'].iloc[i]), max_contracts))
         # Profit protection
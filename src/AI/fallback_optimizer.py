@@ -18,6 +18,21 @@ from typing import Dict, List, Any, Optional, Tuple, Callable, Union
 import random
 import os
 
+from src.AI.backtest_core import (
+    BATCH_STAT_FIELDS,
+    run_backtest_arrays,
+    run_backtest_batch,
+    trades_to_frame
+)
+from src.AI.backtest_cache import evaluate_with_cache, get_default_cache
+from src.AI.successive_halving import successive_halving
+from src.AI.indicators.supertrend_kernel import (
+    rolling_atr,
+    supertrend_bands,
+    trend_signals,
+    true_range
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -78,77 +93,28 @@ def supertrend_strategy(df: pd.DataFrame, params: Dict[str, Union[int, float]])
     
     df = df.copy()
     
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    
     # Calculate ATR (Average True Range)
-    df['tr'] = np.maximum(
-        df['high'] - df['low'],
-        np.maximum(
-            abs(df['high'] - df['close'].shift()),
-            abs(df['low'] - df['close'].shift())
-        )
-    )
-    df['atr'] = df['tr'].rolling(atr_period).mean()
+    tr = true_range(high, low, close)
+    atr = rolling_atr(tr, atr_period)
+    df['tr'] = tr
+    df['atr'] = atr
     
     # Calculate basic bands
-    df['basic_upper'] = (df['high'] + df['low']) / 2 + atr_multiplier * df['atr']
-    df['basic_lower'] = (df['high'] + df['low']) / 2 - atr_multiplier * df['atr']
-    
-    # Initialize SuperTrend columns
-    df['trend'] = 0
-    df['supertrend'] = 0
-    
-    # Calculate SuperTrend - using a more type-safe approach
-    for i in range(1, len(df)):
-        idx = df.index[i]
-        prev_idx = df.index[i-1]
-        
-        # Default values
-        curr_trend = df.at[prev_idx, 'trend']
-        curr_upper = df.at[idx, 'basic_upper']
-        curr_lower = df.at[idx, 'basic_lower']
-        
-        # Previous SuperTrend values
-        prev_upper = df.at[prev_idx, 'basic_upper']
-        prev_lower = df.at[prev_idx, 'basic_lower']
-        prev_close = df.at[prev_idx, 'close']
-        prev_st = df.at[prev_idx, 'supertrend']
-        
-        # Current price
-        curr_close = df.at[idx, 'close']
-        
-        # Adjust upper band
-        if (prev_upper > prev_st) and (prev_close > prev_upper):
-            curr_upper = max(curr_upper, prev_upper)
-            
-        # Adjust lower band
-        if (prev_lower < prev_st) and (prev_close < prev_lower):
-            curr_lower = min(curr_lower, prev_lower)
-            
-        # Update trend direction
-        if curr_close > prev_upper:
-            curr_trend = 1  # Uptrend
-        elif curr_close < prev_lower:
-            curr_trend = -1  # Downtrend
-        else:
-            curr_trend = df.at[prev_idx, 'trend']  # Continue previous trend
-            
-        # Set SuperTrend value based on trend
-        if curr_trend == 1:
-            curr_st = curr_lower
-        else:
-            curr_st = curr_upper
-            
-        # Update DataFrame - using at instead of loc for better type safety
-        df.at[idx, 'trend'] = curr_trend
-        df.at[idx, 'supertrend'] = curr_st
+    hl2 = (high + low) / 2
+    df['basic_upper'] = hl2 + atr_multiplier * atr
+    df['basic_lower'] = hl2 - atr_multiplier * atr
     
-    # Generate signals
-    df['signal'] = 0
+    # Run the SuperTrend band recursion in a single array pass
+    st, trend, _, _ = supertrend_bands(close, hl2, atr, atr_multiplier)
+    df['trend'] = trend
+    df['supertrend'] = st
     
     # Signal is generated when trend changes
-    df.loc[df['trend'] != df['trend'].shift(), 'signal'] = df['trend']
-    
-    # First row signal
-    df.loc[df.index[0], 'signal'] = 0
+    df['signal'] = trend_signals(trend)
     
     return df
 
@@ -173,168 +139,52 @@ def backtest_strategy(df: pd.DataFrame, params: Dict[str, Any]) -> Tuple[pd.Data
     take_profit_pct: float = params.get('take_profit', 4.0)  # Default 4% take profit
     position_size: float = params.get('position_size', 1.0)  # Default position size
     
-    # Initialize tracking variables
-    position = 0
-    entry_price = 0
-    stop_loss = 0
-    take_profit = 0
-    equity = 100  # Start with $100
-    equity_curve: List[float] = [100.0]  # Type-annotated to ensure it's a list of floats
-    trades: List[Dict[str, Any]] = []  # Type-annotated to ensure it's a list of dictionaries
-    
-    # Simulate trading
-    for i in range(1, len(df)):
-        # Check for new signals first
-        if df.loc[df.index[i], 'signal'] == 1 and position <= 0:
-            # Close any short position
-            if position < 0:
-                # Convert to float to avoid type issues
-                close_price = safe_float(df.loc[df.index[i], 'close'])  # type: ignore
-                pnl = (safe_float(entry_price) - close_price) * abs(position)
-                equity += pnl
-                trades.append({
-                    'timestamp': df.index[i],
-                    'action': 'CLOSE_SHORT',
-                    'price': df.loc[df.index[i], 'close'],
-                    'pnl': pnl,
-                    'size': abs(position)
-                })
-            
-            # Open long position
-            position = position_size
-            entry_price = df.loc[df.index[i], 'close']
-            # Convert to float to avoid type issues
-            entry_price_float = safe_float(entry_price)  # type: ignore
-            stop_loss = entry_price_float * (1 - stop_loss_pct/100)
-            take_profit = entry_price_float * (1 + take_profit_pct/100)
-            
-            trades.append({
-                'timestamp': df.index[i],
-                'action': 'BUY',
-                'price': entry_price,
-                'size': position,
-                'stop_loss': stop_loss,
-                'take_profit': take_profit
-            })
-            
-        elif df.loc[df.index[i], 'signal'] == -1 and position >= 0:
-            # Close any long position
-            if position > 0:
-                # Convert to float to avoid type issues
-                close_price = safe_float(df.loc[df.index[i], 'close'])  # type: ignore
-                pnl = (close_price - safe_float(entry_price)) * position  # type: ignore
-                equity += pnl
-                trades.append({
-                    'timestamp': df.index[i],
-                    'action': 'CLOSE_LONG',
-                    'price': df.loc[df.index[i], 'close'],
-                    'pnl': pnl,
-                    'size': position
-                })
-            
-            # Open short position
-            position = -position_size
-            entry_price = df.loc[df.index[i], 'close']
-            # Convert to float to avoid type issues
-            entry_price_float = safe_float(entry_price)  # type: ignore
-            stop_loss = entry_price_float * (1 + stop_loss_pct/100)
-            take_profit = entry_price_float * (1 - take_profit_pct/100)
-            
-            trades.append({
-                'timestamp': df.index[i],
-                'action': 'SELL',
-                'price': entry_price,
-                'size': abs(position),
-                'stop_loss': stop_loss,
-                'take_profit': take_profit
-            })
-        
-        # Check for stop loss and take profit on existing positions
-        elif position > 0:  # Long position
-            if safe_float(df.loc[df.index[i], 'low']) <= safe_float(stop_loss):  # Stop loss hit  # type: ignore
-                pnl = (safe_float(stop_loss) - safe_float(entry_price)) * position  # type: ignore
-                equity += pnl
-                trades.append({
-                    'timestamp': df.index[i],
-                    'action': 'STOP_LOSS_LONG',
-                    'price': stop_loss,
-                    'pnl': pnl,
-                    'size': position
-                })
-                position = 0
-                
-            elif safe_float(df.loc[df.index[i], 'high']) >= safe_float(take_profit):  # Take profit hit  # type: ignore
-                pnl = (safe_float(take_profit) - safe_float(entry_price)) * position  # type: ignore
-                equity += pnl
-                trades.append({
-                    'timestamp': df.index[i],
-                    'action': 'TAKE_PROFIT_LONG',
-                    'price': take_profit,
-                    'pnl': pnl,
-                    'size': position
-                })
-                position = 0
-                
-        elif position < 0:  # Short position
-            if safe_float(df.loc[df.index[i], 'high']) >= safe_float(stop_loss):  # Stop loss hit  # type: ignore
-                pnl = (safe_float(entry_price) - safe_float(stop_loss)) * abs(position)  # type: ignore
-                equity += pnl
-                trades.append({
-                    'timestamp': df.index[i],
-                    'action': 'STOP_LOSS_SHORT',
-                    'price': stop_loss,
-                    'pnl': pnl,
-                    'size': abs(position)
-                })
-                position = 0
-                
-            elif safe_float(df.loc[df.index[i], 'low']) <= safe_float(take_profit):  # Take profit hit  # type: ignore
-                pnl = (safe_float(entry_price) - safe_float(take_profit)) * abs(position)  # type: ignore
-                equity += pnl
-                trades.append({
-                    'timestamp': df.index[i],
-                    'action': 'TAKE_PROFIT_SHORT',
-                    'price': take_profit,
-                    'pnl': pnl,
-                    'size': abs(position)
-                })
-                position = 0
-        
-        # Update equity curve
-        # Ensure equity is a number type
-        # Convert to float and add to equity curve
-        equity_curve.append(float(safe_float(equity)))
-    
-    # Close any remaining position at the end
-    if position != 0:
-        final_price = df['close'].iloc[-1]
-        if position > 0:  # Long position
-            pnl = (final_price - entry_price) * position
-            equity += pnl
-            trades.append({
-                'timestamp': df.index[-1],
-                'action': 'CLOSE_FINAL_LONG',
-                'price': final_price,
-                'pnl': pnl,
-                'size': position
-            })
-        else:  # Short position
-            pnl = (entry_price - final_price) * abs(position)
-            equity += pnl
-            trades.append({
-                'timestamp': df.index[-1],
-                'action': 'CLOSE_FINAL_SHORT',
-                'price': final_price,
-                'pnl': pnl,
-                'size': abs(position)
-            })
+    # Simulate trading on contiguous arrays, starting with $100
+    trades, equity = run_backtest_arrays(
+        df['high'].to_numpy(dtype=np.float64),
+        df['low'].to_numpy(dtype=np.float64),
+        df['close'].to_numpy(dtype=np.float64),
+        df['signal'].to_numpy(dtype=np.float64),
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        position_size=position_size,
+        initial_equity=100.0
+    )
     
     # Convert to DataFrame/Series
-    trades_df = pd.DataFrame(trades) if trades else pd.DataFrame()
-    equity_curve = pd.Series(equity_curve, index=df.index)
+    trades_df = trades_to_frame(trades, df.index)
+    equity_curve = pd.Series(equity, index=df.index)
     
     return trades_df, equity_curve
 
+def _backtest_days(index: pd.Index) -> int:
+    """
+    Length of the backtest period in days.
+    
+    Uses the timestamps when the index is datetime-like, otherwise assumes
+    one bar per day. Always at least one day.
+    """
+    try:
+        # Use type ignore to handle the static analysis issue
+        days = (index[-1] - index[0]).days  # type: ignore
+    except (AttributeError, TypeError):
+        # If index is not datetime, use length and assume daily data
+        days = len(index) - 1
+    if days <= 0:
+        days = 1  # Ensure at least one day for backtest period
+    return days
+
+def _annualized_return(total_return_pct: float, days: int) -> float:
+    """Annualize a total return percentage over a period of ``days``."""
+    years = days / 365
+    if years > 0 and total_return_pct > -100:  # Ensure we don't have negative total returns below -100%
+        try:
+            return ((1 + total_return_pct/100) ** (1/years) - 1) * 100
+        except (ValueError, RuntimeWarning):
+            # Handle cases where the calculation fails (e.g., negative returns)
+            return total_return_pct / years  # Simple approximation
+    return total_return_pct  # If less than a day, use total return
+
 def calculate_metrics(equity_curve: pd.Series, trades: pd.DataFrame) -> Dict[str, float]:
     """
     Calculate performance metrics for a backtest.
@@ -374,31 +224,7 @@ def calculate_metrics(equity_curve: pd.Series, trades: pd.DataFrame) -> Dict[str
     max_drawdown = abs(drawdown.min())
     
     # Annualized metrics
-    try:
-        # Check if index is datetime-like and handle accordingly
-        try:
-            # Use type ignore to handle the static analysis issue
-            days = (equity_curve.index[-1] - equity_curve.index[0]).days  # type: ignore
-        except (AttributeError, TypeError):
-            # If index is not datetime, use length and assume daily data
-            days = len(equity_curve) - 1
-        if days <= 0:
-            days = 1  # Ensure at least one day for backtest period
-    except AttributeError:
-        # If index is not datetime, use length and assume daily data
-        days = len(equity_curve) - 1
-        if days <= 0:
-            days = 1  # Ensure at least one day
-            
-    years = days / 365
-    if years > 0 and total_return_pct > -100:  # Ensure we don't have negative total returns below -100%
-        try:
-            annualized_return = ((1 + total_return_pct/100) ** (1/years) - 1) * 100
-        except (ValueError, RuntimeWarning):
-            # Handle cases where the calculation fails (e.g., negative returns)
-            annualized_return = total_return_pct / years  # Simple approximation
-    else:
-        annualized_return = total_return_pct  # If less than a day, use total return
+    annualized_return = _annualized_return(total_return_pct, _backtest_days(equity_curve.index))
     
     # Risk metrics
     daily_returns = equity_curve.pct_change().dropna()
@@ -446,6 +272,109 @@ def calculate_metrics(equity_curve: pd.Series, trades: pd.DataFrame) -> Dict[str
     
     return metrics
 
+def _metrics_from_batch_stats(stats: np.ndarray, initial_equity: float, num_bars: int, days: int) -> Dict[str, float]:
+    """
+    Build the calculate_metrics dict from one lane of run_backtest_batch statistics.
+    """
+    num_trades = int(stats[BATCH_STAT_FIELDS.index('num_records')])
+    if num_trades == 0 or num_bars < 2:
+        return calculate_metrics(pd.Series(dtype=float), pd.DataFrame())
+    
+    final_equity, min_drawdown, return_count, return_mean, return_m2, _, num_pnl, sum_pnl, \
+        num_win, sum_win, num_loss, sum_loss = stats
+    
+    # Basic return metrics
+    total_return_pct = (final_equity / initial_equity - 1) * 100
+    max_drawdown = abs(min_drawdown * 100)
+    annualized_return = _annualized_return(total_return_pct, days)
+    
+    # Risk metrics (sample standard deviation, as pandas computes it)
+    sharpe_ratio = 0
+    if return_count > 1:
+        return_std = np.sqrt(return_m2 / (return_count - 1))
+        if return_std > 0:
+            sharpe_ratio = return_mean / return_std * np.sqrt(252)
+    
+    # Trade metrics
+    win_rate = num_win / num_trades
+    gross_profit = sum_win if num_win > 0 else 0
+    gross_loss = abs(sum_loss) if num_loss > 0 else 0
+    profit_factor = gross_profit / gross_loss if gross_loss > 0 else 0 if gross_profit == 0 else float('inf')
+    
+    return {
+        'total_return': total_return_pct,
+        'annualized_return': annualized_return,
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe_ratio,
+        'num_trades': num_trades,
+        'win_rate': win_rate,
+        'profit_factor': profit_factor,
+        'avg_trade': sum_pnl / num_pnl if num_pnl > 0 else 0,
+        'avg_winner': sum_win / num_win if num_win > 0 else 0,
+        'avg_loser': sum_loss / num_loss if num_loss > 0 else 0
+    }
+
+def evaluate_parameter_batch(df: pd.DataFrame, param_sets: List[Dict[str, Any]]) -> List[Optional[Dict[str, float]]]:
+    """
+    Backtest many parameter sets in one pass.
+    
+    True range and HL2 are computed once, rolling ATR once per distinct
+    ``atr_period``, and the stop-loss/take-profit state machine runs for all
+    candidates side by side.
+    
+    Parameters:
+    - df: DataFrame with OHLC data
+    - param_sets: List of strategy parameter dictionaries
+    
+    Returns:
+    - List with the calculate_metrics dict for each parameter set, or None
+      where the parameter set could not be evaluated
+    """
+    for col in ['open', 'high', 'low', 'close']:
+        if col not in df.columns:
+            raise ValueError(f"Missing required column: {col}")
+    
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    
+    # Shared inputs for every candidate
+    tr = true_range(high, low, close)
+    hl2 = (high + low) / 2
+    atr_by_period: Dict[int, np.ndarray] = {}
+    
+    signals = np.zeros((len(close), len(param_sets)), dtype=np.int8)
+    lanes: List[int] = []
+    for j, params in enumerate(param_sets):
+        try:
+            atr_period = int(params.get('atr_period', 14))
+            if atr_period not in atr_by_period:
+                atr_by_period[atr_period] = rolling_atr(tr, atr_period)
+            _, trend, _, _ = supertrend_bands(close, hl2, atr_by_period[atr_period], params.get('atr_multiplier', 3.0))
+            signals[:, j] = trend_signals(trend)
+            lanes.append(j)
+        except Exception as e:
+            logger.warning(f"Error evaluating parameter set {params}: {str(e)}")
+    
+    results: List[Optional[Dict[str, float]]] = [None] * len(param_sets)
+    if not lanes:
+        return results
+    
+    selected = [param_sets[j] for j in lanes]
+    stats = run_backtest_batch(
+        high, low, close, signals[:, lanes],
+        stop_loss_pct=[p.get('stop_loss', 2.0) for p in selected],
+        take_profit_pct=[p.get('take_profit', 4.0) for p in selected],
+        position_size=[p.get('position_size', 1.0) for p in selected],
+        initial_equity=100.0
+    )
+    
+    days = _backtest_days(df.index) if len(df) > 0 else 1
+    for lane, j in enumerate(lanes):
+        results[j] = _metrics_from_batch_stats(stats[lane], 100.0, len(df), days)
+    
+    return results
+
 def generate_param_set(search_space: Dict[str, List[Any]]) -> Dict[str, Any]:
     """
     Generate a random parameter set from the search space.
@@ -479,23 +408,45 @@ def optimize_parameters(
     strategy_func: Callable, 
     search_space: Dict[str, List], 
     objective_name: str = 'sharpe', 
-    num_evals: int = 50
+    num_evals: int = 50,
+    batch_size: int = 64,
+    workers: Optional[int] = 1,
+    search_mode: str = 'random',
+    eta: int = 3,
+    min_fraction: float = 0.2,
+    use_cache: bool = True
 ) -> Tuple[Dict[str, Any], float, List[Dict]]:
     """
     Optimize strategy parameters using random search.
     
+    With ``search_mode='halving'`` the random candidates go through
+    successive halving: all are scored on the first ``min_fraction`` of the
+    history and only the top ``1/eta`` are promoted to longer windows.
+    
     Parameters:
     - df: DataFrame with price data
     - strategy_func: Function that implements the strategy
     - search_space: Dictionary with parameter ranges
     - objective_name: Name of the objective to optimize
     - num_evals: Number of parameter sets to evaluate
+    - batch_size: Number of parameter sets backtested together in one pass
+    - workers: Number of worker processes sharing the price data (``None``
+      for all cores but one, ``1`` to evaluate in this process)
+    - search_mode: 'random' or 'halving'
+    - eta: Promotion factor between halving rungs
+    - min_fraction: Fraction of the history used by the first halving rung
+    - use_cache: Reuse results stored in the backtest cache
     
     Returns:
     - best_params: Dictionary with best parameters
     - best_value: Best objective value
-    - results: List of all evaluation results
+    - results: List of all evaluation results, in completion order; in
+      halving mode ranked best first, each with the ``rung`` and ``bars``
+      the candidate reached
     """
+    if search_mode not in ('random', 'halving'):
+        raise ValueError(f"Unknown search mode: {search_mode}")
+    
     logger.info(f"Starting parameter optimization with {num_evals} evaluations")
     
     # Get the objective function
@@ -506,40 +457,57 @@ def optimize_parameters(
     best_value = float('-inf')  # For maximizing objectives
     results = []
     
-    # Test each parameter set
-    for i in range(num_evals):
-        # Generate random parameter set
-        params = generate_param_set(search_space)
+    # Draw all parameter sets up front so they can be evaluated in batches
+    param_sets = [generate_param_set(search_space) for _ in range(num_evals)]
+    cache = get_default_cache() if use_cache else None
+    
+    if search_mode == 'halving':
+        ranked = successive_halving(df, param_sets, evaluate_parameter_batch, objective_fn,
+                                    min_fraction=min_fraction, eta=eta, workers=workers, cache=cache)
+        results = [r for r in ranked if r['metrics'] is not None]
+        if results and results[0]['bars'] == len(df):
+            best_params = results[0]['params'].copy()
+            best_value = results[0]['objective_value']
+            logger.info(f"Optimization completed. Best {objective_name}: {best_value:.4f}")
+            logger.info(f"Best parameters: {best_params}")
+        else:
+            logger.error("Optimization failed. No valid parameter set found.")
+        return best_params, best_value, results
+    
+    best_index = num_evals
+    completed = 0
+    
+    for i, metrics in evaluate_with_cache(df, evaluate_parameter_batch, param_sets, cache,
+                                          workers=workers, max_chunk=max(1, int(batch_size))):
+        completed += 1
+        params = param_sets[i]
+        if metrics is None:
+            continue
         
+        # Evaluate objective
         try:
-            # Run backtest with these parameters
-            trades_df, equity_curve = backtest_strategy(df, params)
-            
-            # Calculate performance metrics
-            metrics = calculate_metrics(equity_curve, trades_df)
-            
-            # Evaluate objective
             obj_value = objective_fn(metrics)
-            
-            # Track result
-            result = {
-                'params': params,
-                'metrics': metrics,
-                'objective_value': obj_value
-            }
-            results.append(result)
-            
-            # Update best if improved
-            if obj_value > best_value:
-                best_value = obj_value
-                best_params = params.copy()
-                
-            # Log progress
-            if (i+1) % 5 == 0 or i == 0:
-                logger.info(f"Evaluated {i+1}/{num_evals} parameter sets. Current best {objective_name}: {best_value:.4f}")
-                
         except Exception as e:
             logger.warning(f"Error evaluating parameter set {params}: {str(e)}")
+            continue
+        
+        # Track result
+        results.append({
+            'params': params,
+            'metrics': metrics,
+            'objective_value': obj_value
+        })
+        
+        # Update best if improved; ties go to the earlier draw so the outcome
+        # does not depend on the order in which workers finish
+        if obj_value > best_value or (obj_value == best_value and i < best_index):
+            best_value = obj_value
+            best_params = params.copy()
+            best_index = i
+            
+        # Log progress
+        if completed % 5 == 0 or completed == 1:
+            logger.info(f"Evaluated {completed}/{num_evals} parameter sets. Current best {objective_name}: {best_value:.4f}")
     
     # Log final results
     if best_params:
@@ -0,0 +1,307 @@
+"""
+Historical Candle Backfill for Jamso-AI-Engine
+
+Paginated download of Capital.com price history into the candle store:
+- The requested range is split into date-ranged pages (``from``/``to``) that
+  each fit below the API's ``max`` of 1000 candles
+- Pages are fetched concurrently by a small thread pool on one keep-alive
+  session, waiting for the process-wide Capital.com rate limiter
+- A page that comes back full may have been truncated and is split in two
+- Overlapping candles are de-duplicated and completed pages are appended to
+  the candle store in time order, so an interrupted run resumes from the last
+  stored timestamp; history older than a stored series is merged in front of
+  it with one rewrite
+
+``capital_data_optimizer.fetch_market_data`` uses the backfill for windows
+longer than one API request.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from src.AI.candle_store import CandleStore, get_default_store
+from src.Exchanges.capital_com_api.rate_limiter import RateLimiter, get_rate_limiter, interval_limiter
+
+logger = logging.getLogger(__name__)
+
+# Largest number of candles the prices endpoint returns per request
+API_MAX_CANDLES = 1000
+
+# Candle length per API resolution
+RESOLUTION_SECONDS = {
+    'MINUTE': 60,
+    'MINUTE_5': 5 * 60,
+    'MINUTE_15': 15 * 60,
+    'MINUTE_30': 30 * 60,
+    'HOUR': 60 * 60,
+    'HOUR_4': 4 * 60 * 60,
+    'DAY': 24 * 60 * 60,
+    'WEEK': 7 * 24 * 60 * 60,
+}
+
+_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def candles_to_frame(candles: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Convert prices-endpoint candles to an OHLCV DataFrame.
+
+    Bid prices are used for the nested format; incomplete candles are
+    skipped. The frame is sorted by timestamp.
+    """
+    data = []
+    for candle in candles:
+        timestamp = candle.get('snapshotTimeUTC')
+        # Handle differences between standard and fallback API responses
+        if 'openPrice' in candle and isinstance(candle['openPrice'], dict):
+            open_price = candle.get('openPrice', {}).get('bid')
+            high_price = candle.get('highPrice', {}).get('bid')
+            low_price = candle.get('lowPrice', {}).get('bid')
+            close_price = candle.get('closePrice', {}).get('bid')
+        else:
+            open_price = candle.get('openPrice') or candle.get('open')
+            high_price = candle.get('highPrice') or candle.get('high')
+            low_price = candle.get('lowPrice') or candle.get('low')
+            close_price = candle.get('closePrice') or candle.get('close')
+        volume = candle.get('lastTradedVolume', 0) or candle.get('volume', 0)
+        # Skip incomplete candles
+        if not all([timestamp, open_price, high_price, low_price, close_price]):
+            continue
+        data.append({
+            'timestamp': timestamp,
+            'open': float(open_price),
+            'high': float(high_price),
+            'low': float(low_price),
+            'close': float(close_price),
+            'volume': float(volume)
+        })
+
+    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    if not df.empty:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.sort_values('timestamp').reset_index(drop=True)
+    return df
+
+
+class HistoricalBackfill:
+    """
+    Concurrent, resumable backfill of one or more price series.
+
+    Attributes:
+        server: API base URL
+        store: Candle store receiving the candles
+        page_size: ``max`` sent with every page request
+        max_concurrency: Pages in flight at the same time
+        stats: Counters for pages, requests, retries, splits and candles
+    """
+
+    def __init__(self, server: str, headers: Dict[str, str], store: Optional[CandleStore] = None,
+                 page_size: int = API_MAX_CANDLES, max_concurrency: int = 4,
+                 min_request_interval: Optional[float] = None, max_retries: int = 3, timeout: float = 30.0,
+                 reauthenticate: Optional[Callable[[], Dict[str, str]]] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        Initialize the backfill.
+
+        Args:
+            server: API base URL (e.g. https://demo-api-capital.backend-capital.com)
+            headers: Authentication headers (X-CAP-API-KEY, CST, X-SECURITY-TOKEN)
+            store: Candle store to write to (default: the shared store)
+            page_size: Candles requested per page, at most the API limit
+            max_concurrency: Pages fetched at the same time
+            min_request_interval: Space request starts by this many seconds
+                with a private limiter instead of the shared one
+            max_retries: Retries per page on rate limiting or server errors
+            timeout: Request timeout in seconds
+            reauthenticate: Called once after a 401; returns fresh headers
+            rate_limiter: Limiter to wait for (default: the process-wide
+                Capital.com limiter)
+        """
+        self.server = server.rstrip('/')
+        self.store = store if store is not None else get_default_store()
+        if self.store is None:
+            raise ValueError("A candle store is required for backfilling")
+        self.page_size = max(2, min(int(page_size), API_MAX_CANDLES))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._headers = dict(headers)
+        self._headers_lock = threading.Lock()
+        self._reauthenticate = reauthenticate
+        if rate_limiter is None:
+            rate_limiter = interval_limiter(min_request_interval) if min_request_interval is not None \
+                else get_rate_limiter()
+        self._rate_limiter = rate_limiter
+        self._session = requests.Session()
+        self.stats = {'pages': 0, 'requests': 0, 'retries': 0, 'splits': 0, 'candles': 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_session_manager(cls, session_manager: Any, store: Optional[CandleStore] = None,
+                             **kwargs: Any) -> 'HistoricalBackfill':
+        """
+        Build a backfill that authenticates through a SessionManager.
+
+        Requests share the session manager's rate limiter unless
+        ``min_request_interval`` or ``rate_limiter`` is given.
+        """
+        session_manager.create_session()
+        if not session_manager.is_authenticated:
+            raise ConnectionError("Could not authenticate with Capital.com API")
+
+        def reauthenticate() -> Dict[str, str]:
+            session_manager.is_authenticated = False
+            session_manager.create_session()
+            return session_manager._get_headers()
+
+        if kwargs.get('min_request_interval') is None:
+            kwargs.setdefault('rate_limiter', getattr(session_manager, 'rate_limiter', None))
+        return cls(session_manager.server, session_manager._get_headers(), store=store,
+                   reauthenticate=reauthenticate, **kwargs)
+
+    def close(self) -> None:
+        """Close the HTTP session."""
+        self._session.close()
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _request(self, epic: str, resolution: str, start: pd.Timestamp, end: pd.Timestamp) -> List[Dict[str, Any]]:
+        """One prices request with retry on 429/5xx and one re-authentication on 401."""
+        params = {
+            'resolution': resolution,
+            'max': self.page_size,
+            'from': start.strftime(_TIME_FORMAT),
+            'to': end.strftime(_TIME_FORMAT),
+        }
+        reauthenticated = False
+        for attempt in range(self.max_retries + 1):
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire('market_data')
+            self._count('requests')
+            with self._headers_lock:
+                headers = dict(self._headers)
+            response = self._session.get(f"{self.server}/api/v1/prices/{epic}", params=params,
+                                         headers=headers, timeout=self.timeout)
+
+            if response.status_code == 200:
+                return response.json().get('prices', [])
+            if response.status_code == 404:
+                # No prices in this range (e.g. before the market existed)
+                return []
+            if response.status_code == 401 and self._reauthenticate and not reauthenticated:
+                reauthenticated = True
+                with self._headers_lock:
+                    self._headers = dict(self._reauthenticate())
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt < self.max_retries:
+                    self._count('retries')
+                    time.sleep(min(2 ** attempt * 0.5, 10))
+                    continue
+            response.raise_for_status()
+            raise requests.HTTPError(f"Unexpected status {response.status_code}", response=response)
+        raise requests.HTTPError(f"Giving up on {epic} {start} - {end} after {self.max_retries} retries")
+
+    def _fetch_page(self, epic: str, resolution: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Fetch ``[start, end]``, splitting the range while pages come back full."""
+        candles = self._request(epic, resolution, start, end)
+        bar = pd.Timedelta(seconds=RESOLUTION_SECONDS.get(resolution, 60))
+        if len(candles) >= self.page_size and end - start > bar:
+            self._count('splits')
+            middle = start + ((end - start) / 2).floor('s')
+            return pd.concat([
+                self._fetch_page(epic, resolution, start, middle),
+                self._fetch_page(epic, resolution, middle + pd.Timedelta(seconds=1), end)
+            ], ignore_index=True)
+        return candles_to_frame(candles)
+
+    def pages(self, resolution: str, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Inclusive ``(from, to)`` ranges covering ``[start, end]``.
+
+        Each page spans one bar less than ``page_size``, so a regular series
+        never fills a page and a full page signals truncation.
+        """
+        if resolution not in RESOLUTION_SECONDS:
+            raise ValueError(f"Unsupported resolution for backfill: {resolution}")
+        span = pd.Timedelta(seconds=RESOLUTION_SECONDS[resolution] * (self.page_size - 1))
+        result = []
+        page_start = start
+        while page_start <= end:
+            page_end = min(page_start + span - pd.Timedelta(seconds=1), end)
+            result.append((page_start, page_end))
+            page_start = page_end + pd.Timedelta(seconds=1)
+        return result
+
+    def _fetch_range(self, epic: str, resolution: str, start: pd.Timestamp,
+                     end: pd.Timestamp) -> Iterator[pd.DataFrame]:
+        """Fetch the pages of ``[start, end]`` concurrently, yielding them in time order."""
+        pages = self.pages(resolution, start, end)
+        logger.info(f"Backfilling {epic} {resolution} from {start} to {end} in {len(pages)} pages")
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pages))) as executor:
+            futures = [executor.submit(self._fetch_page, epic, resolution, s, e) for s, e in pages]
+            try:
+                for future in futures:
+                    frame = future.result()
+                    self._count('pages')
+                    yield frame
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def backfill(self, epic: str, resolution: str, start: Any, end: Any = None) -> int:
+        """
+        Download ``[start, end]`` into the candle store.
+
+        Resumes from the last stored candle when it is later than ``start``
+        (the last candle itself is fetched again, as it may still have been
+        forming). Pages are appended as soon as all earlier pages are in, so
+        an interrupted run loses at most the pages in flight. History older
+        than the first stored candle is fetched first and the series is
+        rewritten once with it.
+
+        Args:
+            epic: Market epic
+            resolution: API resolution (e.g. 'HOUR')
+            start: First timestamp wanted (UTC)
+            end: Last timestamp wanted (UTC, default: now)
+
+        Returns:
+            Number of candles added to the store
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp.now(tz='UTC').tz_localize(None) if end is None else pd.Timestamp(end)
+        start, end = [t.tz_convert('UTC').tz_localize(None) if t.tz is not None else t for t in (start, end)]
+        if start > end:
+            return 0
+
+        added = 0
+        first = self.store.first_timestamp(epic, resolution)
+        if first is not None and start < first:
+            older = [frame for frame in self._fetch_range(epic, resolution, start, first - pd.Timedelta(seconds=1))]
+            older = pd.concat(older, ignore_index=True) if older else pd.DataFrame()
+            if not older.empty:
+                stored = self.store.read(epic, resolution)
+                total = self.store.write(epic, resolution, pd.concat([older, stored], ignore_index=True))
+                added += total - len(stored)
+
+        last = self.store.last_timestamp(epic, resolution)
+        if last is not None and last > start:
+            logger.info(f"Resuming {epic} {resolution} backfill from {last}")
+            start = last
+        if start <= end:
+            # Overlapping candles are dropped by the store
+            for frame in self._fetch_range(epic, resolution, start, end):
+                added += self.store.append(epic, resolution, frame)
+
+        self._count('candles', added)
+        logger.info(f"Backfilled {added} {resolution} candles for {epic}")
+        return added
@@ -0,0 +1,402 @@
+"""
+Incremental SuperTrend Backtest for Jamso-AI-Engine
+
+Resumable version of ``fallback_optimizer.backtest_strategy`` for live
+parameter monitoring:
+- The ATR window, SuperTrend bands and trend, the open position (entry,
+  stop-loss, take-profit) and the running equity statistics are kept in one
+  state object
+- New candles advance the state bar by bar, so a check costs O(new bars)
+  instead of a replay of the whole history
+- The state serializes to a JSON-friendly dict and can be stored between
+  runs
+- The equity and trade records of the last ``history_bars`` bars are kept,
+  so metrics can also be taken over a recent window (e.g. the lookback an
+  optimization was scored on) without replaying it
+
+Metrics are the ``calculate_metrics`` dict of the fallback optimizer and
+match a full backtest over the same bars.
+"""
+
+import logging
+import math
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.AI.backtest_core import BATCH_STAT_FIELDS
+from src.AI.fallback_optimizer import _metrics_from_batch_stats
+
+logger = logging.getLogger(__name__)
+
+# Positions in the statistics vector (see backtest_core.BATCH_STAT_FIELDS)
+_FINAL_EQUITY, _MIN_DRAWDOWN, _RETURN_COUNT, _RETURN_MEAN, _RETURN_M2, _NUM_RECORDS, \
+    _NUM_PNL, _SUM_PNL, _NUM_WIN, _SUM_WIN, _NUM_LOSS, _SUM_LOSS = range(len(BATCH_STAT_FIELDS))
+
+
+def _to_time(value: Any) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value)
+
+
+class IncrementalBacktest:
+    """
+    SuperTrend backtest that can be advanced with new candles.
+
+    Attributes:
+        params: Strategy parameters (atr_period, atr_multiplier, stop_loss,
+            take_profit, position_size)
+        num_bars: Bars processed so far
+        position: Open position (positive long, negative short, 0 flat)
+        equity: Realized equity
+        last_timestamp: Timestamp of the last processed candle
+        history: Per-bar (time in ns or None, equity, trade records, pnl or
+            None) of the last ``history_bars`` bars
+    """
+
+    def __init__(self, params: Dict[str, Any], initial_equity: float = 100.0, history_bars: int = 10000):
+        """
+        Initialize an empty backtest.
+
+        Args:
+            params: Strategy parameters, as used by backtest_strategy
+            initial_equity: Starting equity
+            history_bars: Bars of equity and trade history kept for
+                windowed metrics
+        """
+        self.params = dict(params)
+        self.atr_period = int(params.get('atr_period', 14))
+        if self.atr_period < 1:
+            raise ValueError(f"ATR period must be >= 1, got {self.atr_period}")
+        self.atr_multiplier = float(params.get('atr_multiplier', 3.0))
+        self.stop_loss_pct = float(params.get('stop_loss', 2.0))
+        self.take_profit_pct = float(params.get('take_profit', 4.0))
+        self.position_size = float(params.get('position_size', 1.0))
+        self.initial_equity = float(initial_equity)
+
+        # Indicator recursion state
+        self.num_bars = 0
+        self.prev_close = math.nan
+        self.tr_window: deque = deque(maxlen=self.atr_period)
+        self.final_upper = math.nan
+        self.final_lower = math.nan
+        self.trend = -1
+        self.warm = False
+
+        # Trading state
+        self.position = 0.0
+        self.entry_price = 0.0
+        self.stop_loss = 0.0
+        self.take_profit = 0.0
+        self.equity = self.initial_equity
+        self.peak = self.initial_equity
+        self.stats = [0.0] * len(BATCH_STAT_FIELDS)
+        self.history: deque = deque(maxlen=history_bars)
+
+        # Time span, for resuming and for annualized metrics
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self.first_index_time: Optional[pd.Timestamp] = None
+        self.last_index_time: Optional[pd.Timestamp] = None
+
+    def _next_signal(self, high: float, low: float, close: float) -> int:
+        """Advance ATR and SuperTrend by one bar and return the trend-flip signal."""
+        i = self.num_bars
+        if i == 0:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        # Rolling ATR summed over the window only, so rounding error does not
+        # build up over a long live session the way a running total's would
+        self.tr_window.append(tr)
+        atr = math.fsum(self.tr_window) / self.atr_period if i + 1 >= self.atr_period else math.nan
+
+        prev_trend = self.trend
+        if math.isnan(atr):
+            self.final_upper = math.nan
+            self.final_lower = math.nan
+            self.trend = -1
+            self.warm = False
+        else:
+            hl2 = (high + low) / 2
+            basic_upper = hl2 + self.atr_multiplier * atr
+            basic_lower = hl2 - self.atr_multiplier * atr
+            if self.warm:
+                prev_upper = self.final_upper
+                prev_lower = self.final_lower
+                prev_close = self.prev_close
+                upper = basic_upper if (basic_upper < prev_upper or prev_close > prev_upper) else prev_upper
+                lower = basic_lower if (basic_lower > prev_lower or prev_close < prev_lower) else prev_lower
+                if prev_trend < 0:
+                    self.trend = 1 if close > upper else -1
+                else:
+                    self.trend = -1 if close < lower else 1
+                self.final_upper = upper
+                self.final_lower = lower
+            else:
+                # First bar with a defined ATR starts in a downtrend
+                self.final_upper = basic_upper
+                self.final_lower = basic_lower
+                self.trend = -1
+                self.warm = True
+
+        self.prev_close = close
+        return self.trend if i > 0 and self.trend != prev_trend else 0
+
+    def _record_exit(self, pnl: float) -> None:
+        stats = self.stats
+        self.equity += pnl
+        stats[_NUM_RECORDS] += 1
+        stats[_NUM_PNL] += 1
+        stats[_SUM_PNL] += pnl
+        if pnl > 0:
+            stats[_NUM_WIN] += 1
+            stats[_SUM_WIN] += pnl
+        elif pnl < 0:
+            stats[_NUM_LOSS] += 1
+            stats[_SUM_LOSS] += pnl
+
+    def _trade(self, sig: int, high: float, low: float, close: float) -> None:
+        """One bar of the stop-loss/take-profit state machine in backtest_core."""
+        position = self.position
+        prev_equity = self.equity
+
+        if sig == 1 and position <= 0:
+            if position < 0:
+                self._record_exit((self.entry_price - close) * abs(position))
+            self.position = self.position_size
+            self.entry_price = close
+            self.stop_loss = close * (1 - self.stop_loss_pct / 100)
+            self.take_profit = close * (1 + self.take_profit_pct / 100)
+            self.stats[_NUM_RECORDS] += 1
+        elif sig == -1 and position >= 0:
+            if position > 0:
+                self._record_exit((close - self.entry_price) * position)
+            self.position = -self.position_size
+            self.entry_price = close
+            self.stop_loss = close * (1 + self.stop_loss_pct / 100)
+            self.take_profit = close * (1 - self.take_profit_pct / 100)
+            self.stats[_NUM_RECORDS] += 1
+        elif position > 0:
+            if low <= self.stop_loss:
+                self._record_exit((self.stop_loss - self.entry_price) * position)
+                self.position = 0.0
+            elif high >= self.take_profit:
+                self._record_exit((self.take_profit - self.entry_price) * position)
+                self.position = 0.0
+        elif position < 0:
+            if high >= self.stop_loss:
+                self._record_exit((self.entry_price - self.stop_loss) * abs(position))
+                self.position = 0.0
+            elif low <= self.take_profit:
+                self._record_exit((self.entry_price - self.take_profit) * abs(position))
+                self.position = 0.0
+
+        # Running drawdown and Welford update of bar-to-bar returns
+        stats = self.stats
+        equity = self.equity
+        if equity > self.peak:
+            self.peak = equity
+        drawdown = equity / self.peak - 1
+        if drawdown < stats[_MIN_DRAWDOWN]:
+            stats[_MIN_DRAWDOWN] = drawdown
+        ret = equity / prev_equity - 1 if prev_equity != 0 else math.inf
+        stats[_RETURN_COUNT] += 1
+        delta = ret - stats[_RETURN_MEAN]
+        stats[_RETURN_MEAN] += delta / stats[_RETURN_COUNT]
+        stats[_RETURN_M2] += delta * (ret - stats[_RETURN_MEAN])
+
+    def update_arrays(self, high, low, close, times=None) -> int:
+        """
+        Advance the backtest over new bars.
+
+        Args:
+            high: High prices of the new bars
+            low: Low prices of the new bars
+            close: Close prices of the new bars
+            times: Timestamps of the new bars, for windowed metrics (optional)
+
+        Returns:
+            Number of bars processed
+        """
+        high = np.asarray(high, dtype=np.float64).tolist()
+        low = np.asarray(low, dtype=np.float64).tolist()
+        close = np.asarray(close, dtype=np.float64).tolist()
+        if times is None:
+            times = [None] * len(close)
+        else:
+            times = np.asarray(pd.DatetimeIndex(times), dtype='datetime64[ns]').view(np.int64).tolist()
+        stats = self.stats
+        for h, l, c, t in zip(high, low, close, times):
+            sig = self._next_signal(h, l, c)
+            records, num_pnl, equity = stats[_NUM_RECORDS], stats[_NUM_PNL], self.equity
+            if self.num_bars > 0:
+                self._trade(sig, h, l, c)
+            pnl = self.equity - equity if stats[_NUM_PNL] > num_pnl else None
+            self.history.append((t, self.equity, int(stats[_NUM_RECORDS] - records), pnl))
+            self.num_bars += 1
+        return len(close)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        Advance the backtest with new candles.
+
+        Candles at or before ``last_timestamp`` are skipped, so overlapping
+        windows can be passed as-is. Timestamps come from a ``timestamp``
+        column when present, otherwise from a DatetimeIndex.
+
+        Args:
+            df: DataFrame with high, low and close columns in time order
+
+        Returns:
+            Number of new bars processed
+        """
+        if 'timestamp' in df.columns:
+            times = pd.DatetimeIndex(pd.to_datetime(df['timestamp']))
+        elif isinstance(df.index, pd.DatetimeIndex):
+            times = df.index
+        else:
+            times = None
+
+        if times is not None and self.last_timestamp is not None:
+            mask = np.asarray(times > self.last_timestamp)
+            df = df[mask]
+            times = times[mask]
+        if df.empty:
+            return 0
+
+        # The annualization in calculate_metrics uses the index span
+        if isinstance(df.index, pd.DatetimeIndex):
+            if self.first_index_time is None:
+                self.first_index_time = df.index[0]
+            self.last_index_time = df.index[-1]
+
+        count = self.update_arrays(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), times)
+        if times is not None:
+            self.last_timestamp = times[-1]
+        return count
+
+    def _days(self) -> int:
+        if self.first_index_time is not None and self.last_index_time is not None:
+            days = (self.last_index_time - self.first_index_time).days
+        else:
+            days = self.num_bars - 1
+        return max(days, 1)
+
+    def metrics(self, start: Any = None) -> Dict[str, float]:
+        """
+        Performance metrics over all processed bars, or over the bars from
+        ``start`` on.
+
+        An open position is closed at the last close for the trade
+        statistics, as at the end of a full backtest; the state itself keeps
+        the position open. A window is scored on this continuous backtest:
+        its first bar's equity is the starting equity, and a position open
+        at that bar is carried in.
+
+        Args:
+            start: First timestamp of the window (None for all bars)
+        """
+        if start is None:
+            stats = np.array(self.stats, dtype=np.float64)
+            return self._close_out(stats, self.initial_equity, self.num_bars, self._days())
+
+        start_ns = pd.Timestamp(start).value
+        window = [bar for bar in self.history if bar[0] is not None and bar[0] >= start_ns]
+        if len(window) < 2:
+            return self._close_out(np.zeros(len(BATCH_STAT_FIELDS)), self.initial_equity, len(window), 1)
+
+        equity = np.array([bar[1] for bar in window])
+        pnls = np.array([bar[3] for bar in window[1:] if bar[3] is not None], dtype=np.float64)
+        returns = equity[1:] / equity[:-1] - 1
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+
+        stats = np.zeros(len(BATCH_STAT_FIELDS))
+        stats[_MIN_DRAWDOWN] = min(drawdown.min(), 0.0)
+        stats[_RETURN_COUNT] = len(returns)
+        stats[_RETURN_MEAN] = returns.mean()
+        stats[_RETURN_M2] = np.square(returns - returns.mean()).sum()
+        stats[_NUM_RECORDS] = sum(bar[2] for bar in window[1:])
+        stats[_NUM_PNL] = len(pnls)
+        stats[_SUM_PNL] = pnls.sum()
+        stats[_NUM_WIN] = (pnls > 0).sum()
+        stats[_SUM_WIN] = pnls[pnls > 0].sum()
+        stats[_NUM_LOSS] = (pnls < 0).sum()
+        stats[_SUM_LOSS] = pnls[pnls < 0].sum()
+        days = max((pd.Timestamp(window[-1][0]) - pd.Timestamp(window[0][0])).days, 1)
+        return self._close_out(stats, float(equity[0]), len(window), days)
+
+    def _close_out(self, stats: np.ndarray, initial_equity: float, num_bars: int, days: int) -> Dict[str, float]:
+        """Metrics of ``stats`` with the open position closed at the last close."""
+        stats[_FINAL_EQUITY] = self.equity
+        if self.position != 0 and num_bars > 0:
+            if self.position > 0:
+                pnl = (self.prev_close - self.entry_price) * self.position
+            else:
+                pnl = (self.entry_price - self.prev_close) * abs(self.position)
+            stats[_NUM_RECORDS] += 1
+            stats[_NUM_PNL] += 1
+            stats[_SUM_PNL] += pnl
+            if pnl > 0:
+                stats[_NUM_WIN] += 1
+                stats[_SUM_WIN] += pnl
+            elif pnl < 0:
+                stats[_NUM_LOSS] += 1
+                stats[_SUM_LOSS] += pnl
+        return _metrics_from_batch_stats(stats, initial_equity, num_bars, days)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly snapshot of the full state."""
+        def iso(value):
+            return None if value is None else value.isoformat()
+
+        return {
+            'params': self.params,
+            'initial_equity': self.initial_equity,
+            'num_bars': self.num_bars,
+            'prev_close': self.prev_close,
+            'tr_window': list(self.tr_window),
+            'final_upper': self.final_upper,
+            'final_lower': self.final_lower,
+            'trend': self.trend,
+            'warm': self.warm,
+            'position': self.position,
+            'entry_price': self.entry_price,
+            'stop_loss': self.stop_loss,
+            'take_profit': self.take_profit,
+            'equity': self.equity,
+            'peak': self.peak,
+            'stats': list(self.stats),
+            'history': [list(bar) for bar in self.history],
+            'history_bars': self.history.maxlen,
+            'last_timestamp': iso(self.last_timestamp),
+            'first_index_time': iso(self.first_index_time),
+            'last_index_time': iso(self.last_index_time),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'IncrementalBacktest':
+        """Restore a backtest saved with ``to_dict``."""
+        backtest = cls(state['params'], state.get('initial_equity', 100.0), state.get('history_bars', 10000))
+        for name in ('num_bars', 'trend'):
+            setattr(backtest, name, int(state[name]))
+        for name in ('prev_close', 'final_upper', 'final_lower', 'position',
+                     'entry_price', 'stop_loss', 'take_profit', 'equity', 'peak'):
+            setattr(backtest, name, float(state[name]))
+        backtest.warm = bool(state['warm'])
+        if 'tr_window' in state:
+            backtest.tr_window.extend(float(v) for v in state['tr_window'])
+        else:
+            # Saved with a running true-range total: the window is its differences
+            sums = [float(v) for v in state['cumsum_window']]
+            true_ranges = [b - a for a, b in zip(sums, sums[1:])]
+            if sums and backtest.num_bars <= len(sums):
+                true_ranges.insert(0, sums[0])
+            backtest.tr_window.extend(true_ranges)
+        backtest.stats = [float(v) for v in state['stats']]
+        backtest.history.extend(tuple(bar) for bar in state.get('history', []))
+        backtest.last_timestamp = _to_time(state.get('last_timestamp'))
+        backtest.first_index_time = _to_time(state.get('first_index_time'))
+        backtest.last_index_time = _to_time(state.get('last_index_time'))
+        return backtest
@@ -5,12 +5,25 @@ This module provides various technical indicators for financial market analysis:
 - Standard technical indicators (SMA, EMA, RSI, MACD, etc.)
 - Advanced volatility indicators
 - Custom indicators for AI-driven trading
+- Array-based SuperTrend/ATR kernel shared by the optimizers
 """
 
 from src.AI.indicators.technical import TechnicalIndicators
 from src.AI.indicators.volatility import VolatilityIndicators
+from src.AI.indicators.supertrend_kernel import (
+    true_range,
+    rolling_atr,
+    supertrend,
+    supertrend_bands,
+    trend_signals
+)
 
 __all__ = [
     'TechnicalIndicators',
-    'VolatilityIndicators'
+    'VolatilityIndicators',
+    'true_range',
+    'rolling_atr',
+    'supertrend',
+    'supertrend_bands',
+    'trend_signals'
 ]
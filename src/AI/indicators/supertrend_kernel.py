@@ -0,0 +1,228 @@
+"""
+SuperTrend / ATR Kernel
+
+Array-based implementation of the SuperTrend indicator shared by the
+optimizers, backtesters and example strategies.
+
+All functions take plain NumPy arrays (or anything ``np.asarray`` accepts)
+and never index into pandas objects row by row. The band recursion runs
+as a single pass that is JIT-compiled with numba when it is installed and
+falls back to a plain Python loop over native floats otherwise.
+
+The recursion follows ``pine_supertrend`` in the Jamso AI BOT Pine script
+(TradingView's ``ta.supertrend``), with the trend reported in the
+Python convention used across this package: ``1`` for an uptrend and
+``-1`` for a downtrend.
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# numba is optional; without it the recursion runs as a plain Python loop
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _band_recursion(close, basic_upper, basic_lower, final_upper, final_lower, supertrend, trend):
+    """
+    Single pass over the bars carrying the final bands and trend forward.
+
+    Works on NumPy arrays (numba path) and on Python lists (pure path);
+    the output sequences are filled in place.
+    """
+    n = len(close)
+    warm = False
+    for i in range(n):
+        bu = basic_upper[i]
+        bl = basic_lower[i]
+
+        # Bands are undefined until the ATR has a full window
+        if bu != bu or bl != bl:
+            final_upper[i] = np.nan
+            final_lower[i] = np.nan
+            supertrend[i] = np.nan
+            trend[i] = -1.0
+            warm = False
+            continue
+
+        if warm:
+            prev_close = close[i - 1]
+            prev_upper = final_upper[i - 1]
+            prev_lower = final_lower[i - 1]
+
+            # Bands only tighten while price stays on the same side
+            upper = bu if (bu < prev_upper or prev_close > prev_upper) else prev_upper
+            lower = bl if (bl > prev_lower or prev_close < prev_lower) else prev_lower
+
+            if trend[i - 1] < 0:
+                direction = 1.0 if close[i] > upper else -1.0
+            else:
+                direction = -1.0 if close[i] < lower else 1.0
+        else:
+            # First bar with a defined ATR starts in a downtrend
+            upper = bu
+            lower = bl
+            direction = -1.0
+            warm = True
+
+        final_upper[i] = upper
+        final_lower[i] = lower
+        trend[i] = direction
+        supertrend[i] = lower if direction > 0 else upper
+
+
+if NUMBA_AVAILABLE:
+    _compiled_band_recursion = njit(cache=True)(_band_recursion)
+
+
+def _as_float_array(values) -> np.ndarray:
+    """Return a contiguous float64 view/copy of the input."""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """
+    True Range.
+
+    Args:
+        high: High prices
+        low: Low prices
+        close: Close prices
+
+    Returns:
+        Array of true range values; the first bar uses ``high - low`` since
+        there is no previous close
+    """
+    high = _as_float_array(high)
+    low = _as_float_array(low)
+    close = _as_float_array(close)
+
+    tr = high - low
+    if len(tr) > 1:
+        prev_close = close[:-1]
+        np.maximum(tr[1:], np.abs(high[1:] - prev_close), out=tr[1:])
+        np.maximum(tr[1:], np.abs(low[1:] - prev_close), out=tr[1:])
+    return tr
+
+
+def rolling_atr(tr, period: int) -> np.ndarray:
+    """
+    Average True Range as a simple moving average of the true range.
+
+    Args:
+        tr: True range values (see ``true_range``)
+        period: Window size
+
+    Returns:
+        Array of ATR values, NaN until the first full window
+    """
+    tr = _as_float_array(tr)
+    period = int(period)
+    if period < 1:
+        raise ValueError(f"ATR period must be >= 1, got {period}")
+
+    atr = np.full(len(tr), np.nan)
+    if len(tr) >= period:
+        csum = np.cumsum(tr)
+        atr[period - 1] = csum[period - 1]
+        atr[period:] = csum[period:] - csum[:-period]
+        atr[period - 1:] /= period
+    return atr
+
+
+def supertrend_bands(close, hl2, atr, multiplier: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the SuperTrend band recursion on precomputed inputs.
+
+    Taking ``hl2`` and ``atr`` directly lets callers that evaluate many
+    multipliers share the same precomputed arrays.
+
+    Args:
+        close: Close prices
+        hl2: Bar midpoints, ``(high + low) / 2``
+        atr: ATR values aligned with ``close``
+        multiplier: Band distance in ATR units
+
+    Returns:
+        Tuple of (supertrend, trend, final_upper, final_lower); ``trend`` is
+        an int8 array of 1 (uptrend) / -1 (downtrend)
+    """
+    close = _as_float_array(close)
+    hl2 = _as_float_array(hl2)
+    atr = _as_float_array(atr)
+
+    basic_upper = hl2 + multiplier * atr
+    basic_lower = hl2 - multiplier * atr
+
+    n = len(close)
+    if NUMBA_AVAILABLE:
+        final_upper = np.empty(n)
+        final_lower = np.empty(n)
+        st = np.empty(n)
+        trend = np.empty(n)
+        _compiled_band_recursion(close, basic_upper, basic_lower, final_upper, final_lower, st, trend)
+    else:
+        # Native floats in lists are much faster to index than NumPy scalars
+        final_upper = [0.0] * n
+        final_lower = [0.0] * n
+        st = [0.0] * n
+        trend = [0.0] * n
+        _band_recursion(close.tolist(), basic_upper.tolist(), basic_lower.tolist(),
+                        final_upper, final_lower, st, trend)
+
+    return (
+        np.asarray(st, dtype=np.float64),
+        np.asarray(trend, dtype=np.int8),
+        np.asarray(final_upper, dtype=np.float64),
+        np.asarray(final_lower, dtype=np.float64),
+    )
+
+
+def supertrend(high, low, close, atr_period: int = 10, multiplier: float = 3.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    SuperTrend indicator.
+
+    Args:
+        high: High prices
+        low: Low prices
+        close: Close prices
+        atr_period: ATR window size
+        multiplier: Band distance in ATR units
+
+    Returns:
+        Tuple of (supertrend, trend) arrays; ``trend`` is 1 in an uptrend
+        and -1 in a downtrend
+    """
+    high = _as_float_array(high)
+    low = _as_float_array(low)
+    close = _as_float_array(close)
+
+    atr = rolling_atr(true_range(high, low, close), atr_period)
+    st, trend, _, _ = supertrend_bands(close, (high + low) / 2, atr, multiplier)
+    return st, trend
+
+
+def trend_signals(trend) -> np.ndarray:
+    """
+    Convert a trend array into entry signals.
+
+    Args:
+        trend: Trend values (1 / -1)
+
+    Returns:
+        int8 array with 1 where the trend flips up, -1 where it flips down
+        and 0 elsewhere; the first bar never signals
+    """
+    trend = np.asarray(trend)
+    signals = np.zeros(len(trend), dtype=np.int8)
+    if len(trend) > 1:
+        flipped = trend[1:] != trend[:-1]
+        signals[1:][flipped] = trend[1:][flipped]
+    return signals
@@ -0,0 +1,67 @@
+"""
+Volatility Indicators Module
+
+pandas wrappers around the array-based SuperTrend/ATR kernel in
+``src.AI.indicators.supertrend_kernel``.
+"""
+
+import pandas as pd
+
+from src.AI.indicators.supertrend_kernel import rolling_atr, supertrend, true_range
+
+
+class VolatilityIndicators:
+    """
+    Volatility-band indicators for financial market analysis.
+    """
+
+    @staticmethod
+    def true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+        """
+        True Range.
+
+        Args:
+            high: High price series
+            low: Low price series
+            close: Close price series
+
+        Returns:
+            Series with true range values
+        """
+        return pd.Series(true_range(high.values, low.values, close.values), index=close.index)
+
+    @staticmethod
+    def atr(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 14) -> pd.Series:
+        """
+        Average True Range.
+
+        Args:
+            high: High price series
+            low: Low price series
+            close: Close price series
+            window: Window size
+
+        Returns:
+            Series with ATR values
+        """
+        tr = true_range(high.values, low.values, close.values)
+        return pd.Series(rolling_atr(tr, window), index=close.index)
+
+    @staticmethod
+    def supertrend(high: pd.Series, low: pd.Series, close: pd.Series,
+                   atr_period: int = 10, multiplier: float = 3.0) -> pd.DataFrame:
+        """
+        SuperTrend.
+
+        Args:
+            high: High price series
+            low: Low price series
+            close: Close price series
+            atr_period: ATR window size
+            multiplier: Band distance in ATR units
+
+        Returns:
+            DataFrame with supertrend and trend (1 up / -1 down) columns
+        """
+        st, trend = supertrend(high.values, low.values, close.values, atr_period, multiplier)
+        return pd.DataFrame({'supertrend': st, 'trend': trend}, index=close.index)
@@ -26,6 +26,20 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter, MaxNLocator
+import sys
+from functools import partial
+
+# Add project root to path so the shared indicator kernel is importable when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.AI.indicators.supertrend_kernel import (
+    rolling_atr,
+    supertrend_bands,
+    trend_signals,
+    true_range
+)
+from src.AI.backtest_cache import evaluate_with_cache, get_default_cache
+from src.AI.successive_halving import successive_halving
 
 # Try to import hyperopt, if it's not available we'll provide a simpler optimizer
 try:
@@ -136,63 +150,24 @@ def supertrend_strategy(df, atr_len=10, fact=3.0, risk_percent=1.0, sl_percent=0
     trades = []
     equity_curve = [initial_capital]  # Start with initial capital
     
-    # Calculate ATR if not already calculated or recalculate with specific length
-    df['tr1'] = df['high'] - df['low']
-    df['tr2'] = abs(df['high'] - df['close'].shift(1))
-    df['tr3'] = abs(df['low'] - df['close'].shift(1))
-    df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-    df['atr'] = df['tr'].rolling(window=atr_len).mean().fillna(df['tr'])
-    
-    # Calculate SuperTrend
-    hl2 = (df['high'] + df['low']) / 2
-    df['upperband'] = hl2 + fact * df['atr']
-    df['lowerband'] = hl2 - fact * df['atr']
-    
-    # Initialize SuperTrend values
-    df['supertrend'] = 0.0
-    df['uptrend'] = True
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
     
-    # First value initialization
-    df.loc[0, 'supertrend'] = df.loc[0, 'upperband']
-    df.loc[0, 'uptrend'] = False
+    # Calculate ATR with the specific length
+    df['tr'] = true_range(high, low, close)
+    df['atr'] = rolling_atr(df['tr'].values, atr_len)
     
-    # Calculate SuperTrend and uptrend status
-    for i in range(1, len(df)):
-        curr_close = df.loc[i, 'close']
-        prev_supertrend = df.loc[i-1, 'supertrend']
-        curr_upperband = df.loc[i, 'upperband']
-        curr_lowerband = df.loc[i, 'lowerband']
-        prev_uptrend = df.loc[i-1, 'uptrend']
-        
-        # Determine trend
-        if prev_supertrend <= curr_upperband and prev_uptrend:
-            curr_supertrend = max(curr_lowerband, prev_supertrend)
-            curr_uptrend = True
-        elif prev_supertrend <= curr_upperband and not prev_uptrend:
-            curr_supertrend = curr_lowerband
-            curr_uptrend = True if curr_close > prev_supertrend else False
-        elif prev_supertrend >= curr_lowerband and prev_uptrend:
-            curr_supertrend = curr_upperband
-            curr_uptrend = False if curr_close < prev_supertrend else True
-        else:  # prev_supertrend >= curr_lowerband and not prev_uptrend
-            curr_supertrend = min(curr_upperband, prev_supertrend)
-            curr_uptrend = False
-            
-        # Assign to dataframe
-        df.loc[i, 'supertrend'] = curr_supertrend
-        df.loc[i, 'uptrend'] = curr_uptrend
+    # Calculate SuperTrend bands and trend in a single array pass
+    hl2 = (high + low) / 2
+    st, trend, upperband, lowerband = supertrend_bands(close, hl2, df['atr'].values, fact)
+    df['upperband'] = upperband
+    df['lowerband'] = lowerband
+    df['supertrend'] = st
+    df['uptrend'] = trend > 0
     
     # Add signals to dataframe - signal is 1 for buy, -1 for sell, 0 for no action
-    df['signal'] = 0
-    
-    # Generate signals at trend change
-    for i in range(1, len(df)):
-        # Buy signal - trend changes from down to up
-        if not df.loc[i-1, 'uptrend'] and df.loc[i, 'uptrend']:
-            df.loc[i, 'signal'] = 1
-        # Sell signal - trend changes from up to down
-        elif df.loc[i-1, 'uptrend'] and not df.loc[i, 'uptrend']:
-            df.loc[i, 'signal'] = -1
+    df['signal'] = trend_signals(trend)
     
     # Trading logic
     for i in range(1, len(df)):
@@ -379,7 +354,65 @@ def calculate_metrics(result):
         'largest_loser': largest_loser
     }
 
-def optimize_parameters(df, strategy_func, search_space, objective_name='sharpe', num_evals=50):
+def _evaluate_strategy_batch(strategy_func, df, param_chunk):
+    """Run the strategy for each parameter set and return its metrics (None on failure)."""
+    results = []
+    for params in param_chunk:
+        try:
+            results.append(calculate_metrics(strategy_func(df, **params)))
+        except Exception as e:
+            logger.warning(f"Error evaluating parameter set {params}: {str(e)}")
+            results.append(None)
+    return results
+
+def _grid_param_sets(search_space, num_evals):
+    """
+    Expand a search space into at most num_evals parameter dictionaries.
+    
+    Numeric (low, high) tuples are sampled on an evenly spaced grid, lists
+    are used as-is, and a random subset is drawn when the grid is larger
+    than num_evals.
+    """
+    # Generate parameter combinations
+    param_grid = []
+    for param, value_range in search_space.items():
+        if isinstance(value_range, tuple) and len(value_range) == 2:
+            if isinstance(value_range[0], int) and isinstance(value_range[1], int):
+                # For integer parameters
+                values = np.linspace(value_range[0], value_range[1], min(10, num_evals), dtype=int)
+            else:
+                # For float parameters
+                values = np.linspace(value_range[0], value_range[1], min(10, num_evals))
+            param_grid.append((param, values))
+        elif isinstance(value_range, list):
+            # For discrete values
+            param_grid.append((param, value_range))
+    
+    # Generate all combinations
+    import itertools
+    param_names = [p[0] for p in param_grid]
+    param_values = [p[1] for p in param_grid]
+    combinations = list(itertools.product(*param_values))
+    
+    # Limit to num_evals
+    if len(combinations) > num_evals:
+        chosen = np.random.choice(len(combinations), num_evals, replace=False)
+        combinations = [combinations[i] for i in chosen]
+    
+    param_sets = []
+    for combo in combinations:
+        params = dict(zip(param_names, combo))
+        
+        # Convert int parameters
+        for k, v in params.items():
+            if k in ['atr_len'] and isinstance(v, float):
+                params[k] = int(v)
+        param_sets.append(params)
+    
+    return param_sets
+
+def optimize_parameters(df, strategy_func, search_space, objective_name='sharpe', num_evals=50, workers=1,
+                        search_mode='auto', eta=3, min_fraction=0.2, use_cache=True):
     """
     Optimize strategy parameters using either hyperopt or grid search.
     
@@ -389,14 +422,43 @@ def optimize_parameters(df, strategy_func, search_space, objective_name='sharpe'
     - search_space: Dictionary with parameter ranges, e.g., {'atr_len': (5, 20)}
     - objective_name: Name of the objective function to maximize ('sharpe', 'return', etc.)
     - num_evals: Number of parameter combinations to evaluate
+    - workers: Worker processes for the grid and halving searches (None for all
+      cores but one). Hyperopt's TPE search is sequential and always runs in
+      this process.
+    - search_mode: 'auto' (hyperopt when installed, otherwise grid), 'grid', or
+      'halving' (successive halving over the grid candidates)
+    - eta: Promotion factor between halving rungs
+    - min_fraction: Fraction of the history used by the first halving rung
+    - use_cache: Reuse grid and halving results stored in the backtest cache
     
     Returns:
-    - Tuple of (best parameters, best objective value, all results)
+    - Tuple of (best parameters, best objective value, all results); halving
+      results are ranked best first and record the ``rung`` and ``bars`` each
+      candidate reached
     """
+    if search_mode not in ('auto', 'grid', 'halving'):
+        raise ValueError(f"Unknown search mode: {search_mode}")
+    
     objective_func = OBJECTIVES.get(objective_name, OBJECTIVES['sharpe'])
     results = []
+    evaluate_batch = partial(_evaluate_strategy_batch, strategy_func)
+    cache = get_default_cache() if use_cache else None
     
-    if HYPEROPT_AVAILABLE:
+    if search_mode == 'halving':
+        ranked = successive_halving(
+            df, _grid_param_sets(search_space, num_evals), evaluate_batch, objective_func,
+            min_fraction=min_fraction, eta=eta, workers=workers, cache=cache
+        )
+        results = [
+            {'params': r['params'].copy(), 'metrics': r['metrics'], 'objective': r['objective_value'],
+             'rung': r['rung'], 'bars': r['bars']}
+            for r in ranked if r['metrics'] is not None
+        ]
+        if results and results[0]['bars'] == len(df):
+            return results[0]['params'].copy(), results[0]['objective'], results
+        return None, float('-inf'), results
+    
+    if HYPEROPT_AVAILABLE and search_mode == 'auto':
         # Create hyperopt search space
         hspace = {}
         for param, value_range in search_space.items():
@@ -457,47 +519,18 @@ def optimize_parameters(df, strategy_func, search_space, objective_name='sharpe'
         best_value = -trials.trials[best_idx]['result']['loss']
         
     else:
-        # Simple grid search if hyperopt is not available
-        # Generate parameter combinations
-        param_grid = []
-        for param, value_range in search_space.items():
-            if isinstance(value_range, tuple) and len(value_range) == 2:
-                if isinstance(value_range[0], int) and isinstance(value_range[1], int):
-                    # For integer parameters
-                    values = np.linspace(value_range[0], value_range[1], min(10, num_evals), dtype=int)
-                else:
-                    # For float parameters
-                    values = np.linspace(value_range[0], value_range[1], min(10, num_evals))
-                param_grid.append((param, values))
-            elif isinstance(value_range, list):
-                # For discrete values
-                param_grid.append((param, value_range))
-        
-        # Generate all combinations
-        import itertools
-        param_names = [p[0] for p in param_grid]
-        param_values = [p[1] for p in param_grid]
-        combinations = list(itertools.product(*param_values))
-        
-        # Limit to num_evals
-        if len(combinations) > num_evals:
-            combinations = np.random.choice(combinations, num_evals, replace=False)
+        # Grid search when hyperopt is not available or not requested
+        param_sets = _grid_param_sets(search_space, num_evals)
         
-        # Evaluate each combination
+        # Evaluate each combination, taking results as workers finish
         best_value = float('-inf')
         best_params = None
+        best_index = len(param_sets)
         
-        for combo in combinations:
-            params = dict(zip(param_names, combo))
-            
-            # Convert int parameters
-            for k, v in params.items():
-                if k in ['atr_len'] and isinstance(v, float):
-                    params[k] = int(v)
-            
-            # Run strategy
-            result = strategy_func(df, **params)
-            metrics = calculate_metrics(result)
+        for i, metrics in evaluate_with_cache(df, evaluate_batch, param_sets, cache, workers=workers):
+            if metrics is None:
+                continue
+            params = param_sets[i]
             obj_value = objective_func(metrics)
             
             # Save result
@@ -507,10 +540,11 @@ def optimize_parameters(df, strategy_func, search_space, objective_name='sharpe'
                 'objective': obj_value
             })
             
-            # Update best if better
-            if obj_value > best_value:
+            # Update best if better (ties go to the earlier combination)
+            if obj_value > best_value or (obj_value == best_value and i < best_index):
                 best_value = obj_value
                 best_params = params.copy()
+                best_index = i
     
     return best_params, best_value, results
 
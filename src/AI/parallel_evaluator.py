@@ -0,0 +1,271 @@
+"""
+Parallel Parameter Evaluation Engine for Jamso-AI-Engine
+
+Process-pool evaluation of strategy parameter sets against one price frame:
+- The frame's numeric and datetime columns are published once in a
+  ``multiprocessing.shared_memory`` block
+- Each worker attaches to the block when it starts and rebuilds the frame as
+  zero-copy, read-only views; it drops the frame and closes its mapping when
+  the worker process exits
+- Tasks carry only chunks of parameter dictionaries
+- Results are yielded as soon as each chunk finishes
+
+The optimizers in ``fallback_optimizer``, ``optimizer_essentials`` and
+``parameter_optimizer`` all evaluate through ``evaluate_in_parallel``.
+"""
+
+import gc
+import logging
+import math
+import os
+from multiprocessing import util as multiprocessing_util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# evaluate_batch(df, param_chunk) -> one result per parameter set in the chunk
+BatchEvaluator = Callable[[pd.DataFrame, List[Dict[str, Any]]], List[Any]]
+
+# Array kinds that can live in shared memory: bool, int, uint, float, datetime64
+_SHAREABLE_KINDS = 'biufM'
+_ALIGNMENT = 64
+
+# Per-worker state, set once by _init_worker
+_worker_frame: Optional[pd.DataFrame] = None
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_evaluate: Optional[BatchEvaluator] = None
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """
+    Number of worker processes to use.
+
+    ``None`` or ``0`` means one per CPU, keeping one core for the parent.
+    """
+    if not workers:
+        return max(1, (os.cpu_count() or 2) - 1)
+    return max(1, int(workers))
+
+
+def _shareable(values: np.ndarray) -> bool:
+    return values.dtype.kind in _SHAREABLE_KINDS
+
+
+class SharedFrame:
+    """
+    A DataFrame published in one shared memory block.
+
+    Columns whose values are plain NumPy arrays (numbers, booleans, naive
+    datetimes) are copied into the block once; anything else (strings,
+    timezone-aware datetimes) travels in the descriptor, which is pickled
+    once per worker rather than once per task.
+
+    The creating process owns the block and unlinks it on ``close``.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        arrays: List[Tuple[str, Any, np.ndarray]] = []
+        extra: Dict[Any, Any] = {}
+
+        index_values = np.asarray(df.index)
+        if _shareable(index_values):
+            arrays.append(('index', df.index.name, index_values))
+            index_spec: Dict[str, Any] = {'shared': True, 'freq': getattr(df.index, 'freq', None)}
+        else:
+            index_spec = {'shared': False, 'index': df.index}
+
+        for col in df.columns:
+            values = df[col].to_numpy()
+            if _shareable(values):
+                arrays.append(('column', col, values))
+            else:
+                extra[col] = df[col].array
+
+        layout = []
+        offset = 0
+        for kind, name, values in arrays:
+            values = np.ascontiguousarray(values)
+            layout.append((kind, name, values.dtype.str, offset))
+            offset += -(-values.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (kind, name, dtype, start), (_, _, values) in zip(layout, arrays):
+            view = np.ndarray(len(values), dtype=dtype, buffer=self._shm.buf, offset=start)
+            view[:] = values
+
+        self.descriptor: Dict[str, Any] = {
+            'shm_name': self._shm.name,
+            'length': len(df),
+            'columns': list(df.columns),
+            'layout': layout,
+            'index': index_spec,
+            'extra': extra,
+        }
+
+    @staticmethod
+    def attach(descriptor: Dict[str, Any]) -> Tuple[pd.DataFrame, shared_memory.SharedMemory]:
+        """
+        Rebuild the frame from a descriptor.
+
+        Returns the frame and the attached block; the block must stay open for
+        as long as the frame is used.
+        """
+        shm = shared_memory.SharedMemory(name=descriptor['shm_name'])
+        length = descriptor['length']
+
+        shared: Dict[Any, np.ndarray] = {}
+        index = None
+        for kind, name, dtype, start in descriptor['layout']:
+            view = np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=start)
+            view.flags.writeable = False
+            if kind == 'index':
+                freq = descriptor['index']['freq']
+                if freq is not None:
+                    index = pd.DatetimeIndex(view, name=name, freq=freq, copy=False)
+                else:
+                    index = pd.Index(view, name=name, copy=False)
+            else:
+                shared[name] = view
+
+        if not descriptor['index']['shared']:
+            index = descriptor['index']['index']
+
+        data = {}
+        for col in descriptor['columns']:
+            values = shared[col] if col in shared else descriptor['extra'][col]
+            data[col] = pd.Series(values, index=index, name=col, copy=False)
+
+        frame = pd.DataFrame(data, index=index, columns=descriptor['columns'], copy=False)
+        return frame, shm
+
+    def close(self) -> None:
+        """Release and unlink the shared block."""
+        if self._shm is None:
+            return
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+
+    def __enter__(self) -> 'SharedFrame':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _init_worker(descriptor: Dict[str, Any], evaluate_batch: BatchEvaluator) -> None:
+    """Attach to the shared frame once per worker process."""
+    global _worker_frame, _worker_shm, _worker_evaluate
+    _worker_frame, _worker_shm = SharedFrame.attach(descriptor)
+    _worker_evaluate = evaluate_batch
+    # Worker processes end with os._exit, which skips atexit; multiprocessing
+    # runs finalizers that have an exit priority on the way out
+    multiprocessing_util.Finalize(None, _release_worker, exitpriority=10)
+
+
+def _release_worker() -> None:
+    """Drop the worker's frame and close its mapping of the shared block."""
+    global _worker_frame, _worker_shm, _worker_evaluate
+    shm = _worker_shm
+    _worker_frame, _worker_shm, _worker_evaluate = None, None, None
+    if shm is None:
+        return
+    # Views of the block must be gone before the mapping can be closed
+    gc.collect()
+    try:
+        shm.close()
+    except BufferError:
+        logger.debug("Shared frame still referenced at worker exit; the mapping is released with the process")
+
+
+def _run_chunk(param_chunk: List[Dict[str, Any]]) -> List[Any]:
+    """Evaluate one chunk of parameter sets in a worker."""
+    if _worker_frame is None or _worker_evaluate is None:
+        raise RuntimeError("Worker was not initialised with a shared frame")
+    # Shallow copy so columns a strategy adds do not leak into the next chunk
+    return _worker_evaluate(_worker_frame.copy(deep=False), param_chunk)
+
+
+def _chunk_size(num_params: int, workers: int, max_chunk: int) -> int:
+    if workers == 1:
+        return max(1, max_chunk)
+    # Roughly four chunks per worker keeps the pool busy near the end of the run
+    return max(1, min(max_chunk, math.ceil(num_params / (workers * 4))))
+
+
+def evaluate_in_parallel(
+    df: pd.DataFrame,
+    evaluate_batch: BatchEvaluator,
+    param_sets: Sequence[Dict[str, Any]],
+    workers: Optional[int] = 1,
+    max_chunk: int = 64
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Evaluate parameter sets, yielding results as they complete.
+
+    Parameters:
+    - df: DataFrame with price data, shared with the workers
+    - evaluate_batch: Module-level function ``(df, param_chunk) -> results``
+      returning one result per parameter set; it is sent to each worker once
+    - param_sets: Parameter dictionaries to evaluate
+    - workers: Number of worker processes (``None``/``0`` for all cores but
+      one); ``1`` evaluates in this process
+    - max_chunk: Largest number of parameter sets sent in one task
+
+    Yields:
+    - ``(position, result)`` pairs in completion order, where ``position``
+      indexes ``param_sets``. A chunk that raises yields ``None`` for each of
+      its parameter sets.
+    """
+    param_sets = list(param_sets)
+    if not param_sets:
+        return
+
+    workers = min(resolve_workers(workers), len(param_sets))
+    chunk = _chunk_size(len(param_sets), workers, max_chunk)
+    starts = range(0, len(param_sets), chunk)
+
+    if workers == 1:
+        for start in starts:
+            batch = param_sets[start:start + chunk]
+            try:
+                results = evaluate_batch(df, batch)
+            except Exception as e:
+                logger.warning(f"Error evaluating parameter chunk: {str(e)}")
+                results = [None] * len(batch)
+            for offset, result in enumerate(results):
+                yield start + offset, result
+        return
+
+    logger.info(f"Evaluating {len(param_sets)} parameter sets on {workers} workers")
+    with SharedFrame(df) as shared:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shared.descriptor, evaluate_batch)
+        )
+        try:
+            futures = {
+                executor.submit(_run_chunk, param_sets[start:start + chunk]): start
+                for start in starts
+            }
+            for future in as_completed(futures):
+                start = futures[future]
+                size = len(param_sets[start:start + chunk])
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.warning(f"Error evaluating parameter chunk: {str(e)}")
+                    results = [None] * size
+                for offset, result in enumerate(results):
+                    yield start + offset, result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
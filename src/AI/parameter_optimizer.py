@@ -23,6 +23,7 @@ import sys
 import json
 import itertools
 import multiprocessing
+from functools import partial
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union, Tuple
 import matplotlib.pyplot as plt
@@ -33,6 +34,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.AI.performance_monitor import PerformanceMonitor
 from src.AI.example_strategies import jamso_ai_bot_strategy
 from src.AI.backtest_utils import DataLoader, ResultSaver
+from src.AI.parallel_evaluator import evaluate_in_parallel, resolve_workers
 
 # Define optimization objectives
 OBJECTIVES: Dict[str, Any] = {
@@ -79,6 +81,8 @@ def parse_args():
                       help='Use parallel processing')
     parser.add_argument('--cores', type=int, default=multiprocessing.cpu_count() - 1,
                       help='Number of CPU cores to use')
+    parser.add_argument('--workers', type=int,
+                      help='Number of worker processes sharing the price data (overrides --parallel/--cores)')
     
     # Output options
     parser.add_argument('--output', type=str, default='optimization_results.json',
@@ -153,33 +157,44 @@ def get_parameter_grid(args):
         'param2': [0.1, 0.2, 0.3]
     }
 
-def evaluate_params(args_tuple):
-    """Evaluate a single parameter set."""
-    data, strategy_fn, params, objective_fn = args_tuple
-    
+def score_result(params, metrics, objective_fn):
+    """Build a result entry from backtest metrics."""
+    if 'error' in metrics:
+        return {'params': params, 'score': float('-inf'), 'metrics': metrics}
     try:
-        # Run backtest with these parameters
-        monitor = PerformanceMonitor(strategy_fn, data, params)
-        result = monitor.run_backtest()
-        
-        # Calculate score based on objective function
-        score = objective_fn(result.metrics)
-        
-        return {
-            'params': params,
-            'score': score,
-            'metrics': result.metrics
-        }
+        score = objective_fn(metrics)
     except Exception as e:
         print(f"Error evaluating parameters {params}: {e}")
-        return {
-            'params': params,
-            'score': float('-inf'),
-            'metrics': {'error': str(e)}
-        }
+        return {'params': params, 'score': float('-inf'), 'metrics': {'error': str(e)}}
+    return {'params': params, 'score': score, 'metrics': metrics}
 
-def run_grid_search(data, strategy_fn, param_grid, objective_fn, max_evals, use_parallel=False, cores=None):
-    """Run grid search optimization."""
+def backtest_param_batch(strategy_fn, data, param_chunk):
+    """Run backtests for a chunk of parameter sets and return their metrics."""
+    metrics = []
+    for params in param_chunk:
+        try:
+            monitor = PerformanceMonitor(strategy_fn, data, params)
+            metrics.append(monitor.run_backtest().metrics)
+        except Exception as e:
+            print(f"Error evaluating parameters {params}: {e}")
+            metrics.append({'error': str(e)})
+    return metrics
+
+def evaluate_params(args_tuple):
+    """Evaluate a single parameter set."""
+    data, strategy_fn, params, objective_fn = args_tuple
+    metrics = backtest_param_batch(strategy_fn, data, [params])[0]
+    return score_result(params, metrics, objective_fn)
+
+def run_grid_search(data, strategy_fn, param_grid, objective_fn, max_evals, use_parallel=False, cores=None,
+                    workers=None):
+    """
+    Run grid search optimization.
+
+    Price data is published once in shared memory and the worker processes
+    receive only parameter dictionaries; objective scores are computed here
+    as results stream back.
+    """
     # Generate all parameter combinations
     param_keys = list(param_grid.keys())
     param_values = list(param_grid.values())
@@ -208,25 +223,22 @@ def run_grid_search(data, strategy_fn, param_grid, objective_fn, max_evals, use_
         p['initial_capital'] = 5000
         p['direction_bias'] = "Both"
     
-    results = []
+    if workers is None:
+        workers = cores if use_parallel and cores else 1
+    workers = resolve_workers(workers)
+    if workers > 1:
+        print(f"Using {workers} worker processes for parallel processing")
     
-    if use_parallel and cores:
-        # Use parallel processing
-        print(f"Using {cores} CPU cores for parallel processing")
-        args_list = [(data, strategy_fn, p, objective_fn) for p in param_dicts]
+    results = []
+    evaluate_batch = partial(backtest_param_batch, strategy_fn)
+    for i, metrics in evaluate_in_parallel(data, evaluate_batch, param_dicts, workers=workers):
+        if metrics is None:
+            metrics = {'error': 'evaluation failed'}
+        results.append(score_result(param_dicts[i], metrics, objective_fn))
         
-        with multiprocessing.Pool(processes=cores) as pool:
-            results = pool.map(evaluate_params, args_list)
-    else:
-        # Sequential processing
-        for i, params in enumerate(param_dicts):
-            print(f"Evaluating parameter set {i+1}/{len(param_dicts)}")
-            result = evaluate_params((data, strategy_fn, params, objective_fn))
-            results.append(result)
-            
-            # Print progress
-            if (i+1) % 10 == 0 or i+1 == len(param_dicts):
-                print(f"Completed {i+1}/{len(param_dicts)} evaluations")
+        # Print progress
+        if len(results) % 10 == 0 or len(results) == len(param_dicts):
+            print(f"Completed {len(results)}/{len(param_dicts)} evaluations")
     
     # Sort by score (descending)
     results.sort(key=lambda x: x['score'], reverse=True)
@@ -326,7 +338,8 @@ def main():
         objective_fn=objective_fn,
         max_evals=args.max_evals,
         use_parallel=args.parallel,
-        cores=args.cores if args.parallel else None
+        cores=args.cores if args.parallel else None,
+        workers=args.workers
     )
     
     # Print top results
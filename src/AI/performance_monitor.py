@@ -11,6 +11,8 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Any, List, Callable, Optional
 
+from src.AI.backtest_cache import get_default_cache
+
 class BacktestResult:
     def __init__(self, equity_curve: pd.Series, trades: pd.DataFrame, metrics: Dict[str, Any]):
         self.equity_curve = equity_curve
@@ -18,18 +20,31 @@ class BacktestResult:
         self.metrics = metrics
 
 class PerformanceMonitor:
-    def __init__(self, strategy_fn: Callable, data: pd.DataFrame, params: Dict[str, Any]):
+    def __init__(self, strategy_fn: Callable, data: pd.DataFrame, params: Dict[str, Any],
+                 use_cache: bool = True):
         self.strategy_fn = strategy_fn
         self.data = data
         self.params = params
+        self.use_cache = use_cache
         self.results: Optional[BacktestResult] = None
 
     def run_backtest(self) -> BacktestResult:
-        """Run the strategy on historical data and collect performance metrics."""
+        """Run the strategy on historical data and collect performance metrics.
+
+        Results are reused from the backtest cache when the same strategy has
+        already run on identical data with identical parameters.
+        """
+        cache = get_default_cache() if self.use_cache else None
+        if cache is not None:
+            self.results = cache.get_or_compute(self.data, self.strategy_fn, self.params, self._backtest)
+        else:
+            self.results = self._backtest()
+        return self.results
+
+    def _backtest(self) -> BacktestResult:
         trades, equity_curve = self.strategy_fn(self.data, **self.params)
         metrics = self.calculate_metrics(equity_curve, trades)
-        self.results = BacktestResult(equity_curve, trades, metrics)
-        return self.results
+        return BacktestResult(equity_curve, trades, metrics)
 
     @staticmethod
     def calculate_metrics(equity_curve: pd.Series, trades: pd.DataFrame) -> Dict[str, Any]:
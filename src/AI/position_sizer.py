@@ -109,23 +109,32 @@ class AdaptivePositionSizer:
         # Get current regime
         regime_info = self.regime_detector.get_current_regime(symbol)
         
-        # Default adjustment factor
-        adjustment_factor = 1.0
+        # Apply adjustment, but ensure within limits
+        adjusted_size = base_size * self._regime_factor(regime_info)
+        
+        return adjusted_size, regime_info
+
+    @staticmethod
+    def _regime_factor(regime_info: Dict[str, Any]) -> float:
+        """
+        Position size adjustment factor for a volatility regime.
         
+        Args:
+            regime_info: Regime information from the regime detector
+            
+        Returns:
+            Regime adjustment factor
+        """
         # Adjust based on volatility level
         vol_level = regime_info.get('volatility_level', 'MEDIUM')
         
         if vol_level == 'HIGH':
             # Reduce position size in high volatility
-            adjustment_factor = 0.7  # 30% reduction
+            return 0.7  # 30% reduction
         elif vol_level == 'LOW':
             # Increase position size in low volatility
-            adjustment_factor = 1.2  # 20% increase
-        
-        # Apply adjustment, but ensure within limits
-        adjusted_size = base_size * adjustment_factor
-        
-        return adjusted_size, regime_info
+            return 1.2  # 20% increase
+        return 1.0
         
     def _calculate_performance_adjustment(self, 
                                          symbol: str, 
@@ -302,19 +311,65 @@ class AdaptivePositionSizer:
             # Step 1: Get account balance
             account_balance = self._get_account_balance(account_id)
             
+            # Steps 2-3: Look up the volatility regime, recent performance and drawdown
+            regime_info = self.regime_detector.get_current_regime(symbol)
+            performance_factor = self._calculate_performance_adjustment(symbol)
+            drawdown_factor = self._calculate_drawdown_adjustment(account_id)
+            
+            return self.size_position(symbol, original_size, account_balance, regime_info,
+                                      performance_factor, drawdown_factor, signal_id=signal_id,
+                                      price=price, stop_loss=stop_loss)
+            
+        except Exception as e:
+            logger.error(f"Error calculating position size: {e}")
+            # Return original size in case of error
+            return {
+                'original_size': original_size,
+                'adjusted_size': original_size,
+                'error': str(e)
+            }
+
+    def size_position(self, 
+                      symbol: str, 
+                      original_size: float,
+                      account_balance: float,
+                      regime_info: Dict[str, Any],
+                      performance_factor: float,
+                      drawdown_factor: float,
+                      signal_id: Optional[int] = None,
+                      price: Optional[float] = None,
+                      stop_loss: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Calculate the position size from already looked-up inputs.
+        
+        Lets callers that fetch the account balance, regime and adjustment
+        factors concurrently (or from a cache) share the sizing rules.
+        
+        Args:
+            symbol: Market symbol
+            original_size: Original position size from the signal
+            account_balance: Current account balance
+            regime_info: Current volatility regime information
+            performance_factor: Recent performance adjustment factor
+            drawdown_factor: Drawdown adjustment factor
+            signal_id: Signal ID (optional)
+            price: Entry price (optional)
+            stop_loss: Stop loss level (optional)
+            
+        Returns:
+            Dictionary with position sizing information
+        """
+        try:
             # Step 2: Calculate risk amount based on base risk percentage
             risk_amount = account_balance * (self.base_risk_percent / 100)
             
             # Step 3: Get adjustments based on volatility regime
-            base_size = original_size
-            regime_adjusted_size, regime_info = self._calculate_regime_adjustment(symbol, base_size)
+            regime_adjusted_size = original_size * self._regime_factor(regime_info)
             
             # Step 4: Apply performance adjustment
-            performance_factor = self._calculate_performance_adjustment(symbol)
             performance_adjusted_size = regime_adjusted_size * performance_factor
             
             # Step 5: Apply drawdown protection adjustment
-            drawdown_factor = self._calculate_drawdown_adjustment(account_id)
             drawdown_adjusted_size = performance_adjusted_size * drawdown_factor
             
             # Step 6: Calculate actual risk percentage based on stop loss if provided
@@ -236,6 +236,12 @@ class RealtimeAnalytics:
             symbols = self._get_active_symbols()
             
             for symbol in symbols:
+                # Classify the candles collected since the last check
+                self.regime_detector.refresh_bars(symbol)
+                
+                # Refit only when the model is missing, stale or drifting
+                self.regime_detector.refit_if_needed(symbol)
+                
                 # Get current and previous regime
                 current_regime = self.regime_detector.detect_current_regime(symbol)
                 previous_regime = self._get_previous_regime(symbol)
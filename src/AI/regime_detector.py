@@ -4,6 +4,14 @@ Volatility Regime Detector Module
 This module provides functionality to detect market volatility regimes using K-means clustering.
 The detector analyzes historical price data to identify different market states (regimes)
 with distinct volatility characteristics.
+
+Fitted models are saved as versions in a RegimeModelRegistry. Between fits the
+regime is classified online: rolling features updated per bar are assigned to
+the nearest centroid of the latest model. New bars reach the online features
+through ``update_bars`` (called by MarketDataCollector as candles are stored)
+or ``refresh_bars`` (which reads the candle store, called by the real-time
+monitor). Models are refitted on a schedule (``refit_interval_days``) or when
+the bars drift away from the centroids.
 """
 
 import numpy as np
@@ -14,14 +22,33 @@ import logging
 import sqlite3
 from datetime import datetime, timedelta
 import json
+import threading
 from typing import Dict, List, Tuple, Optional, Any, Union
 
 # Import AI cache utilities
 from src.AI.utils.cache import regime_cache, cached
+from src.AI.candle_store import CandleStore, get_default_store
+from src.AI.regime_registry import (
+    REGIME_FEATURES, OnlineRegimeFeatures, RegimeModel, RegimeModelRegistry, get_default_registry
+)
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+
+class _OnlineRegimeState:
+    """Online features, model and drift statistics of one symbol."""
+
+    def __init__(self, model: Optional[RegimeModel]):
+        self.features = OnlineRegimeFeatures()
+        self.model = model
+        self.last_regime: Optional[int] = None
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self.drift = 1.0
+        self.bars_since_fit = 0
+        self.lock = threading.Lock()
+
+
 class VolatilityRegimeDetector:
     """
     Detects market volatility regimes using K-means clustering.
@@ -33,10 +60,19 @@ class VolatilityRegimeDetector:
         model (KMeans): The trained K-means clustering model
         scaler (StandardScaler): Data scaler for normalizing features
         db_path (str): Path to the SQLite database
+        candle_store (CandleStore): Columnar candle store read before the database
+        registry (RegimeModelRegistry): Versioned store of fitted models
+        refit_interval_days (float): Age at which a model is refitted
+        drift_threshold (float): Ratio of recent to training centroid distance
+            at which a model is refitted
     """
     
     def __init__(self, n_clusters: int = 3, lookback_days: int = 60, 
-                 db_path: str = '/home/jamso-ai-server/Jamso-Ai-Engine/src/Database/Webhook/trading_signals.db'):
+                 db_path: str = '/home/jamso-ai-server/Jamso-Ai-Engine/src/Database/Webhook/trading_signals.db',
+                 candle_store: Optional[CandleStore] = None,
+                 registry: Optional[RegimeModelRegistry] = None,
+                 refit_interval_days: float = 7.0,
+                 drift_threshold: float = 3.0):
         """
         Initialize the volatility regime detector.
         
@@ -44,14 +80,26 @@ class VolatilityRegimeDetector:
             n_clusters: Number of volatility regimes to detect (default: 3)
             lookback_days: Number of days of historical data to analyze (default: 60)
             db_path: Path to the SQLite database
+            candle_store: Candle store with the collector's daily candles
+                (default: the shared store)
+            registry: Registry of fitted models (default: the shared registry)
+            refit_interval_days: Age in days at which a model is refitted
+            drift_threshold: Ratio of the recent mean distance to the nearest
+                centroid over the training mean distance that triggers a refit
         """
         self.n_clusters = n_clusters
         self.lookback_days = lookback_days
         self.db_path = db_path
+        self.candle_store = candle_store if candle_store is not None else get_default_store()
         self.model = None
         self.scaler = StandardScaler()
-        self.features = ['atr_normalized', 'volume_change', 'price_range', 'volatility']
+        self.features = list(REGIME_FEATURES)
         self.regime_characteristics = {}
+        self.registry = registry if registry is not None else get_default_registry()
+        self.refit_interval_days = refit_interval_days
+        self.drift_threshold = drift_threshold
+        self._online: Dict[str, _OnlineRegimeState] = {}
+        self._online_lock = threading.Lock()
         
         # Create regimes table if it doesn't exist
         self._create_tables()
@@ -100,16 +148,57 @@ class VolatilityRegimeDetector:
         except Exception as e:
             logger.error(f"Error creating volatility regime tables: {e}")
             
+    def _fetch_stored_data(self, symbol: str) -> pd.DataFrame:
+        """
+        Read daily candles from the candle store and derive ATR and volatility
+        the way MarketDataCollector stores them in market_volatility.
+        
+        Args:
+            symbol: The market symbol to fetch data for
+            
+        Returns:
+            DataFrame containing market data, empty if the store has none
+        """
+        if self.candle_store is None:
+            return pd.DataFrame()
+        
+        start_date = pd.Timestamp.now(tz='UTC').tz_localize(None) - pd.Timedelta(days=self.lookback_days)
+        # Extra history so the rolling windows are warm at the start date
+        df = self.candle_store.read(symbol, 'DAY', start=start_date - pd.Timedelta(days=40))
+        if df.empty:
+            return df
+        
+        tr = pd.concat([
+            (df['high'] - df['low']).abs(),
+            (df['high'] - df['close'].shift(1)).abs(),
+            (df['low'] - df['close'].shift(1)).abs()
+        ], axis=1).max(axis=1)
+        df['atr'] = tr.rolling(window=14).mean()
+        df['volatility'] = df['close'].pct_change().rolling(window=20).std() * np.sqrt(252)
+        
+        df = df[(df['timestamp'] >= start_date) & df['atr'].notna() & df['volatility'].notna()]
+        return df[['timestamp', 'close', 'high', 'low', 'volume', 'atr', 'volatility']].reset_index(drop=True)
+    
     def _fetch_market_data(self, symbol: str) -> pd.DataFrame:
         """
         Fetch historical market data for the given symbol.
         
+        Candles come from the candle store when it holds enough history,
+        otherwise from the market_volatility table.
+        
         Args:
             symbol: The market symbol to fetch data for
             
         Returns:
             DataFrame containing market data
         """
+        try:
+            df = self._fetch_stored_data(symbol)
+            if len(df) >= 30:
+                return df
+        except Exception as e:
+            logger.warning(f"Error reading candle store for {symbol}: {e}")
+        
         try:
             # Calculate the start date
             end_date = datetime.now()
@@ -197,6 +286,9 @@ class VolatilityRegimeDetector:
         """
         Train the regime detection model for the given symbol.
         
+        The fitted model is saved as a new registry version and used for
+        online classification from then on.
+        
         Args:
             symbol: The market symbol to analyze
             
@@ -216,40 +308,253 @@ class VolatilityRegimeDetector:
                 logger.warning(f"Insufficient feature data for {symbol}")
                 return -1
                 
-            # Scale features
-            X = self.scaler.fit_transform(features_df)
+            model = self._fit_model(symbol, features_df[self.features])
+            try:
+                self.registry.save(model)
+            except OSError as e:
+                # Still usable in this process, just not persisted
+                logger.error(f"Error saving regime model for {symbol}: {e}")
+            
+            # Restart the online state from the same history
+            state = _OnlineRegimeState(model)
+            self._prime(state, market_data)
+            with self._online_lock:
+                self._online[symbol] = state
             
-            # Train K-means model
-            self.model = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
-            clusters = self.model.fit_predict(X)
-            
-            # Analyze cluster characteristics
-            for i in range(self.n_clusters):
-                cluster_data = features_df.iloc[clusters == i]
-                
-                # Store regime characteristics
-                self.regime_characteristics[i] = {
-                    'atr_avg': float(cluster_data['atr_normalized'].mean()),
-                    'volume_change_avg': float(cluster_data['volume_change'].mean()),
-                    'price_range_avg': float(cluster_data['price_range'].mean()),
-                    'volatility_avg': float(cluster_data['volatility'].mean()),
-                    'count': int(len(cluster_data)),
-                    'volatility_level': self._get_volatility_level(cluster_data['volatility'].mean())
-                }
-                
             # Determine current regime (latest data point)
-            latest_features = self.scaler.transform(features_df.iloc[[-1]])
-            current_regime = int(self.model.predict(latest_features)[0])
+            current_regime, _ = model.classify(features_df[self.features].iloc[-1].to_numpy())
+            state.last_regime = current_regime
             
             # Save regime information
             self._save_regime_data(symbol, current_regime)
             
-            logger.info(f"Volatility regime model trained for {symbol}. Current regime: {current_regime}")
+            logger.info(f"Volatility regime model v{model.version} trained for {symbol}. "
+                        f"Current regime: {current_regime}")
             return current_regime
             
         except Exception as e:
             logger.error(f"Error training volatility regime model: {e}")
             return -1
+    
+    def _fit_model(self, symbol: str, features_df: pd.DataFrame) -> RegimeModel:
+        """
+        Fit the scaler and K-means on prepared features.
+        
+        Args:
+            symbol: The market symbol
+            features_df: Features, one row per bar, in ``self.features`` order
+            
+        Returns:
+            The fitted model
+        """
+        # Scale features
+        X = self.scaler.fit_transform(features_df)
+        
+        # Train K-means model
+        self.model = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
+        clusters = self.model.fit_predict(X)
+        
+        # Analyze cluster characteristics
+        self.regime_characteristics = {}
+        for i in range(self.n_clusters):
+            cluster_data = features_df.iloc[clusters == i]
+            
+            # Store regime characteristics
+            self.regime_characteristics[i] = {
+                'atr_avg': float(cluster_data['atr_normalized'].mean()),
+                'volume_change_avg': float(cluster_data['volume_change'].mean()),
+                'price_range_avg': float(cluster_data['price_range'].mean()),
+                'volatility_avg': float(cluster_data['volatility'].mean()),
+                'count': int(len(cluster_data)),
+                'volatility_level': self._get_volatility_level(cluster_data['volatility'].mean())
+            }
+        
+        return RegimeModel(
+            symbol=symbol,
+            features=self.features,
+            mean=self.scaler.mean_,
+            scale=self.scaler.scale_,
+            centroids=self.model.cluster_centers_,
+            characteristics=self.regime_characteristics,
+            mean_distance=self.model.inertia_ / len(X),
+            n_samples=len(X)
+        )
+    
+    def _prime(self, state: _OnlineRegimeState, market_data: pd.DataFrame) -> None:
+        """Feed historical bars through the online features."""
+        if 'volume' in market_data.columns:
+            volume = market_data['volume'].fillna(0.0)
+        else:
+            volume = pd.Series(0.0, index=market_data.index)
+        for close, high, low, vol in zip(market_data['close'], market_data['high'], market_data['low'], volume):
+            state.features.update(float(close), float(high), float(low), float(vol))
+        if 'timestamp' in market_data.columns:
+            state.last_timestamp = pd.to_datetime(market_data['timestamp']).max()
+    
+    def _online_state(self, symbol: str) -> _OnlineRegimeState:
+        """Online state of a symbol, loaded from the registry and history on first use."""
+        with self._online_lock:
+            state = self._online.get(symbol)
+            if state is not None:
+                return state
+        
+        state = _OnlineRegimeState(self.registry.latest(symbol))
+        market_data = self._fetch_market_data(symbol)
+        if not market_data.empty:
+            self._prime(state, market_data)
+        with self._online_lock:
+            return self._online.setdefault(symbol, state)
+    
+    def _classify_online(self, symbol: str, state: _OnlineRegimeState) -> Tuple[int, float]:
+        """
+        Classify the latest features, saving a regime row when the regime changes.
+        
+        Returns:
+            Tuple of (regime ID or -1, squared distance to its centroid)
+        """
+        model = self.registry.latest(symbol) or state.model
+        if model is not state.model:
+            state.model, state.drift, state.bars_since_fit = model, 1.0, 0
+        vector = state.features.vector
+        if model is None or vector is None:
+            return -1, np.nan
+        
+        regime, distance = model.classify(vector)
+        if regime != state.last_regime:
+            state.last_regime = regime
+            self._save_regime_data(symbol, regime, model.characteristics)
+        return regime, distance
+    
+    def classify(self, symbol: str) -> int:
+        """
+        Current regime from the latest model and the online features.
+        
+        Args:
+            symbol: The market symbol
+            
+        Returns:
+            Current regime ID, or -1 if there is no model or too little data
+        """
+        try:
+            state = self._online_state(symbol)
+            with state.lock:
+                return self._classify_online(symbol, state)[0]
+        except Exception as e:
+            logger.error(f"Error classifying regime for {symbol}: {e}")
+            return -1
+    
+    def update_bar(self, symbol: str, close: float, high: float, low: float, volume: float = 0.0,
+                   timestamp: Any = None) -> int:
+        """
+        Add a new bar to the online features and classify it.
+        
+        Args:
+            symbol: The market symbol
+            close: Closing price
+            high: High price
+            low: Low price
+            volume: Trading volume
+            timestamp: Time of the bar; a bar not newer than the last one
+                added is ignored
+            
+        Returns:
+            Current regime ID, or -1 if there is no model or too little data
+        """
+        try:
+            state = self._online_state(symbol)
+            with state.lock:
+                if timestamp is not None:
+                    timestamp = pd.Timestamp(timestamp)
+                    if state.last_timestamp is not None and timestamp <= state.last_timestamp:
+                        return self._classify_online(symbol, state)[0]
+                    state.last_timestamp = timestamp
+                state.features.update(close, high, low, volume)
+                regime, distance = self._classify_online(symbol, state)
+                if regime >= 0:
+                    # Exponential average of the distance relative to training
+                    state.drift = 0.9 * state.drift + 0.1 * distance / max(state.model.mean_distance, 1e-12)
+                    state.bars_since_fit += 1
+                return regime
+        except Exception as e:
+            logger.error(f"Error updating regime for {symbol}: {e}")
+            return -1
+    
+    def update_bars(self, symbol: str, bars: pd.DataFrame) -> int:
+        """
+        Add the bars of a candle frame that are newer than the last bar seen.
+        
+        Args:
+            symbol: The market symbol
+            bars: Candles with timestamp, close, high, low and optionally
+                volume columns, oldest first
+            
+        Returns:
+            Current regime ID, or -1 if there is no model or too little data
+        """
+        regime = -1
+        volume = bars['volume'].fillna(0.0) if 'volume' in bars.columns else pd.Series(0.0, index=bars.index)
+        for timestamp, close, high, low, vol in zip(pd.to_datetime(bars['timestamp']), bars['close'],
+                                                    bars['high'], bars['low'], volume):
+            regime = self.update_bar(symbol, float(close), float(high), float(low), float(vol), timestamp)
+        return regime
+    
+    def refresh_bars(self, symbol: str) -> int:
+        """
+        Add the daily candles stored since the last bar seen.
+        
+        Args:
+            symbol: The market symbol
+            
+        Returns:
+            Current regime ID, or -1 if there is no model or too little data
+        """
+        if self.candle_store is None:
+            return self.classify(symbol)
+        try:
+            state = self._online_state(symbol)
+            bars = self.candle_store.read(symbol, 'DAY', start=state.last_timestamp)
+        except Exception as e:
+            logger.error(f"Error reading new candles for {symbol}: {e}")
+            return -1
+        if bars.empty:
+            return self.classify(symbol)
+        return self.update_bars(symbol, bars)
+    
+    def needs_refit(self, symbol: str) -> Optional[str]:
+        """
+        Reason the symbol's model should be refitted, if any.
+        
+        Args:
+            symbol: The market symbol
+            
+        Returns:
+            'missing', 'schedule' or 'drift', or None if the model is current
+        """
+        state = self._online_state(symbol)
+        model = self.registry.latest(symbol) or state.model
+        if model is None:
+            return 'missing'
+        if model.age_seconds >= self.refit_interval_days * 86400:
+            return 'schedule'
+        if model is state.model and state.bars_since_fit >= 5 and state.drift > self.drift_threshold:
+            return 'drift'
+        return None
+    
+    def refit_if_needed(self, symbol: str) -> Optional[str]:
+        """
+        Refit the symbol's model when it is missing, stale or drifting.
+        
+        Args:
+            symbol: The market symbol
+            
+        Returns:
+            Reason for the refit, or None if none was needed
+        """
+        reason = self.needs_refit(symbol)
+        if reason is not None:
+            logger.info(f"Refitting regime model for {symbol} ({reason})")
+            self.train(symbol)
+        return reason
             
     def _get_volatility_level(self, volatility: float) -> str:
         """
@@ -268,21 +573,25 @@ class VolatilityRegimeDetector:
         else:
             return "HIGH"
             
-    def _save_regime_data(self, symbol: str, current_regime: int):
+    def _save_regime_data(self, symbol: str, current_regime: int,
+                          characteristics: Optional[Dict[int, Dict[str, Any]]] = None):
         """
         Save regime data to the database.
         
         Args:
             symbol: The market symbol
             current_regime: Current regime ID
+            characteristics: Regime characteristics (default: the last fit's)
         """
+        if characteristics is None:
+            characteristics = self.regime_characteristics
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            regime_data = json.dumps(self.regime_characteristics)
-            regime_info = self.regime_characteristics[current_regime]
+            regime_data = json.dumps(characteristics)
+            regime_info = characteristics[current_regime]
             
             cursor.execute('''
             INSERT OR REPLACE INTO volatility_regimes
@@ -337,6 +646,10 @@ class VolatilityRegimeDetector:
         """
         Get the current volatility regime for the given symbol.
         
+        The regime is classified from the online features with the latest
+        saved model; the last stored regime row is the fallback while there
+        is no model or too little data.
+        
         Args:
             symbol: The market symbol
             
@@ -344,6 +657,10 @@ class VolatilityRegimeDetector:
             Dictionary containing current regime information
         """
         try:
+            current_regime = self.classify(symbol)
+            if current_regime >= 0:
+                return self._regime_info(symbol, current_regime)
+            
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
@@ -373,7 +690,7 @@ class VolatilityRegimeDetector:
                     'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 }
             else:
-                # No regime data found, train new model
+                # No model and no regime data: train one
                 current_regime = self.train(symbol)
                 if current_regime >= 0:
                     return self.get_current_regime(symbol)
@@ -394,6 +711,21 @@ class VolatilityRegimeDetector:
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
             
+    def _regime_info(self, symbol: str, regime: int) -> Dict[str, Any]:
+        """Regime information of an online classification, shaped like a stored regime row."""
+        model = self._online_state(symbol).model
+        info = model.characteristics.get(regime, {})
+        return {
+            'regime_id': regime,
+            'description': f"Regime {regime}",
+            'volatility_level': info.get('volatility_level'),
+            'atr_average': info.get('atr_avg'),
+            'volume_change_average': info.get('volume_change_avg'),
+            # Keyed by string like the JSON stored with regime rows
+            'regime_characteristics': {str(k): v for k, v in model.characteristics.items()},
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+            
     def update_market_data(self, symbol: str, timestamp: str, close: float, 
                           high: float, low: float, volume: float = 0, 
                           atr: float = 0, volatility: float = 0):
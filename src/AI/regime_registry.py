@@ -0,0 +1,323 @@
+"""
+Regime Model Registry Module
+
+Persisted volatility regime models and the online features they classify,
+so the current regime is a nearest-centroid lookup instead of a KMeans fit.
+
+- ``RegimeModel`` holds what classification needs from a fit: the scaler's
+  mean and scale, the centroids, the per-regime characteristics and the
+  mean squared distance of the training points to their centroid (the
+  reference for drift detection)
+- ``RegimeModelRegistry`` stores models as versioned JSON files,
+  ``<root>/<SYMBOL>/v<version>.json``. A version is published by hard-linking
+  a fully written temporary file, so readers never see a partial model and
+  concurrent trainers cannot claim the same version. Other processes' new
+  versions are picked up at most every ``refresh_interval`` seconds
+- ``OnlineRegimeFeatures`` maintains the detector's features (normalized
+  ATR, volume change, price range, annualized volatility) with rolling
+  windows updated in O(1) per bar
+
+Set ``REGIME_MODEL_PATH`` to move the default registry.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'Database', 'Regimes'
+))
+
+REGIME_FEATURES = ('atr_normalized', 'volume_change', 'price_range', 'volatility')
+
+_VERSION_FILE = re.compile(r'^v(\d+)\.json$')
+
+
+class RegimeModel:
+    """
+    Fitted regime model of one symbol.
+
+    Attributes:
+        symbol (str): Market symbol
+        features (list): Feature names, in column order
+        mean (np.ndarray): Scaler mean per feature
+        scale (np.ndarray): Scaler scale per feature
+        centroids (np.ndarray): Cluster centres in scaled feature space
+        characteristics (dict): Regime ID -> characteristics of its cluster
+        mean_distance (float): Mean squared distance of the training points
+            to their centroid
+        n_samples (int): Number of training points
+        trained_at (str): ISO timestamp of the fit
+        version (int): Registry version, 0 until saved
+    """
+
+    def __init__(self, symbol: str, features: Sequence[str], mean: Sequence[float], scale: Sequence[float],
+                 centroids: Sequence[Sequence[float]], characteristics: Dict[int, Dict[str, Any]],
+                 mean_distance: float, n_samples: int, trained_at: Optional[str] = None, version: int = 0):
+        self.symbol = symbol
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.centroids = np.asarray(centroids, dtype=float)
+        self.characteristics = {int(k): v for k, v in characteristics.items()}
+        self.mean_distance = float(mean_distance)
+        self.n_samples = int(n_samples)
+        self.trained_at = trained_at or datetime.now().isoformat(timespec='seconds')
+        self.version = version
+
+    @property
+    def age_seconds(self) -> float:
+        """Seconds since the model was fitted."""
+        return (datetime.now() - datetime.fromisoformat(self.trained_at)).total_seconds()
+
+    def classify(self, vector: np.ndarray) -> Tuple[int, float]:
+        """
+        Assign a feature vector to the nearest centroid.
+
+        Returns:
+            Tuple of (regime ID, squared distance in scaled space)
+        """
+        distances = np.square(self.centroids - (vector - self.mean) / self.scale).sum(axis=1)
+        regime = int(np.argmin(distances))
+        return regime, float(distances[regime])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'symbol': self.symbol,
+            'features': self.features,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'centroids': self.centroids.tolist(),
+            'characteristics': self.characteristics,
+            'mean_distance': self.mean_distance,
+            'n_samples': self.n_samples,
+            'trained_at': self.trained_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], version: int = 0) -> 'RegimeModel':
+        return cls(version=version, **data)
+
+
+class RegimeModelRegistry:
+    """
+    Versioned on-disk regime models, one directory per symbol.
+
+    Attributes:
+        root (str): Directory holding the symbol directories
+        keep (int): Versions kept per symbol; older ones are removed
+        refresh_interval (float): Seconds between checks for newer versions
+    """
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_PATH, keep: int = 10, refresh_interval: float = 60.0):
+        """
+        Initialize the registry; directories are created on first save.
+
+        Args:
+            root: Directory for the model files
+            keep: Versions kept per symbol
+            refresh_interval: Seconds between checks for newer versions
+        """
+        self.root = root
+        self.keep = keep
+        self.refresh_interval = refresh_interval
+        self._latest: Dict[str, Tuple[Optional[RegimeModel], float]] = {}
+        self._lock = threading.Lock()
+
+    def _directory(self, symbol: str) -> str:
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9_.-]', '_', symbol))
+
+    def versions(self, symbol: str) -> List[int]:
+        """Saved versions of a symbol's model, oldest first."""
+        try:
+            names = os.listdir(self._directory(symbol))
+        except FileNotFoundError:
+            return []
+        return sorted(int(m.group(1)) for m in map(_VERSION_FILE.match, names) if m)
+
+    def save(self, model: RegimeModel) -> int:
+        """
+        Save a model as the symbol's next version.
+
+        Returns:
+            The version assigned (also set on ``model``)
+        """
+        directory = self._directory(model.symbol)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(model.to_dict(), f)
+            version = (self.versions(model.symbol) or [0])[-1] + 1
+            while True:
+                try:
+                    os.link(tmp_path, os.path.join(directory, f"v{version:06d}.json"))
+                    break
+                except FileExistsError:
+                    version += 1
+        finally:
+            os.unlink(tmp_path)
+
+        model.version = version
+        with self._lock:
+            self._latest[model.symbol] = (model, time.monotonic() + self.refresh_interval)
+        self._prune(model.symbol)
+        logger.info(f"Saved regime model v{version} for {model.symbol}")
+        return version
+
+    def _prune(self, symbol: str) -> None:
+        for version in self.versions(symbol)[:-self.keep]:
+            try:
+                os.unlink(os.path.join(self._directory(symbol), f"v{version:06d}.json"))
+            except OSError:
+                pass
+
+    def load(self, symbol: str, version: Optional[int] = None) -> Optional[RegimeModel]:
+        """A saved version of a symbol's model (the latest by default), or None."""
+        if version is None:
+            versions = self.versions(symbol)
+            if not versions:
+                return None
+            version = versions[-1]
+        path = os.path.join(self._directory(symbol), f"v{version:06d}.json")
+        try:
+            with open(path) as f:
+                return RegimeModel.from_dict(json.load(f), version=version)
+        except FileNotFoundError:
+            return None
+
+    def latest(self, symbol: str) -> Optional[RegimeModel]:
+        """Latest model of a symbol, re-checking the disk once per ``refresh_interval``."""
+        with self._lock:
+            cached = self._latest.get(symbol)
+            if cached is not None and time.monotonic() < cached[1]:
+                return cached[0]
+
+        current = cached[0] if cached is not None else None
+        versions = self.versions(symbol)
+        if versions and (current is None or versions[-1] != current.version):
+            try:
+                current = self.load(symbol, versions[-1]) or current
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading regime model for {symbol}: {e}")
+
+        with self._lock:
+            self._latest[symbol] = (current, time.monotonic() + self.refresh_interval)
+        return current
+
+
+class _RollingWindow:
+    """Mean and sample standard deviation of the last ``length`` values."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.values = np.zeros(length)
+        self.invalid = np.zeros(length, dtype=bool)
+        self.count = 0
+        self.position = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value: float) -> None:
+        """Add a value (NaN marks the window invalid until it is evicted)."""
+        invalid = bool(np.isnan(value))
+        value = 0.0 if invalid else float(value)
+        if self.count < self.length:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.values[self.position]
+            mean = self.mean
+            self.mean = mean + (value - old) / self.length
+            self.m2 += (value - mean) * (value - self.mean) - (old - mean) * (old - self.mean)
+
+        self.values[self.position] = value
+        self.invalid[self.position] = invalid
+        self.position = (self.position + 1) % self.length
+        if self.count == self.length and self.position == 0:
+            # Recompute once per cycle to keep rounding drift bounded
+            self.mean = float(self.values.mean())
+            self.m2 = float(np.square(self.values - self.mean).sum())
+
+    @property
+    def ready(self) -> bool:
+        return self.count == self.length and not self.invalid.any()
+
+    def average(self) -> float:
+        return self.mean if self.ready else np.nan
+
+    def std(self) -> float:
+        return float(np.sqrt(max(self.m2, 0.0) / (self.length - 1))) if self.ready else np.nan
+
+
+class OnlineRegimeFeatures:
+    """
+    The regime detector's features for the latest bar, updated bar by bar.
+
+    Matches ``VolatilityRegimeDetector._prepare_features`` on candles: ATR is
+    the 14-bar mean true range, volume change the 5-bar mean volume change
+    and volatility the 20-bar standard deviation of returns, annualized.
+    """
+
+    def __init__(self, atr_window: int = 14, volume_window: int = 5, volatility_window: int = 20):
+        self._true_range = _RollingWindow(atr_window)
+        self._volume_change = _RollingWindow(volume_window)
+        self._returns = _RollingWindow(volatility_window)
+        self._close: Optional[float] = None
+        self._volume: Optional[float] = None
+        self.vector: Optional[np.ndarray] = None
+
+    def update(self, close: float, high: float, low: float, volume: float = 0.0) -> Optional[np.ndarray]:
+        """
+        Add one bar.
+
+        Returns:
+            Feature vector in ``REGIME_FEATURES`` order, or None while the
+            windows are filling
+        """
+        previous_close, previous_volume = self._close, self._volume
+        if previous_close is None:
+            true_range = high - low
+            self._volume_change.push(np.nan)
+        else:
+            true_range = max(abs(high - low), abs(high - previous_close), abs(low - previous_close))
+            self._returns.push(close / previous_close - 1)
+            self._volume_change.push(volume / previous_volume - 1 if previous_volume else np.nan)
+        self._true_range.push(true_range)
+        self._close, self._volume = close, volume
+
+        vector = np.array([
+            self._true_range.average() / close,
+            self._volume_change.average(),
+            (high - low) / close,
+            self._returns.std() * np.sqrt(252)
+        ])
+        self.vector = None if np.isnan(vector).any() else vector
+        return self.vector
+
+
+_default_registry: Optional[RegimeModelRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry() -> RegimeModelRegistry:
+    """Shared regime model registry for this process."""
+    global _default_registry
+    path = os.getenv('REGIME_MODEL_PATH', DEFAULT_REGISTRY_PATH)
+    with _default_registry_lock:
+        if _default_registry is None or _default_registry.root != path:
+            _default_registry = RegimeModelRegistry(path)
+        return _default_registry
@@ -15,6 +15,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Union, Tuple
 
+from src.AI.correlation_matrix import MARKET_CORRELATIONS_TABLE_SQL, correlation_changes, get_correlation_matrix
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
@@ -51,6 +53,10 @@ class RiskManager:
         # Create risk management tables if they don't exist
         self._create_tables()
         
+        # 30-day correlations, shared by all risk managers on this database
+        self.correlations = get_correlation_matrix(db_path, 'correlation_30d')
+        self._correlation_baseline = None
+        
     def _create_tables(self):
         """Create necessary tables if they don't exist."""
         try:
@@ -73,18 +79,7 @@ class RiskManager:
             ''')
             
             # Create market_correlations table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS market_correlations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                symbol1 TEXT NOT NULL,
-                symbol2 TEXT NOT NULL,
-                correlation_90d REAL,
-                correlation_30d REAL,
-                correlation_7d REAL,
-                UNIQUE(symbol1, symbol2)
-            )
-            ''')
+            cursor.execute(MARKET_CORRELATIONS_TABLE_SQL)
             
             # Create account_balances table if it doesn't exist
             cursor.execute('''
@@ -278,52 +273,28 @@ class RiskManager:
             
             cursor = conn.execute(query, (account_id,))
             open_positions = cursor.fetchall()
+            conn.close()
             
             if not open_positions:
                 return {"status": "NO_POSITIONS", "correlation_risk": 0}
-                
-            # Get correlations for the symbol with existing positions
-            correlated_positions = []
-            total_correlated_exposure = 0
-            
-            for pos_symbol, direction, size in open_positions:
-                # Skip self-correlation
-                if pos_symbol == symbol:
-                    continue
-                    
-                # Get correlation data
-                query = """
-                SELECT correlation_30d
-                FROM market_correlations
-                WHERE 
-                    (symbol1 = ? AND symbol2 = ?) OR
-                    (symbol1 = ? AND symbol2 = ?)
-                ORDER BY timestamp DESC
-                LIMIT 1
-                """
-                
-                cursor.execute(query, (symbol, pos_symbol, pos_symbol, symbol))
-                corr_row = cursor.fetchone()
-                
-                if corr_row is not None and corr_row[0] is not None:
-                    correlation = float(corr_row[0])
-                    
-                    # Account for direction (positive correlation with opposite directions cancels out)
-                    effective_correlation = correlation
-                    
-                    # If correlation is high enough to be considered a risk
-                    if abs(effective_correlation) > self.correlation_threshold:
-                        correlated_positions.append({
-                            "symbol": pos_symbol,
-                            "correlation": correlation,
-                            "effective_correlation": effective_correlation,
-                            "size": size
-                        })
-                        
-                        # Add to total exposure (weighted by correlation and size)
-                        total_correlated_exposure += abs(effective_correlation * size)
             
-            conn.close()
+            # One vectorized lookup against the in-memory matrix instead of a query per position
+            symbols = [pos_symbol for pos_symbol, _, _ in open_positions]
+            sizes = [size if size is not None else np.nan for _, _, size in open_positions]
+            total_correlated_exposure, mask, correlations = self.correlations.correlated_exposure(
+                symbol, symbols, sizes, self.correlation_threshold
+            )
+            
+            # If correlation is high enough to be considered a risk
+            correlated_positions = [
+                {
+                    "symbol": symbols[i],
+                    "correlation": float(correlations[i]),
+                    "effective_correlation": float(correlations[i]),
+                    "size": open_positions[i][2]
+                }
+                for i in np.flatnonzero(mask)
+            ]
             
             # Determine correlation risk status
             if total_correlated_exposure > 5:  # Arbitrary threshold for high correlated exposure
@@ -449,9 +420,37 @@ class RiskManager:
             conn.commit()
             conn.close()
             
+            # Keep the in-memory matrix in step with the table
+            self.correlations.set(symbol1, symbol2, correlation_30d)
+            
         except Exception as e:
             logger.error(f"Error updating market correlation: {e}")
     
+    def detect_correlation_changes(self, threshold: float = 0.2) -> List[Dict[str, Any]]:
+        """
+        Detect significant changes in 30-day market correlations.
+        
+        Compares the stored correlations with the values last reported by
+        this risk manager; the first call only records them.
+        
+        Args:
+            threshold: Absolute correlation change that counts as significant
+            
+        Returns:
+            List of changes with symbol1, symbol2, previous_correlation,
+            current_correlation and change, largest change first
+        """
+        try:
+            symbols, current = self.correlations.snapshot()
+            self._correlation_baseline, changes = correlation_changes(
+                symbols, self._correlation_baseline, current, threshold
+            )
+            return changes
+            
+        except Exception as e:
+            logger.error(f"Error detecting correlation changes: {e}")
+            return []
+    
     def adjust_stop_loss(self, symbol: str, current_price: float, original_stop: float, 
                          position_direction: str, volatility_level: str) -> float:
         """
@@ -523,6 +522,43 @@ class RiskManager:
             # Check correlation risk
             correlation = self.get_position_correlations(symbol, account_id)
             
+            result = self.assess_trade_risk(signal_data, account_id, daily_risk, drawdown, correlation)
+            
+            # Save risk evaluation result
+            self._save_risk_evaluation(result)
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error evaluating trade risk: {e}")
+            return {
+                "status": "ERROR",
+                "error": str(e)
+            }
+
+    def assess_trade_risk(self, signal_data: Dict[str, Any], account_id: int, daily_risk: Dict[str, Any],
+                          drawdown: Dict[str, Any], correlation: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Decide on a trade from already computed risk checks, without saving the result.
+        
+        Args:
+            signal_data: Trading signal data
+            account_id: Account ID
+            daily_risk: Result of check_daily_risk_limit
+            drawdown: Result of check_drawdown
+            correlation: Result of get_position_correlations
+            
+        Returns:
+            Dictionary with risk evaluation results
+        """
+        try:
+            symbol = signal_data.get('ticker') or signal_data.get('symbol')
+            direction = signal_data.get('order_action') or signal_data.get('direction')
+            size = float(signal_data.get('position_size') or signal_data.get('quantity') or 0)
+            
+            if not symbol or not direction or size <= 0:
+                return {"status": "REJECTED", "reason": "Invalid signal data"}
+            
             # Determine overall risk status
             risk_status = "ACCEPTABLE"
             rejection_reason = None
@@ -570,13 +606,10 @@ class RiskManager:
                 "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
             
-            # Save risk evaluation result
-            self._save_risk_evaluation(result)
-            
             return result
             
         except Exception as e:
-            logger.error(f"Error evaluating trade risk: {e}")
+            logger.error(f"Error assessing trade risk: {e}")
             return {
                 "status": "ERROR",
                 "error": str(e)
@@ -38,6 +38,8 @@ sys.path.append(parent_dir)
 
 # Import mobile alerts for notifications
 from src.AI.mobile_alerts import MobileAlertManager
+from src.AI.incremental_backtest import IncrementalBacktest
+from src.AI.walk_forward import walk_forward_optimize
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(parent_dir)
@@ -61,6 +63,9 @@ logger = logging.getLogger(__name__)
 # Database for storing optimization history
 DB_PATH = os.path.join(parent_dir, 'parameter_history.db')
 
+# Live bars required before monitored metrics are compared with the optimization
+MIN_MONITOR_BARS = 50
+
 def initialize_database():
     """Initialize the database for storing optimization history."""
     try:
@@ -97,6 +102,55 @@ def initialize_database():
         )
         ''')
         
+        # Create table for per-fold walk-forward results
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS walk_forward_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_timestamp TEXT,
+            symbol TEXT,
+            timeframe TEXT,
+            objective TEXT,
+            fold INTEGER,
+            train_from TEXT,
+            test_from TEXT,
+            test_to TEXT,
+            train_objective REAL,
+            test_objective REAL,
+            return_value REAL,
+            sharpe_ratio REAL,
+            max_drawdown REAL,
+            win_rate REAL,
+            total_trades INTEGER,
+            params_json TEXT
+        )
+        ''')
+        
+        # Create table for the last degradation verdict of each deployed optimization
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS degradation_state (
+            symbol TEXT,
+            timeframe TEXT,
+            objective TEXT,
+            updated_at TEXT,
+            baseline_json TEXT,
+            degraded INTEGER,
+            PRIMARY KEY (symbol, timeframe, objective)
+        )
+        ''')
+        
+        # Create table for resumable live backtests of the deployed parameters
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backtest_state (
+            symbol TEXT,
+            timeframe TEXT,
+            objective TEXT,
+            updated_at TEXT,
+            params_json TEXT,
+            state_json TEXT,
+            PRIMARY KEY (symbol, timeframe, objective)
+        )
+        ''')
+        
         conn.commit()
         conn.close()
         logger.info(f"Database initialized at {DB_PATH}")
@@ -238,16 +292,12 @@ def send_alert_email(subject: str, message: str):
     except Exception as e:
         logger.error(f"Error sending email alert: {str(e)}")
 
-def check_parameter_degradation(symbol: str, timeframe: str, objective: str, 
-                              current_metrics: dict, previous_metrics: dict) -> bool:
+def _degradation_report(current_metrics: dict, previous_metrics: dict) -> Tuple[List[str], str]:
     """
-    Check if parameter performance has degraded significantly
+    Compare metrics with a baseline.
     
-    Returns True if degradation is detected, False otherwise
+    Returns the degradation messages (empty if none) and the alert level
     """
-    if not previous_metrics:
-        return False
-    
     # Calculate degradation percentages
     return_degradation = ((previous_metrics['total_return'] - current_metrics['total_return']) / 
                         abs(previous_metrics['total_return'])) if previous_metrics['total_return'] != 0 else 0
@@ -259,24 +309,39 @@ def check_parameter_degradation(symbol: str, timeframe: str, objective: str,
                         abs(previous_metrics['max_drawdown'])) if previous_metrics['max_drawdown'] != 0 else 0
     
     # Check degradation thresholds
-    degraded = False
     message = []
     
     if return_degradation > 0.2:  # 20% reduction in returns
-        degraded = True
         message.append(f"Return degraded by {return_degradation*100:.1f}% "
                      f"({previous_metrics['total_return']:.2f}% -> {current_metrics['total_return']:.2f}%)")
     
     if sharpe_degradation > 0.2:  # 20% reduction in Sharpe ratio
-        degraded = True
         message.append(f"Sharpe ratio degraded by {sharpe_degradation*100:.1f}% "
                      f"({previous_metrics['sharpe_ratio']:.2f} -> {current_metrics['sharpe_ratio']:.2f})")
     
     if drawdown_increase > 0.3:  # 30% increase in drawdown
-        degraded = True
         message.append(f"Max drawdown increased by {drawdown_increase*100:.1f}% "
                      f"({previous_metrics['max_drawdown']:.2f}% -> {current_metrics['max_drawdown']:.2f}%)")
     
+    # Determine alert level based on degradation severity
+    level = "warning"
+    if return_degradation > 0.3 or sharpe_degradation > 0.3 or drawdown_increase > 0.5:
+        level = "critical"
+    return message, level
+
+def check_parameter_degradation(symbol: str, timeframe: str, objective: str, 
+                              current_metrics: dict, previous_metrics: dict) -> bool:
+    """
+    Check if parameter performance has degraded significantly
+    
+    Returns True if degradation is detected, False otherwise
+    """
+    if not previous_metrics:
+        return False
+    
+    message, level = _degradation_report(current_metrics, previous_metrics)
+    degraded = bool(message)
+    
     # Log alert if degradation detected
     if degraded:
         alert_message = f"Parameter degradation detected: {', '.join(message)}"
@@ -288,11 +353,6 @@ def check_parameter_degradation(symbol: str, timeframe: str, objective: str,
             if 'optimizer' in globals() and hasattr(globals()['optimizer'], 'alert_manager'):
                 alert_manager = globals()['optimizer'].alert_manager
                 
-                # Determine alert level based on degradation severity
-                level = "warning"
-                if return_degradation > 0.3 or sharpe_degradation > 0.3 or drawdown_increase > 0.5:
-                    level = "critical"
-                
                 alert_manager.send_alert(
                     f"{symbol} {timeframe} Performance Degradation",
                     alert_message,
@@ -310,6 +370,208 @@ def check_parameter_degradation(symbol: str, timeframe: str, objective: str,
     
     return degraded
 
+def store_walk_forward_results(symbol: str, timeframe: str, objective: str, folds: List[dict]):
+    """Store the per-fold results of one walk-forward run in the database."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        
+        run_timestamp = datetime.now().isoformat()
+        rows = []
+        for fold in folds:
+            test_metrics = fold.get('test_metrics') or {}
+            rows.append((
+                run_timestamp,
+                symbol,
+                timeframe,
+                objective,
+                fold['fold'],
+                fold['train_from'],
+                fold['test_from'],
+                fold['test_to'],
+                float(fold['train_objective']),
+                float(fold['test_objective']),
+                float(test_metrics.get('total_return', 0)),
+                float(test_metrics.get('sharpe_ratio', 0)),
+                float(test_metrics.get('max_drawdown', 0)),
+                float(test_metrics.get('win_rate', 0)),
+                int(test_metrics.get('num_trades', 0)),
+                json.dumps(fold['params'])
+            ))
+        
+        cursor.executemany('''
+        INSERT INTO walk_forward_results
+        (run_timestamp, symbol, timeframe, objective, fold, train_from, test_from, test_to,
+         train_objective, test_objective, return_value, sharpe_ratio, max_drawdown, win_rate,
+         total_trades, params_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        
+        conn.commit()
+        conn.close()
+        logger.info(f"Stored {len(rows)} walk-forward folds for {symbol} {timeframe} {objective}")
+    except Exception as e:
+        logger.error(f"Error storing walk-forward results: {str(e)}")
+
+def run_walk_forward(symbol: str, timeframe: str, objective: str, df: pd.DataFrame,
+                     train_bars: int = 500, test_bars: int = 100, step: int = None,
+                     max_evals: int = 20, workers: int = 1) -> List[dict]:
+    """
+    Run a walk-forward validation on already fetched data and store the folds.
+    
+    The same frame can be passed for every objective of a symbol/timeframe,
+    so the data is fetched once per combination.
+    """
+    try:
+        from src.AI.capital_data_optimizer import SEARCH_SPACE
+        
+        logger.info(f"Starting walk-forward validation for {symbol} {timeframe} {objective}")
+        folds = walk_forward_optimize(
+            df, SEARCH_SPACE, objective_name=objective,
+            train_bars=train_bars, test_bars=test_bars, step=step,
+            num_evals=max_evals, workers=workers
+        )
+        if not folds:
+            return []
+        
+        store_walk_forward_results(symbol, timeframe, objective, folds)
+        
+        scored = [f['test_objective'] for f in folds if np.isfinite(f['test_objective'])]
+        if scored:
+            logger.info(f"Walk-forward {symbol} {timeframe} {objective}: {len(folds)} folds, "
+                        f"mean test {objective} {np.mean(scored):.4f}, "
+                        f"{sum(v > 0 for v in scored)}/{len(scored)} positive")
+        return folds
+    except Exception as e:
+        logger.error(f"Error running walk-forward validation: {str(e)}")
+        return []
+
+def load_backtest_state(symbol: str, timeframe: str, objective: str) -> Optional[IncrementalBacktest]:
+    """Load the live backtest state for a symbol/timeframe/objective."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT state_json FROM backtest_state
+        WHERE symbol = ? AND timeframe = ? AND objective = ?
+        ''', (symbol, timeframe, objective))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        return IncrementalBacktest.from_dict(json.loads(row[0])) if row else None
+    except Exception as e:
+        logger.error(f"Error loading backtest state: {str(e)}")
+        return None
+
+def save_backtest_state(symbol: str, timeframe: str, objective: str, backtest: IncrementalBacktest):
+    """Store the live backtest state for a symbol/timeframe/objective."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        INSERT OR REPLACE INTO backtest_state
+        (symbol, timeframe, objective, updated_at, params_json, state_json)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            symbol,
+            timeframe,
+            objective,
+            datetime.now().isoformat(),
+            json.dumps(backtest.params, sort_keys=True),
+            json.dumps(backtest.to_dict())
+        ))
+        
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error saving backtest state: {str(e)}")
+
+def load_degradation_state(symbol: str, timeframe: str, objective: str) -> Optional[Tuple[str, bool]]:
+    """Get the baseline and verdict of the last degradation check."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT baseline_json, degraded FROM degradation_state
+        WHERE symbol = ? AND timeframe = ? AND objective = ?
+        ''', (symbol, timeframe, objective))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        return (row[0], bool(row[1])) if row else None
+    except Exception as e:
+        logger.error(f"Error loading degradation state: {str(e)}")
+        return None
+
+def save_degradation_state(symbol: str, timeframe: str, objective: str, baseline_json: str, degraded: bool):
+    """Store the baseline and verdict of a degradation check."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        INSERT OR REPLACE INTO degradation_state
+        (symbol, timeframe, objective, updated_at, baseline_json, degraded)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (symbol, timeframe, objective, datetime.now().isoformat(), baseline_json, int(degraded)))
+        
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error saving degradation state: {str(e)}")
+
+def monitor_parameter_performance(symbol: str, timeframe: str, objective: str,
+                                  df: pd.DataFrame, lookback_days: int = 30) -> Optional[dict]:
+    """
+    Advance the live backtest of the deployed parameters and check for degradation.
+    
+    The stored state is resumed and only candles newer than its last timestamp
+    are processed, so a check costs O(new bars). The state restarts when a new
+    optimization changed the parameters.
+    
+    The optimization's metrics were scored on ``lookback_days`` of candles, so
+    the live metrics are taken over the same trailing window. An alert is sent
+    when the verdict turns to degraded; it is not repeated until performance
+    recovers or a new optimization replaces the baseline.
+    
+    Returns the live metrics, or None if there is nothing to monitor yet
+    """
+    optimized_metrics, params = get_previous_optimization(symbol, timeframe, objective)
+    if not params:
+        return None
+    
+    backtest = load_backtest_state(symbol, timeframe, objective)
+    if backtest is None or backtest.params != params:
+        logger.info(f"Starting live backtest for {symbol} {timeframe} {objective}")
+        backtest = IncrementalBacktest(params)
+    
+    new_bars = backtest.update(df)
+    save_backtest_state(symbol, timeframe, objective, backtest)
+    
+    if new_bars == 0 or backtest.num_bars < MIN_MONITOR_BARS:
+        return None
+    
+    window_start = None
+    if backtest.last_timestamp is not None:
+        window_start = backtest.last_timestamp - pd.Timedelta(days=lookback_days)
+    live_metrics = backtest.metrics(start=window_start)
+    logger.info(f"Live metrics for {symbol} {timeframe} {objective} over the last {lookback_days} days "
+                f"after {new_bars} new bars: {live_metrics}")
+    if not optimized_metrics or not live_metrics:
+        return live_metrics
+    
+    baseline_json = json.dumps({'params': params, 'metrics': optimized_metrics}, sort_keys=True)
+    degraded = bool(_degradation_report(live_metrics, optimized_metrics)[0])
+    if degraded and load_degradation_state(symbol, timeframe, objective) != (baseline_json, True):
+        check_parameter_degradation(symbol, timeframe, objective, live_metrics, optimized_metrics)
+    save_degradation_state(symbol, timeframe, objective, baseline_json, degraded)
+    return live_metrics
+
 def plot_optimization_history(symbol: str, timeframe: str, objective: str, output_file: str = None):
     """Plot optimization history for a symbol/timeframe/objective combination."""
     try:
@@ -372,7 +634,8 @@ def plot_optimization_history(symbol: str, timeframe: str, objective: str, outpu
         logger.error(f"Error plotting optimization history: {str(e)}")
 
 def run_optimization(symbol: str, timeframe: str, objective: str, 
-                    days: int = 30, max_evals: int = 20, use_sentiment: bool = True):
+                    days: int = 30, max_evals: int = 20, use_sentiment: bool = True,
+                    workers: int = 1):
     """Run an optimization for a symbol/timeframe/objective combination."""
     try:
         logger.info(f"Starting optimization for {symbol} {timeframe} {objective}")
@@ -392,7 +655,8 @@ def run_optimization(symbol: str, timeframe: str, objective: str,
             f"--objective={objective}",
             f"--days={days}",
             f"--max-evals={max_evals}",
-            f"--output={output_file}"
+            f"--output={output_file}",
+            f"--workers={workers}"
         ]
         
         if use_sentiment:
@@ -700,6 +964,11 @@ class ScheduledOptimizer:
         self.days = 30
         self.max_evals = 20
         self.use_sentiment = True
+        self.workers = 1
+        self.monitor_interval_hours = 1.0
+        self.walk_forward = False
+        self.train_bars = 500
+        self.test_bars = 100
         
         # Initialize mobile alerts manager
         self.alert_manager = MobileAlertManager()
@@ -717,6 +986,7 @@ class ScheduledOptimizer:
         logger.info(f"Symbols: {', '.join(self.symbols)}")
         logger.info(f"Timeframes: {', '.join(self.timeframes)}")
         logger.info(f"Objectives: {', '.join(self.objectives)}")
+        logger.info(f"Degradation check interval: {self.monitor_interval_hours} hours")
         
         # Send mobile alert for scheduler start
         try:
@@ -733,16 +1003,23 @@ class ScheduledOptimizer:
         # Run first optimization immediately
         self._run_all_optimizations()
         
-        # Start scheduler loop
+        # Start scheduler loop: full optimizations on the interval, cheap
+        # incremental degradation checks in between
+        next_optimization = time.time() + self.interval_hours * 60 * 60
+        next_check = time.time() + self.monitor_interval_hours * 60 * 60
         while self.running and not self.stop_event.is_set():
-            # Sleep for the specified interval
-            for _ in range(int(self.interval_hours * 60 * 60)):  # Convert hours to seconds
-                if self.stop_event.is_set():
-                    break
-                time.sleep(1)
+            time.sleep(1)
+            if not self.running or self.stop_event.is_set():
+                break
             
-            if self.running and not self.stop_event.is_set():
+            now = time.time()
+            if now >= next_optimization:
                 self._run_all_optimizations()
+                next_optimization = time.time() + self.interval_hours * 60 * 60
+                next_check = time.time() + self.monitor_interval_hours * 60 * 60
+            elif self.monitor_interval_hours > 0 and now >= next_check:
+                self._run_degradation_checks()
+                next_check = time.time() + self.monitor_interval_hours * 60 * 60
     
     def stop(self):
         """Stop the scheduled optimization process."""
@@ -776,7 +1053,8 @@ class ScheduledOptimizer:
                         metrics, params = run_optimization(
                             symbol, timeframe, objective, 
                             days=self.days, max_evals=self.max_evals,
-                            use_sentiment=self.use_sentiment
+                            use_sentiment=self.use_sentiment,
+                            workers=self.workers
                         )
                         
                         if metrics and params:
@@ -787,12 +1065,69 @@ class ScheduledOptimizer:
                     except Exception as e:
                         logger.error(f"Error during optimization {symbol} {timeframe} {objective}: {str(e)}")
         
+        if self.walk_forward:
+            self._run_walk_forward()
+        
         # Generate dashboard after all optimizations
         generate_dashboard()
         
         elapsed_time = time.time() - start_time
         logger.info(f"Completed optimization batch in {elapsed_time:.2f} seconds")
 
+    def _run_walk_forward(self):
+        """Run walk-forward validation for all configured combinations."""
+        # Imported lazily: the data module loads API configuration on import
+        from src.AI.capital_data_optimizer import fetch_market_data
+        
+        for symbol in self.symbols:
+            for timeframe in self.timeframes:
+                try:
+                    if not self.running or self.stop_event.is_set():
+                        return
+                    
+                    # One fetch per symbol/timeframe, shared by every objective
+                    df = fetch_market_data(symbol, timeframe, days=self.days)
+                    if df is None or df.empty:
+                        logger.warning(f"No market data for {symbol} {timeframe}")
+                        continue
+                    
+                    for objective in self.objectives:
+                        run_walk_forward(
+                            symbol, timeframe, objective, df,
+                            train_bars=self.train_bars, test_bars=self.test_bars,
+                            max_evals=self.max_evals, workers=self.workers
+                        )
+                except Exception as e:
+                    logger.error(f"Error during walk-forward {symbol} {timeframe}: {str(e)}")
+    
+    def _run_degradation_checks(self):
+        """Advance the live backtests of all deployed parameters with new candles."""
+        start_time = time.time()
+        logger.info("Starting degradation checks")
+        
+        # Imported lazily: the data module loads API configuration on import
+        from src.AI.capital_data_optimizer import fetch_market_data
+        
+        for symbol in self.symbols:
+            for timeframe in self.timeframes:
+                try:
+                    if not self.running or self.stop_event.is_set():
+                        return
+                    
+                    df = fetch_market_data(symbol, timeframe, days=self.days)
+                    if df is None or df.empty:
+                        logger.warning(f"No market data for {symbol} {timeframe}")
+                        continue
+                    
+                    for objective in self.objectives:
+                        monitor_parameter_performance(symbol, timeframe, objective, df,
+                                                      lookback_days=self.days)
+                except Exception as e:
+                    logger.error(f"Error during degradation check {symbol} {timeframe}: {str(e)}")
+        
+        elapsed_time = time.time() - start_time
+        logger.info(f"Completed degradation checks in {elapsed_time:.2f} seconds")
+
 def signal_handler(sig, frame):
     """Handle termination signals."""
     logger.info("Received termination signal")
@@ -813,6 +1148,14 @@ def main():
     parser.add_argument("--days", type=int, default=30, help="Days of historical data to use")
     parser.add_argument("--max-evals", type=int, default=20, help="Maximum evaluations per optimization")
     parser.add_argument("--use-sentiment", action="store_true", help="Use sentiment data in optimization")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Worker processes per optimization (0 for all cores but one)")
+    parser.add_argument("--monitor-interval", type=float, default=1.0,
+                       help="Hours between incremental degradation checks (0 to disable)")
+    parser.add_argument("--walk-forward", action="store_true",
+                       help="Also run walk-forward validation after each optimization batch")
+    parser.add_argument("--train-bars", type=int, default=500, help="Bars per walk-forward train fold")
+    parser.add_argument("--test-bars", type=int, default=100, help="Bars per walk-forward test fold")
     parser.add_argument("--dashboard-only", action="store_true", 
                        help="Generate dashboard only without running optimizations")
     parser.add_argument("--daemon", action="store_true", help="Run as a daemon/service")
@@ -847,6 +1190,11 @@ def main():
     optimizer.days = args.days
     optimizer.max_evals = args.max_evals
     optimizer.use_sentiment = args.use_sentiment
+    optimizer.workers = args.workers
+    optimizer.monitor_interval_hours = args.monitor_interval
+    optimizer.walk_forward = args.walk_forward
+    optimizer.train_bars = args.train_bars
+    optimizer.test_bars = args.test_bars
     
     # Store reference for signal handler and make it global for other functions
     signal_handler.optimizer = optimizer
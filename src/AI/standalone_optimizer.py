@@ -9,6 +9,8 @@ Usage:
     python standalone_optimizer.py [--objective sharpe|return|calmar|win_rate] [--params '{"fact":[2,3], "atr_len":[10,14]}']
 """
 
+import os
+import sys
 import pandas as pd
 import numpy as np
 import json
@@ -18,6 +20,16 @@ import itertools
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 
+# Add project root to path so the shared indicator kernel is importable when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.AI.indicators.supertrend_kernel import (
+    rolling_atr,
+    supertrend_bands,
+    trend_signals,
+    true_range
+)
+
 # Define optimization objectives
 OBJECTIVES = {
     'sharpe': lambda metrics: metrics.get('sharpe_ratio', 0),
@@ -88,63 +100,24 @@ def supertrend_strategy(df, atr_len=10, fact=3.0, risk_percent=1.0, sl_percent=0
     trades = []
     equity_curve = [initial_capital]  # Start with initial capital
     
-    # Calculate ATR if not already calculated or recalculate with specific length
-    df['tr1'] = df['high'] - df['low']
-    df['tr2'] = abs(df['high'] - df['close'].shift(1))
-    df['tr3'] = abs(df['low'] - df['close'].shift(1))
-    df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-    df['atr'] = df['tr'].rolling(window=atr_len).mean().fillna(df['tr'])
-    
-    # Calculate SuperTrend
-    hl2 = (df['high'] + df['low']) / 2
-    df['upperband'] = hl2 + fact * df['atr']
-    df['lowerband'] = hl2 - fact * df['atr']
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
     
-    # Initialize SuperTrend values
-    df['supertrend'] = 0.0
-    df['uptrend'] = True
+    # Calculate ATR with the specific length
+    df['tr'] = true_range(high, low, close)
+    df['atr'] = rolling_atr(df['tr'].values, atr_len)
     
-    # First value initialization
-    df.loc[0, 'supertrend'] = df.loc[0, 'upperband']
-    df.loc[0, 'uptrend'] = False
-    
-    # Calculate SuperTrend and uptrend status
-    for i in range(1, len(df)):
-        curr_close = df.loc[i, 'close']
-        prev_supertrend = df.loc[i-1, 'supertrend']
-        curr_upperband = df.loc[i, 'upperband']
-        curr_lowerband = df.loc[i, 'lowerband']
-        prev_uptrend = df.loc[i-1, 'uptrend']
-        
-        # Determine trend
-        if prev_supertrend <= curr_upperband and prev_uptrend:
-            curr_supertrend = max(curr_lowerband, prev_supertrend)
-            curr_uptrend = True
-        elif prev_supertrend <= curr_upperband and not prev_uptrend:
-            curr_supertrend = curr_lowerband
-            curr_uptrend = True if curr_close > prev_supertrend else False
-        elif prev_supertrend >= curr_lowerband and prev_uptrend:
-            curr_supertrend = curr_upperband
-            curr_uptrend = False if curr_close < prev_supertrend else True
-        else:  # prev_supertrend >= curr_lowerband and not prev_uptrend
-            curr_supertrend = min(curr_upperband, prev_supertrend)
-            curr_uptrend = False
-            
-        # Assign to dataframe
-        df.loc[i, 'supertrend'] = curr_supertrend
-        df.loc[i, 'uptrend'] = curr_uptrend
+    # Calculate SuperTrend bands and trend in a single array pass
+    hl2 = (high + low) / 2
+    st, trend, upperband, lowerband = supertrend_bands(close, hl2, df['atr'].values, fact)
+    df['upperband'] = upperband
+    df['lowerband'] = lowerband
+    df['supertrend'] = st
+    df['uptrend'] = trend > 0
     
     # Add signals to dataframe - signal is 1 for buy, -1 for sell, 0 for no action
-    df['signal'] = 0
-    
-    # Generate signals at trend change
-    for i in range(1, len(df)):
-        # Buy signal - trend changes from down to up
-        if not df.loc[i-1, 'uptrend'] and df.loc[i, 'uptrend']:
-            df.loc[i, 'signal'] = 1
-        # Sell signal - trend changes from up to down
-        elif df.loc[i-1, 'uptrend'] and not df.loc[i, 'uptrend']:
-            df.loc[i, 'signal'] = -1
+    df['signal'] = trend_signals(trend)
     
     # Trading logic
     for i in range(1, len(df)):
@@ -0,0 +1,127 @@
+"""
+Successive-Halving Parameter Search for Jamso-AI-Engine
+
+Hyperband-style early stopping for strategy optimization:
+- Every candidate is backtested on a short prefix of the history
+- Only the best ``1/eta`` of each rung is promoted to the next, longer prefix
+- The last rung covers the full history
+
+Each result records the rung a candidate reached and the number of bars it
+was scored on, so losing parameter sets stop consuming backtest time early.
+"""
+
+import logging
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from src.AI.backtest_cache import BacktestCache, evaluate_with_cache
+from src.AI.parallel_evaluator import BatchEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+def halving_schedule(num_bars: int, min_fraction: float = 0.2, eta: int = 3, min_bars: int = 50) -> List[int]:
+    """
+    Number of bars evaluated at each rung.
+
+    Parameters:
+    - num_bars: Length of the full history
+    - min_fraction: Fraction of the history used by the first rung
+    - eta: Growth factor of the window (and reduction factor of candidates)
+    - min_bars: Smallest window worth scoring
+
+    Returns:
+    - Increasing list of prefix lengths ending with ``num_bars``
+    """
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    if not 0 < min_fraction <= 1:
+        raise ValueError("min_fraction must be in (0, 1]")
+
+    schedule = []
+    fraction = min_fraction
+    while fraction < 1:
+        bars = max(min_bars, int(num_bars * fraction))
+        if bars >= num_bars:
+            break
+        if not schedule or bars > schedule[-1]:
+            schedule.append(bars)
+        fraction *= eta
+    schedule.append(num_bars)
+    return schedule
+
+
+def _score(objective_fn: Callable[[Dict[str, Any]], float], metrics: Optional[Dict[str, Any]]) -> float:
+    if metrics is None:
+        return float('-inf')
+    try:
+        value = float(objective_fn(metrics))
+    except Exception as e:
+        logger.warning(f"Error evaluating objective: {str(e)}")
+        return float('-inf')
+    return value if not math.isnan(value) else float('-inf')
+
+
+def successive_halving(
+    df: pd.DataFrame,
+    param_sets: Sequence[Dict[str, Any]],
+    evaluate_batch: BatchEvaluator,
+    objective_fn: Callable[[Dict[str, Any]], float],
+    min_fraction: float = 0.2,
+    eta: int = 3,
+    min_bars: int = 50,
+    workers: Optional[int] = 1,
+    cache: Optional[BacktestCache] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run successive halving over a fixed list of candidates.
+
+    Parameters:
+    - df: DataFrame with price data, in time order
+    - param_sets: Candidate parameter dictionaries
+    - evaluate_batch: ``(df, param_chunk) -> metrics`` evaluator (see
+      ``parallel_evaluator.evaluate_in_parallel``)
+    - objective_fn: Objective from an ``OBJECTIVES`` map (higher is better)
+    - min_fraction: Fraction of the history used by the first rung
+    - eta: Keep the top ``1/eta`` candidates per rung
+    - min_bars: Smallest window worth scoring
+    - workers: Worker processes used at every rung
+    - cache: Optional backtest cache consulted at every rung
+
+    Returns:
+    - One entry per candidate with ``params``, ``metrics`` and
+      ``objective_value`` from the last rung it reached, plus ``rung`` and
+      ``bars``; sorted best first, with full-history candidates ahead of
+      those eliminated earlier
+    """
+    param_sets = list(param_sets)
+    schedule = halving_schedule(len(df), min_fraction, eta, min_bars)
+    results: List[Dict[str, Any]] = [
+        {'params': params, 'metrics': None, 'objective_value': float('-inf'), 'rung': 0, 'bars': 0}
+        for params in param_sets
+    ]
+
+    survivors = list(range(len(param_sets)))
+    for rung, bars in enumerate(schedule):
+        if not survivors:
+            break
+        window = df.iloc[:bars]
+        candidates = [param_sets[i] for i in survivors]
+        for position, metrics in evaluate_with_cache(window, evaluate_batch, candidates, cache, workers=workers):
+            entry = results[survivors[position]]
+            entry.update(metrics=metrics, objective_value=_score(objective_fn, metrics), rung=rung, bars=bars)
+
+        # Stable ranking: ties keep the original candidate order
+        ranked = sorted(survivors, key=lambda i: -results[i]['objective_value'])
+        best_value = results[ranked[0]]['objective_value']
+        logger.info(f"Rung {rung}: {len(survivors)} candidates on {bars} bars, best objective {best_value:.4f}")
+
+        if rung < len(schedule) - 1:
+            keep = max(1, len(survivors) // eta)
+            # -inf marks failed evaluations; +inf (e.g. a profit factor with no
+            # losing trades) is a legitimate best score and is promoted
+            survivors = [i for i in ranked[:keep] if results[i]['objective_value'] > float('-inf')]
+
+    return sorted(results, key=lambda r: (-r['rung'], -r['objective_value']))
@@ -42,6 +42,7 @@ from src.AI.capital_data_optimizer import (
     supertrend_with_sentiment,
     RESOLUTION_MAP
 )
+from src.AI.backtest_cache import get_default_cache
 
 # Configure logging
 logging.basicConfig(
@@ -74,13 +75,22 @@ def apply_strategy_with_parameters(df: pd.DataFrame, params_file: str, use_senti
         
         # Apply the strategy with the loaded parameters
         if use_sentiment and metadata.get('use_sentiment'):
-            sentiment_weight = metadata.get('sentiment_weight', 0.2)
-            result = supertrend_with_sentiment(df, **params, sentiment_weight=sentiment_weight)
+            strategy_fn = supertrend_with_sentiment
+            strategy_params = dict(params, sentiment_weight=metadata.get('sentiment_weight', 0.2))
         else:
-            result = supertrend_strategy(df, **params)
+            strategy_fn = supertrend_strategy
+            strategy_params = params
         
-        # Calculate metrics
-        metrics = calculate_metrics(result)
+        def run_strategy():
+            result = strategy_fn(df, **strategy_params)
+            return result, calculate_metrics(result)
+        
+        # Reuse the result of an earlier run on the same data when cached
+        cache = get_default_cache()
+        if cache is not None:
+            result, metrics = cache.get_or_compute(df, strategy_fn, strategy_params, run_strategy)
+        else:
+            result, metrics = run_strategy()
         logger.info(f"Strategy performance metrics: {metrics}")
         
         return result
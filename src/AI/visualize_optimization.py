@@ -17,8 +17,15 @@ import matplotlib.pyplot as plt
 from matplotlib.dates import DateFormatter
 import matplotlib.patches as mpatches
 from datetime import datetime, timedelta
+import os
+import sys
 from typing import Dict, List, Any, Optional, Tuple
 
+# Add project root to path so the shared indicator kernel is importable when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.AI.indicators.supertrend_kernel import supertrend, trend_signals
+
 # Import functionality from standalone optimizer
 try:
     from standalone_optimizer import generate_sample_data, supertrend_strategy
@@ -58,60 +65,16 @@ def visualize_strategy(data, params):
     
     # Calculate ATR
     df = data.copy()
-    df['tr1'] = df['high'] - df['low']
-    df['tr2'] = abs(df['high'] - df['close'].shift(1))
-    df['tr3'] = abs(df['low'] - df['close'].shift(1))
-    df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-    df['atr'] = df['tr'].rolling(window=atr_len).mean().fillna(df['tr'])
-    
-    # Calculate SuperTrend
-    hl2 = (df['high'] + df['low']) / 2
-    df['upperband'] = hl2 + fact * df['atr']
-    df['lowerband'] = hl2 - fact * df['atr']
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
     
-    # Initialize SuperTrend values
-    df['supertrend'] = 0.0
-    df['uptrend'] = True
-    
-    # First value initialization
-    df.loc[0, 'supertrend'] = df.loc[0, 'upperband']
-    df.loc[0, 'uptrend'] = False
-    
-    # Calculate SuperTrend and uptrend status
-    for i in range(1, len(df)):
-        curr_close = df.loc[i, 'close']
-        prev_supertrend = df.loc[i-1, 'supertrend']
-        curr_upperband = df.loc[i, 'upperband']
-        curr_lowerband = df.loc[i, 'lowerband']
-        prev_uptrend = df.loc[i-1, 'uptrend']
-        
-        # Determine trend
-        if prev_supertrend <= curr_upperband and prev_uptrend:
-            curr_supertrend = max(curr_lowerband, prev_supertrend)
-            curr_uptrend = True
-        elif prev_supertrend <= curr_upperband and not prev_uptrend:
-            curr_supertrend = curr_lowerband
-            curr_uptrend = True if curr_close > prev_supertrend else False
-        elif prev_supertrend >= curr_lowerband and prev_uptrend:
-            curr_supertrend = curr_upperband
-            curr_uptrend = False if curr_close < prev_supertrend else True
-        else:  # prev_supertrend >= curr_lowerband and not prev_uptrend
-            curr_supertrend = min(curr_upperband, prev_supertrend)
-            curr_uptrend = False
-            
-        # Assign to dataframe
-        df.loc[i, 'supertrend'] = curr_supertrend
-        df.loc[i, 'uptrend'] = curr_uptrend
+    st, trend = supertrend(high, low, close, atr_len, fact)
+    df['supertrend'] = st
+    df['uptrend'] = trend > 0
     
     # Add signals to dataframe
-    df['signal'] = 0
-    for i in range(1, len(df)):
-        # Buy signal - trend changes from down to up
-        if not df.loc[i-1, 'uptrend'] and df.loc[i, 'uptrend']:
-            df.loc[i, 'signal'] = 1
-        # Sell signal - trend changes from up to down
-        elif df.loc[i-1, 'uptrend'] and not df.loc[i, 'uptrend']:
-            df.loc[i, 'signal'] = -1
+    df['signal'] = trend_signals(trend)
     
     # Create figure
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10), gridspec_kw={'height_ratios': [3, 1]})
@@ -0,0 +1,237 @@
+"""
+Walk-Forward Optimization for Jamso-AI-Engine
+
+Robustness check for SuperTrend parameters over rolling train/test folds:
+- The history is split into folds of ``train_bars`` followed by ``test_bars``,
+  rolled forward by ``step`` bars
+- SuperTrend signals are computed once over the whole history for every
+  distinct (atr_period, atr_multiplier) and shared by all folds
+- Every (fold, candidate) pair is backtested on its slice of the shared
+  arrays, spread over worker processes
+- The best candidate of each train fold is scored on the following test fold
+
+Because indicators come from the full history, each fold starts with a warmed
+up ATR and trend instead of a fresh warm-up period; the indicators are causal,
+so no future bars leak into a fold.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.AI.backtest_core import run_backtest_batch
+from src.AI.fallback_optimizer import (
+    OBJECTIVES, _backtest_days, _metrics_from_batch_stats, generate_param_set
+)
+from src.AI.indicators.supertrend_kernel import rolling_atr, supertrend_bands, trend_signals, true_range
+from src.AI.parallel_evaluator import evaluate_in_parallel
+from src.AI.successive_halving import _score
+
+logger = logging.getLogger(__name__)
+
+
+def walk_forward_folds(num_bars: int, train_bars: int, test_bars: int,
+                       step: Optional[int] = None) -> List[Tuple[int, int, int]]:
+    """
+    Rolling train/test split of a history.
+
+    Parameters:
+    - num_bars: Length of the history
+    - train_bars: Bars in each train window
+    - test_bars: Bars in each test window, directly after its train window
+    - step: Bars between fold starts (defaults to ``test_bars``, so the test
+      windows tile the history without overlap)
+
+    Returns:
+    - List of ``(train_start, test_start, test_end)`` positions
+    """
+    if train_bars < 2 or test_bars < 2:
+        raise ValueError("train_bars and test_bars must be at least 2")
+    step = test_bars if step is None else step
+    if step < 1:
+        raise ValueError("step must be at least 1")
+
+    folds = []
+    start = 0
+    while start + train_bars + test_bars <= num_bars:
+        folds.append((start, start + train_bars, start + train_bars + test_bars))
+        start += step
+    return folds
+
+
+def precompute_signals(df: pd.DataFrame, param_sets: Sequence[Dict[str, Any]]) -> Tuple[pd.DataFrame, List[Optional[str]]]:
+    """
+    Compute SuperTrend signals once for every distinct indicator setting.
+
+    Parameters:
+    - df: DataFrame with OHLC data
+    - param_sets: Candidate parameter dictionaries
+
+    Returns:
+    - Frame with ``high``, ``low``, ``close`` and one int8 signal column per
+      distinct (atr_period, atr_multiplier), on the index of ``df``
+    - The signal column of each parameter set, or None where the indicator
+      could not be computed
+    """
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+
+    tr = true_range(high, low, close)
+    hl2 = (high + low) / 2
+    atr_by_period: Dict[int, np.ndarray] = {}
+
+    columns: Dict[str, np.ndarray] = {'high': high, 'low': low, 'close': close}
+    column_by_setting: Dict[Tuple[int, float], str] = {}
+    signal_columns: List[Optional[str]] = []
+    for params in param_sets:
+        try:
+            atr_period = int(params.get('atr_period', 14))
+            setting = (atr_period, float(params.get('atr_multiplier', 3.0)))
+            if setting not in column_by_setting:
+                if atr_period not in atr_by_period:
+                    atr_by_period[atr_period] = rolling_atr(tr, atr_period)
+                _, trend, _, _ = supertrend_bands(close, hl2, atr_by_period[atr_period], setting[1])
+                name = f'signal_{len(column_by_setting)}'
+                columns[name] = trend_signals(trend)
+                column_by_setting[setting] = name
+            signal_columns.append(column_by_setting[setting])
+        except Exception as e:
+            logger.warning(f"Error computing signals for {params}: {str(e)}")
+            signal_columns.append(None)
+
+    return pd.DataFrame(columns, index=df.index), signal_columns
+
+
+def evaluate_fold_tasks(frame: pd.DataFrame, tasks: List[Dict[str, Any]]) -> List[Optional[Dict[str, float]]]:
+    """
+    Backtest (fold, candidate) tasks on slices of a precomputed signal frame.
+
+    Each task holds ``start``, ``end``, ``signal`` (column name) and
+    ``params``; tasks sharing a window are simulated together in one batch.
+    Module-level so it can be sent to ``evaluate_in_parallel`` workers.
+
+    Returns:
+    - The calculate_metrics dict of each task
+    """
+    results: List[Optional[Dict[str, float]]] = [None] * len(tasks)
+    windows: Dict[Tuple[int, int], List[int]] = {}
+    for k, task in enumerate(tasks):
+        windows.setdefault((task['start'], task['end']), []).append(k)
+
+    for (start, end), members in windows.items():
+        window = frame.iloc[start:end]
+        signals = np.column_stack([window[tasks[k]['signal']].to_numpy() for k in members])
+        selected = [tasks[k]['params'] for k in members]
+        stats = run_backtest_batch(
+            window['high'].to_numpy(), window['low'].to_numpy(), window['close'].to_numpy(), signals,
+            stop_loss_pct=[p.get('stop_loss', 2.0) for p in selected],
+            take_profit_pct=[p.get('take_profit', 4.0) for p in selected],
+            position_size=[p.get('position_size', 1.0) for p in selected],
+            initial_equity=100.0
+        )
+        days = _backtest_days(window.index)
+        for lane, k in enumerate(members):
+            results[k] = _metrics_from_batch_stats(stats[lane], 100.0, len(window), days)
+
+    return results
+
+
+def walk_forward_optimize(
+    df: pd.DataFrame,
+    search_space: Dict[str, List],
+    objective_name: str = 'sharpe',
+    train_bars: int = 500,
+    test_bars: int = 100,
+    step: Optional[int] = None,
+    num_evals: int = 50,
+    workers: Optional[int] = 1,
+    param_sets: Optional[Sequence[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Optimize on each train fold and evaluate the winner on the next test fold.
+
+    Parameters:
+    - df: DataFrame with OHLC data, in time order
+    - search_space: Dictionary with parameter ranges
+    - objective_name: Name of the objective to optimize
+    - train_bars: Bars in each train window
+    - test_bars: Bars in each test window
+    - step: Bars between fold starts (defaults to ``test_bars``)
+    - num_evals: Number of random candidates, shared by all folds
+    - workers: Number of worker processes (``None`` for all cores but one)
+    - param_sets: Explicit candidates instead of sampling ``search_space``
+
+    Returns:
+    - One entry per fold with its bounds (positions and timestamps),
+      ``params``, ``train_metrics``, ``train_objective``, ``test_metrics``
+      and ``test_objective``
+    """
+    for col in ['high', 'low', 'close']:
+        if col not in df.columns:
+            raise ValueError(f"Missing required column: {col}")
+
+    folds = walk_forward_folds(len(df), train_bars, test_bars, step)
+    if not folds:
+        logger.warning(f"History of {len(df)} bars is too short for {train_bars}/{test_bars} folds")
+        return []
+
+    objective_fn = OBJECTIVES.get(objective_name, OBJECTIVES['sharpe'])
+    if param_sets is None:
+        param_sets = [generate_param_set(search_space) for _ in range(num_evals)]
+    param_sets = list(param_sets)
+
+    frame, signal_columns = precompute_signals(df, param_sets)
+    candidates = [j for j, column in enumerate(signal_columns) if column is not None]
+    logger.info(f"Walk-forward: {len(folds)} folds x {len(candidates)} candidates, "
+                f"{frame.shape[1] - 3} distinct signal series")
+
+    # Train: every candidate on every train window, in parallel
+    tasks = [
+        {'start': train_start, 'end': test_start, 'signal': signal_columns[j], 'params': param_sets[j]}
+        for train_start, test_start, _ in folds
+        for j in candidates
+    ]
+    best: List[Tuple[float, int, Optional[Dict[str, float]]]] = [(float('-inf'), -1, None)] * len(folds)
+    for position, metrics in evaluate_in_parallel(frame, evaluate_fold_tasks, tasks, workers=workers):
+        fold, lane = divmod(position, len(candidates))
+        value = _score(objective_fn, metrics)
+        # Ties go to the earlier candidate, independent of completion order
+        current_value, current_lane, _ = best[fold]
+        if value > current_value or (value == current_value and 0 <= lane < current_lane):
+            best[fold] = (value, lane, metrics)
+
+    # Test: each fold's winner on the window that follows it
+    times = pd.DatetimeIndex(pd.to_datetime(df['timestamp'])) if 'timestamp' in df.columns else df.index
+    results: List[Dict[str, Any]] = []
+    test_tasks = []
+    for k, (train_start, test_start, test_end) in enumerate(folds):
+        value, lane, train_metrics = best[k]
+        params = param_sets[candidates[lane]] if lane >= 0 else None
+        results.append({
+            'fold': k,
+            'train_start': train_start,
+            'test_start': test_start,
+            'test_end': test_end,
+            'train_from': str(times[train_start]),
+            'test_from': str(times[test_start]),
+            'test_to': str(times[test_end - 1]),
+            'params': params,
+            'train_metrics': train_metrics,
+            'train_objective': value,
+            'test_metrics': None,
+            'test_objective': float('-inf'),
+        })
+        if params is not None:
+            test_tasks.append({'start': test_start, 'end': test_end,
+                               'signal': signal_columns[candidates[lane]], 'params': params, 'fold': k})
+
+    for task, metrics in zip(test_tasks, evaluate_fold_tasks(frame, test_tasks)):
+        results[task['fold']].update(test_metrics=metrics, test_objective=_score(objective_fn, metrics))
+
+    for r in results:
+        logger.info(f"Fold {r['fold']}: train {objective_name} {r['train_objective']:.4f}, "
+                    f"test {objective_name} {r['test_objective']:.4f}")
+    return results
@@ -0,0 +1,283 @@
+# async_client.py
+"""
+Asyncio client for the Capital.com API.
+
+Mirrors the read and trade methods of MarketDataManager and PositionManager
+(``prices``, ``single_market_details``, ``client_sentiment``,
+``all_positions``, ``position_details``, ``create_position``,
+``close_position``) for callers that query many epics or positions at once:
+- One aiohttp session per client keeps a shared pool of keep-alive
+  connections
+- A semaphore bounds the requests in flight; request starts wait for the
+  process-wide token-bucket rate limiter (without blocking the event loop)
+- Authentication comes from a SessionManager (e.g. the pooled webhook client),
+  so tokens are shared with the synchronous client; a 401 triggers one
+  re-login and retry
+
+Fan-out helpers (``prices_many``, ``position_details_many``, ...) run one call
+per key concurrently and return a dict of results, with exceptions in place
+of failed entries.
+
+Example:
+    async with AsyncClient(session_manager) as client:
+        prices = await client.prices_many(['BTCUSD', 'ETHUSD'], resolution='HOUR', max=100)
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+
+import aiohttp
+
+from src.Exchanges.capital_com_api.exceptions import CapitalAPIException, get_exception_for_status
+from src.Exchanges.capital_com_api.rate_limiter import RateLimiter, classify_endpoint, interval_limiter
+from src.Exchanges.capital_com_api.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncClient:
+    """
+    Concurrent Capital.com client on top of a SessionManager.
+
+    Attributes:
+        session_manager: Source of the server URL, API key and tokens
+        max_concurrency: Requests in flight at the same time
+        stats: Counters for requests, retries and re-authentications
+    """
+
+    def __init__(self, session_manager: SessionManager, max_concurrency: int = 8,
+                 min_request_interval: Optional[float] = None, max_retries: int = 3,
+                 timeout: float = 30.0, rate_limiter: Optional[RateLimiter] = None):
+        """
+        Initialize the client.
+
+        Args:
+            session_manager: Authenticated (or authenticatable) SessionManager
+            max_concurrency: Requests in flight at the same time
+            min_request_interval: Space request starts by this many seconds
+                with a private limiter instead of the shared one
+            max_retries: Retries on 429 and, for reads, on 5xx responses
+            timeout: Total timeout per request in seconds
+            rate_limiter: Limiter to wait for (default: the session manager's,
+                i.e. the process-wide limiter)
+        """
+        self.session_manager = session_manager
+        self.server = session_manager.server
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        if rate_limiter is None:
+            if min_request_interval is not None:
+                rate_limiter = interval_limiter(min_request_interval)
+            else:
+                rate_limiter = session_manager.rate_limiter
+        self._rate_limiter = rate_limiter
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._auth_lock: Optional[asyncio.Lock] = None
+        self.stats = {'requests': 0, 'retries': 0, 'reauthentications': 0}
+
+    async def __aenter__(self) -> 'AsyncClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the pool belongs to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._auth_lock = asyncio.Lock()
+        return self._session
+
+    async def _ensure_authenticated(self) -> None:
+        """Log in through the session manager (in a thread) if its tokens are not valid."""
+        if self.session_manager.is_authenticated and self.session_manager._is_token_valid():
+            return
+        async with self._auth_lock:
+            # Concurrent first requests share one login
+            if self.session_manager.is_authenticated and self.session_manager._is_token_valid():
+                return
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self.session_manager.create_session)
+        if not self.session_manager.is_authenticated:
+            message = result.get('error_message') if isinstance(result, dict) else None
+            raise get_exception_for_status(401, message or "Could not authenticate with Capital.com API")
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "X-CAP-API-KEY": self.session_manager.api_key or "",
+            "CST": str(self.session_manager.CST or ""),
+            "X-SECURITY-TOKEN": str(self.session_manager.X_TOKEN or "")
+        }
+
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                       payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send one request and return its JSON body.
+
+        Raises:
+            CapitalAPIException (or a subclass by status code) on API errors
+        """
+        session = self._ensure_session()
+        await self._ensure_authenticated()
+        url = f"{self.server}{path}"
+        body = json.dumps(payload) if payload is not None else None
+        endpoint_class = classify_endpoint(method, path)
+        reauthenticated = False
+        attempt = 0
+
+        async with self._semaphore:
+            while True:
+                if self._rate_limiter is not None:
+                    await self._rate_limiter.acquire_async(endpoint_class)
+                headers = self._headers()
+                self.stats['requests'] += 1
+                try:
+                    async with session.request(method, url, params=params, data=body, headers=headers) as response:
+                        status = response.status
+                        text = await response.text()
+                except asyncio.TimeoutError:
+                    raise get_exception_for_status(408, f"{method} {path} timed out")
+                except aiohttp.ClientError as e:
+                    raise CapitalAPIException(message=f"Request failed: {str(e)}")
+
+                if status == 401 and not reauthenticated:
+                    # Tokens are validated lazily: log in again once and retry
+                    reauthenticated = True
+                    self.stats['reauthentications'] += 1
+                    loop = asyncio.get_running_loop()
+                    if await loop.run_in_executor(None, self.session_manager.reauthenticate, headers["CST"]):
+                        continue
+                retryable = status == 429 or (status >= 500 and method == 'GET')
+                if retryable and attempt < self.max_retries:
+                    attempt += 1
+                    self.stats['retries'] += 1
+                    await asyncio.sleep(min(2 ** attempt * 0.25, 10))
+                    continue
+                break
+
+        if status >= 400:
+            try:
+                message = json.loads(text).get('errorCode', text)
+            except (ValueError, AttributeError):
+                message = text
+            raise get_exception_for_status(status, message)
+        if not text:
+            return {}
+        try:
+            return json.loads(text)
+        except ValueError:
+            return {}
+
+    async def _fan_out(self, call: Callable[..., Awaitable[Dict[str, Any]]], keys: Iterable[str],
+                       **kwargs: Any) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """Run ``call(key, **kwargs)`` for every key concurrently."""
+        keys = list(dict.fromkeys(keys))
+        results = await asyncio.gather(*(call(key, **kwargs) for key in keys), return_exceptions=True)
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.error(f"{call.__name__} failed for {key}: {result}")
+        return dict(zip(keys, results))
+
+    # Market data
+
+    async def prices(self, epic: str, resolution: str = "MINUTE", max: int = 10,
+                     from_date: Optional[str] = None, to_date: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch historical prices (see MarketDataManager.prices)."""
+        params: Dict[str, Any] = {"resolution": resolution, "max": max}
+        if from_date:
+            params["from"] = from_date
+        if to_date:
+            params["to"] = to_date
+        return await self._request("GET", f"/api/v1/prices/{epic}", params=params)
+
+    async def single_market_details(self, epic: str) -> Dict[str, Any]:
+        """Fetch details of one market."""
+        return await self._request("GET", f"/api/v1/markets/{epic}")
+
+    async def client_sentiment(self, market_id: str) -> Dict[str, Any]:
+        """Fetch client sentiment for a market."""
+        return await self._request("GET", f"/api/v1/clientsentiment/{market_id}")
+
+    async def prices_many(self, epics: Iterable[str], **kwargs: Any) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """Fetch prices for several epics concurrently; keyword arguments as for ``prices``."""
+        return await self._fan_out(self.prices, epics, **kwargs)
+
+    async def single_market_details_many(self, epics: Iterable[str]) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """Fetch market details for several epics concurrently."""
+        return await self._fan_out(self.single_market_details, epics)
+
+    async def client_sentiment_many(self, market_ids: Iterable[str]) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """Fetch client sentiment for several markets concurrently."""
+        return await self._fan_out(self.client_sentiment, market_ids)
+
+    # Positions
+
+    async def all_positions(self) -> Dict[str, Any]:
+        """Fetch all open positions."""
+        return await self._request("GET", "/api/v1/positions")
+
+    async def position_details(self, deal_id: str) -> Dict[str, Any]:
+        """Fetch details of one position."""
+        return await self._request("GET", f"/api/v1/positions/{deal_id}")
+
+    async def position_details_many(self, deal_ids: Iterable[str]) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """Fetch details of several positions concurrently."""
+        return await self._fan_out(self.position_details, deal_ids)
+
+    async def create_position(self, epic: str, direction: str, size: float,
+                              type: str = "MARKET", timeInForce: str = "FILL_OR_KILL",
+                              stopLevel: Optional[float] = None,
+                              profitLevel: Optional[float] = None,
+                              limitLevel: Optional[float] = None,
+                              **kwargs: Any) -> Dict[str, Any]:
+        """Open a position with the same payload as PositionManager.create_position."""
+        payload: Dict[str, Any] = {
+            'epic': epic,
+            'direction': direction,
+            'size': str(size),
+            'orderType': type,
+            'timeInForce': timeInForce
+        }
+        if stopLevel:
+            payload['stopLevel'] = str(stopLevel)
+        if profitLevel:
+            payload['profitLevel'] = str(profitLevel)
+        if limitLevel:
+            payload['limitLevel'] = str(limitLevel)
+        payload.update(kwargs)
+        logger.info(f"Creating position: {payload}")
+        return await self._request("POST", "/api/v1/positions", payload=payload)
+
+    async def close_position(self, deal_id: str) -> Dict[str, Any]:
+        """Close a position with an opposite market order (see PositionManager.close_position)."""
+        position = (await self.position_details(deal_id)).get('position', {})
+        if not position:
+            return {"status": "error", "message": f"Position {deal_id} not found or cannot be retrieved"}
+        direction = position.get('direction')
+        size = position.get('size')
+        if not direction or not size:
+            return {"status": "error", "message": f"Could not determine direction or size for position {deal_id}"}
+
+        close_data = {
+            "dealId": deal_id,
+            "direction": "BUY" if direction == "SELL" else "SELL",
+            "size": str(size),
+            "orderType": "MARKET"
+        }
+        logger.info(f"Closing position with deal ID: {deal_id}")
+        return await self._request("POST", "/api/v1/positions/otc", payload=close_data)
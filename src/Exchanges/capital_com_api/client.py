@@ -161,6 +161,7 @@ class Client:
             self.request_handler = RequestHandler()
         else:
             self.request_handler = request_handler
+        self.request_handler.session_manager = self.session_manager
         
         # Initialize account configuration
         self.account_config = AccountConfig()
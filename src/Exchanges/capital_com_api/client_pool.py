@@ -0,0 +1,185 @@
+# client_pool.py
+"""
+Process-wide pool of warm, authenticated Capital.com clients.
+
+One Client is kept per API server. Its SessionManager and RequestHandler share
+a single keep-alive ``requests.Session``, so order requests reuse an open TLS
+connection instead of connecting (and authenticating) per call. A daemon
+thread re-authenticates every client before the 15-minute CST/X-SECURITY-TOKEN
+expiry, keeping the hot path to a single broker round trip.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+from src.Exchanges.capital_com_api.client import Client
+from src.Exchanges.capital_com_api.request_handler import RequestHandler
+
+logger = logging.getLogger(__name__)
+
+# SessionManager treats tokens as expired after 15 minutes; refresh well before
+DEFAULT_REFRESH_AFTER = 10 * 60
+DEFAULT_CHECK_INTERVAL = 30.0
+
+
+def create_keep_alive_session(pool_maxsize: int = 10) -> requests.Session:
+    """
+    Build a pooled session for one API server.
+
+    Uses the shared retry policy of ``RequestHandler.setup_retry``:
+    idempotent requests are retried on 5xx responses; POSTs are never retried
+    here, since a retried order could open a second position.
+    """
+    session = requests.Session()
+    RequestHandler.setup_retry(session, pool_connections=1, pool_maxsize=pool_maxsize)
+    return session
+
+
+class ClientPool:
+    """
+    Warm clients keyed by server URL.
+
+    Attributes:
+        refresh_after: Token age in seconds after which the refresher
+            re-authenticates a client
+        check_interval: Seconds between refresher passes
+    """
+
+    def __init__(self, client_factory: Callable[[str, requests.Session], Client],
+                 server_resolver: Callable[[], str],
+                 refresh_after: float = DEFAULT_REFRESH_AFTER,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 pool_maxsize: int = 10):
+        """
+        Initialize the pool.
+
+        Args:
+            client_factory: Builds an authenticated Client for a server, using
+                the given keep-alive session
+            server_resolver: Returns the active account's server URL; called
+                when the pool warms up and on every refresher pass, so
+                account switches are picked up off the request path
+            refresh_after: Token age that triggers re-authentication
+            check_interval: Seconds between refresher passes
+            pool_maxsize: Connections kept open per server
+        """
+        self._client_factory = client_factory
+        self._server_resolver = server_resolver
+        self.refresh_after = refresh_after
+        self.check_interval = check_interval
+        self.pool_maxsize = pool_maxsize
+
+        self._clients: Dict[str, Client] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._server: Optional[str] = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    @property
+    def server(self) -> str:
+        """Server URL of the active account."""
+        if self._server is None:
+            self._server = self._server_resolver().rstrip('/')
+        return self._server
+
+    def get(self, server: Optional[str] = None) -> Client:
+        """
+        Return the ready client for ``server`` (default: the active account).
+
+        The first call for a server builds and authenticates its client; later
+        calls return it without any I/O.
+        """
+        server = (server or self.server).rstrip('/')
+        client = self._clients.get(server)
+        if client is not None and client.session_manager.is_authenticated:
+            return client
+
+        with self._lock:
+            client = self._clients.get(server)
+            if client is not None and client.session_manager.is_authenticated:
+                return client
+            if server not in self._sessions:
+                self._sessions[server] = create_keep_alive_session(self.pool_maxsize)
+            client = self._client_factory(server, self._sessions[server])
+            self._clients[server] = client
+            return client
+
+    def warm(self) -> Optional[Client]:
+        """
+        Authenticate the active account's client and start the refresher.
+
+        Errors are logged, not raised, so a broker outage does not stop the
+        app from starting; the first request then builds the client.
+        """
+        self.start()
+        try:
+            return self.get()
+        except Exception as e:
+            logger.error(f"Failed to warm Capital.com client: {str(e)}")
+            return None
+
+    def refresh(self, client: Client) -> bool:
+        """Re-authenticate one client, keeping its current tokens until new ones arrive."""
+        result = client.session_manager.refresh_session()
+        if result.get('success'):
+            client._setup_auth_headers()
+            logger.debug(f"Refreshed Capital.com session for {client.server}")
+            return True
+        logger.warning(f"Failed to refresh Capital.com session for {client.server}: "
+                       f"{result.get('error_message')}")
+        return False
+
+    def refresh_due(self) -> None:
+        """Refresh every client whose tokens are older than ``refresh_after``."""
+        try:
+            self._server = self._server_resolver().rstrip('/')
+        except Exception as e:
+            logger.warning(f"Could not resolve active server: {str(e)}")
+
+        with self._lock:
+            clients = list(self._clients.values())
+        now = time.time()
+        for client in clients:
+            if now - client.session_manager.last_auth_time >= self.refresh_after:
+                try:
+                    self.refresh(client)
+                except Exception as e:
+                    logger.error(f"Error refreshing Capital.com session: {str(e)}")
+
+    def start(self) -> None:
+        """Start the background refresher if it is not running."""
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._run, name='capital-client-refresher', daemon=True)
+            self._refresher.start()
+
+    def stop(self) -> None:
+        """Stop the refresher and close all pooled connections."""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._clients.clear()
+            self._sessions.clear()
+
+    def invalidate(self, server: Optional[str] = None) -> None:
+        """Drop the client for ``server`` (default: all), e.g. after an account switch."""
+        with self._lock:
+            if server is None:
+                self._clients.clear()
+                self._server = None
+            else:
+                self._clients.pop(server.rstrip('/'), None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.refresh_due()
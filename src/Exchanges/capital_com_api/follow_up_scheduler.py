@@ -0,0 +1,266 @@
+# follow_up_scheduler.py
+"""
+Background follow-up checks after trades.
+
+Verifying that a new position got its trailing stop used to sleep on the
+caller's thread. The FollowUpScheduler queues each verification with a delay
+and checks them on a daemon thread instead:
+- All verifications that are due are checked against one ``all_positions()``
+  call
+- Positions are matched by deal reference (or deal ID), not by scanning and
+  sorting on epic and direction. Only verifications without either check
+  the newest position on the same epic and direction; a reference that
+  never lists is looked up in the deal confirmations (the order may have
+  been rejected or not filled) and the verification stops there, so no
+  other position's stop is ever changed
+- A position that is not listed yet, or a failed listing, is retried with
+  exponential backoff; after enabling a missing trailing stop the position is
+  verified again the same way
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _reference_key(reference: Optional[str]) -> Optional[str]:
+    """Deal reference without its type prefix (orders ``o_``, positions ``p_``)."""
+    if not reference:
+        return None
+    reference = str(reference)
+    if len(reference) > 2 and reference[1] == '_':
+        return reference[2:]
+    return reference
+
+
+class TrailingStopVerification:
+    """One pending trailing-stop check."""
+
+    __slots__ = ('epic', 'direction', 'deal_reference', 'deal_id', 'stop_distance',
+                 'attempt', 'updated', 'on_done')
+
+    def __init__(self, epic: str, direction: str, deal_reference: Optional[str] = None,
+                 deal_id: Optional[str] = None, stop_distance: Optional[float] = None,
+                 on_done: Optional[Callable[[str, Optional[str]], None]] = None):
+        self.epic = epic
+        self.direction = direction
+        self.deal_reference = deal_reference
+        self.deal_id = deal_id
+        self.stop_distance = stop_distance
+        self.attempt = 0
+        self.updated = False
+        self.on_done = on_done
+
+    def __repr__(self) -> str:
+        return f"TrailingStopVerification({self.epic} {self.direction} ref={self.deal_reference} id={self.deal_id})"
+
+
+class FollowUpScheduler:
+    """
+    Delayed, batched trailing-stop verification for one PositionManager.
+
+    Attributes:
+        delay: Seconds between a trade and its first check
+        backoff: Factor applied to the delay for every retry
+        max_attempts: Checks per verification before giving up
+        stats: Counters for batches, listings, verified, updated, failed and
+            rejected (the deal confirmation of an unlisted reference says the
+            order was rejected)
+    """
+
+    def __init__(self, position_manager: Any, delay: float = 2.0, backoff: float = 2.0,
+                 max_attempts: int = 5, max_delay: float = 60.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            position_manager: Provides ``all_positions``, ``update_position``
+                and ``deal_confirmation``
+            delay: Seconds between a trade and its first check
+            backoff: Factor applied to the delay for every retry
+            max_attempts: Checks per verification before giving up
+            max_delay: Upper bound for a single retry delay
+        """
+        self.position_manager = position_manager
+        self.delay = delay
+        self.backoff = backoff
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self.stats = {'batches': 0, 'listings': 0, 'verified': 0, 'updated': 0, 'failed': 0, 'rejected': 0}
+
+        self._queue: List[Any] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def schedule(self, verification: TrailingStopVerification, delay: Optional[float] = None) -> None:
+        """Queue a verification to run after ``delay`` seconds (default: ``self.delay``)."""
+        due = time.monotonic() + (self.delay if delay is None else delay)
+        with self._condition:
+            heapq.heappush(self._queue, (due, next(self._counter), verification))
+            self._ensure_thread()
+            self._condition.notify()
+
+    def pending(self) -> int:
+        """Number of queued verifications."""
+        with self._condition:
+            return len(self._queue)
+
+    def stop(self) -> None:
+        """Stop the worker thread; queued verifications are dropped."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='trade-follow-ups', daemon=True)
+            self._thread.start()
+
+    def _take_due(self) -> Optional[List[TrailingStopVerification]]:
+        """Block until verifications are due; None once stopped."""
+        with self._condition:
+            while not self._stopped:
+                now = time.monotonic()
+                if self._queue and self._queue[0][0] <= now:
+                    due = []
+                    while self._queue and self._queue[0][0] <= now:
+                        due.append(heapq.heappop(self._queue)[2])
+                    return due
+                timeout = self._queue[0][0] - now if self._queue else None
+                self._condition.wait(timeout)
+            return None
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_due()
+            if batch is None:
+                return
+            try:
+                self.run_batch(batch)
+            except Exception as e:
+                logger.error(f"Error in trade follow-up batch: {str(e)}")
+
+    def _retry(self, verification: TrailingStopVerification, reason: str) -> None:
+        verification.attempt += 1
+        if verification.attempt >= self.max_attempts:
+            self.stats['failed'] += 1
+            logger.error(f"Giving up on {verification} after {verification.attempt} attempts: {reason}")
+            self._finish(verification, 'failed')
+            return
+        delay = min(self.delay * self.backoff ** verification.attempt, self.max_delay)
+        logger.debug(f"Retrying {verification} in {delay:.1f}s: {reason}")
+        self.schedule(verification, delay)
+
+    @staticmethod
+    def _finish(verification: TrailingStopVerification, outcome: str, deal_id: Optional[str] = None) -> None:
+        if verification.on_done is not None:
+            try:
+                verification.on_done(outcome, deal_id)
+            except Exception as e:
+                logger.error(f"Error in follow-up callback: {str(e)}")
+
+    def run_batch(self, batch: List[TrailingStopVerification]) -> None:
+        """Check a batch of verifications against a single position listing."""
+        self.stats['batches'] += 1
+        try:
+            self.stats['listings'] += 1
+            listing = self.position_manager.all_positions() or {}
+        except Exception as e:
+            for verification in batch:
+                self._retry(verification, f"listing positions failed: {str(e)}")
+            return
+
+        by_reference: Dict[str, Dict[str, Any]] = {}
+        by_deal_id: Dict[str, Dict[str, Any]] = {}
+        for entry in listing.get('positions', []):
+            position = entry.get('position', {})
+            key = _reference_key(position.get('dealReference'))
+            if key:
+                by_reference[key] = entry
+            if position.get('dealId'):
+                by_deal_id[str(position['dealId'])] = entry
+
+        for verification in batch:
+            entry = None
+            if verification.deal_id:
+                entry = by_deal_id.get(str(verification.deal_id))
+            if entry is None and verification.deal_reference:
+                entry = by_reference.get(_reference_key(verification.deal_reference))
+            if entry is None and not verification.deal_id and not verification.deal_reference:
+                entry = self._newest_match(listing, verification)
+            if entry is None:
+                if verification.deal_reference and verification.attempt + 1 >= self.max_attempts:
+                    self._give_up_unlisted(verification)
+                else:
+                    self._retry(verification, "position not listed yet")
+                continue
+            self._verify(verification, entry)
+
+    @staticmethod
+    def _newest_match(listing: Dict[str, Any],
+                      verification: TrailingStopVerification) -> Optional[Dict[str, Any]]:
+        """Newest position on the same epic and direction, for callers without a deal reference."""
+        matches = [
+            entry for entry in listing.get('positions', [])
+            if entry.get('market', {}).get('epic') == verification.epic
+            and entry.get('position', {}).get('direction') == verification.direction
+        ]
+        if not matches:
+            return None
+        return max(matches, key=lambda entry: entry.get('position', {}).get('createdDate', ''))
+
+    def _give_up_unlisted(self, verification: TrailingStopVerification) -> None:
+        """Report why a deal reference never listed, then stop verifying it."""
+        verification.attempt += 1
+        try:
+            confirmation = self.position_manager.deal_confirmation(verification.deal_reference) or {}
+        except Exception as e:
+            confirmation = {}
+            logger.error(f"Error fetching deal confirmation for {verification.deal_reference}: {str(e)}")
+
+        status = confirmation.get('dealStatus')
+        outcome = 'rejected' if status == 'REJECTED' else 'failed'
+        self.stats[outcome] += 1
+        logger.error(f"Giving up on {verification} after {verification.attempt} attempts: position never listed "
+                     f"(deal status {status or 'unknown'}, reason {confirmation.get('reason', 'unknown')})")
+        self._finish(verification, outcome)
+
+    def _verify(self, verification: TrailingStopVerification, entry: Dict[str, Any]) -> None:
+        position = entry.get('position', {})
+        deal_id = position.get('dealId')
+        verification.deal_id = deal_id
+        if position.get('trailingStop', False):
+            self.stats['verified'] += 1
+            if verification.updated:
+                logger.info(f"Successfully added trailing stop to position {deal_id}")
+            else:
+                logger.info(f"Position {deal_id} has trailing stop correctly applied")
+            self._finish(verification, 'verified', deal_id)
+            return
+
+        if verification.updated:
+            self._retry(verification, "trailing stop still inactive after update")
+            return
+
+        logger.warning(f"Position {deal_id} was created but trailing stop appears inactive! Attempting to add it...")
+        update_args: Dict[str, Any] = {'trailingStop': True}
+        if verification.stop_distance:
+            update_args['stopDistance'] = verification.stop_distance
+        result = self.position_manager.update_position(deal_id, **update_args)
+        if isinstance(result, dict) and result.get('status') == 'error':
+            self._retry(verification, result.get('message', 'update failed'))
+            return
+        self.stats['updated'] += 1
+        verification.updated = True
+        # Check again on the next batch instead of sleeping here
+        self.schedule(verification, self.delay / 2)
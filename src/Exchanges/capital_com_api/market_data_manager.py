@@ -3,7 +3,7 @@ import json
 import os
 import requests
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .session_manager import SessionManager
 from .request_handler import RequestHandler
 
@@ -99,8 +99,6 @@ class MarketDataManager:
         except Exception as e:
             logger.error(f"Error fetching all top-level nodes: {e}")
             raise
-        finally:
-            self.session_manager.end_session()  # Changed from close_session
 
     def all_top_sub(self, node_id: str) -> Dict[str, Any]:
         """Fetch all sub-nodes for node ID."""
@@ -129,8 +127,6 @@ class MarketDataManager:
                 logger.error(f"Response Status Code: {e.response.status_code}")
                 logger.error(f"Response Text: {e.response.text}")
             raise
-        finally:
-            self.session_manager.end_session()  # Changed from destroy_session
 
     def market_details(self, market: str) -> Dict[str, Any]:
         """Fetch market details."""
@@ -159,8 +155,6 @@ class MarketDataManager:
                 logger.error(f"Response Status Code: {e.response.status_code}")
                 logger.error(f"Response Text: {e.response.text}")
             raise
-        finally:
-            self.session_manager.end_session()  # Changed from destroy_session
 
     def single_market_details(self, epic: str) -> Dict[str, Any]:
         """Fetch single market details."""
@@ -189,15 +183,23 @@ class MarketDataManager:
                 logger.error(f"Response Status Code: {e.response.status_code}")
                 logger.error(f"Response Text: {e.response.text}")
             raise
-        finally:
-            self.session_manager.end_session()  # Changed from close_session/destroy_session
 
-    def prices(self, epic: str, resolution: str = "MINUTE", max: int = 10) -> Dict[str, Any]:
-        """Fetch historical prices."""
+    def prices(self, epic: str, resolution: str = "MINUTE", max: int = 10,
+               from_date: Optional[str] = None, to_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Fetch historical prices.
+        
+        ``from_date``/``to_date`` (``YYYY-MM-DDTHH:MM:SS``, UTC) select a date
+        range; ``max`` still caps the number of candles returned (at most 1000).
+        """
         logger.info("Fetching historical prices for epic: %s", epic)
         try:
             self.session_manager.create_session()
             url = f"{self.session_manager.server}/api/v1/prices/{epic}?resolution={resolution}&max={max}"
+            if from_date:
+                url += f"&from={from_date}"
+            if to_date:
+                url += f"&to={to_date}"
             logger.debug(f"Request URL: {url}")
             try:
                 headers = {}
@@ -223,8 +225,6 @@ class MarketDataManager:
         except Exception as e:
             logger.error(f"Error fetching prices: {e}")
             raise
-        finally:
-            self.session_manager.end_session()  # Add session cleanup
 
     def client_sentiment(self, market_id: str) -> Dict[str, Any]:
         """Fetch client sentiment for market ID."""
@@ -256,6 +256,4 @@ class MarketDataManager:
                 raise
         except Exception as e:
             logger.error(f"Error fetching client sentiment: {e}")
-            raise
-        finally:
-            self.session_manager.end_session()  # Changed from close_session
\ No newline at end of file
+            raise
\ No newline at end of file
@@ -3,7 +3,7 @@ import json
 from typing import Dict, Any, Optional, List
 from src.Exchanges.capital_com_api.session_manager import SessionManager
 from src.Exchanges.capital_com_api.request_handler import RequestHandler
-import time
+from src.Exchanges.capital_com_api.follow_up_scheduler import FollowUpScheduler, TrailingStopVerification
 
 # Create a module-level logger
 logger = logging.getLogger(__name__)
@@ -21,6 +21,8 @@ class PositionManager:
         self.request_handler = request_handler
         # Add this line to fix the 'PositionManager' object has no attribute 'logger' error
         self.logger = logger
+        # Created on first use by schedule_trailing_stop_verification
+        self.follow_up_scheduler: Optional[FollowUpScheduler] = None
         
     def all_positions(self) -> Dict[str, Any]:
         logger.info("Fetching all open positions")
@@ -46,6 +48,18 @@ class PositionManager:
         logger.info("Fetched position details successfully")
         return data
 
+    def deal_confirmation(self, deal_reference: str) -> Dict[str, Any]:
+        logger.info("Fetching deal confirmation for deal reference: %s", deal_reference)
+        self.session_manager.create_session()
+        url = f"{self.session_manager.server}/api/v1/confirms/{deal_reference}"
+        headers = {
+            "CST": str(self.session_manager.CST) if self.session_manager.CST else "",
+            "X-SECURITY-TOKEN": str(self.session_manager.X_TOKEN) if self.session_manager.X_TOKEN else ""
+        }
+        data = self.request_handler.make_request("get", url, headers=headers)[0]
+        logger.info("Fetched deal confirmation successfully")
+        return data
+
     def create_position(self, epic: str, direction: str, size: float, 
                        type: str = "MARKET", timeInForce: str = "FILL_OR_KILL", 
                        stopLevel: Optional[float] = None, 
@@ -178,56 +192,30 @@ class PositionManager:
             logger.error(error_msg)
             return {"status": "error", "message": error_msg}
 
-    def schedule_trailing_stop_verification(self, epic, direction):
-        """Schedule a verification of trailing stop after position creation"""
-        try:
-            # Wait 2 seconds to allow position to be created
-            time.sleep(2)
-            
-            # Get all positions
-            positions = self.all_positions()
-            all_positions = positions.get('positions', [])
-            
-            # Find the most recently created position matching our epic and direction
-            matching_positions = []
-            for pos in all_positions:
-                position_data = pos.get('position', {})
-                market_data = pos.get('market', {})
-                
-                if market_data.get('epic') == epic and position_data.get('direction') == direction:
-                    matching_positions.append(pos)
-            
-            if matching_positions:
-                # Sort by creation time, newest first
-                sorted_positions = sorted(matching_positions, 
-                                         key=lambda x: x.get('position', {}).get('createdDate', ''), 
-                                         reverse=True)
-                
-                newest_position = sorted_positions[0]
-                position_id = newest_position.get('position', {}).get('dealId')
-                
-                # Check if trailing stop is active
-                has_trailing = newest_position.get('position', {}).get('trailingStop', False)
-                
-                if not has_trailing:
-                    logger.warning(f"Position {position_id} was created but trailing stop appears inactive! Attempting to add it...")
-                    
-                    # Try to update the position to add trailing stop
-                    self.update_position(position_id, trailingStop=True, 
-                                       stopDistance=newest_position.get('position', {}).get('stopLevel', 0.01))
-                    
-                    # Verify again
-                    time.sleep(1)
-                    updated_position = self.position_details(position_id)
-                    if updated_position.get('position', {}).get('trailingStop', False):
-                        logger.info(f"Successfully added trailing stop to position {position_id}")
-                    else:
-                        logger.error(f"Failed to add trailing stop to position {position_id}")
-                else:
-                    logger.info(f"Position {position_id} has trailing stop correctly applied")
-                    
-        except Exception as e:
-            logger.error(f"Error verifying trailing stop: {str(e)}")
+    def schedule_trailing_stop_verification(self, epic: str, direction: str,
+                                            deal_reference: Optional[str] = None,
+                                            stop_distance: Optional[float] = None) -> None:
+        """
+        Schedule a verification of the trailing stop after position creation.
+
+        Returns immediately; the check runs on the follow-up scheduler's
+        thread, batched with other pending checks into one positions listing.
+
+        Args:
+            epic: Market of the new position
+            direction: BUY or SELL
+            deal_reference: dealReference returned by create_position, used to
+                find the position (without it the newest position on the same
+                epic and direction is checked). A reference that never lists
+                is only reported, with its deal confirmation
+            stop_distance: Trailing distance to apply if the stop is missing
+        """
+        if self.follow_up_scheduler is None:
+            self.follow_up_scheduler = FollowUpScheduler(self)
+        self.follow_up_scheduler.schedule(
+            TrailingStopVerification(epic, direction, deal_reference=deal_reference,
+                                     stop_distance=stop_distance)
+        )
 
     def close_position(self, deal_id: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,224 @@
+# rate_limiter.py
+"""
+Process-wide token-bucket rate limiter for outbound Capital.com requests.
+
+Requests are grouped into endpoint classes, each with its own bucket:
+- ``session``: logins (POST /api/v1/session), at most one per second
+- ``trading``: positions, working orders and deal confirmations
+- ``market_data``: prices, markets, sentiment and everything else
+
+Every request also draws from an account-wide bucket, so the classes together
+stay within the broker's overall budget. Buckets refill continuously and allow
+bursts up to their capacity.
+
+Callers reserve a class token under a short lock and then wait outside it,
+with ``acquire`` (threads) or ``acquire_async`` (asyncio tasks). Reservations
+are granted in arrival order within a class, so concurrent callers are spaced
+instead of all retrying at once. The account token is only taken once the
+class token is due, i.e. just before the request is sent: a queue of market
+data requests therefore uses the account budget at the market data rate and
+does not run up account debt that orders would have to wait behind.
+``reserve`` is the non-blocking form for callers that schedule their own
+wait; it takes both tokens at once and returns the larger wait.
+``metrics`` reports how often and how long callers waited.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# (requests per second, burst capacity)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'session': (1.0, 1.0),
+    'trading': (10.0, 10.0),
+    # Below the account rate, so queued market data leaves account budget for orders
+    'market_data': (8.0, 8.0),
+}
+DEFAULT_ACCOUNT_LIMIT: Tuple[float, float] = (10.0, 10.0)
+
+_TRADING_PATHS = ('/api/v1/positions', '/api/v1/workingorders', '/api/v1/confirms')
+
+
+def classify_endpoint(method: str, url: str) -> str:
+    """Endpoint class of a request, from its method and URL or path."""
+    path = urlparse(url).path or url
+    if path.rstrip('/') == '/api/v1/session' and method.upper() == 'POST':
+        return 'session'
+    if path.startswith(_TRADING_PATHS):
+        return 'trading'
+    return 'market_data'
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations.
+
+    A reservation always succeeds and returns how long the caller must wait
+    for its token; the balance may go negative, which queues later callers
+    behind earlier ones.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float, tokens: float = 1.0) -> float:
+        """Take ``tokens`` and return the seconds until they are available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= tokens
+        return max(0.0, -self.tokens / self.rate)
+
+
+class RateLimiter:
+    """
+    Per-endpoint-class token buckets plus an optional account-wide bucket.
+
+    Thread-safe; ``acquire_async`` waits without blocking the event loop.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 account_limit: Optional[Tuple[float, float]] = DEFAULT_ACCOUNT_LIMIT):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits: Endpoint class to (requests per second, burst) mapping
+            account_limit: (requests per second, burst) shared by all
+                classes, or None for no overall limit
+        """
+        limits = DEFAULT_LIMITS if limits is None else limits
+        self._buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in limits.items()}
+        self._account = TokenBucket(*account_limit) if account_limit else None
+        self._lock = threading.Lock()
+        self._metrics = {name: self._empty_metrics() for name in self._buckets}
+
+    @staticmethod
+    def _empty_metrics() -> Dict[str, float]:
+        return {'requests': 0, 'delayed': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+
+    def configure(self, endpoint_class: str, rate: float, burst: float) -> None:
+        """Set (or add) the limit of one endpoint class."""
+        with self._lock:
+            self._buckets[endpoint_class] = TokenBucket(rate, burst)
+            self._metrics.setdefault(endpoint_class, self._empty_metrics())
+
+    def _reserve(self, endpoint_class: str) -> Tuple[str, float, bool]:
+        """
+        Reserve a class token, and the account token too if the class token is due now.
+
+        Returns:
+            Tuple of (endpoint class used, seconds to wait, whether the
+            account token is still to be taken after the wait)
+        """
+        with self._lock:
+            if endpoint_class not in self._buckets:
+                endpoint_class = 'market_data'
+            now = time.monotonic()
+            bucket = self._buckets.get(endpoint_class)
+            wait = bucket.reserve(now) if bucket is not None else 0.0
+            if self._account is None:
+                return endpoint_class, wait, False
+            if wait > 0:
+                return endpoint_class, wait, True
+            return endpoint_class, self._account.reserve(now), False
+
+    def _reserve_account(self) -> float:
+        """Take an account token and return the seconds until it is available."""
+        if self._account is None:
+            return 0.0
+        with self._lock:
+            return self._account.reserve(time.monotonic())
+
+    def _record(self, endpoint_class: str, wait: float) -> None:
+        with self._lock:
+            stats = self._metrics.setdefault(endpoint_class, self._empty_metrics())
+            stats['requests'] += 1
+            if wait > 0:
+                stats['delayed'] += 1
+                stats['total_wait'] += wait
+                stats['max_wait'] = max(stats['max_wait'], wait)
+
+    def reserve(self, endpoint_class: str = 'market_data') -> float:
+        """
+        Reserve one request and return the seconds to wait before it may be sent.
+
+        Both the class token and the account token are taken now, and the
+        larger of the two waits is returned. Unlike ``acquire``, which takes
+        the account token only once the class token is due, a queue of
+        reservations therefore runs up account debt at once. Unknown classes
+        fall back to ``market_data`` (or only the account bucket if that class
+        is not configured).
+        """
+        endpoint_class, wait, pending = self._reserve(endpoint_class)
+        if pending:
+            wait = max(wait, self._reserve_account())
+        self._record(endpoint_class, wait)
+        return wait
+
+    def acquire(self, endpoint_class: str = 'market_data') -> float:
+        """Block the calling thread until a request may be sent; returns the wait."""
+        endpoint_class, wait, pending = self._reserve(endpoint_class)
+        if wait > 0:
+            time.sleep(wait)
+        if pending:
+            account_wait = self._reserve_account()
+            if account_wait > 0:
+                time.sleep(account_wait)
+            wait += account_wait
+        self._record(endpoint_class, wait)
+        return wait
+
+    async def acquire_async(self, endpoint_class: str = 'market_data') -> float:
+        """Wait in the event loop until a request may be sent; returns the wait."""
+        endpoint_class, wait, pending = self._reserve(endpoint_class)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if pending:
+            account_wait = self._reserve_account()
+            if account_wait > 0:
+                await asyncio.sleep(account_wait)
+            wait += account_wait
+        self._record(endpoint_class, wait)
+        return wait
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Requests, delayed requests, total and maximum wait (seconds) per endpoint class."""
+        with self._lock:
+            result = {}
+            for name, stats in self._metrics.items():
+                entry = dict(stats)
+                entry['mean_wait'] = stats['total_wait'] / stats['requests'] if stats['requests'] else 0.0
+                result[name] = entry
+            return result
+
+    def reset_metrics(self) -> None:
+        """Clear the wait-time counters."""
+        with self._lock:
+            self._metrics = {name: self._empty_metrics() for name in self._metrics}
+
+
+def interval_limiter(min_interval: float) -> Optional[RateLimiter]:
+    """A single-bucket limiter that spaces request starts by ``min_interval`` seconds."""
+    if min_interval <= 0:
+        return None
+    return RateLimiter({'market_data': (1.0 / min_interval, 1.0)}, account_limit=None)
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Shared limiter for all Capital.com requests in this process."""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -8,6 +8,7 @@ import logging
 import os
 import json
 from src.Exchanges.capital_com_api.exceptions import CapitalAPIException
+from src.Exchanges.capital_com_api.rate_limiter import classify_endpoint, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,10 @@ class RequestHandler:
         """Initialize RequestHandler."""
         self._default_headers = {"Content-Type": "application/json"}
         self._auth_headers = {}
+        # Set by Client; used to log in again when a request gets a 401
+        self.session_manager = None
+        # Shared by every request handler in the process
+        self.rate_limiter = get_rate_limiter()
         
         # Configure retry strategy
         retry_strategy = Retry(
@@ -106,14 +111,37 @@ class RequestHandler:
             if method not in ['get', 'post', 'put', 'delete']:
                 raise ValueError(f"Unsupported HTTP method: {method}")
 
-            response = requests.request(
+            headers = dict(headers or {})
+            endpoint_class = classify_endpoint(method, url)
+            self.rate_limiter.acquire(endpoint_class)
+            response = self.session.request(
                 method=method,
                 url=url,
                 data=data,
-                headers=headers or {},
+                headers=headers,
                 verify=True
             )
 
+            # Tokens are validated lazily: only a rejected request triggers a new login
+            if response.status_code == 401 and "CST" in headers and self.session_manager is not None:
+                if self.session_manager.reauthenticate(headers["CST"]):
+                    headers.update({
+                        "CST": self.session_manager.CST,
+                        "X-SECURITY-TOKEN": self.session_manager.X_TOKEN
+                    })
+                    self._auth_headers.update({
+                        "CST": self.session_manager.CST,
+                        "X-SECURITY-TOKEN": self.session_manager.X_TOKEN
+                    })
+                    self.rate_limiter.acquire(endpoint_class)
+                    response = self.session.request(
+                        method=method,
+                        url=url,
+                        data=data,
+                        headers=headers,
+                        verify=True
+                    )
+
             # Handle 204 No Content for DELETE requests
             if response.status_code == 204:
                 # Convert CaseInsensitiveDict to regular dict
@@ -151,14 +179,24 @@ class RequestHandler:
         """Close the session explicitly."""
         self.session.close()
 
-    def setup_retry(self, session: requests.Session, retries: int = 3, backoff_factor: float = 0.3) -> None:
-        """Setup retry strategy for requests."""
+    @staticmethod
+    def setup_retry(session: requests.Session, retries: int = 3, backoff_factor: float = 0.3,
+                    pool_connections: int = 10, pool_maxsize: int = 10) -> None:
+        """
+        Mount the retry policy shared by every keep-alive session.
+
+        Idempotent requests are retried on 5xx responses. POSTs (logins and
+        orders) are never retried here, since a retried order could open a
+        second position, and 429 responses reach the caller's own rate-limit
+        handling instead of ending as a RetryError.
+        """
         retry_strategy = Retry(
             total=retries,
             backoff_factor=backoff_factor,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"]
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS"]
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize)
         session.mount("https://", adapter)
         session.mount("http://", adapter)
\ No newline at end of file
@@ -1,9 +1,9 @@
 # session_manager.py
 import requests
+import threading
 import time
 import os
 import json
-import http.client
 from typing import Dict, Any, Tuple, Optional, List, Union
 from requests.structures import CaseInsensitiveDict
 from requests.adapters import HTTPAdapter
@@ -21,11 +21,15 @@ except ImportError:
 
 from src.Exchanges.capital_com_api.exceptions import CapitalAPIException
 from src.Exchanges.capital_com_api.account_config import AccountConfig
+from src.Exchanges.capital_com_api.request_handler import RequestHandler
+from src.Exchanges.capital_com_api.rate_limiter import classify_endpoint, get_rate_limiter
 from src.Credentials.credentials_manager import CredentialManager
 
 class SessionManager:
     MAX_SESSIONS = 10
     active_sessions = 0
+    # Tokens are treated as expired this many seconds after they were issued
+    TOKEN_LIFETIME = 900
 
     def __init__(self, server: str, api_key: Optional[str] = None, 
                  username: Optional[str] = None, password: Optional[str] = None,
@@ -49,16 +53,24 @@ class SessionManager:
         self.CST = auth_tokens.get('CST', '') if auth_tokens else ''
         self.X_TOKEN = auth_tokens.get('X-SECURITY-TOKEN', '') if auth_tokens else ''
         self.is_authenticated = bool(self.CST and self.X_TOKEN)
-        self.last_request_time = 0
-        self.min_request_interval = 0.5  # Seconds between requests
+        # Shared by every session manager in the process
+        self.rate_limiter = get_rate_limiter()
         self.last_auth_time = time.time()  # Initialize last auth time
+        # Cached token lifecycle; checked locally instead of asking the server
+        self.token_expires_at = self.last_auth_time + self.TOKEN_LIFETIME if self.is_authenticated else 0.0
+        self.unauthorized_count = 0
         
         # Track authentication attempts
         self.auth_attempts = 0
         self.last_auth_attempt = 0
         
-        # Set up session with retry
+        # Counted in active_sessions while authenticated
+        self._holds_session_slot = False
+        self._reauth_lock = threading.Lock()
+        
+        # Keep-alive session for all API calls (may be shared, see client_pool)
         self.session = requests.Session()
+        RequestHandler.setup_retry(self.session)
         self.headers = {"Content-Type": "application/json", "X-CAP-API-KEY": self.api_key}
         if self.CST and self.X_TOKEN:
             self.headers.update({"CST": self.CST, "X-SECURITY-TOKEN": self.X_TOKEN})
@@ -71,12 +83,9 @@ class SessionManager:
                 "X-SECURITY-TOKEN": self.X_TOKEN
             })
 
-    def _wait_for_rate_limit(self):
-        """Implement smarter rate limiting."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed + 0.1)  # Small buffer
-        self.last_request_time = time.time()
+    def _wait_for_rate_limit(self, endpoint_class: str = 'market_data') -> float:
+        """Wait for the process-wide rate limiter; returns the seconds waited."""
+        return self.rate_limiter.acquire(endpoint_class)
 
     def _get_headers(self) -> Dict[str, str]:
         """Get headers with authentication tokens if available."""
@@ -91,17 +100,22 @@ class SessionManager:
             })
         return headers
 
-    def create_session(self, attempt: int = 1, max_attempts: int = 3) -> Dict[str, Any]:
+    def create_session(self, attempt: int = 1, max_attempts: int = 3, force: bool = False) -> Dict[str, Any]:
         """
         Create a new session or refresh existing session.
         
+        Args:
+            force: Log in again even if the current tokens are still valid
+        
         Returns:
             Dict containing status and error information if applicable
         """
-        if SessionManager.active_sessions >= SessionManager.MAX_SESSIONS:
-            return {"success": False, "error_code": "SESSION_LIMIT", "error_message": "Maximum session limit reached.", "attempt": attempt}
-        
-        SessionManager.active_sessions += 1
+        # Each manager holds at most one slot, however often it re-authenticates
+        if not self._holds_session_slot:
+            if SessionManager.active_sessions >= SessionManager.MAX_SESSIONS:
+                return {"success": False, "error_code": "SESSION_LIMIT", "error_message": "Maximum session limit reached.", "attempt": attempt}
+            SessionManager.active_sessions += 1
+            self._holds_session_slot = True
         try:
             # Return detailed status information for better error handling
             result = {
@@ -112,7 +126,7 @@ class SessionManager:
             }
             
             # Skip if already authenticated (first attempt)
-            if self.is_authenticated and attempt == 1:
+            if self.is_authenticated and attempt == 1 and not force:
                 if self._is_token_valid():
                     result["success"] = True
                     return result
@@ -133,7 +147,8 @@ class SessionManager:
             }
             
             try:
-                response = requests.post(
+                self._wait_for_rate_limit('session')
+                response = self.session.post(
                     f"{self.server}/api/v1/session",
                     headers=headers,
                     json=data,
@@ -145,6 +160,7 @@ class SessionManager:
                     self.X_TOKEN = response.headers.get('X-SECURITY-TOKEN')
                     self.is_authenticated = True
                     self.last_auth_time = time.time()
+                    self.token_expires_at = self.last_auth_time + self.TOKEN_LIFETIME
                     result["success"] = True
                     return result
                 
@@ -163,7 +179,7 @@ class SessionManager:
                     result["error_code"] = "RATE_LIMITED"
                     wait_time = min(2 ** attempt, 30)  # Exponential backoff, max 30 seconds
                     time.sleep(wait_time)
-                    return self.create_session(attempt + 1, max_attempts)
+                    return self.create_session(attempt + 1, max_attempts, force)
                     
                 # Session expired specific handling
                 if response.status_code == 401:
@@ -172,7 +188,7 @@ class SessionManager:
                     self.X_TOKEN = None
                     self.is_authenticated = False
                     if attempt < max_attempts:
-                        return self.create_session(attempt + 1, max_attempts)
+                        return self.create_session(attempt + 1, max_attempts, force)
                 
                 return result
                 
@@ -192,46 +208,58 @@ class SessionManager:
             if attempt < max_attempts:
                 wait_time = 2 ** attempt
                 time.sleep(wait_time)
-                return self.create_session(attempt + 1, max_attempts)
+                return self.create_session(attempt + 1, max_attempts, force)
             
             return result
         finally:
             if not self.is_authenticated:
-                SessionManager.active_sessions -= 1
+                self._release_session_slot()
+
+    def refresh_session(self) -> Dict[str, Any]:
+        """
+        Log in again to renew CST/X-SECURITY-TOKEN before they expire.
+
+        The current tokens stay in place until the new ones arrive, so
+        requests sent during the refresh still authenticate.
+        """
+        return self.create_session(force=True)
+
+    def _release_session_slot(self) -> None:
+        if self._holds_session_slot:
+            SessionManager.active_sessions -= 1
+            self._holds_session_slot = False
 
     def _is_token_valid(self) -> bool:
-        """Check if the current authentication token is still valid."""
+        """
+        Check the cached token lifecycle; no request is sent.
+
+        Tokens are valid until ``TOKEN_LIFETIME`` after issue or until a
+        request is rejected with 401 (see ``invalidate_token``).
+        """
         if not self.CST or not self.X_TOKEN:
             return False
-            
-        # Token age check - refresh if older than 15 minutes
-        if time.time() - self.last_auth_time > 900:  # 15 minutes in seconds
-            return False
-            
-        # Verify token with a lightweight API call
-        try:
-            conn = http.client.HTTPSConnection(self.server.replace('https://', ''))
-            headers = {
-                "X-CAP-API-KEY": self.api_key,
-                "CST": self.CST,
-                "X-SECURITY-TOKEN": self.X_TOKEN
-            }
-            conn.request("GET", "/api/v1/session", headers=headers)
-            res = conn.getresponse()
-            
-            # Read and discard the response data
-            res.read()
-            
-            # Check if we got a successful response
-            if res.status == 200:
+        return time.time() < self.token_expires_at
+
+    def invalidate_token(self) -> None:
+        """Mark the current tokens as rejected, so the next create_session logs in again."""
+        self.unauthorized_count += 1
+        self.token_expires_at = 0.0
+
+    def reauthenticate(self, rejected_cst: Optional[str] = None) -> bool:
+        """
+        Log in again after a 401 and return whether it worked.
+
+        Args:
+            rejected_cst: CST sent with the rejected request (default: the
+                current one); callers rejected with the same tokens share one
+                login
+        """
+        rejected = self.CST if rejected_cst is None else rejected_cst
+        with self._reauth_lock:
+            if self.CST != rejected and self._is_token_valid():
                 return True
-                
-            # If we got a 401 or other error, token is invalid
-            return False
-        except Exception as e:
-            return False
-        finally:
-            conn.close()
+            self.invalidate_token()
+            return bool(self.create_session().get("success"))
 
     def _handle_session_response(self, response: requests.Response) -> None:
         """Handle the session response and update tokens."""
@@ -261,13 +289,25 @@ class SessionManager:
                 "X-SECURITY-TOKEN": self.X_TOKEN
             })
         try:
-            self._wait_for_rate_limit()
-            response = requests.request(
+            endpoint_class = classify_endpoint(method, endpoint)
+            self._wait_for_rate_limit(endpoint_class)
+            response = self.session.request(
                 method=method,
                 url=f"{self.server}{endpoint}",
                 headers=headers,
                 json=data
             )
+            # Tokens are only re-checked once the server rejects them
+            logout = method.upper() == "DELETE" and endpoint == "/api/v1/session"
+            if response.status_code == 401 and not logout and self.reauthenticate(headers.get("CST")):
+                headers.update({"CST": self.CST, "X-SECURITY-TOKEN": self.X_TOKEN})
+                self._wait_for_rate_limit(endpoint_class)
+                response = self.session.request(
+                    method=method,
+                    url=f"{self.server}{endpoint}",
+                    headers=headers,
+                    json=data
+                )
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -335,5 +375,6 @@ class SessionManager:
                 self.CST = None
                 self.X_TOKEN = None
                 self.is_authenticated = False
+                self._release_session_slot()
         except Exception as e:
             raise
\ No newline at end of file
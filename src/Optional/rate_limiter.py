@@ -2,11 +2,31 @@
 """
 Rate limiting utilities for Jamso AI Server.
 This module provides rate limiting functionality for API endpoints.
+
+Limits are sliding-window counters: each (route, client IP) key keeps the
+request count of the current and the previous fixed window, and the rate is
+estimated as the current count plus the previous count weighted by how much
+of the previous window still overlaps the sliding one. An update is O(1) and
+a key needs three integers, whatever the limit.
+
+Counters live in a pluggable backend:
+- ``MemoryBackend``: in-process, sharded locks, LRU eviction of idle clients
+- ``SQLiteBackend``: a SQLite file shared by every worker process on the host,
+  so a gunicorn deployment enforces one limit instead of one per worker
+
+``RATE_LIMIT_BACKEND`` (``memory`` or ``sqlite``) and ``RATE_LIMIT_DB`` select
+the backend of the process-wide limiter. Allowed and limited requests are
+counted per route; ``get_limiter().metrics()`` reports them.
 """
 
+import os
+import sqlite3
+import tempfile
+import threading
 import time
 import logging
-from typing import Dict, Any, Callable, Optional, TypeVar, cast
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple, TypeVar, cast
 from functools import wraps
 from flask import request, jsonify, Response
 
@@ -15,8 +35,284 @@ logger = logging.getLogger(__name__)
 # Create type variables for function typing
 F = TypeVar('F', bound=Callable[..., Any])
 
-# In-memory rate limit store (IP -> last request timestamp)
-_rate_limit_store: Dict[str, Dict[str, Any]] = {}
+DEFAULT_MAX_CLIENTS = 10000
+
+
+def _slide(window_index: int, current: int, previous: int, now: float,
+           window: float) -> Tuple[int, int, int, float]:
+    """
+    Move a counter to the window containing ``now``.
+
+    Returns:
+        Tuple of (window index, current count, previous count, estimated
+        requests in the sliding window ending at ``now``)
+    """
+    index = int(now // window)
+    if index != window_index:
+        previous = current if index == window_index + 1 else 0
+        current = 0
+    overlap = 1.0 - (now - index * window) / window
+    return index, current, previous, current + previous * overlap
+
+
+class MemoryBackend:
+    """
+    In-process sliding-window counters.
+
+    Keys are spread over independently locked shards, so concurrent requests
+    for different clients rarely contend; each shard evicts its least
+    recently used keys once the backend holds ``max_clients`` keys.
+
+    Attributes:
+        max_clients: Most keys kept across all shards
+        evictions: Keys dropped to stay within ``max_clients``
+    """
+
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS, shards: int = 16):
+        self.max_clients = max(1, int(max_clients))
+        self.evictions = 0
+        self._shard_size = max(1, self.max_clients // shards)
+        self._shards: List[Tuple[threading.Lock, 'OrderedDict[str, List[float]]']] = [
+            (threading.Lock(), OrderedDict()) for _ in range(shards)
+        ]
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, float]:
+        """
+        Count a request for ``key`` unless it would exceed ``limit``.
+
+        Returns:
+            Tuple of (allowed, estimated requests in the window before this one)
+        """
+        lock, entries = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = [int(now // window), 0, 0]
+                if len(entries) > self._shard_size:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                entries.move_to_end(key)
+            entry[0], entry[1], entry[2], count = _slide(entry[0], entry[1], entry[2], now, window)
+            if count + 1 > limit:
+                return False, count
+            entry[1] += 1
+            return True, count
+
+    def __len__(self) -> int:
+        return sum(len(entries) for _, entries in self._shards)
+
+
+RATE_LIMITS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key TEXT PRIMARY KEY,
+        window_index INTEGER NOT NULL,
+        current INTEGER NOT NULL,
+        previous INTEGER NOT NULL,
+        touched REAL NOT NULL
+    )
+'''
+
+
+class SQLiteBackend:
+    """
+    Sliding-window counters in a SQLite file shared by all workers on a host.
+
+    Each hit is one short ``BEGIN IMMEDIATE`` transaction on the key's row.
+    The file only holds rate state, so it runs with ``synchronous=OFF``.
+    Every ``purge_every`` hits, keys idle for ``idle_timeout`` seconds are
+    dropped, then the least recently used ones beyond ``max_clients``.
+
+    Attributes:
+        db_path: SQLite database file
+        max_clients: Most keys kept
+        idle_timeout: Seconds after which an untouched key is dropped
+        evictions: Keys dropped by this process's purges
+    """
+
+    def __init__(self, db_path: str, max_clients: int = DEFAULT_MAX_CLIENTS,
+                 idle_timeout: float = 3600.0, purge_every: int = 1000):
+        self.db_path = db_path
+        self.max_clients = max(1, int(max_clients))
+        self.idle_timeout = idle_timeout
+        self.purge_every = max(1, int(purge_every))
+        self.evictions = 0
+        self._hits = 0
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+        db = self._connect()
+        db.execute(RATE_LIMITS_TABLE_SQL)
+        db.execute('CREATE INDEX IF NOT EXISTS idx_rate_limits_touched ON rate_limits (touched)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork (gunicorn --preload)
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=OFF')
+            self._local.db = db
+        return db
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, float]:
+        """
+        Count a request for ``key`` unless it would exceed ``limit``.
+
+        Returns:
+            Tuple of (allowed, estimated requests in the window before this one)
+        """
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT window_index, current, previous FROM rate_limits WHERE key = ?',
+                             (key,)).fetchone()
+            index, current, previous, count = _slide(*(row or (int(now // window), 0, 0)), now, window)
+            allowed = count + 1 <= limit
+            if allowed:
+                current += 1
+            db.execute(
+                'INSERT INTO rate_limits (key, window_index, current, previous, touched) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET window_index = excluded.window_index, current = excluded.current, '
+                'previous = excluded.previous, touched = excluded.touched',
+                (key, index, current, previous, now)
+            )
+            db.execute('COMMIT')
+        except Exception:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+
+        self._hits += 1
+        if self._hits % self.purge_every == 0:
+            self.purge(now)
+        return allowed, count
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Drop idle keys, then the least recently used beyond ``max_clients``; returns the number removed."""
+        now = time.time() if now is None else now
+        db = self._connect()
+        removed = db.execute('DELETE FROM rate_limits WHERE touched < ?', (now - self.idle_timeout,)).rowcount
+        removed += db.execute(
+            'DELETE FROM rate_limits WHERE key IN '
+            '(SELECT key FROM rate_limits ORDER BY touched DESC LIMIT -1 OFFSET ?)',
+            (self.max_clients,)
+        ).rowcount
+        self.evictions += removed
+        return removed
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window rate limiter over a counter backend, with decision metrics.
+
+    Metrics are kept per process; the backend decides for all processes
+    sharing it. A backend error allows the request (fails open), so a locked
+    or unavailable store cannot take the endpoints down.
+    """
+
+    def __init__(self, backend: Any = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            backend: Object with ``hit(key, limit, window, now)`` returning
+                (allowed, count); default a new MemoryBackend
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+    def hit(self, scope: str, client: str, limit: int, window: float) -> Tuple[bool, float]:
+        """
+        Record a request by ``client`` to ``scope`` and decide whether to allow it.
+
+        Returns:
+            Tuple of (allowed, estimated requests in the window before this one)
+        """
+        try:
+            allowed, count = self.backend.hit(f"{scope}:{client}", limit, window, time.time())
+            outcome = 'allowed' if allowed else 'limited'
+        except Exception as e:
+            logger.error(f"Rate limit backend error, allowing request: {str(e)}")
+            allowed, count, outcome = True, 0.0, 'errors'
+        with self._lock:
+            stats = self._metrics.get(scope)
+            if stats is None:
+                stats = self._metrics[scope] = {'allowed': 0, 'limited': 0, 'errors': 0}
+            stats[outcome] += 1
+        return allowed, count
+
+    def metrics(self) -> Dict[str, Any]:
+        """Allowed, limited and failed decisions per route, plus the backend's key count and evictions."""
+        with self._lock:
+            scopes = {scope: dict(stats) for scope, stats in self._metrics.items()}
+        try:
+            clients = len(self.backend)
+        except Exception:
+            clients = None
+        return {
+            'backend': type(self.backend).__name__,
+            'clients': clients,
+            'evictions': getattr(self.backend, 'evictions', 0),
+            'scopes': scopes
+        }
+
+    def reset_metrics(self) -> None:
+        """Clear the decision counters."""
+        with self._lock:
+            self._metrics = {}
+
+
+def create_backend(kind: Optional[str] = None, db_path: Optional[str] = None,
+                   max_clients: Optional[int] = None) -> Any:
+    """
+    Build a counter backend, by default from the environment.
+
+    Args:
+        kind: ``memory`` or ``sqlite`` (default ``RATE_LIMIT_BACKEND``, else memory)
+        db_path: SQLite file for the sqlite backend (default ``RATE_LIMIT_DB``,
+            else a file in the system temp directory)
+        max_clients: Most tracked keys (default ``RATE_LIMIT_MAX_CLIENTS``)
+    """
+    kind = (kind or os.getenv('RATE_LIMIT_BACKEND', 'memory')).lower()
+    if max_clients is None:
+        max_clients = int(os.getenv('RATE_LIMIT_MAX_CLIENTS', str(DEFAULT_MAX_CLIENTS)))
+    if kind == 'sqlite':
+        db_path = db_path or os.getenv('RATE_LIMIT_DB') or \
+            os.path.join(tempfile.gettempdir(), 'jamso_rate_limits.db')
+        return SQLiteBackend(db_path, max_clients=max_clients)
+    if kind != 'memory':
+        raise ValueError(f"Unknown rate limit backend: {kind}")
+    return MemoryBackend(max_clients=max_clients)
+
+
+_limiter: Optional[SlidingWindowLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> SlidingWindowLimiter:
+    """Process-wide limiter used by ``rate_limit``, built from the environment on first use."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = SlidingWindowLimiter(create_backend())
+    return _limiter
+
+
+def set_limiter(limiter: Optional[SlidingWindowLimiter]) -> None:
+    """Replace the process-wide limiter; None rebuilds it from the environment on next use."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
+
 
 def _get_client_ip() -> str:
     """
@@ -26,57 +322,39 @@ def _get_client_ip() -> str:
         return request.headers.get('X-Forwarded-For', '').split(',')[0].strip()
     return request.remote_addr or "unknown"
 
-def rate_limit(limit: int = 60, window: int = 60) -> Callable[[F], F]:
+def rate_limit(limit: int = 60, window: int = 60, scope: Optional[str] = None) -> Callable[[F], F]:
     """
     Rate limiting decorator for Flask routes.
-    
+
     Args:
         limit: Maximum number of requests allowed in the time window
         window: Time window in seconds (default is 60 seconds/1 minute)
-        
+        scope: Name the limit is kept under (default the view function's name)
+
     Returns:
         Decorated function with rate limiting
     """
-    min_interval = float(window) / float(limit)
-    
     def decorator(func: F) -> F:
+        name = scope or func.__name__
+
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             client_ip = _get_client_ip()
-            
-            # Initialize client in store if not exists
-            if client_ip not in _rate_limit_store:
-                _rate_limit_store[client_ip] = {
-                    'last_request_time': 0,
-                    'count': 0
-                }
-            
-            # Check timing
-            client_data = _rate_limit_store[client_ip]
-            current_time = time.time()
-            time_passed = current_time - client_data['last_request_time']
-            
-            # If within the time window, increment counter
-            if time_passed < window:
-                client_data['count'] += 1
-            else:
-                # Reset counter for a new time window
-                client_data['count'] = 1
-            
-            # Store last request time
-            client_data['last_request_time'] = current_time
-            
+            allowed, count = get_limiter().hit(name, client_ip, limit, window)
+
             # Check if we're over the limit
-            if client_data['count'] > limit:
-                logger.warning(f"Rate limit exceeded for {client_ip}: {client_data['count']} requests/{window}s")
-                return jsonify({
+            if not allowed:
+                logger.warning(f"Rate limit exceeded for {client_ip} on {name}: {count:.1f} requests/{window}s")
+                response = jsonify({
                     'error': 'Rate limit exceeded',
                     'message': f'Maximum {limit} requests per {window} seconds allowed'
-                }), 429
-            
+                })
+                response.headers['Retry-After'] = str(max(1, int(window - time.time() % window)))
+                return response, 429
+
             # Allow the request and call the original function
             return func(*args, **kwargs)
-        
+
         return cast(F, wrapper)
-    
+
     return decorator
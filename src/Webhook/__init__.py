@@ -3,8 +3,10 @@ import os
 
 from .utils import (
     get_client,
+    warm_client_pool,
     get_position_details,
     execute_trade,
+    dispatch_trade,
     save_signal,
     save_trade_result
 )
@@ -21,8 +23,10 @@ BASE_PATH = '/home/jamso-ai-server/Jamso-Ai-Engine'
 
 __all__ = [
     'get_client',
+    'warm_client_pool',
     'get_position_details',
     'execute_trade',
+    'dispatch_trade',
     'save_signal',
     'save_trade_result',
     'get_db',
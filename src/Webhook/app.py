@@ -19,7 +19,9 @@ import fcntl
 from src.Logging.logger import get_logger, timing_decorator, configure_root_logger
 from src.Webhook.database import init_db
 from src.Webhook.routes import init_routes
+from src.Webhook.utils import warm_client_pool
 from src.Webhook.config import Config
+from src.Optional.rate_limiter import get_limiter
 # Import dashboard blueprint
 from Dashboard.controllers.dashboard_controller import dashboard_bp
 from Dashboard.auth.auth_controller import auth_bp
@@ -112,6 +114,10 @@ def create_app(test_config=None):
     # Register blueprints and routes
     init_routes(app)
     
+    # Authenticate the trading client before the first signal arrives
+    if test_config is None:
+        warm_client_pool()
+    
     # Properly setup dashboard and its static files
     # This handles blueprints registration, so we don't need to register them again
     if setup_dashboard(app):
@@ -219,6 +225,11 @@ def create_app(test_config=None):
     def health_check():
         return jsonify({"status": "healthy"}), 200
 
+    # Rate limit decisions of this worker, and the shared backend's key count
+    @app.route('/health/rate_limits', methods=['GET'])
+    def rate_limit_metrics():
+        return jsonify(get_limiter().metrics()), 200
+
     # --- /logs route for quick troubleshooting (admin only) ---
     @app.route('/logs')
     def view_logs():
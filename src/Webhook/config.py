@@ -17,4 +17,7 @@ class Config:
     TESTING = False
     JSON_SORT_KEYS = False
     JSONIFY_PRETTYPRINT_REGULAR = True
-    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
\ No newline at end of file
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Acknowledge /webhook signals with 202 and execute them from a durable queue
+    WEBHOOK_ASYNC_INGESTION = os.environ.get('WEBHOOK_ASYNC_INGESTION', 'false').lower() in ('1', 'true', 'yes')
+    SIGNAL_QUEUE_WORKERS = int(os.environ.get('SIGNAL_QUEUE_WORKERS', '4'))
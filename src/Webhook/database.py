@@ -1,12 +1,56 @@
 import sqlite3
 import logging
+import threading
 from flask import g
 
+from src.Webhook.signal_writer import SignalWriter
+
 logger = logging.getLogger(__name__)
 DATABASE = '/home/jamso-ai-server/Jamso-Ai-Engine/src/Database/Webhook/trading_signals.db'
 
+# Longest a read waits for pending write-behind writes
+SYNC_TIMEOUT = 5.0
+
+SIGNALS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS signals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        order_id TEXT,
+        deal_id TEXT,
+        symbol TEXT,
+        direction TEXT,
+        quantity REAL,
+        price REAL,
+        signal_data TEXT,
+        status TEXT DEFAULT 'pending',
+        error TEXT,
+        position_status TEXT DEFAULT 'open',
+        trade_action TEXT,
+        trade_direction TEXT,
+        position_size REAL,
+        hedging_enabled BOOLEAN DEFAULT 0
+    )
+'''
+
+_signal_writers = {}
+_signal_writers_lock = threading.Lock()
+
+def get_signal_writer(db_path=None):
+    """Returns the process-wide write-behind writer for a database (default: DATABASE)."""
+    db_path = db_path or DATABASE
+    with _signal_writers_lock:
+        writer = _signal_writers.get(db_path)
+        if writer is None:
+            writer = _signal_writers[db_path] = SignalWriter(db_path)
+        return writer
+
 def get_db():
-    """Connects to the SQLite database."""
+    """Connects to the SQLite database, after pending write-behind writes are committed."""
+    writer = _signal_writers.get(DATABASE)
+    if writer is not None:
+        # Read-your-writes for everything that reads through get_db
+        if not writer.sync(timeout=SYNC_TIMEOUT):
+            logger.warning(f"Pending signal writes not committed after {SYNC_TIMEOUT}s, reading without them")
     db = getattr(g, '_database', None)
     if db is None:
         db = g._database = sqlite3.connect(DATABASE)
@@ -23,26 +67,7 @@ def init_db(app):
     """Initializes the database with webhook tables."""
     with app.app_context():
         db = get_db()
-        db.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                order_id TEXT,
-                deal_id TEXT,
-                symbol TEXT,
-                direction TEXT,
-                quantity REAL,
-                price REAL,
-                signal_data TEXT,
-                status TEXT DEFAULT 'pending',
-                error TEXT,
-                position_status TEXT DEFAULT 'open',
-                trade_action TEXT,
-                trade_direction TEXT,
-                position_size REAL,
-                hedging_enabled BOOLEAN DEFAULT 0
-            )
-        ''')
+        db.execute(SIGNALS_TABLE_SQL)
         db.commit()
     app.teardown_appcontext(close_connection)
 
@@ -0,0 +1,171 @@
+"""
+Per-symbol sharded trade execution.
+
+Signals for different instruments are independent, but signals for the same
+instrument must reach the broker in the order they arrived. The
+ExecutionDispatcher hashes each signal's symbol onto one of N lanes; every
+lane is a worker thread with a bounded backlog:
+- Within a symbol, execution is strictly first-in first-out
+- Different symbols (on different lanes) execute in parallel, so a burst of
+  signals at bar close takes roughly (signals / lanes) executions, not one
+  execution per signal
+- A full lane pushes back: ``submit`` waits up to ``submit_timeout`` seconds
+  for room and then raises BacklogFullError instead of queueing unbounded work
+
+``metrics`` reports per-lane depth, high-water mark, rejections and queue-wait
+and execution times.
+"""
+
+import logging
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BacklogFullError(Exception):
+    """Raised when a lane's backlog stays full for the whole submit timeout."""
+
+    def __init__(self, symbol: str, lane: int):
+        self.symbol = symbol
+        self.lane = lane
+        super().__init__(f"Execution backlog full for {symbol} (lane {lane})")
+
+
+class _Lane:
+    """One worker thread and its bounded backlog."""
+
+    def __init__(self, index: int, max_backlog: int):
+        self.index = index
+        self.backlog: queue.Queue = queue.Queue(maxsize=max_backlog)
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.stats = self.empty_stats()
+
+    @staticmethod
+    def empty_stats() -> Dict[str, float]:
+        return {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'max_depth': 0,
+                'total_wait': 0.0, 'max_wait': 0.0, 'total_run': 0.0}
+
+
+class ExecutionDispatcher:
+    """
+    Runs ``execute`` calls on per-symbol lanes.
+
+    Attributes:
+        lanes: Number of worker lanes
+        max_backlog: Pending calls each lane accepts before pushing back
+        submit_timeout: Seconds ``submit`` waits for room in a full lane
+    """
+
+    def __init__(self, execute: Callable[..., Any], lanes: int = 8, max_backlog: int = 64,
+                 submit_timeout: float = 5.0):
+        """
+        Initialize the dispatcher; lane threads start on first use.
+
+        Args:
+            execute: Called on a lane thread with the arguments given to submit
+            lanes: Number of worker lanes
+            max_backlog: Pending calls each lane accepts
+            submit_timeout: Seconds submit waits for room in a full lane
+        """
+        self.execute = execute
+        self.lanes = max(1, int(lanes))
+        self.max_backlog = max(1, int(max_backlog))
+        self.submit_timeout = submit_timeout
+        self._lanes = [_Lane(i, self.max_backlog) for i in range(self.lanes)]
+        self._start_lock = threading.Lock()
+
+    def lane_for(self, symbol: str) -> int:
+        """Lane index of a symbol; stable across processes."""
+        return zlib.crc32(str(symbol).upper().encode('utf-8')) % self.lanes
+
+    def submit(self, symbol: str, *args: Any, **kwargs: Any) -> Future:
+        """
+        Queue ``execute(*args, **kwargs)`` on the symbol's lane.
+
+        Returns:
+            Future resolving to the result of ``execute``
+
+        Raises:
+            BacklogFullError: If the lane stayed full for ``submit_timeout``
+        """
+        lane = self._lanes[self.lane_for(symbol)]
+        self._ensure_started(lane)
+        future: Future = Future()
+        try:
+            lane.backlog.put((future, time.monotonic(), args, kwargs), timeout=self.submit_timeout)
+        except queue.Full:
+            with lane.lock:
+                lane.stats['rejected'] += 1
+            logger.warning(f"Execution lane {lane.index} backlog full, rejecting signal for {symbol}")
+            raise BacklogFullError(symbol, lane.index)
+        with lane.lock:
+            lane.stats['submitted'] += 1
+            lane.stats['max_depth'] = max(lane.stats['max_depth'], lane.backlog.qsize())
+        return future
+
+    def _ensure_started(self, lane: _Lane) -> None:
+        if lane.thread is not None and lane.thread.is_alive():
+            return
+        with self._start_lock:
+            if lane.thread is None or not lane.thread.is_alive():
+                lane.thread = threading.Thread(target=self._run, args=(lane,),
+                                               name=f'execution-lane-{lane.index}', daemon=True)
+                lane.thread.start()
+
+    def _run(self, lane: _Lane) -> None:
+        while True:
+            item = lane.backlog.get()
+            if item is None:
+                return
+            future, submitted_at, args, kwargs = item
+            started = time.monotonic()
+            wait = started - submitted_at
+            failed = False
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.execute(*args, **kwargs))
+                except Exception as e:
+                    failed = True
+                    future.set_exception(e)
+            with lane.lock:
+                lane.stats['completed'] += 1
+                lane.stats['failed'] += int(failed)
+                lane.stats['total_wait'] += wait
+                lane.stats['max_wait'] = max(lane.stats['max_wait'], wait)
+                lane.stats['total_run'] += time.monotonic() - started
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Finish queued calls and stop the lane threads."""
+        for lane in self._lanes:
+            if lane.thread is not None and lane.thread.is_alive():
+                lane.backlog.put(None)
+        for lane in self._lanes:
+            if lane.thread is not None:
+                lane.thread.join(timeout=timeout)
+                lane.thread = None
+
+    def metrics(self) -> List[Dict[str, float]]:
+        """Per-lane depth, counters and mean/max queue wait and mean run time (seconds)."""
+        result = []
+        for lane in self._lanes:
+            with lane.lock:
+                entry = dict(lane.stats)
+            completed = entry['completed']
+            entry['lane'] = lane.index
+            entry['depth'] = lane.backlog.qsize()
+            entry['mean_wait'] = entry['total_wait'] / completed if completed else 0.0
+            entry['mean_run'] = entry['total_run'] / completed if completed else 0.0
+            result.append(entry)
+        return result
+
+    def reset_metrics(self) -> None:
+        """Clear the counters of all lanes."""
+        for lane in self._lanes:
+            with lane.lock:
+                lane.stats = lane.empty_stats()
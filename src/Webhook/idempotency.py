@@ -0,0 +1,289 @@
+"""
+Idempotency for webhook signals, keyed on ``order_id``.
+
+TradingView re-sends alerts it considers undelivered. Without a guard, each
+retry inserts another ``signals`` row and places another order. The
+IdempotencyStore records every ``order_id`` the first time it is seen:
+- The ``idempotency_keys`` table (``order_id`` is its primary key) claims a key
+  atomically, so concurrent retries in any thread or process cannot both
+  execute
+- The response sent for the first request is stored with the key; duplicates
+  get that response back without touching the broker or the ``signals`` table
+- A TTL'd in-memory cache of recent keys answers most duplicates without a
+  database round trip
+
+A key whose request is still executing is reported as in flight. If handling
+fails with an exception the claim is released, so a retry can execute. While
+a handler runs, a heartbeat thread renews its claim every ``lease / 4``
+seconds, so a slow request is never executed twice; only a claim left behind
+by a crashed process stops being renewed and expires after ``lease`` seconds.
+An error response (status 400 and above) is only replayed for
+``failure_ttl`` seconds, after which the next retry takes the key over and
+executes, except ``UNKNOWN_OUTCOME_STATUS`` (the trade may still have reached
+the broker), which is kept like a success.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        order_id TEXT PRIMARY KEY,
+        state TEXT NOT NULL DEFAULT 'in_flight',
+        response TEXT,
+        status_code INTEGER,
+        created_at REAL NOT NULL,
+        completed_at REAL
+    )
+'''
+
+IN_FLIGHT = 'in_flight'
+COMPLETED = 'completed'
+
+# Response status of a request whose trade timed out and may still execute
+UNKNOWN_OUTCOME_STATUS = 504
+
+# Abandoned claims and error responses past their TTL; parameters are
+# (IN_FLIGHT, lease cutoff, COMPLETED, failure cutoff). created_at is the
+# claim time, renewed by the heartbeat while the handler runs
+_EXPIRED_SQL = ('((state = ? AND created_at < ?) OR '
+                f'(state = ? AND status_code >= 400 AND status_code != {UNKNOWN_OUTCOME_STATUS} '
+                'AND completed_at < ?))')
+
+
+class IdempotencyStore:
+    """
+    SQLite-backed idempotency keys with an in-memory cache of recent results.
+
+    Attributes:
+        db_path: SQLite database holding the ``idempotency_keys`` table
+        cache_ttl: Seconds a completed result stays in the memory cache
+        retention: Seconds completed keys are kept in the database
+        lease: Seconds without a heartbeat after which an in-flight claim
+            is considered abandoned
+        failure_ttl: Seconds an error response is replayed
+        stats: Counters for executed requests, duplicates, cache hits,
+            expired keys and heartbeats
+    """
+
+    def __init__(self, db_path: str, cache_ttl: float = 3600.0, cache_size: int = 10000,
+                 retention: float = 7 * 24 * 3600.0, lease: float = 120.0, failure_ttl: float = 60.0):
+        """
+        Initialize the store and create its table.
+
+        Args:
+            db_path: SQLite database file
+            cache_ttl: Seconds a completed result stays in the memory cache
+            cache_size: Maximum number of cached keys
+            retention: Seconds completed keys are kept in the database
+            lease: Seconds without a heartbeat after which an in-flight
+                claim is considered abandoned
+            failure_ttl: Seconds an error response is replayed
+        """
+        self.db_path = db_path
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.retention = retention
+        self.lease = lease
+        self.failure_ttl = failure_ttl
+        self.stats = {'executed': 0, 'duplicates': 0, 'cache_hits': 0, 'expired': 0, 'heartbeats': 0}
+
+        self._cache: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+        self._held: Dict[str, int] = {}
+        self._held_lock = threading.Condition()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+        db = self._connect()
+        db.execute(IDEMPOTENCY_TABLE_SQL)
+        self.purge()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def _cached(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            entry = self._cache.get(order_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._cache[order_id]
+                return None
+            self._cache.move_to_end(order_id)
+            return entry[1]
+
+    def _remember(self, order_id: str, record: Dict[str, Any]) -> None:
+        failed = record['status_code'] >= 400 and record['status_code'] != UNKNOWN_OUTCOME_STATUS
+        ttl = self.failure_ttl if failed else self.cache_ttl
+        with self._cache_lock:
+            self._cache[order_id] = (time.monotonic() + min(ttl, self.cache_ttl), record)
+            self._cache.move_to_end(order_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'state': row['state'],
+            'response': json.loads(row['response']) if row['response'] else None,
+            'status_code': row['status_code'],
+            'created_at': row['created_at']
+        }
+
+    def begin(self, order_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Claim ``order_id`` for execution.
+
+        Returns:
+            (True, None) if the caller must execute the request, otherwise
+            (False, record) with the key's state and stored response
+        """
+        order_id = str(order_id)
+        record = self._cached(order_id)
+        if record is not None:
+            self.stats['cache_hits'] += 1
+            self.stats['duplicates'] += 1
+            return False, record
+
+        db = self._connect()
+        cursor = db.execute(
+            'INSERT OR IGNORE INTO idempotency_keys (order_id, state, created_at) VALUES (?, ?, ?)',
+            (order_id, IN_FLIGHT, time.time())
+        )
+        if cursor.rowcount == 1:
+            self.stats['executed'] += 1
+            return True, None
+
+        # Take over an abandoned claim or an expired error response
+        now = time.time()
+        cursor = db.execute(
+            'UPDATE idempotency_keys SET state = ?, response = NULL, status_code = NULL, '
+            'created_at = ?, completed_at = NULL WHERE order_id = ? AND ' + _EXPIRED_SQL,
+            (IN_FLIGHT, now, order_id, IN_FLIGHT, now - self.lease, COMPLETED, now - self.failure_ttl)
+        )
+        if cursor.rowcount == 1:
+            logger.warning(f"Idempotency key for order {order_id} expired, executing again")
+            self.stats['expired'] += 1
+            self.stats['executed'] += 1
+            return True, None
+
+        row = db.execute('SELECT * FROM idempotency_keys WHERE order_id = ?', (order_id,)).fetchone()
+        if row is None:
+            # Released between the insert and the read; claim again
+            return self.begin(order_id)
+        record = self._record(row)
+        if record['state'] == COMPLETED:
+            self._remember(order_id, record)
+        self.stats['duplicates'] += 1
+        return False, record
+
+    def complete(self, order_id: str, response: Dict[str, Any], status_code: int) -> None:
+        """Store the response sent for ``order_id``."""
+        order_id = str(order_id)
+        self._connect().execute(
+            'UPDATE idempotency_keys SET state = ?, response = ?, status_code = ?, completed_at = ? '
+            'WHERE order_id = ?',
+            (COMPLETED, json.dumps(response, default=str), status_code, time.time(), order_id)
+        )
+        self._remember(order_id, {'state': COMPLETED, 'response': response,
+                                  'status_code': status_code, 'created_at': time.time()})
+
+    def release(self, order_id: str) -> None:
+        """Drop an in-flight claim so the request can be retried."""
+        self._connect().execute('DELETE FROM idempotency_keys WHERE order_id = ? AND state = ?',
+                                (str(order_id), IN_FLIGHT))
+
+    def run_once(self, order_id: str,
+                 handler: Callable[[], Tuple[Dict[str, Any], int]]) -> Tuple[Dict[str, Any], int, bool]:
+        """
+        Run ``handler`` unless ``order_id`` was seen before.
+
+        Args:
+            order_id: Idempotency key
+            handler: Returns (response dict, HTTP status code)
+
+        Returns:
+            Tuple of (response, status code, whether it is a replay)
+        """
+        claimed, record = self.begin(order_id)
+        if not claimed:
+            if record['state'] == COMPLETED:
+                logger.info(f"Duplicate signal for order {order_id}, returning original result")
+                return record['response'], record['status_code'], True
+            logger.info(f"Duplicate signal for order {order_id} while the original is in flight")
+            return {'status': 'processing', 'order_id': order_id}, 202, True
+
+        self._hold(str(order_id))
+        try:
+            response, status_code = handler()
+        except Exception:
+            self.release(order_id)
+            raise
+        finally:
+            self._unhold(str(order_id))
+        self.complete(order_id, response, status_code)
+        return response, status_code, False
+
+    def _hold(self, order_id: str) -> None:
+        """Keep renewing the claim on ``order_id`` until ``_unhold``."""
+        with self._held_lock:
+            self._held[order_id] = self._held.get(order_id, 0) + 1
+            if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+                self._heartbeat_thread = threading.Thread(target=self._heartbeat, name='idempotency-heartbeat',
+                                                          daemon=True)
+                self._heartbeat_thread.start()
+
+    def _unhold(self, order_id: str) -> None:
+        with self._held_lock:
+            count = self._held.pop(order_id, 1) - 1
+            if count > 0:
+                self._held[order_id] = count
+
+    def _heartbeat(self) -> None:
+        """Renew the claims of running handlers; exits when none are left."""
+        while True:
+            with self._held_lock:
+                self._held_lock.wait(self.lease / 4)
+                held = list(self._held)
+                if not held:
+                    self._heartbeat_thread = None
+                    return
+            try:
+                self.renew(held)
+            except sqlite3.Error as e:
+                logger.error(f"Error renewing idempotency claims: {str(e)}")
+
+    def renew(self, order_ids: List[str]) -> int:
+        """Restart the lease of in-flight claims; returns the number renewed."""
+        placeholders = ', '.join('?' for _ in order_ids)
+        cursor = self._connect().execute(
+            f'UPDATE idempotency_keys SET created_at = ? WHERE state = ? AND order_id IN ({placeholders})',
+            [time.time(), IN_FLIGHT, *order_ids]
+        )
+        self.stats['heartbeats'] += 1
+        return cursor.rowcount
+
+    def purge(self) -> int:
+        """
+        Delete completed keys older than ``retention``, abandoned claims and
+        expired error responses; returns the number removed.
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            'DELETE FROM idempotency_keys WHERE (state = ? AND completed_at < ?) OR ' + _EXPIRED_SQL,
+            (COMPLETED, now - self.retention, IN_FLIGHT, now - self.lease, COMPLETED, now - self.failure_ttl)
+        )
+        return cursor.rowcount
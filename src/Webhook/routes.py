@@ -14,7 +14,7 @@ import subprocess
 from src.Webhook import (
     get_client,
     get_position_details,
-    execute_trade,
+    dispatch_trade,
     save_signal,
     save_trade_result,
     get_db,
@@ -27,6 +27,11 @@ from src.Webhook.utils import create_error_response, handle_request_error, jsoni
 # Import rate limiting utility
 from src.Optional.rate_limiter import rate_limit
 
+from src.Webhook.database import DATABASE, get_signal_writer
+from src.Webhook.signal_queue import SignalQueue
+from src.Webhook.idempotency import IdempotencyStore, UNKNOWN_OUTCOME_STATUS
+from src.Webhook.validators import parse_webhook_signal
+
 logger = logging.getLogger('webhook')
 
 def init_server_control_watcher(app: Flask):
@@ -102,6 +107,35 @@ def init_routes(app: Flask):
     
     # Initialize file watcher for server control
     init_server_control_watcher(app)
+
+    # In async ingestion mode /webhook only queues signals; workers execute them
+    if app.config.get('WEBHOOK_ASYNC_INGESTION', False):
+        signal_queue = SignalQueue(
+            app.config.get('DATABASE', DATABASE),
+            workers=app.config.get('SIGNAL_QUEUE_WORKERS', 4)
+        )
+        signal_queue.start()
+        app.extensions['signal_queue'] = signal_queue
+
+    # Signal inserts and status updates are group-committed on a writer thread
+    signal_writer = get_signal_writer(app.config.get('DATABASE', DATABASE))
+
+    # Executed order_ids and their responses, for replaying retried alerts
+    app.extensions['idempotency'] = IdempotencyStore(app.config.get('DATABASE', DATABASE))
+
+    def read_payload():
+        """Request body as a dict, parsed once; raises ValueError on malformed JSON"""
+        if request.mimetype in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+            return dict(request.form)
+        body = request.get_data(cache=True)
+        return json.loads(body) if body else None
+
+    def idempotent_response(response_data, status_code, replayed):
+        """JSON response, marked when it replays an earlier request's result"""
+        response = jsonify(response_data)
+        if replayed:
+            response.headers['X-Idempotent-Replay'] = 'true'
+        return response, status_code
     
     # Add a root route to serve as a health check and tunnel test
     @app.route('/')
@@ -146,30 +180,15 @@ def init_routes(app: Flask):
         logger.info("Webhook endpoint called")
         
         try:
-            # Log raw request data for debugging
-            logger.debug(f"Request headers: {dict(request.headers)}")
-            logger.debug(f"Request data: {request.get_data(as_text=True)}")
-            
-            # Try multiple ways to get the data
-            data = None
-            if request.is_json:
-                data = request.get_json(silent=True)
-                logger.debug("Parsed JSON data from request.is_json")
-            
-            if not data and request.data:
-                try:
-                    data = json.loads(request.data.decode('utf-8'))
-                    logger.debug("Parsed JSON data from request.data")
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON decode error: {e}")
-                    return jsonify_error(create_error_response(
-                        message="Invalid JSON format", 
-                        error_code="JSON_PARSE_ERROR"
-                    ))
-            
-            if not data and request.form:
-                data = dict(request.form)
-                logger.debug("Got data from request.form")
+            # Parse the body exactly once: form fields, or JSON whatever the Content-Type
+            try:
+                data = read_payload()
+            except ValueError as e:
+                logger.error(f"JSON decode error: {e}")
+                return jsonify_error(create_error_response(
+                    message="Invalid JSON format", 
+                    error_code="JSON_PARSE_ERROR"
+                ))
             
             if not data:
                 logger.error('No data received in any format')
@@ -178,7 +197,7 @@ def init_routes(app: Flask):
                     error_code="NO_DATA"
                 ))
             
-            logger.info(f"Received webhook data: {data}")
+            logger.debug("Received webhook data: %s", data)
             
             # Check if trading is paused
             if app.config.get('TRADING_PAUSED', False):
@@ -186,12 +205,11 @@ def init_routes(app: Flask):
                 return jsonify_error(create_error_response(
                     message="Trading is currently paused by administrator",
                     error_code="TRADING_PAUSED",
-                    details={"order_id": data.get('order_id', 'unknown')}
+                    details={"order_id": data.get('order_id', 'unknown') if isinstance(data, dict) else 'unknown'}
                 ))
             
-            # Use our enhanced validation system
-            from src.Webhook.validators import validate_webhook_data
-            validation_errors = validate_webhook_data(data)
+            # Validate and coerce in one pass into a normalized signal
+            trade_signal, validation_errors = parse_webhook_signal(data)
             
             if validation_errors:
                 logger.error(f"Validation errors: {validation_errors}")
@@ -201,96 +219,106 @@ def init_routes(app: Flask):
                     details={"errors": validation_errors}
                 ))
 
+            logger.info(f"Received webhook signal: {trade_signal}")
+            data = trade_signal.to_payload()
+
             # Remove webhook token if present
             data.pop('X-Webhook-Token', None)
+
+            signal_queue = app.extensions.get('signal_queue')
+            if signal_queue is not None:
+                signal_id, status, duplicate = signal_queue.enqueue(data)
+                return jsonify({
+                    'status': status,
+                    'order_id': data['order_id'],
+                    'signal_id': signal_id,
+                    'duplicate': duplicate,
+                    'status_url': url_for('webhook_status', order_id=data['order_id'])
+                }), 200 if duplicate else 202
             
-            # Initialize client and execute trade
-            client = get_client()
-            
-            # Map webhook fields to database fields
-            order_id = data.get('order_id')
-            symbol = data.get('ticker')
-            direction = data.get('order_action')
-            quantity = float(data.get('position_size', 0))
-            price = float(data.get('price', 0))
+            def execute_signal():
+                # Initialize client and execute trade
+                client = get_client()
             
-            # Save signal to database BEFORE executing trade
-            with app.app_context():
-                db = get_db()
-                # Store trade information in signals table with both original and mapped fields
-                cursor = db.execute(
-                    'INSERT INTO signals (order_id, symbol, direction, quantity, price, signal_data, trade_action, trade_direction, position_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                    (
-                        order_id,
-                        symbol,
-                        direction,
-                        quantity,
-                        price,
-                        json.dumps(data),
-                        order_id,
-                        direction,
-                        quantity
-                    )
-                )
-                signal_id = cursor.lastrowid
-                db.commit()
+                # Save signal to database BEFORE executing trade (group-committed by the writer)
+                signal_id = signal_writer.insert_signal({
+                    'order_id': trade_signal.order_id,
+                    'symbol': trade_signal.symbol,
+                    'direction': trade_signal.direction,
+                    'quantity': trade_signal.quantity,
+                    'price': trade_signal.price or 0.0,
+                    'signal_data': json.dumps(data),
+                    'trade_action': trade_signal.order_id,
+                    'trade_direction': trade_signal.direction,
+                    'position_size': trade_signal.quantity
+                }).result()
                 logger.info(f"Signal saved with ID: {signal_id}")
             
-            # Execute the trade
-            result = execute_trade(client, data)
+                # Execute the trade
+                result = dispatch_trade(client, data)
             
-            # Check if result contains error status
-            if isinstance(result, dict) and result.get('status') == 'error':
-                error_msg = result.get('message', 'Unknown error during trade execution')
-                error_code = result.get('code', 'EXECUTION_ERROR')
-                logger.error(f"Trade execution failed: {error_msg}")
+                # Check if result contains error status
+                if isinstance(result, dict) and result.get('status') == 'error':
+                    error_msg = result.get('message', 'Unknown error during trade execution')
+                    error_code = result.get('code', 'EXECUTION_ERROR')
+                    logger.error(f"Trade execution failed: {error_msg}")
                 
-                # Update signal with error
-                with app.app_context():
-                    db = get_db()
-                    db.execute(
-                        'UPDATE signals SET status = ?, error = ? WHERE id = ?',
-                        ('failed', error_msg, signal_id)
-                    )
-                    db.commit()
+                    # Update signal with error; written behind, readers sync through get_db
+                    signal_writer.update_signal(signal_id, status='failed', error=error_msg)
                     
-                return jsonify_error(create_error_response(
-                    message=error_msg,
-                    error_code=error_code,
-                    details={"order_id": data['order_id']}
-                ))
+                    return create_error_response(
+                        message=error_msg,
+                        error_code=error_code,
+                        details={"order_id": data['order_id']},
+                        status_code=UNKNOWN_OUTCOME_STATUS if error_code == 'EXECUTION_TIMEOUT' else 400
+                    )
             
-            # Update signal with deal ID from successful trade
-            deal_reference = result.get('dealReference') if isinstance(result, dict) else None
+                # Update signal with deal ID from successful trade
+                deal_reference = result.get('dealReference') if isinstance(result, dict) else None
             
-            with app.app_context():
-                db = get_db()
-                db.execute(
-                    'UPDATE signals SET status = ?, deal_id = ? WHERE id = ?',
-                    ('success', deal_reference, signal_id)
-                )
-                db.commit()
+                signal_writer.update_signal(signal_id, status='success', deal_id=deal_reference)
             
-            # Prepare response
-            response_data = {
-                'status': 'success',
-                'order_id': data['order_id'],
-                'deal_reference': deal_reference,
-                'trade_details': {
-                    'action': data['order_action'],
-                    'size': data['position_size'],
-                    'ticker': data['ticker']
+                # Prepare response
+                response_data = {
+                    'status': 'success',
+                    'order_id': data['order_id'],
+                    'deal_reference': deal_reference,
+                    'trade_details': {
+                        'action': data['order_action'],
+                        'size': data['position_size'],
+                        'ticker': data['ticker']
+                    }
                 }
-            }
             
-            logger.info(f"Trade executed successfully: {response_data}")
-            return jsonify(response_data), 200
+                logger.info(f"Trade executed successfully: {response_data}")
+                return response_data, 200
+
+            # Retried alerts get the original response instead of a second order
+            response_data, status_code, replayed = app.extensions['idempotency'].run_once(
+                data['order_id'], execute_signal
+            )
+            return idempotent_response(response_data, status_code, replayed)
             
         except ValueError as ve:
             return jsonify_error(handle_request_error(ve, 400))
         except Exception as e:
             return jsonify_error(handle_request_error(e))
 
+    @app.route('/webhook/status/<order_id>', methods=['GET'])
+    @require_auth
+    def webhook_status(order_id):
+        """Execution status of a signal accepted in async ingestion mode"""
+        signal_queue = app.extensions.get('signal_queue')
+        state = signal_queue.status(order_id) if signal_queue is not None else None
+        if state is None:
+            return jsonify_error(create_error_response(
+                message="No queued signal found for the given order ID",
+                error_code="SIGNAL_NOT_FOUND",
+                details={"order_id": order_id},
+                status_code=404
+            ))
+        return jsonify(state), 200
+
     @app.route('/webhook/tradingview', methods=['POST'])
     @require_auth
     @rate_limit(limit=20, window=60)  # 20 requests per minute
@@ -304,12 +332,8 @@ def init_routes(app: Flask):
                     status_code=415
                 ))
 
-            data = request.get_json()
-            logger.info(f"TradingView signal received: {data}")
-
-            # Use our enhanced validation system
-            from src.Webhook.validators import validate_webhook_data
-            validation_errors = validate_webhook_data(data)
+            # Validate and coerce in one pass into a normalized signal
+            trade_signal, validation_errors = parse_webhook_signal(request.get_json())
             
             if validation_errors:
                 logger.error(f"Validation errors: {validation_errors}")
@@ -319,35 +343,43 @@ def init_routes(app: Flask):
                     details={"errors": validation_errors}
                 ))
 
-            # Initialize client before database operations
-            client = get_client()
-            
-            # Database operations within app context
-            with app.app_context():
-                db = get_db()
-                signal_id = save_signal(db, data)
-                result = execute_trade(client, data)
-                
+            logger.info(f"TradingView signal received: {trade_signal}")
+            data = trade_signal.to_payload()
+
+            def execute_signal():
+                # Initialize client before database operations
+                client = get_client()
+
+                # Database writes go through the group-committing writer
+                signal_id = save_signal(signal_writer, data)
+                result = dispatch_trade(client, data)
+
                 # Check if result contains error status
                 if isinstance(result, dict) and result.get('status') == 'error':
                     error_msg = result.get('message', 'Unknown error during trade execution')
                     error_code = result.get('code', 'EXECUTION_ERROR')
                     logger.error(f"Trade execution failed: {error_msg}")
-                    return jsonify_error(create_error_response(
+                    return create_error_response(
                         message=error_msg,
                         error_code=error_code,
-                        details={"signal_id": signal_id}
-                    ))
-                
-                position_id = save_trade_result(db, signal_id, result)
+                        details={"signal_id": signal_id},
+                        status_code=UNKNOWN_OUTCOME_STATUS if error_code == 'EXECUTION_TIMEOUT' else 400
+                    )
 
-                return jsonify({
+                position_id = save_trade_result(signal_writer, signal_id, result)
+
+                return {
                     "status": "success",
                     "signal_id": signal_id,
                     "position_id": position_id,
                     "deal_reference": result.get('dealReference'),
                     "timestamp": datetime.utcnow().isoformat()
-                }), 200
+                }, 200
+
+            response_data, status_code, replayed = app.extensions['idempotency'].run_once(
+                data['order_id'], execute_signal
+            )
+            return idempotent_response(response_data, status_code, replayed)
 
         except Exception as e:
             return jsonify_error(handle_request_error(e))
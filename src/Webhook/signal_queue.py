@@ -0,0 +1,389 @@
+"""
+Durable work queue for asynchronous webhook ingestion.
+
+In async ingestion mode the ``/webhook`` route only validates a signal and
+hands it to ``SignalQueue.enqueue``, which writes the ``signals`` row and a
+``signal_queue`` job in one SQLite transaction and returns at once (202).
+A pool of worker threads drains the queue and executes the trades:
+- Jobs for the same symbol run one at a time, in arrival order; different
+  symbols run in parallel, so bursts at bar close are absorbed
+- ``order_id`` is unique in the queue, so a re-sent alert returns the
+  existing signal instead of placing a second order
+- The ``signals`` row moves through queued -> processing -> success/failed,
+  with the deal reference or error recorded as before
+
+Jobs survive restarts. While a worker executes a job, a heartbeat thread
+renews the job's ``heartbeat_at`` every ``stale_after / 4`` seconds. A running
+job without a heartbeat for ``stale_after`` seconds belongs to a process that
+died; it is marked failed rather than executed again, since the order may
+already have reached the broker. Jobs that live workers (in this or another
+process) are executing keep their heartbeat and are left alone, however long
+they take, so their symbol stays blocked until they finish.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.Webhook.database import SIGNALS_TABLE_SQL
+
+logger = logging.getLogger(__name__)
+
+QUEUE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS signal_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        signal_id INTEGER NOT NULL,
+        order_id TEXT NOT NULL UNIQUE,
+        symbol TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        result TEXT,
+        enqueued_at REAL NOT NULL,
+        started_at REAL,
+        heartbeat_at REAL,
+        finished_at REAL
+    )
+'''
+QUEUE_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS idx_signal_queue_status ON signal_queue (status, symbol, id)'
+
+# Oldest queued job whose symbol has no job running
+_CLAIM_SQL = '''
+    SELECT id, signal_id, order_id, symbol, payload FROM signal_queue AS q
+    WHERE q.status = 'queued'
+      AND NOT EXISTS (
+          SELECT 1 FROM signal_queue AS r WHERE r.symbol = q.symbol AND r.status = 'running'
+      )
+    ORDER BY q.id
+    LIMIT 1
+'''
+
+
+def _default_execute(data: Dict[str, Any]) -> Any:
+    from src.Webhook.utils import get_client, dispatch_trade
+    return dispatch_trade(get_client(), data)
+
+
+class SignalQueue:
+    """
+    SQLite-backed signal queue with a pool of executor threads.
+
+    Attributes:
+        db_path: SQLite database holding the ``signals`` and ``signal_queue`` tables
+        workers: Number of executor threads
+        stats: Counters for enqueued, duplicate, succeeded and failed signals
+        stale_after: Seconds without a heartbeat after which a running job
+            counts as interrupted
+    """
+
+    def __init__(self, db_path: str, execute: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 workers: int = 4, poll_interval: float = 1.0, stale_after: float = 300.0):
+        """
+        Initialize the queue and create its tables.
+
+        Args:
+            db_path: SQLite database file
+            execute: Called with the signal data on a worker thread; returns
+                the broker response (default: dispatch_trade with the pooled client)
+            workers: Number of executor threads
+            poll_interval: Seconds between checks for jobs written by other
+                processes
+            stale_after: Seconds without a heartbeat after which a running
+                job is taken to be interrupted by a dead process
+        """
+        self.db_path = db_path
+        self.execute = execute or _default_execute
+        self.workers = max(1, int(workers))
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._next_recovery = 0.0
+        self.stats = {'enqueued': 0, 'duplicates': 0, 'succeeded': 0, 'failed': 0}
+
+        self._local = threading.local()
+        self._claim_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopped = threading.Event()
+        self._running: Dict[int, int] = {}
+        self._running_lock = threading.Lock()
+
+        db = self._connect()
+        db.execute(SIGNALS_TABLE_SQL)
+        db.execute(QUEUE_TABLE_SQL)
+        db.execute(QUEUE_INDEX_SQL)
+        columns = {row['name'] for row in db.execute('PRAGMA table_info(signal_queue)')}
+        if 'heartbeat_at' not in columns:
+            # Queues created before heartbeats were recorded
+            db.execute('ALTER TABLE signal_queue ADD COLUMN heartbeat_at REAL')
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connection for the calling thread (autocommit; transactions are explicit)."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def enqueue(self, data: Dict[str, Any]) -> Tuple[int, str, bool]:
+        """
+        Persist a validated signal and queue it for execution.
+
+        Args:
+            data: Validated webhook data; must contain ``order_id``
+
+        Returns:
+            Tuple of (signal ID, signal status, whether the order_id was
+            already queued)
+        """
+        order_id = str(data['order_id'])
+        symbol = data.get('ticker') or data.get('symbol')
+        direction = data.get('order_action') or data.get('direction')
+        quantity = float(data.get('position_size', data.get('quantity', 0)))
+        price = float(data.get('price') or 0)
+        payload = json.dumps(data)
+
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            existing = self._find(db, order_id)
+            if existing is not None:
+                db.execute('COMMIT')
+                self.stats['duplicates'] += 1
+                logger.info(f"Duplicate signal for order {order_id}, already queued as signal {existing[0]}")
+                return existing[0], existing[1], True
+
+            cursor = db.execute(
+                'INSERT INTO signals (order_id, symbol, direction, quantity, price, signal_data, trade_action, '
+                'trade_direction, position_size, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (order_id, symbol, direction, quantity, price, payload, order_id, direction, quantity, 'queued')
+            )
+            signal_id = cursor.lastrowid
+            db.execute(
+                'INSERT INTO signal_queue (signal_id, order_id, symbol, payload, enqueued_at) VALUES (?, ?, ?, ?, ?)',
+                (signal_id, order_id, symbol, payload, time.time())
+            )
+            db.execute('COMMIT')
+        except sqlite3.IntegrityError:
+            # Another process queued the same order_id first
+            db.execute('ROLLBACK')
+            existing = self._find(db, order_id)
+            if existing is None:
+                raise
+            self.stats['duplicates'] += 1
+            return existing[0], existing[1], True
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+
+        self.stats['enqueued'] += 1
+        logger.info(f"Signal {signal_id} queued for order {order_id}")
+        with self._condition:
+            self._condition.notify()
+        return signal_id, 'queued', False
+
+    @staticmethod
+    def _find(db: sqlite3.Connection, order_id: str) -> Optional[Tuple[int, str]]:
+        row = db.execute(
+            'SELECT q.signal_id, s.status FROM signal_queue AS q LEFT JOIN signals AS s ON s.id = q.signal_id '
+            'WHERE q.order_id = ?', (order_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row['signal_id'], row['status'] or 'queued'
+
+    def status(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Current state of a queued signal, or None if the order_id is unknown."""
+        row = self._connect().execute(
+            'SELECT q.signal_id, q.status AS job_status, q.enqueued_at, q.finished_at, '
+            's.status, s.deal_id, s.error FROM signal_queue AS q '
+            'LEFT JOIN signals AS s ON s.id = q.signal_id WHERE q.order_id = ?', (str(order_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'order_id': order_id,
+            'signal_id': row['signal_id'],
+            'status': row['status'],
+            'deal_reference': row['deal_id'],
+            'error': row['error'],
+            'enqueued_at': row['enqueued_at'],
+            'finished_at': row['finished_at']
+        }
+
+    def depth(self) -> Dict[str, int]:
+        """Number of jobs per queue status."""
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM signal_queue GROUP BY status').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def start(self) -> None:
+        """Recover stale jobs and start the executor threads."""
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._recover()
+        self._stopped.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f'signal-executor-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._heartbeat, name='signal-heartbeat', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Signal queue started with {self.workers} executor threads")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the executor threads after their current job."""
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def _heartbeat(self) -> None:
+        """Renew the heartbeat of the jobs this process is executing."""
+        while not self._stopped.wait(self.stale_after / 4):
+            try:
+                self.renew()
+            except sqlite3.Error as e:
+                logger.error(f"Error renewing signal queue heartbeats: {str(e)}")
+
+    def renew(self) -> int:
+        """Record a heartbeat for this process's running jobs; returns the number renewed."""
+        with self._running_lock:
+            job_ids = list(self._running)
+        if not job_ids:
+            return 0
+        placeholders = ', '.join('?' for _ in job_ids)
+        cursor = self._connect().execute(
+            f"UPDATE signal_queue SET heartbeat_at = ? WHERE status = 'running' AND id IN ({placeholders})",
+            [time.time(), *job_ids]
+        )
+        return cursor.rowcount
+
+    def _recover(self) -> None:
+        """Mark running jobs without a heartbeat for ``stale_after`` seconds as failed."""
+        now = time.time()
+        self._next_recovery = now + self.stale_after / 4
+        with self._running_lock:
+            own = set(self._running)
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            stale = [
+                job for job in db.execute(
+                    "SELECT id, signal_id FROM signal_queue WHERE status = 'running' "
+                    "AND COALESCE(heartbeat_at, started_at) < ?",
+                    (now - self.stale_after,)
+                ).fetchall()
+                if job['id'] not in own
+            ]
+            for job in stale:
+                db.execute(
+                    "UPDATE signals SET status = 'failed', error = ? WHERE id = ?",
+                    ('Interrupted during execution; check the broker for the order', job['signal_id'])
+                )
+                db.execute("UPDATE signal_queue SET status = 'failed', finished_at = ? WHERE id = ?",
+                           (now, job['id']))
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        if stale:
+            logger.warning(f"Marked {len(stale)} interrupted signals as failed: "
+                           f"{[job['signal_id'] for job in stale]}")
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Mark the next runnable job as running and return it."""
+        db = self._connect()
+        with self._claim_lock:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                job = db.execute(_CLAIM_SQL).fetchone()
+                if job is not None:
+                    now = time.time()
+                    db.execute("UPDATE signal_queue SET status = 'running', started_at = ?, heartbeat_at = ? "
+                               "WHERE id = ?", (now, now, job['id']))
+                    db.execute("UPDATE signals SET status = 'processing' WHERE id = ?", (job['signal_id'],))
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+        if job is not None:
+            with self._running_lock:
+                self._running[job['id']] = job['signal_id']
+        return job
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if time.time() >= self._next_recovery:
+                    self._recover()
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming queued signal: {str(e)}")
+                job = None
+            if job is None:
+                with self._condition:
+                    self._condition.wait(self.poll_interval)
+                continue
+            try:
+                self.process(job)
+            except Exception as e:
+                # Keep the worker alive and release the symbol for the next job
+                logger.error(f"Error processing signal {job['signal_id']}: {str(e)}")
+                self._abandon(job, e)
+            finally:
+                with self._running_lock:
+                    self._running.pop(job['id'], None)
+            # A finished job may unblock the next one for its symbol
+            with self._condition:
+                self._condition.notify()
+
+    def _abandon(self, job: sqlite3.Row, error: Exception) -> None:
+        """Mark a job whose outcome could not be recorded as failed."""
+        message = f"Error recording outcome: {str(error)}; check the broker for the order"
+        try:
+            self._finish(job, 'failed', {'status': 'error', 'message': message}, error=message)
+            self.stats['failed'] += 1
+        except Exception as e:
+            logger.error(f"Could not mark signal {job['signal_id']} as failed: {str(e)}")
+
+    def process(self, job: sqlite3.Row) -> None:
+        """Execute one claimed job and record the outcome."""
+        signal_id = job['signal_id']
+        try:
+            result = self.execute(json.loads(job['payload']))
+        except Exception as e:
+            logger.error(f"Trade execution failed for signal {signal_id}: {str(e)}")
+            result = {'status': 'error', 'message': str(e), 'code': 'EXECUTION_ERROR'}
+
+        if isinstance(result, dict) and result.get('status') == 'error':
+            error_msg = result.get('message', 'Unknown error during trade execution')
+            logger.error(f"Trade execution failed for signal {signal_id}: {error_msg}")
+            self._finish(job, 'failed', result, error=error_msg)
+            self.stats['failed'] += 1
+        else:
+            deal_reference = result.get('dealReference') if isinstance(result, dict) else None
+            logger.info(f"Signal {signal_id} executed, deal reference {deal_reference}")
+            self._finish(job, 'done', result, deal_reference=deal_reference)
+            self.stats['succeeded'] += 1
+
+    def _finish(self, job: sqlite3.Row, job_status: str, result: Any,
+                deal_reference: Optional[str] = None, error: Optional[str] = None) -> None:
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if job_status == 'done':
+                db.execute("UPDATE signals SET status = 'success', deal_id = ? WHERE id = ?",
+                           (deal_reference, job['signal_id']))
+            else:
+                db.execute("UPDATE signals SET status = 'failed', error = ? WHERE id = ?",
+                           (error, job['signal_id']))
+            db.execute('UPDATE signal_queue SET status = ?, result = ?, finished_at = ? WHERE id = ?',
+                       (job_status, json.dumps(result, default=str), time.time(), job['id']))
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
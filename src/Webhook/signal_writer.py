@@ -0,0 +1,292 @@
+"""
+Write-behind persistence for signals and trade results.
+
+Each webhook used to commit its signal INSERT and two status UPDATEs
+separately, paying a full fsync for each. The SignalWriter owns a single
+connection on a dedicated thread and commits whatever writes are queued
+together in one transaction:
+- Writes are queued and return a Future (the row ID for inserts), so callers
+  that need an ID wait only for the next group commit, and status updates can
+  be fire-and-forget
+- A failing statement rolls back its group, which is then replayed one
+  statement at a time so the other writes still land
+- The database runs in WAL mode with ``synchronous=NORMAL``: readers never
+  block the writer, and commits survive an application crash (a power loss
+  can drop the last transactions)
+
+``sync`` blocks until every write submitted before the call is committed;
+``database.get_db`` calls it, so requests and the dashboard read their own
+writes. A write that fails for any reason fails its Future instead of
+stopping the thread, and if the thread has died anyway ``sync`` commits the
+queued writes itself, so a reader never waits on a writer that is gone.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_BARRIER = object()
+
+
+class SignalWriter:
+    """
+    Single-threaded, group-committing SQLite writer.
+
+    Attributes:
+        db_path: SQLite database file
+        max_batch: Most writes committed in one transaction
+        max_delay: Seconds the writer waits for more writes before committing
+        stats: Counters for writes, transactions, failed writes and the
+            largest group
+    """
+
+    def __init__(self, db_path: str, max_batch: int = 256, max_delay: float = 0.002,
+                 synchronous: str = 'NORMAL'):
+        """
+        Initialize the writer; its thread starts on the first write.
+
+        Args:
+            db_path: SQLite database file
+            max_batch: Most writes committed in one transaction
+            max_delay: Seconds to wait for more writes before committing
+            synchronous: SQLite ``synchronous`` setting of the writer connection
+        """
+        self.db_path = db_path
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max_delay
+        self.synchronous = synchronous
+        self.stats = {'writes': 0, 'transactions': 0, 'failed': 0, 'largest_batch': 0}
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._progress = threading.Condition()
+        self._submitted = 0
+        self._committed = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='signal-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, sql: str, params: Sequence[Any] = ()) -> Future:
+        """
+        Queue one statement.
+
+        Returns:
+            Future resolving to the statement's ``lastrowid`` once committed
+        """
+        future: Future = Future()
+        self._ensure_started()
+        with self._progress:
+            # Enqueued under the lock so sequence numbers reach the writer in order
+            self._submitted += 1
+            self._queue.put((self._submitted, sql, tuple(params), future))
+        return future
+
+    @staticmethod
+    def _columns(fields: Dict[str, Any]) -> List[str]:
+        columns = list(fields)
+        for column in columns:
+            if not column.isidentifier():
+                raise ValueError(f"Invalid column name: {column}")
+        return columns
+
+    def insert(self, table: str, fields: Dict[str, Any]) -> Future:
+        """Queue an INSERT of ``fields`` into ``table``; the Future yields the row ID."""
+        columns = self._columns(fields)
+        placeholders = ', '.join('?' for _ in columns)
+        return self.submit(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                           [fields[c] for c in columns])
+
+    def update(self, table: str, row_id: int, fields: Dict[str, Any]) -> Future:
+        """Queue an UPDATE of ``fields`` on the row of ``table`` with ``id = row_id``."""
+        columns = self._columns(fields)
+        assignments = ', '.join(f"{c} = ?" for c in columns)
+        return self.submit(f"UPDATE {table} SET {assignments} WHERE id = ?",
+                           [fields[c] for c in columns] + [row_id])
+
+    def insert_signal(self, fields: Dict[str, Any]) -> Future:
+        """Queue a ``signals`` row; the Future yields the signal ID."""
+        return self.insert('signals', fields)
+
+    def update_signal(self, signal_id: int, **fields: Any) -> Future:
+        """Queue an update of a ``signals`` row, e.g. ``status`` and ``deal_id``."""
+        return self.update('signals', signal_id, fields)
+
+    def insert_position(self, fields: Dict[str, Any]) -> Future:
+        """Queue a ``positions`` row; the Future yields the position ID."""
+        return self.insert('positions', fields)
+
+    def sync(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every write submitted before this call is committed.
+
+        If the writer thread is no longer running, the queued writes are
+        committed directly on the calling thread.
+
+        Returns:
+            False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._progress:
+            target = self._submitted
+            while self._committed < target:
+                if self._thread is None or not self._thread.is_alive():
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Wake up periodically to notice a writer thread that died
+                self._progress.wait(0.1 if remaining is None else min(remaining, 0.1))
+            else:
+                return True
+
+        self._write_direct()
+        with self._progress:
+            return self._committed >= target
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        """Run a read after ``sync``, so it sees all writes submitted so far."""
+        self.sync()
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            return db.execute(sql, tuple(params)).fetchall()
+        finally:
+            db.close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Commit queued writes and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_BARRIER)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(f'PRAGMA synchronous={self.synchronous}')
+        return db
+
+    def _next_batch(self) -> Tuple[List[Tuple[int, str, tuple, Future]], bool]:
+        """Block for one write, then gather more for up to ``max_delay``."""
+        item = self._queue.get()
+        if item is _BARRIER:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _BARRIER:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        try:
+            db = self._connect()
+        except Exception as e:
+            logger.error(f"Signal writer could not open {self.db_path}: {str(e)}")
+            return
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    try:
+                        self._write(db, batch)
+                    except Exception as e:
+                        logger.error(f"Signal writer failed to write a batch: {str(e)}")
+                        self._fail(batch, e)
+                if stop:
+                    return
+        finally:
+            db.close()
+
+    def _write_direct(self) -> None:
+        """Commit the queued writes on the calling thread while the writer thread is down."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            batch = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _BARRIER:
+                    batch.append(item)
+            if not batch:
+                return
+
+            logger.warning(f"Signal writer thread is not running, writing {len(batch)} queued writes directly")
+            try:
+                db = self._connect()
+            except Exception as e:
+                logger.error(f"Signal writer could not open {self.db_path}: {str(e)}")
+                self._fail(batch, e)
+                return
+            try:
+                for start in range(0, len(batch), self.max_batch):
+                    chunk = batch[start:start + self.max_batch]
+                    try:
+                        self._write(db, chunk)
+                    except Exception as e:
+                        logger.error(f"Signal writer failed to write a batch: {str(e)}")
+                        self._fail(chunk, e)
+            finally:
+                db.close()
+
+    def _fail(self, batch: List[Tuple[int, str, tuple, Future]], error: Exception) -> None:
+        """Fail the unresolved writes of a batch and count them as done."""
+        for _, _, _, future in batch:
+            if not future.done():
+                self.stats['failed'] += 1
+                future.set_exception(error)
+        self._advance(batch)
+
+    def _advance(self, batch: List[Tuple[int, str, tuple, Future]]) -> None:
+        with self._progress:
+            self._committed = max(self._committed, batch[-1][0])
+            self._progress.notify_all()
+
+    def _write(self, db: sqlite3.Connection, batch: List[Tuple[int, str, tuple, Future]]) -> None:
+        results: List[Any] = []
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            for _, sql, params, _ in batch:
+                results.append(db.execute(sql, params).lastrowid)
+            db.execute('COMMIT')
+        except Exception as e:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            if len(batch) == 1:
+                logger.error(f"Failed to persist write: {str(e)}")
+                self._fail(batch, e)
+            else:
+                # Isolate the failing statement so the others still commit
+                for item in batch:
+                    self._write(db, [item])
+            return
+
+        self.stats['transactions'] += 1
+        self.stats['writes'] += len(batch)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        for (_, _, _, future), row_id in zip(batch, results):
+            # A caller may have cancelled its Future; the write is committed regardless
+            if not future.done():
+                future.set_result(row_id)
+        self._advance(batch)
@@ -1,101 +1,116 @@
-import json
 import os
 import logging
-import http.client
 import time
 import re
+import threading
 import requests  # type: ignore
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from typing import Dict, Any, Optional, Union, List, cast, Tuple
-from datetime import datetime
 from flask import jsonify
 
 from src.Exchanges.capital_com_api.client import Client
+from src.Exchanges.capital_com_api.client_pool import ClientPool
 from src.Exchanges.capital_com_api.account_config import AccountConfig
 from src.Exchanges.capital_com_api.session_manager import SessionManager
 from src.Exchanges.capital_com_api.request_handler import RequestHandler
 from src.Exchanges.capital_com_api.exceptions import CapitalAPIException
 from src.Credentials.credentials import load_credentials, get_api_credentials, get_server_url
 from src.Optional.position_validator import validate_position_size
+from src.Webhook.execution_dispatcher import ExecutionDispatcher, BacklogFullError
+from src.Webhook.signal_writer import SignalWriter
+from src.Webhook.validators import parse_webhook_signal
 
 logger = logging.getLogger(__name__)
 
+def _create_client(server: str, session: requests.Session) -> Client:
+    """Build and authenticate a Client for ``server`` on a shared keep-alive session."""
+    # Ensure credentials are loaded from env.sh
+    load_credentials()
+    
+    # Get API credentials
+    creds = get_api_credentials()
+    
+    # Handle missing username field gracefully
+    if 'username' not in creds or not creds['username']:
+        logger.error("Missing 'username' in credentials")
+        raise KeyError("username")
+    
+    # Log credential status (masked for security)
+    logger.info(f"Creating client with server: {server}")
+    logger.debug(f"API credentials - Key: {'Present' if creds['api_key'] else 'Missing'}, "
+                f"Username: {'Present' if creds['username'] else 'Missing'}, "
+                f"Password: {'Present' if creds['password'] else 'Missing'}")
+    
+    # Create session manager with loaded credentials
+    session_manager = SessionManager(
+        server=server,
+        api_key=creds['api_key'],
+        username=creds['username'],
+        password=creds['password']
+    )
+    session_manager.session = session
+    
+    # Route all manager requests through the same pooled connections
+    request_handler = RequestHandler()
+    request_handler.session.close()
+    request_handler.session = session
+    
+    # Create client with session manager (authenticates on creation)
+    client = Client(session_manager=session_manager, request_handler=request_handler)
+    
+    # Verify authentication works with better error handling
+    if not client.session_manager.is_authenticated:
+        logger.info("Authenticating with Capital.com...")
+        auth_result = client.session_manager.create_session()
+        
+        # Check authentication result explicitly
+        if isinstance(auth_result, dict) and not auth_result.get('success', False):
+            error_msg = auth_result.get('error_message', 'Unknown authentication error')
+            logger.error(f"Authentication failed: {error_msg}")
+            raise Exception(f"Authentication failed: {error_msg}")
+        
+    if client.session_manager.is_authenticated:
+        client._setup_auth_headers()
+        logger.info("Successfully created authenticated client")
+    else:
+        error_msg = "Client creation succeeded but authentication did not complete"
+        logger.error(error_msg)
+        raise Exception(error_msg)
+        
+    return client
+
+# Warm clients shared by all requests in this process
+client_pool = ClientPool(_create_client, get_server_url)
+
 def get_client() -> Client:
-    """Initialize and return a properly authenticated Client instance."""
+    """Return the pooled, authenticated Client for the active account."""
     try:
-        # Ensure credentials are loaded from env.sh
-        load_credentials()
-        
-        # Get API credentials and server URL
-        creds = get_api_credentials()
-        server = get_server_url()
-        
-        # Handle missing username field gracefully
-        if 'username' not in creds or not creds['username']:
-            logger.error("Missing 'username' in credentials")
-            raise KeyError("username")
-        
-        # Log credential status (masked for security)
-        logger.info(f"Creating client with server: {server}")
-        logger.debug(f"API credentials - Key: {'Present' if creds['api_key'] else 'Missing'}, "
-                    f"Username: {'Present' if creds['username'] else 'Missing'}, "
-                    f"Password: {'Present' if creds['password'] else 'Missing'}")
-        
-        # Create session manager with loaded credentials
-        session_manager = SessionManager(
-            server=server,
-            api_key=creds['api_key'],
-            username=creds['username'],
-            password=creds['password']
-        )
-        
-        # Create client with session manager
-        client = Client(session_manager=session_manager)
-        
-        # Verify authentication works with better error handling
-        if not client.session_manager.is_authenticated:
-            logger.info("Authenticating with Capital.com...")
-            auth_result = client.session_manager.create_session()
-            
-            # Check authentication result explicitly
-            if isinstance(auth_result, dict) and not auth_result.get('success', False):
-                error_msg = auth_result.get('error_message', 'Unknown authentication error')
-                logger.error(f"Authentication failed: {error_msg}")
-                raise Exception(f"Authentication failed: {error_msg}")
-            
-        if client.session_manager.is_authenticated:
-            logger.info("Successfully created authenticated client")
-        else:
-            error_msg = "Client creation succeeded but authentication did not complete"
-            logger.error(error_msg)
-            raise Exception(error_msg)
-            
-        return client
-        
+        return client_pool.get()
     except Exception as e:
         logger.error(f"Failed to initialize client: {str(e)}", exc_info=True)
         raise
 
+def warm_client_pool() -> None:
+    """Authenticate the pooled client in the background and start token refresh."""
+    threading.Thread(target=client_pool.warm, name='capital-client-warmup', daemon=True).start()
+
 def get_position_details(client: Client, deal_reference: str) -> Dict[str, Any]:
     """Retrieve details of a specific position using authenticated client."""
     try:
         if not client.session_manager.is_authenticated:
             client.session_manager.create_session()
             
-        conn = http.client.HTTPSConnection(client.session_manager.server.replace('https://', ''))
         headers = {
             'X-SECURITY-TOKEN': client.session_manager.X_TOKEN,
             'CST': client.session_manager.CST,
             'Content-Type': 'application/json'
         }
         
-        conn.request("GET", f"/api/v1/confirms/{deal_reference}", '', headers)
-        res = conn.getresponse()
-        data = res.read()
-        
-        if res.status != 200:
-            raise CapitalAPIException(res.status, res.reason, data.decode("utf-8"))
-            
-        return json.loads(data.decode("utf-8"))
+        # Pooled keep-alive connection; a 401 triggers one re-login and retry
+        data, _ = client.request_handler.make_request(
+            "get", f"{client.session_manager.server}/api/v1/confirms/{deal_reference}", headers=headers
+        )
+        return data
         
     except Exception as e:
         logger.error(f"Failed to get position details: {str(e)}")
@@ -334,7 +349,16 @@ def execute_trade(client: Client, data: Dict[str, Any]) -> Dict[str, Any]:
                         
                         # Otherwise treat as error
                         raise ValueError(error_msg)
-                    
+
+                    deal_reference = response.get('dealReference') if isinstance(response, dict) else None
+                    if position_args.get('trailingStop') and deal_reference:
+                        # Checked in the background so the webhook response does not wait on it;
+                        # only this order's position is ever matched, never another one on the epic
+                        client.position_manager.schedule_trailing_stop_verification(
+                            position_args['epic'], position_args['direction'],
+                            deal_reference=deal_reference,
+                            stop_distance=position_args.get('trailingStopDistance')
+                        )
                     return response
                     
                 except requests.exceptions.RequestException as e:
@@ -419,9 +443,81 @@ def get_symbol(data):
     """Get symbol from data, supporting both 'symbol' and 'ticker' keys for compatibility."""
     return data.get('symbol') or data.get('ticker')
 
+# Trades for the same symbol run in order on one lane; other symbols run in parallel
+execution_dispatcher = ExecutionDispatcher(
+    execute_trade,
+    lanes=int(os.getenv('EXECUTION_LANES', '8')),
+    max_backlog=int(os.getenv('EXECUTION_LANE_BACKLOG', '64'))
+)
+
+# Seconds a caller waits for its trade; kept below the idempotency lease
+DISPATCH_TIMEOUT = float(os.getenv('DISPATCH_TIMEOUT', '60'))
+
+def dispatch_trade(client: Client, data: Dict[str, Any],
+                   timeout: Optional[float] = DISPATCH_TIMEOUT) -> Dict[str, Any]:
+    """
+    Execute a trade on its symbol's execution lane and wait for the result.
+
+    Returns the execute_trade result, or a structured error if the lane's
+    backlog is full or the trade is not done within ``timeout`` seconds. A
+    trade still waiting for its lane is cancelled (EXECUTION_BACKLOG_FULL);
+    one already executing keeps running and is reported as EXECUTION_TIMEOUT,
+    since the order may still reach the broker.
+    """
+    try:
+        future = execution_dispatcher.submit(get_symbol(data) or '', client, data)
+    except BacklogFullError as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "code": "EXECUTION_BACKLOG_FULL"
+        }
+    try:
+        return future.result(timeout=timeout)
+    except FuturesTimeoutError:
+        if future.cancel():
+            return {
+                "status": "error",
+                "message": f"Trade did not start within {timeout:g}s; execution lane busy",
+                "code": "EXECUTION_BACKLOG_FULL"
+            }
+        logger.error(f"Trade for order {data.get('order_id')} still executing after {timeout:g}s")
+        return {
+            "status": "error",
+            "message": f"Trade still executing after {timeout:g}s; check the broker before re-sending",
+            "code": "EXECUTION_TIMEOUT"
+        }
+
+def signal_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns of the signals row for a trading signal."""
+    return {
+        # Generate order_id if not provided
+        'order_id': data.get('order_id') or f"{data['direction']}_{int(time.time()*1000)}",
+        'symbol': get_symbol(data),
+        'direction': data['direction'].upper(),
+        'quantity': float(data['quantity']),
+        'price': float(data.get('price', 0)),
+        'status': 'pending'
+    }
+
+def trade_result_row(signal_id: int, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns of the positions row for a trade execution result."""
+    return {
+        'signal_id': signal_id,
+        'deal_id': result.get('dealId'),
+        'symbol': result.get('epic'),
+        'direction': result.get('direction'),
+        'size': result.get('size'),
+        'entry_price': result.get('level')
+    }
+
 def save_signal(db, data: Dict[str, Any]) -> int:
-    """Save trading signal to database."""
+    """Save trading signal to database (a connection, or a SignalWriter for a group commit)."""
     try:
+        row = signal_row(data)
+        if isinstance(db, SignalWriter):
+            return db.insert_signal(row).result()
+
         # Create table if not exists
         db.execute("""
         CREATE TABLE IF NOT EXISTS signals (
@@ -435,71 +531,60 @@ def save_signal(db, data: Dict[str, Any]) -> int:
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )""")
         
-        # Generate order_id if not provided
-        order_id = data.get('order_id') or f"{data['direction']}_{int(time.time()*1000)}"
-        
-        symbol = get_symbol(data)
-        
         cursor = db.execute("""
             INSERT INTO signals 
             (order_id, symbol, direction, quantity, price, status) 
             VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            order_id,
-            symbol,
-            data['direction'].upper(),
-            float(data['quantity']),
-            float(data.get('price', 0)),
-            'pending'
-        ))
+        """, tuple(row.values()))
         db.commit()
         return cursor.lastrowid
         
     except Exception as e:
         logger.error(f"Failed to save signal: {str(e)}", exc_info=True)
-        db.rollback()
+        if not isinstance(db, SignalWriter):
+            db.rollback()
         raise
 
 def save_trade_result(db, signal_id: int, result: Dict[str, Any]) -> int:
-    """Save trade execution result to database."""
+    """Save trade execution result to database (a connection, or a SignalWriter for a group commit)."""
     try:
-        cursor = db.cursor()
-        cursor.execute("""
-            INSERT INTO positions (signal_id, deal_id, symbol, direction, size, entry_price)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            signal_id,
-            result.get('dealId'),
-            result.get('epic'),
-            result.get('direction'),
-            result.get('size'),
-            result.get('level')
-        ))
-        db.commit()
-        return cursor.lastrowid
+        row = trade_result_row(signal_id, result)
+        if isinstance(db, SignalWriter):
+            position_id = db.insert_position(row).result()
+        else:
+            cursor = db.cursor()
+            cursor.execute("""
+                INSERT INTO positions (signal_id, deal_id, symbol, direction, size, entry_price)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, tuple(row.values()))
+            db.commit()
+            position_id = cursor.lastrowid
+
+        # Open positions feed the cached risk and correlation lookups
+        if _ai_decision_service is not None:
+            _ai_decision_service.invalidate_positions()
+        return position_id
         
     except Exception as e:
         logger.error(f"Failed to save trade result: {str(e)}")
-        db.rollback()
+        if not isinstance(db, SignalWriter):
+            db.rollback()
         raise
 
 def process_webhook_signal(data: dict, headers: dict) -> dict:
     """Process incoming webhook signal."""
     try:
-        # Validate required fields
-        required_fields = ["order_id", "order_action", "position_size", "ticker"]
-        missing = [f for f in required_fields if f not in data]
-        if missing:
-            raise ValueError(f"Missing required fields: {', '.join(missing)}")
-
-        # Always reload credentials to ensure they're available
-        load_credentials()
-        
-        # Initialize client
+        # Validate and coerce into a normalized signal
+        signal, errors = parse_webhook_signal(data)
+        if errors:
+            raise ValueError(f"Invalid signal: {'; '.join(errors)}")
+        data = signal.to_payload()
+
+        # Pooled client, authenticated ahead of time
         client = get_client()
         
         # Execute trade
-        result = execute_trade(client, data)
+        result = dispatch_trade(client, data)
         
         # Check if result is a structured error response
         if isinstance(result, dict) and result.get('status') == 'error':
@@ -601,6 +686,19 @@ def jsonify_error(error_data: Tuple[Dict[str, Any], int]):
     response_dict, status_code = error_data
     return jsonify(response_dict), status_code
 
+_ai_decision_service = None
+_ai_decision_service_lock = threading.Lock()
+
+def get_ai_decision_service():
+    """Process-wide AI decision service, created on the first signal."""
+    global _ai_decision_service
+    if _ai_decision_service is None:
+        with _ai_decision_service_lock:
+            if _ai_decision_service is None:
+                from src.AI.decision_service import AIDecisionService
+                _ai_decision_service = AIDecisionService()
+    return _ai_decision_service
+
 def apply_ai_trading_logic(data: Dict[str, Any], client: Client) -> Dict[str, Any]:
     """
     Apply AI-driven trading enhancements including:
@@ -608,6 +706,9 @@ def apply_ai_trading_logic(data: Dict[str, Any], client: Client) -> Dict[str, An
     - Dynamic position sizing
     - Risk management
     
+    The regime detector, position sizer and risk manager stay resident in the
+    AI decision service, which runs their lookups concurrently and caches them.
+    
     Args:
         data: Trading signal data from webhook
         client: Authenticated Capital.com client
@@ -616,120 +717,9 @@ def apply_ai_trading_logic(data: Dict[str, Any], client: Client) -> Dict[str, An
         Modified trading signal data with AI enhancements
     """
     try:
-        # Get required modules
-        from src.AI.regime_detector import VolatilityRegimeDetector
-        from src.AI.position_sizer import AdaptivePositionSizer
-        from src.AI.risk_manager import RiskManager
-        
-        # Extract key signal parameters
-        symbol = data.get('ticker') or data.get('symbol')
-        direction = data.get('order_action') or data.get('direction')
-        original_size = float(data.get('position_size', data.get('quantity', 1.0)))
-        
-        # Default account_id - in production should be extracted from appropriate source
-        account_id = int(data.get('account_id', 1))
-        
-        # Extract price and stop loss if available
-        price = float(data.get('price', 0)) if data.get('price') else None
-        stop_loss = float(data.get('stop_loss', 0)) if data.get('stop_loss') else None
-        
-        # Step 1: Detect current volatility regime
-        logger.info(f"Analyzing volatility regime for {symbol}")
-        regime_detector = VolatilityRegimeDetector()
-        regime_info = regime_detector.get_current_regime(symbol)
-        
-        vol_regime = regime_info.get('regime_id', -1)
-        vol_level = regime_info.get('volatility_level', 'MEDIUM')  # Default to medium if unknown
-        
-        # Add regime information to signal data for reference
-        data['volatility_regime'] = vol_regime
-        data['volatility_level'] = vol_level
-        
-        # Log regime detection
-        logger.info(f"Detected volatility regime for {symbol}: {vol_regime} ({vol_level})")
-        
-        # Step 2: Apply dynamic position sizing
-        logger.info(f"Calculating optimal position size for {symbol}")
-        position_sizer = AdaptivePositionSizer()
-        sizing_result = position_sizer.calculate_position_size(
-            symbol=symbol,
-            account_id=account_id,
-            original_size=original_size,
-            price=price,
-            stop_loss=stop_loss
-        )
-        
-        # Update position size with AI-optimized value
-        adjusted_size = sizing_result.get('adjusted_size', original_size)
-        data['position_size'] = adjusted_size
-        data['original_position_size'] = original_size
-        data['position_size_adjustment_factor'] = sizing_result.get('total_adjustment_factor', 1.0)
-        
-        # Log position sizing adjustment
-        logger.info(f"Adjusted position size for {symbol}: {original_size} -> {adjusted_size} " +
-                    f"(adjustment factor: {sizing_result.get('total_adjustment_factor', 1.0):.2f})")
-        
-        # Step 3: Apply risk management logic
-        logger.info(f"Evaluating trade risk for {symbol}")
-        risk_manager = RiskManager()
-        risk_evaluation = risk_manager.evaluate_trade_risk(data, account_id)
-        
-        # Apply risk-based adjustments
-        if risk_evaluation.get('status') == 'REJECTED':
-            logger.warning(f"Trade rejected by risk management: {risk_evaluation.get('rejection_reason')}")
-            # Return error response to prevent trade execution
-            return {
-                'status': 'error',
-                'message': f"Trade rejected: {risk_evaluation.get('rejection_reason')}",
-                'code': 'RISK_MANAGEMENT_REJECTION',
-                'data': data,
-                'risk_evaluation': risk_evaluation
-            }
-        
-        elif risk_evaluation.get('status') == 'ADJUST_SIZE':
-            # Apply risk-based size adjustment
-            risk_adjusted_size = risk_evaluation.get('adjusted_size', adjusted_size)
-            data['position_size'] = risk_adjusted_size
-            data['risk_size_adjustment_factor'] = risk_evaluation.get('size_adjustment_factor', 1.0)
-            logger.info(f"Risk management adjusted position size: {adjusted_size} -> {risk_adjusted_size}")
-        
-        # Step 4: Adjust stop loss based on volatility if needed
-        if stop_loss and vol_level != 'UNKNOWN':
-            # Adjust stop loss to account for volatility
-            adjusted_stop = risk_manager.adjust_stop_loss(
-                symbol=symbol,
-                current_price=price,
-                original_stop=stop_loss,
-                position_direction=direction,
-                volatility_level=vol_level
-            )
-            
-            # Update stop loss in signal data
-            data['original_stop_loss'] = stop_loss
-            data['stop_loss'] = adjusted_stop
-            logger.info(f"Adjusted stop loss based on {vol_level} volatility: {stop_loss} -> {adjusted_stop}")
-        
-        # Add AI metadata to signal
-        data['ai_enhanced'] = True
-        data['ai_metadata'] = {
-            'volatility_regime': vol_regime,
-            'volatility_level': vol_level,
-            'position_sizing': {
-                'original': original_size,
-                'ai_adjusted': adjusted_size,
-                'final': data['position_size']
-            },
-            'risk_evaluation': {
-                'status': risk_evaluation.get('status'),
-                'daily_risk_used': risk_evaluation.get('daily_risk', {}).get('used_risk_percent', 0),
-                'drawdown': risk_evaluation.get('drawdown', {}).get('drawdown_percent', 0)
-            },
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        return data
-    
+        service = get_ai_decision_service()
     except Exception as e:
         logger.error(f"Error in AI trading logic: {str(e)}", exc_info=True)
         # Return original data if AI enhancement fails
-        return data
\ No newline at end of file
+        return data
+    return service.enhance(data)
@@ -4,131 +4,292 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def validate_webhook_data(data: Dict[str, Any]) -> List[str]:
+# Declarative schema for webhook payloads. Each field is read from the first of
+# its keys that is set in the payload (legacy key first), coerced once and
+# checked against its rules; 'when' names a flag that must be set for the field
+# to be checked at all. Messages may use {label}, {limit}, {value} and {type}.
+WEBHOOK_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'order_id': {
+        'keys': ('order_id',), 'type': str, 'required': True, 'max_length': 50,
+        'messages': {'max_length': "{label} exceeds maximum length of 50 characters"}
+    },
+    'symbol': {
+        'keys': ('ticker', 'symbol'), 'label': 'ticker/symbol', 'missing': 'ticker or symbol',
+        'type': str, 'required': True, 'pattern': r'^[A-Za-z0-9\.\-_]+$',
+        'messages': {'pattern': "{label} contains invalid characters: {value}"}
+    },
+    'direction': {
+        'keys': ('order_action', 'direction'), 'label': 'order_action/direction',
+        'missing': 'order_action or direction', 'type': str, 'required': True, 'upper': True,
+        'choices': ('BUY', 'SELL', 'CLOSE_BUY', 'CLOSE_SELL'),
+        'messages': {'choices': "Invalid {label}: {value}. Must be one of ['BUY', 'SELL', 'CLOSE_BUY', 'CLOSE_SELL']"}
+    },
+    'quantity': {
+        'keys': ('position_size', 'quantity'), 'label': 'position_size/quantity',
+        'missing': 'position_size or quantity', 'type': float, 'required': True, 'gt': 0, 'max': 100,
+        'messages': {'gt': "{label} must be greater than 0",
+                     'max': "{label} exceeds maximum allowed value of 100, got: {value}"}
+    },
+    'price': {'keys': ('price',), 'type': float, 'skip_empty': True},
+    'stop_loss': {'keys': ('stop_loss',), 'type': float, 'skip_empty': True, 'gt': 0},
+    'take_profit': {'keys': ('take_profit',), 'type': float, 'skip_empty': True, 'gt': 0},
+    'trailing_stop': {'keys': ('trailing_stop',), 'type': 'flag'},
+    'trailing_step_percent': {
+        'keys': ('trailing_step_percent',), 'type': float, 'gt': 0, 'max': 50, 'when': 'trailing_stop',
+        'messages': {'gt': "{label} must be between 0.01 and 50, got: {value}",
+                     'max': "{label} must be between 0.01 and 50, got: {value}"}
+    },
+    'trailing_offset': {'keys': ('trailing_offset',), 'type': float, 'gt': 0, 'when': 'trailing_stop'},
+    'hedging_enabled': {'keys': ('hedging_enabled',), 'type': bool},
+}
+
+_DEFAULT_MESSAGES = {
+    'missing': "Missing required field: {label}",
+    'str': "{label} must be a string, got: {type}",
+    'float': "{label} must be a number, got: {value}",
+    'bool': "{label} must be a boolean, got: {type}",
+    'gt': "{label} must be positive, got: {value}",
+    'max': "{label} exceeds maximum allowed value of {limit}, got: {value}",
+    'max_length': "{label} exceeds maximum length of {limit} characters",
+    'pattern': "{label} has an invalid format: {value}",
+    'choices': "Invalid {label}: {value}",
+}
+
+
+class TradingSignal:
     """
-    Validates the incoming webhook data for required fields and value ranges.
-    Accepts both legacy (ticker/order_action/position_size) and new (symbol/direction/quantity) keys.
-    Returns a list of error messages, empty if validation succeeds.
+    A validated, normalized webhook signal.
+
+    Attributes:
+        order_id: Client order ID
+        symbol: Instrument (ticker)
+        direction: BUY, SELL, CLOSE_BUY or CLOSE_SELL
+        quantity: Position size
+        price, stop_loss, take_profit: Levels as floats, or None
+        trailing_stop: Whether a trailing stop was requested
+        trailing_step_percent, trailing_offset: Trailing distance settings, or None
+        hedging_enabled: Hedging flag, or None if not given
+        raw: The payload as received
     """
-    errors = []
-    # Accept both legacy and new keys
-    order_id = data.get('order_id')
-    ticker = data.get('ticker') or data.get('symbol')
-    order_action = data.get('order_action') or data.get('direction')
 
-    # Required fields
-    if 'order_id' not in data or data.get('order_id') is None:
-        errors.append("Missing required field: order_id")
-    if 'ticker' not in data or data.get('ticker') is None:
-        errors.append("Missing required field: ticker or symbol")
-    if 'order_action' not in data or data.get('order_action') is None:
-        errors.append("Missing required field: order_action or direction")
-    if 'position_size' not in data and 'quantity' not in data:
-        errors.append("Missing required field: position_size or quantity")
-    else:
-        # Accept either key
-        position_size = data.get('position_size', data.get('quantity'))
-        try:
-            size = float(position_size)
-        except Exception:
-            errors.append(f"position_size/quantity must be a number, got: {position_size}")
-        else:
-            if size <= 0:
-                errors.append("position_size/quantity must be greater than 0")
-            elif size > 100:
-                errors.append(f"position_size/quantity exceeds maximum allowed value of 100, got: {size}")
-
-    # Validate order action
-    if order_action:
-        valid_actions = ['BUY', 'SELL', 'CLOSE_BUY', 'CLOSE_SELL']
-        if order_action.upper() not in valid_actions:
-            errors.append(f"Invalid order_action/direction: {order_action}. Must be one of {valid_actions}")
-
-    # Validate ticker symbol
-    if ticker:
-        if not isinstance(ticker, str):
-            errors.append(f"ticker/symbol must be a string, got: {type(ticker).__name__}")
-        elif not re.match(r'^[A-Za-z0-9\.\-_]+$', ticker):
-            errors.append(f"ticker/symbol contains invalid characters: {ticker}")
+    __slots__ = ('order_id', 'symbol', 'direction', 'quantity', 'price', 'stop_loss', 'take_profit',
+                 'trailing_stop', 'trailing_step_percent', 'trailing_offset', 'hedging_enabled', 'raw')
 
-    # Validate order_id
-    if order_id:
-        if not isinstance(order_id, str):
-            errors.append(f"order_id must be a string, got: {type(order_id).__name__}")
-        elif len(order_id) > 50:
-            errors.append(f"order_id exceeds maximum length of 50 characters")
+    def __init__(self, raw: Dict[str, Any], order_id: Optional[str] = None, symbol: Optional[str] = None,
+                 direction: Optional[str] = None, quantity: Optional[float] = None,
+                 price: Optional[float] = None, stop_loss: Optional[float] = None,
+                 take_profit: Optional[float] = None, trailing_stop: bool = False,
+                 trailing_step_percent: Optional[float] = None, trailing_offset: Optional[float] = None,
+                 hedging_enabled: Optional[bool] = None):
+        self.raw = raw
+        self.order_id = order_id
+        self.symbol = symbol
+        self.direction = direction
+        self.quantity = quantity
+        self.price = price
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.trailing_stop = trailing_stop
+        self.trailing_step_percent = trailing_step_percent
+        self.trailing_offset = trailing_offset
+        self.hedging_enabled = hedging_enabled
 
-    # Validate stop loss and take profit (if provided)
-    if 'stop_loss' in data and data['stop_loss']:
-        try:
-            sl = float(data['stop_loss'])
-            if sl <= 0:
-                errors.append(f"stop_loss must be positive, got: {sl}")
-                
-            if 'order_action' in data and 'price' in data and data['price']:
-                try:
-                    price = float(data['price'])
-                    action = data['order_action'].upper()
-                    
-                    # For long positions, stop loss should be below entry price
-                    if action == 'BUY' and sl >= price:
-                        errors.append(f"For BUY orders, stop_loss ({sl}) should be below entry price ({price})")
-                    # For short positions, stop loss should be above entry price
-                    elif action == 'SELL' and sl <= price:
-                        errors.append(f"For SELL orders, stop_loss ({sl}) should be above entry price ({price})")
-                except ValueError:
-                    errors.append(f"price must be a number for stop_loss validation")
-        except ValueError:
-            errors.append(f"stop_loss must be a number, got: {data['stop_loss']}")
-    
-    # Validate take profit
-    if 'take_profit' in data and data['take_profit']:
-        try:
-            tp = float(data['take_profit'])
-            if tp <= 0:
-                errors.append(f"take_profit must be positive, got: {tp}")
-                
-            if 'order_action' in data and 'price' in data and data['price']:
-                try:
-                    price = float(data['price'])
-                    action = data['order_action'].upper()
-                    
-                    # For long positions, take profit should be above entry price
-                    if action == 'BUY' and tp <= price:
-                        errors.append(f"For BUY orders, take_profit ({tp}) should be above entry price ({price})")
-                    # For short positions, take profit should be below entry price
-                    elif action == 'SELL' and tp >= price:
-                        errors.append(f"For SELL orders, take_profit ({tp}) should be below entry price ({price})")
-                except ValueError:
-                    errors.append(f"price must be a number for take_profit validation")
-        except ValueError:
-            errors.append(f"take_profit must be a number, got: {data['take_profit']}")
-    
-    # Validate trailing stop parameters
-    if 'trailing_stop' in data and data['trailing_stop'] is True:
-        if 'trailing_step_percent' in data:
-            try:
-                trailing_percent = float(data['trailing_step_percent'])
-                if trailing_percent <= 0 or trailing_percent > 50:
-                    errors.append(f"trailing_step_percent must be between 0.01 and 50, got: {trailing_percent}")
-            except ValueError:
-                errors.append(f"trailing_step_percent must be a number, got: {data['trailing_step_percent']}")
-        elif 'trailing_offset' in data:
+    def to_payload(self) -> Dict[str, Any]:
+        """
+        The payload with coerced values under both legacy and new keys.
+
+        Extra fields are passed through unchanged, so downstream code
+        (execute_trade, save_signal) can use it in place of the raw payload.
+        """
+        payload = dict(self.raw)
+        payload.update(
+            order_id=self.order_id,
+            ticker=self.symbol, symbol=self.symbol,
+            order_action=self.direction, direction=self.direction,
+            position_size=self.quantity, quantity=self.quantity
+        )
+        for name in ('price', 'stop_loss', 'take_profit', 'trailing_step_percent', 'trailing_offset'):
+            value = getattr(self, name)
+            if value is not None:
+                payload[name] = value
+        return payload
+
+    def __repr__(self) -> str:
+        return f"TradingSignal({self.order_id} {self.direction} {self.quantity} {self.symbol})"
+
+
+class _Field:
+    """One schema field with its regex, choices and messages prepared up front."""
+
+    __slots__ = ('name', 'keys', 'type', 'required', 'skip_empty', 'upper', 'when', 'gt', 'max',
+                 'max_length', 'match', 'choices', 'messages')
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        if spec['type'] not in ('flag', str, float, bool):
+            raise ValueError(f"Unsupported type for schema field {name}: {spec['type']!r}")
+        self.name = name
+        self.keys = tuple(spec['keys'])
+        self.type = spec['type']
+        self.required = spec.get('required', False)
+        self.skip_empty = spec.get('skip_empty', False)
+        self.upper = spec.get('upper', False)
+        self.when = spec.get('when')
+        self.gt = spec.get('gt')
+        self.max = spec.get('max')
+        self.max_length = spec.get('max_length')
+        self.match = re.compile(spec['pattern']).match if 'pattern' in spec else None
+        self.choices = frozenset(spec['choices']) if 'choices' in spec else None
+
+        # Label and limits are filled in now; {value} and {type} stay open
+        label = spec.get('label', name)
+        templates = dict(_DEFAULT_MESSAGES, **spec.get('messages', {}))
+        limits = {'gt': self.gt, 'max': self.max, 'max_length': self.max_length}
+        self.messages = {
+            kind: template.format(label=label, limit=limits.get(kind), value='{value}', type='{type}')
+            for kind, template in templates.items()
+        }
+        self.messages['missing'] = templates['missing'].format(label=spec.get('missing', label))
+
+
+class WebhookValidator:
+    """
+    Validator built once from a field schema.
+
+    Regexes, choice sets and messages (with their label and limits already
+    filled in) are prepared when the validator is created, so a request is a
+    single loop over the fields.
+
+    Attributes:
+        fields: Prepared schema fields, in schema order
+    """
+
+    def __init__(self, schema: Dict[str, Dict[str, Any]], signal_class: type = TradingSignal):
+        self.fields = [_Field(name, spec) for name, spec in schema.items()]
+        self._signal_class = signal_class
+
+    def _check(self, data: Dict[str, Any], errors: List[str]) -> TradingSignal:
+        """Coerce and check every field, collecting messages in ``errors``."""
+        values: Dict[str, Any] = {}
+        for field in self.fields:
+            if field.when is not None and not values.get(field.when):
+                values[field.name] = None
+                continue
+
+            value = None
+            for key in field.keys:
+                value = data.get(key)
+                if value is not None:
+                    break
+
+            if field.type == 'flag':
+                # Only a literal true enables a flag
+                values[field.name] = value is True
+            elif not value if field.skip_empty else value is None:
+                values[field.name] = None
+                if field.required:
+                    errors.append(field.messages['missing'])
+            else:
+                values[field.name] = self._check_value(field, value, errors)
+        return self._signal_class(data, **values)
+
+    @staticmethod
+    def _check_value(field: _Field, value: Any, errors: List[str]) -> Any:
+        """Coerce a present value and apply the field's rules; None if it is invalid."""
+        messages = field.messages
+        if field.type is float:
+            if value.__class__ is bool:
+                errors.append(messages['float'].format(value=value))
+                return None
             try:
-                trailing_offset = float(data['trailing_offset'])
-                if trailing_offset <= 0:
-                    errors.append(f"trailing_offset must be positive, got: {trailing_offset}")
-            except ValueError:
-                errors.append(f"trailing_offset must be a number, got: {data['trailing_offset']}")
-        else:
-            errors.append("When trailing_stop is enabled, either trailing_step_percent or trailing_offset must be provided")
-    
-    # Validate hedging parameters
-    if 'hedging_enabled' in data:
-        if not isinstance(data['hedging_enabled'], bool):
-            errors.append(f"hedging_enabled must be a boolean, got: {type(data['hedging_enabled']).__name__}")
-    
-    logger.debug(f"Validation result for webhook data: {'Success' if not errors else f'Failed with {len(errors)} errors'}")
+                number = float(value)
+            except (TypeError, ValueError, OverflowError):
+                errors.append(messages['float'].format(value=value))
+                return None
+            if field.gt is not None and number <= field.gt:
+                errors.append(messages['gt'].format(value=number))
+            elif field.max is not None and number > field.max:
+                errors.append(messages['max'].format(value=number))
+            return number
+
+        if field.type is bool:
+            if value is True or value is False:
+                return value
+            errors.append(messages['bool'].format(type=type(value).__name__))
+            return None
+
+        if not isinstance(value, str):
+            errors.append(messages['str'].format(type=type(value).__name__))
+            return None
+        text = value.upper() if field.upper else value
+        if field.max_length is not None and len(text) > field.max_length:
+            errors.append(messages['max_length'])
+        if field.match is not None and not field.match(text):
+            errors.append(messages['pattern'].format(value=text))
+        if field.choices is not None and text not in field.choices:
+            errors.append(messages['choices'].format(value=value))
+        return text
+
+    def validate(self, data: Dict[str, Any]) -> Tuple[Optional[TradingSignal], List[str]]:
+        """
+        Validate and coerce a payload in one pass.
+
+        Returns:
+            Tuple of (TradingSignal or None, error messages)
+        """
+        if not isinstance(data, dict):
+            return None, ["Payload must be a JSON object"]
+        errors: List[str] = []
+        signal = self._check(data, errors)
+        self._check_levels(signal, errors)
+
+        if errors:
+            return None, errors
+        return signal, errors
+
+    @staticmethod
+    def _check_levels(signal: TradingSignal, errors: List[str]) -> None:
+        """Cross-field rules: stop and limit sides relative to price, trailing settings."""
+        price = signal.price
+        direction = signal.direction
+        stop_loss = signal.stop_loss
+        take_profit = signal.take_profit
+        if price is not None:
+            # For long positions, stop loss below and take profit above entry price
+            if stop_loss is not None:
+                if direction == 'BUY' and stop_loss >= price:
+                    errors.append(f"For BUY orders, stop_loss ({stop_loss}) should be below entry price ({price})")
+                elif direction == 'SELL' and stop_loss <= price:
+                    errors.append(f"For SELL orders, stop_loss ({stop_loss}) should be above entry price ({price})")
+            if take_profit is not None:
+                if direction == 'BUY' and take_profit <= price:
+                    errors.append(f"For BUY orders, take_profit ({take_profit}) should be above entry price ({price})")
+                elif direction == 'SELL' and take_profit >= price:
+                    errors.append(f"For SELL orders, take_profit ({take_profit}) should be below entry price ({price})")
+
+        if signal.trailing_stop and signal.trailing_step_percent is None and signal.trailing_offset is None:
+            if not any(message.startswith(('trailing_step_percent', 'trailing_offset')) for message in errors):
+                errors.append("When trailing_stop is enabled, either trailing_step_percent or trailing_offset must be provided")
+
+
+webhook_validator = WebhookValidator(WEBHOOK_SCHEMA)
+
+def parse_webhook_signal(data: Dict[str, Any]) -> Tuple[Optional[TradingSignal], List[str]]:
+    """
+    Validate webhook data and return it as a normalized TradingSignal.
+    Accepts both legacy (ticker/order_action/position_size) and new (symbol/direction/quantity) keys.
+    Returns (signal, []) on success and (None, errors) otherwise.
+    """
+    return webhook_validator.validate(data)
+
+def validate_webhook_data(data: Dict[str, Any]) -> List[str]:
+    """
+    Validates the incoming webhook data for required fields and value ranges.
+    Accepts both legacy (ticker/order_action/position_size) and new (symbol/direction/quantity) keys.
+    Returns a list of error messages, empty if validation succeeds.
+    """
+    errors = webhook_validator.validate(data)[1]
+    logger.debug("Validation result for webhook data: %s",
+                 'Success' if not errors else f'Failed with {len(errors)} errors')
     return errors
 
 def validate_close_position_data(data: Dict[str, Any]) -> List[str]:
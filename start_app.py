@@ -66,7 +66,9 @@ def start_gunicorn():
         return None
     print("[ACTION] Starting unified webhook+dashboard app with Gunicorn on 0.0.0.0:5000...")
     # Start Gunicorn as a background process
-    return subprocess.Popen(GUNICORN_CMD, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Workers share one set of rate limit counters instead of one each
+    env = dict(os.environ, RATE_LIMIT_BACKEND=os.environ.get('RATE_LIMIT_BACKEND', 'sqlite'))
+    return subprocess.Popen(GUNICORN_CMD, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
 
 def main():
     print("=== Jamso-AI Engine Unified Launcher (Production) ===")